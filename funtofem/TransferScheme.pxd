@@ -5,7 +5,44 @@ cimport mpi4py.MPI as MPI
 # Typdefs required for either real or complex mode
 include "FuntofemTypedefs.pxi"
 
+cdef extern from "Octree.h":
+  cppclass Octree:
+    Octree(const F2FScalar *points, int num_points, int min_point_count,
+           double min_edge_length, int max_tree_depth)
+    void incref()
+    void decref()
+    void setNumThreads(int num_threads)
+    void setVerbose(int verbose_flag)
+    void setPoints(const F2FScalar *points, int num_points)
+    void generate()
+    int findLeafBins(int min_point_count, int *bins)
+    void locateKClosest(int K, int nxpts, const F2FScalar *xpts, int *indices,
+                        int isymm, double tol, int num_threads)
+    size_t getMemoryFootprint()
+    int npts
+    int nbins
+    int *bin_start
+    int *bin_end
+    int *points_bins
+    int nleaf
+    int *leaf_bins
+    int *leaf_ptr
+    int *point_ids
+
 cdef extern from "TransferScheme.h":
+  enum SearchType "TransferScheme::SearchType":
+    LOCATE_POINT_SEARCH "TransferScheme::LOCATE_POINT_SEARCH"
+    KD_TREE_SEARCH "TransferScheme::KD_TREE_SEARCH"
+    OCTREE_SEARCH "TransferScheme::OCTREE_SEARCH"
+
+  enum Precision "TransferScheme::Precision":
+    FULL_PRECISION "TransferScheme::FULL_PRECISION"
+    MIXED_PRECISION "TransferScheme::MIXED_PRECISION"
+
+  enum RotationType "LDTransferScheme::RotationType":
+    SVD_ROTATION "LDTransferScheme::SVD_ROTATION"
+    QUATERNION_ROTATION "LDTransferScheme::QUATERNION_ROTATION"
+
   cppclass LDTransferScheme:
     # Mesh loading
     void setAeroNodes(const F2FScalar *aero_X, int aero_nnodes)
@@ -13,6 +50,20 @@ cdef extern from "TransferScheme.h":
 
     # Initialization
     void initialize()
+    void setSearchType(SearchType search_type, int num_threads)
+    void setStructOctree(Octree *octree)
+    void setDistributedStructMesh(int distributed)
+    void setConnReuse(int reuse)
+    void setPrecision(Precision prec)
+    void setRotationType(RotationType rotation_type)
+
+    # Interpolation operator of the linear schemes
+    int getInterpOperatorSize(int *bs, int *nrows, int *ncols, int *nnz)
+    void getInterpOperator(int *rowp, int *cols, F2FScalar *vals)
+
+    # Memory usage
+    size_t getMemoryFootprint()
+    size_t getWorkspaceMemoryFootprint()
 
     # Load and displacement transfers
     void transferDisps(const F2FScalar *struct_disps,
@@ -42,6 +93,21 @@ cdef extern from "TransferScheme.h":
     void applydLdxA0(const F2FScalar *vecs, F2FScalar *prods)
     void applydLdxS0(const F2FScalar *vecs, F2FScalar *prods)
 
+    # Action of the Jacobians on a block of vectors stored row-wise
+    void applydDduSMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods)
+    void applydDduSTransMulti(int nvecs, const F2FScalar *vecs,
+                              F2FScalar *prods)
+    void applydLduSMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods)
+    void applydLduSTransMulti(int nvecs, const F2FScalar *vecs,
+                              F2FScalar *prods)
+    void applydLdfAMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods)
+    void applydLdfATransMulti(int nvecs, const F2FScalar *vecs,
+                              F2FScalar *prods)
+    void applydDdxA0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods)
+    void applydDdxS0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods)
+    void applydLdxA0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods)
+    void applydLdxS0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods)
+
     # Convert aero displacements into equivalent rigid + elastic deformation
     void transformEquivRigidMotion(const F2FScalar *aero_disps,
                                    F2FScalar *R, F2FScalar *t, F2FScalar *u)
@@ -100,6 +166,19 @@ cdef extern from "TransferScheme.h":
 
     # Initialization
     void initialize()
+    void setSearchType(SearchType search_type, int num_threads)
+    void setStructOctree(Octree *octree)
+    void setDistributedStructMesh(int distributed)
+    void setConnReuse(int reuse)
+    void setPrecision(Precision prec)
+
+    # Interpolation operator of the linear schemes
+    int getInterpOperatorSize(int *bs, int *nrows, int *ncols, int *nnz)
+    void getInterpOperator(int *rowp, int *cols, F2FScalar *vals)
+
+    # Memory usage
+    size_t getMemoryFootprint()
+    size_t getWorkspaceMemoryFootprint()
 
     # Transfer temperatures and heat fluxes
     void transferTemp(const F2FScalar *struct_temp,
@@ -121,18 +200,40 @@ cdef extern from "TransferScheme.h":
     void applydQdqA(const F2FScalar *vecs, F2FScalar *prods)
     void applydQdqATrans(const F2FScalar *vecs, F2FScalar *prods)
 
+    # Action of the Jacobians on a block of vectors stored row-wise
+    void applydTdtSMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods)
+    void applydTdtSTransMulti(int nvecs, const F2FScalar *vecs,
+                              F2FScalar *prods)
+    void applydQdqAMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods)
+    void applydQdqATransMulti(int nvecs, const F2FScalar *vecs,
+                              F2FScalar *prods)
+
     # Routines to test necessary functionality of transfer scheme
     int testAllDerivatives(const F2FScalar *struct_temps,
                            const F2FScalar *aero_flux, const F2FScalar h,
                            const double rtol, const double atol)
 
 cdef extern from "MELD.h":
+  enum FactorStorage "MELD::FactorStorage":
+    STORE_FACTOR "MELD::STORE_FACTOR"
+    STORE_SINGLE_FACTOR "MELD::STORE_SINGLE_FACTOR"
+    RECOMPUTE_FACTOR "MELD::RECOMPUTE_FACTOR"
+
   cppclass MELD(LDTransferScheme):
     # Constructor
     MELD(MPI_Comm all,
          MPI_Comm structure, int struct_root,
          MPI_Comm aero, int aero_root,
-         int symmetry, int num_nearest, F2FScalar beta)
+         int symmetry, int num_nearest, F2FScalar beta,
+         int num_threads)
+
+    # Threading of the aerodynamic node loops
+    void setNumThreads(int num_threads)
+    int getNumThreads()
+
+    # Storage of the factored systems for the load transfer products
+    void setFactorStorage(FactorStorage storage)
+    size_t getFactorMemoryEstimate(FactorStorage storage)
 
 cdef extern from "MELDThermal.h":
   cppclass MELDThermal(ThermalTransfer):
@@ -156,13 +257,33 @@ cdef extern from "RBF.h":
     MULTIQUADRIC "RBF::MULTIQUADRIC"
     INVERSE_MULTIQUADRIC "RBF::INVERSE_MULTIQUADRIC"
     THIN_PLATE_SPLINE "RBF::THIN_PLATE_SPLINE"
+    WENDLAND_C0 "RBF::WENDLAND_C0"
+    WENDLAND_C2 "RBF::WENDLAND_C2"
+    WENDLAND_C4 "RBF::WENDLAND_C4"
 
   cppclass RBF(LDTransferScheme):
     # Constructor
     RBF(MPI_Comm all,
         MPI_Comm structure, int struct_root,
         MPI_Comm aero, int aero_root,
-        RbfType rbf_type, int sampling_ratio)
+        RbfType rbf_type, int sampling_ratio, double support_radius)
+    void setGreedySampling(double tol, int max_centers)
+    void setFactorReuse(int reuse)
+
+cdef extern from "PURBF.h":
+  cppclass PURBF(LDTransferScheme):
+    # Constructor
+    PURBF(MPI_Comm all,
+          MPI_Comm structure, int struct_root,
+          MPI_Comm aero, int aero_root,
+          int patch_points, double overlap, int num_threads)
+
+    # Threading of the patches and products
+    void setNumThreads(int num_threads)
+    int getNumThreads()
+
+    # Patches with singular interpolation systems
+    int getNumFailedPatches()
 
 cdef extern from "BeamTransfer.h":
   cppclass BeamTransfer(LDTransferScheme):
@@ -171,4 +292,8 @@ cdef extern from "BeamTransfer.h":
                  MPI_Comm structure, int struct_root,
                  MPI_Comm aero, int aero_root,
                  const int *_conn, int _nelems, int _order,
-                 int _dof_per_node)
\ No newline at end of file
+                 int _dof_per_node)
+
+    # Threading of the closest element search
+    void setNumThreads(int num_threads)
+    int getNumThreads()
\ No newline at end of file
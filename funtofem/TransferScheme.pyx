@@ -20,6 +20,197 @@ np.import_array()
 # Include the definitions
 include "FuntofemDefs.pxi"
 
+cdef int _getNumVecs(np.ndarray v, np.ndarray p, int vec_len,
+                     int prod_len) except -1:
+    """
+    Check the shapes of a block of input vectors and the block of products,
+    both stored with one column per vector, and return the number of vectors
+    """
+    if v.shape[0] != vec_len:
+        raise ValueError("Input array incorrect length")
+    if p.shape[0] != prod_len:
+        raise ValueError("Output array incorrect length")
+    if v.shape[1] != p.shape[1]:
+        raise ValueError("Input and output arrays have different numbers "
+                         "of vectors")
+    return v.shape[1]
+
+def _interpMatrix(int bs, int nrows, int ncols,
+                  np.ndarray rowp, np.ndarray cols, np.ndarray vals):
+    """
+    Wrap the block CSR arrays of an interpolation operator in a
+    scipy.sparse.bsr_matrix, or return the arrays in the order used by the
+    scipy.sparse constructors if scipy is not available
+    """
+    shape = (bs * nrows, bs * ncols)
+    blocks = vals.reshape((-1, bs, bs))
+    try:
+        from scipy.sparse import bsr_matrix
+    except ImportError:
+        return (blocks, cols, rowp), shape
+    return bsr_matrix((blocks, cols, rowp), shape=shape)
+
+PY_LOCATE_POINT_SEARCH = LOCATE_POINT_SEARCH
+PY_KD_TREE_SEARCH = KD_TREE_SEARCH
+PY_OCTREE_SEARCH = OCTREE_SEARCH
+
+PY_FULL_PRECISION = FULL_PRECISION
+PY_MIXED_PRECISION = MIXED_PRECISION
+
+PY_SVD_ROTATION = SVD_ROTATION
+PY_QUATERNION_ROTATION = QUATERNION_ROTATION
+
+cdef class pyOctree:
+    """
+    Octree of a set of points built from their Morton (Z-order) codes. The
+    points in each leaf bin are stored in CSR format, and the octree also
+    answers K-nearest neighbor queries. One octree of the structural nodes may
+    be shared by the transfer schemes of a body with setStructOctree, in which
+    case it is generated by the transfer schemes when they are initialized.
+
+    Parameters
+    ----------
+    X: ndarray
+        One-dimensional array of point locations (may be None for an octree
+        that is only shared between transfer schemes)
+    min_point_count: int
+        the bins with at most this many points are not divided
+    min_edge_length: float
+        the bins with a smaller edge are not divided
+    max_tree_depth: int
+        deepest level of the tree (at most 21)
+    num_threads: int
+        number of OpenMP threads used to sort the points (values less than
+        one use all available threads)
+    verbose: bool
+        print messages when generating and freeing the octree
+    """
+    cdef Octree *ptr
+
+    def __cinit__(self, np.ndarray[F2FScalar, ndim=1, mode='c'] X=None,
+                  int min_point_count=8, double min_edge_length=1e-6,
+                  int max_tree_depth=21, int num_threads=1, verbose=False):
+        cdef int npts = 0
+        cdef F2FScalar *array = NULL
+        if X is not None:
+            npts = int(len(X)//3)
+            array = <F2FScalar*>X.data
+
+        self.ptr = new Octree(array, npts, min_point_count, min_edge_length,
+                              max_tree_depth)
+        self.ptr.incref()
+        self.ptr.setNumThreads(num_threads)
+        self.ptr.setVerbose(verbose)
+
+    def __dealloc__(self):
+        self.ptr.decref()
+
+    def setPoints(self, np.ndarray[F2FScalar, ndim=1, mode='c'] X):
+        """
+        Replace the points of the octree. The octree must be generated again.
+
+        Parameters
+        ----------
+        X: ndarray
+            One-dimensional array of point locations
+        """
+        self.ptr.setPoints(<F2FScalar*>X.data, int(len(X)//3))
+
+    def generate(self):
+        """
+        Sort the points by their Morton codes and create the bins of the octree
+        """
+        self.ptr.generate()
+
+    def getLeafPoints(self):
+        """
+        Get the points in each leaf bin of the octree
+
+        Returns
+        -------
+        leaf_ptr: ndarray
+            pointer into point_ids for each leaf bin
+        point_ids: ndarray
+            indices of the points sorted by leaf bin
+        """
+        cdef int i
+        cdef np.ndarray leaf_ptr = np.zeros(self.ptr.nleaf + 1, dtype=np.intc)
+        cdef np.ndarray point_ids = np.zeros(self.ptr.npts, dtype=np.intc)
+        if self.ptr.leaf_ptr != NULL:
+            for i in range(self.ptr.nleaf + 1):
+                leaf_ptr[i] = self.ptr.leaf_ptr[i]
+            for i in range(self.ptr.npts):
+                point_ids[i] = self.ptr.point_ids[i]
+        return leaf_ptr, point_ids
+
+    def getLeafBins(self, int min_point_count=0):
+        """
+        Get the points in each leaf bin of the octree that would be generated
+        with a larger minimum point count, without generating it again
+
+        Parameters
+        ----------
+        min_point_count: int
+            minimum point count (not positive for the leaf bins of the octree)
+
+        Returns
+        -------
+        leaf_ptr: ndarray
+            pointer into point_ids for each leaf bin
+        point_ids: ndarray
+            indices of the points sorted by leaf bin
+        """
+        cdef int i, nbins
+        if min_point_count <= 0:
+            return self.getLeafPoints()
+
+        cdef np.ndarray bins = np.zeros(max(self.ptr.nbins, 1), dtype=np.intc)
+        nbins = self.ptr.findLeafBins(min_point_count, <int*>bins.data)
+        leaf_ptr = np.zeros(nbins + 1, dtype=np.intc)
+        for i in range(nbins):
+            leaf_ptr[i] = self.ptr.bin_start[bins[i]]
+        leaf_ptr[nbins] = self.ptr.npts
+
+        return leaf_ptr, self.getLeafPoints()[1]
+
+    def locateKClosest(self, int K,
+                       np.ndarray[F2FScalar, ndim=1, mode='c'] X,
+                       int isymm=-1, double tol=1e-7, int num_threads=1):
+        """
+        Locate the K closest points to each query point
+
+        Parameters
+        ----------
+        K: int
+            number of points to locate
+        X: ndarray
+            One-dimensional array of query point locations
+        isymm: int
+            also search the points reflected across this plane of symmetry,
+            numbered after the points (-1 for no symmetry)
+        tol: float
+            symmetry plane tolerance
+        num_threads: int
+            number of OpenMP threads for the queries
+
+        Returns
+        -------
+        indices: ndarray
+            the indices of the closest points to each query point sorted by
+            distance
+        """
+        cdef int nx = int(len(X)//3)
+        cdef np.ndarray indices = np.zeros((nx, K), dtype=np.intc)
+        self.ptr.locateKClosest(K, nx, <F2FScalar*>X.data,
+                                <int*>indices.data, isymm, tol, num_threads)
+        return indices
+
+    def getMemoryFootprint(self):
+        """
+        Get the number of bytes allocated by the octree
+        """
+        return self.ptr.getMemoryFootprint()
+
 # Wrap the transfer scheme class and its functions
 cdef class pyTransferScheme:
     """
@@ -80,6 +271,158 @@ cdef class pyTransferScheme:
 
         return
 
+    def setSearchType(self, SearchType search_type, int num_threads=1):
+        """
+        Set the nearest neighbor search used to build the connectivity between
+        the aerodynamic and structural nodes when the scheme is initialized
+
+        Parameters
+        ----------
+        search_type: C++ enum
+            PY_LOCATE_POINT_SEARCH, PY_KD_TREE_SEARCH or PY_OCTREE_SEARCH
+        num_threads: int
+            number of OpenMP threads for the k-d tree and octree queries
+            (values less than one use all available threads)
+        """
+        self.ptr.setSearchType(search_type, num_threads)
+
+        return
+
+    def setStructOctree(self, pyOctree octree):
+        """
+        Share an octree of the structural nodes with other transfer schemes,
+        such as the load and displacement and thermal transfer schemes of a
+        body. The octree is used by the octree search and by the schemes that
+        sample or partition the structural nodes with an octree, and it is
+        only generated again when the structural nodes change.
+
+        Parameters
+        ----------
+        octree: pyOctree
+            the shared octree
+        """
+        self.ptr.setStructOctree(octree.ptr)
+
+        return
+
+    def setDistributedStructMesh(self, distributed):
+        """
+        Store only the structural nodes connected to the aerodynamic nodes on
+        each processor instead of the full structural mesh. The structural
+        values are then exchanged with neighboring processors instead of
+        being broadcast to all the processors. This must be set before the
+        scheme is initialized and is used by the MELD schemes.
+
+        Parameters
+        ----------
+        distributed: bool
+            whether to distribute the structural mesh
+        """
+        self.ptr.setDistributedStructMesh(int(distributed))
+
+        return
+
+    def setConnReuse(self, reuse):
+        """
+        Keep the aerostructural connectivity when the scheme is initialized
+        again after the node locations have changed, so that mostly only the
+        weights are computed again. The nearest neighbor search is repeated
+        only for the aerodynamic nodes that may have moved enough to change
+        their nearest structural nodes. This is used by the MELD schemes.
+
+        Parameters
+        ----------
+        reuse: bool
+            whether to keep the connectivity when it is still valid
+        """
+        self.ptr.setConnReuse(int(reuse))
+
+        return
+
+    def setPrecision(self, Precision prec):
+        """
+        Set the precision of the data stored by the MELD scheme. With mixed
+        precision, the weights and the centroids and rotations of the
+        aerodynamic nodes are stored in single precision, the transfers read
+        single precision copies of the node locations, and the sums are
+        accumulated in full precision. This halves the memory traffic of the
+        transfers, which are then accurate to single precision, so it is
+        intended for analyses that only need the forward transfers.
+
+        Parameters
+        ----------
+        prec: C++ enum
+            PY_FULL_PRECISION (default) or PY_MIXED_PRECISION
+        """
+        self.ptr.setPrecision(prec)
+
+        return
+
+    def setRotationType(self, RotationType rotation_type):
+        """
+        Set the method used by the MELD scheme to compute the rotation of
+        each aerodynamic node from the covariance matrix of its structural
+        nodes. The quaternion method computes the rotations of blocks of
+        nodes together and falls back to the SVD for nearly degenerate
+        matrices. Both methods give the same derivatives in complex mode.
+
+        Parameters
+        ----------
+        rotation_type: C++ enum
+            PY_SVD_ROTATION (default) or PY_QUATERNION_ROTATION
+        """
+        self.ptr.setRotationType(rotation_type)
+
+        return
+
+    def getInterpOperator(self):
+        """
+        Get the linear displacement transfer assembled by the LinearizedMELD
+        scheme. This is collective on the global communicator.
+
+        The rows are the aerodynamic displacements on this processor and the
+        columns are the structural displacements, numbered by the global
+        structural node in the order of the structural processors. The load
+        transfer is the transpose of this operator.
+
+        Returns
+        -------
+        mat: scipy.sparse.bsr_matrix
+            the operator such that uA = mat @ uS. If scipy is not available,
+            the tuple ((data, indices, indptr), shape) is returned instead, and
+            None is returned if the scheme is not linear.
+        """
+        cdef int bs = 0
+        cdef int nrows = 0
+        cdef int ncols = 0
+        cdef int nnz = 0
+        if not self.ptr.getInterpOperatorSize(&bs, &nrows, &ncols, &nnz):
+            return None
+
+        cdef np.ndarray[int, ndim=1, mode='c'] rowp = np.zeros(nrows + 1,
+                                                               dtype=np.intc)
+        cdef np.ndarray[int, ndim=1, mode='c'] cols = np.zeros(nnz,
+                                                               dtype=np.intc)
+        cdef np.ndarray[F2FScalar, ndim=1, mode='c'] vals = np.zeros(
+            bs * bs * nnz, dtype=dtype)
+        self.ptr.getInterpOperator(<int*>rowp.data, <int*>cols.data,
+                                   <F2FScalar*>vals.data)
+
+        return _interpMatrix(bs, nrows, ncols, rowp, cols, vals)
+
+    def getMemoryFootprint(self):
+        """
+        Get the memory allocated by the transfer scheme on this processor
+
+        Returns
+        -------
+        footprint: dict
+            Number of bytes allocated in total ('total') and for the persistent
+            work arrays that are reused between transfers ('workspace')
+        """
+        return {'total': self.ptr.getMemoryFootprint(),
+                'workspace': self.ptr.getWorkspaceMemoryFootprint()}
+
     def transferDisps(self,
             np.ndarray[F2FScalar, ndim=1, mode='c'] struct_disps,
             np.ndarray[F2FScalar, ndim=1, mode='c'] aero_disps):
@@ -603,6 +946,211 @@ cdef class pyTransferScheme:
 
         return
 
+    def applydDduSMulti(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                        np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the Jacobian containing the derivatives of the
+        displacement transfer residuals with respect to the structural
+        displacements to a block of input vectors and store the products in
+        empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of structural displacements, one column per vector
+        p: ndarray
+            Empty array of aerodynamic displacements, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalStructArrayLen(),
+                                     self.ptr.getLocalAeroArrayLen())
+        self.ptr.applydDduSMulti(nvecs, <F2FScalar*>v.data, <F2FScalar*>p.data)
+        return
+
+    def applydDduSTransMulti(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                             np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the transpose of the Jacobian containing the
+        derivatives of the displacement transfer residuals with respect to the
+        structural displacements to a block of input vectors and store the
+        products in empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of aerodynamic displacements, one column per vector
+        p: ndarray
+            Empty array of structural displacements, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalAeroArrayLen(),
+                                     self.ptr.getLocalStructArrayLen())
+        self.ptr.applydDduSTransMulti(nvecs, <F2FScalar*>v.data,
+                                      <F2FScalar*>p.data)
+        return
+
+    def applydLduSMulti(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                        np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the Jacobian containing the derivatives of the load
+        transfer residuals with respect to the structural displacements to a
+        block of input vectors and store the products in empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of structural displacements, one column per vector
+        p: ndarray
+            Empty array of structural loads, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalStructArrayLen(),
+                                     self.ptr.getLocalStructArrayLen())
+        self.ptr.applydLduSMulti(nvecs, <F2FScalar*>v.data, <F2FScalar*>p.data)
+        return
+
+    def applydLduSTransMulti(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                             np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the transpose of the Jacobian containing the
+        derivatives of the load transfer residuals with respect to the
+        structural displacements to a block of input vectors and store the
+        products in empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of structural loads, one column per vector
+        p: ndarray
+            Empty array of structural displacements, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalStructArrayLen(),
+                                     self.ptr.getLocalStructArrayLen())
+        self.ptr.applydLduSTransMulti(nvecs, <F2FScalar*>v.data,
+                                      <F2FScalar*>p.data)
+        return
+
+    def applydLdfAMulti(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                        np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the Jacobian containing the derivatives of the load
+        transfer residuals with respect to the aerodynamic forces to a block of
+        input vectors and store the products in empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of aerodynamic forces, one column per vector
+        p: ndarray
+            Empty array of structural loads, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalAeroArrayLen(),
+                                     self.ptr.getLocalStructArrayLen())
+        self.ptr.applydLdfAMulti(nvecs, <F2FScalar*>v.data, <F2FScalar*>p.data)
+        return
+
+    def applydLdfATransMulti(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                             np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the transpose of the Jacobian containing the
+        derivatives of the load transfer residuals with respect to the
+        aerodynamic forces to a block of input vectors and store the products
+        in empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of structural loads, one column per vector
+        p: ndarray
+            Empty array of aerodynamic forces, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalStructArrayLen(),
+                                     self.ptr.getLocalAeroArrayLen())
+        self.ptr.applydLdfATransMulti(nvecs, <F2FScalar*>v.data,
+                                      <F2FScalar*>p.data)
+        return
+
+    def applydDdxA0Multi(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                         np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the Jacobian containing the derivatives of the
+        displacement transfer residuals with respect to the initial aerodynamic
+        surface node locations to a block of input vectors and store the
+        products in empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of aerodynamic displacements, one column per vector
+        p: ndarray
+            Empty array of aerodynamic nodes, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalAeroArrayLen(),
+                                     3 * self.ptr.getNumLocalAeroNodes())
+        self.ptr.applydDdxA0Multi(nvecs, <F2FScalar*>v.data,
+                                  <F2FScalar*>p.data)
+        return
+
+    def applydDdxS0Multi(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                         np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the Jacobian containing the derivatives of the
+        displacement transfer residuals with respect to the initial structural
+        node locations to a block of input vectors and store the products in
+        empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of aerodynamic displacements, one column per vector
+        p: ndarray
+            Empty array of structural nodes, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalAeroArrayLen(),
+                                     3 * self.ptr.getNumLocalStructNodes())
+        self.ptr.applydDdxS0Multi(nvecs, <F2FScalar*>v.data,
+                                  <F2FScalar*>p.data)
+        return
+
+    def applydLdxA0Multi(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                         np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the Jacobian containing the derivatives of the load
+        transfer residuals with respect to the initial aerodynamic surface node
+        locations to a block of input vectors and store the products in empty
+        input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of structural loads, one column per vector
+        p: ndarray
+            Empty array of aerodynamic nodes, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalStructArrayLen(),
+                                     3 * self.ptr.getNumLocalAeroNodes())
+        self.ptr.applydLdxA0Multi(nvecs, <F2FScalar*>v.data,
+                                  <F2FScalar*>p.data)
+        return
+
+    def applydLdxS0Multi(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                         np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the Jacobian containing the derivatives of the load
+        transfer residuals with respect to the initial structural node
+        locations to a block of input vectors and store the products in empty
+        input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of structural loads, one column per vector
+        p: ndarray
+            Empty array of structural nodes, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalStructArrayLen(),
+                                     3 * self.ptr.getNumLocalStructNodes())
+        self.ptr.applydLdxS0Multi(nvecs, <F2FScalar*>v.data,
+                                  <F2FScalar*>p.data)
+        return
+
 # Generic thermal transfer scheme
 cdef class pyThermalTransfer:
     """
@@ -663,6 +1211,139 @@ cdef class pyThermalTransfer:
 
         return
 
+    def setSearchType(self, SearchType search_type, int num_threads=1):
+        """
+        Set the nearest neighbor search used to build the connectivity between
+        the aerodynamic and structural nodes when the scheme is initialized
+
+        Parameters
+        ----------
+        search_type: C++ enum
+            PY_LOCATE_POINT_SEARCH, PY_KD_TREE_SEARCH or PY_OCTREE_SEARCH
+        num_threads: int
+            number of OpenMP threads for the k-d tree and octree queries
+            (values less than one use all available threads)
+        """
+        self.ptr.setSearchType(search_type, num_threads)
+
+        return
+
+    def setStructOctree(self, pyOctree octree):
+        """
+        Share an octree of the structural nodes with other transfer schemes,
+        such as the load and displacement and thermal transfer schemes of a
+        body. The octree is used by the octree search and by the schemes that
+        sample or partition the structural nodes with an octree, and it is
+        only generated again when the structural nodes change.
+
+        Parameters
+        ----------
+        octree: pyOctree
+            the shared octree
+        """
+        self.ptr.setStructOctree(octree.ptr)
+
+        return
+
+    def setDistributedStructMesh(self, distributed):
+        """
+        Store only the structural nodes connected to the aerodynamic nodes on
+        each processor instead of the full structural mesh. The structural
+        values are then exchanged with neighboring processors instead of
+        being broadcast to all the processors. This must be set before the
+        scheme is initialized and is used by the MELD schemes.
+
+        Parameters
+        ----------
+        distributed: bool
+            whether to distribute the structural mesh
+        """
+        self.ptr.setDistributedStructMesh(int(distributed))
+
+        return
+
+    def setConnReuse(self, reuse):
+        """
+        Keep the aerostructural connectivity when the scheme is initialized
+        again after the node locations have changed, so that mostly only the
+        weights are computed again. The nearest neighbor search is repeated
+        only for the aerodynamic nodes that may have moved enough to change
+        their nearest structural nodes. This is used by the MELD schemes.
+
+        Parameters
+        ----------
+        reuse: bool
+            whether to keep the connectivity when it is still valid
+        """
+        self.ptr.setConnReuse(int(reuse))
+
+        return
+
+    def setPrecision(self, Precision prec):
+        """
+        Set the precision of the data stored by the MELD scheme. With mixed
+        precision, the weights and the temperature transfer assembled from
+        them are stored in single precision and the sums are accumulated in
+        full precision. This halves the memory traffic of the transfers, which
+        are then accurate to single precision.
+
+        Parameters
+        ----------
+        prec: C++ enum
+            PY_FULL_PRECISION (default) or PY_MIXED_PRECISION
+        """
+        self.ptr.setPrecision(prec)
+
+        return
+
+    def getInterpOperator(self):
+        """
+        Get the linear temperature transfer assembled by the MELDThermal
+        scheme. This is collective on the global communicator.
+
+        The rows are the aerodynamic temperatures on this processor and the
+        columns are the structural temperatures, numbered by the global
+        structural node in the order of the structural processors. The flux
+        transfer is the transpose of this operator.
+
+        Returns
+        -------
+        mat: scipy.sparse.bsr_matrix
+            the operator such that tA = mat @ tS. If scipy is not available,
+            the tuple ((data, indices, indptr), shape) is returned instead, and
+            None is returned if the scheme is not linear.
+        """
+        cdef int bs = 0
+        cdef int nrows = 0
+        cdef int ncols = 0
+        cdef int nnz = 0
+        if not self.ptr.getInterpOperatorSize(&bs, &nrows, &ncols, &nnz):
+            return None
+
+        cdef np.ndarray[int, ndim=1, mode='c'] rowp = np.zeros(nrows + 1,
+                                                               dtype=np.intc)
+        cdef np.ndarray[int, ndim=1, mode='c'] cols = np.zeros(nnz,
+                                                               dtype=np.intc)
+        cdef np.ndarray[F2FScalar, ndim=1, mode='c'] vals = np.zeros(
+            bs * bs * nnz, dtype=dtype)
+        self.ptr.getInterpOperator(<int*>rowp.data, <int*>cols.data,
+                                   <F2FScalar*>vals.data)
+
+        return _interpMatrix(bs, nrows, ncols, rowp, cols, vals)
+
+    def getMemoryFootprint(self):
+        """
+        Get the memory allocated by the transfer scheme on this processor
+
+        Returns
+        -------
+        footprint: dict
+            Number of bytes allocated in total ('total') and for the persistent
+            work arrays that are reused between transfers ('workspace')
+        """
+        return {'total': self.ptr.getMemoryFootprint(),
+                'workspace': self.ptr.getWorkspaceMemoryFootprint()}
+
     def transferTemp(self,
                      np.ndarray[F2FScalar, ndim=1, mode='c'] struct_temps,
                      np.ndarray[F2FScalar, ndim=1, mode='c'] aero_temps):
@@ -802,6 +1483,87 @@ cdef class pyThermalTransfer:
         self.ptr.applydQdqATrans(<F2FScalar*>v.data, <F2FScalar*>p.data)
         return
 
+    def applydTdtSMulti(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                        np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the Jacobian containing the derivatives of the
+        temperature transfer residuals with respect to the structural
+        temperatures to a block of input vectors and store the products in
+        empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of structural temperatures, one column per vector
+        p: ndarray
+            Empty array of aerodynamic temperatures, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalStructArrayLen(),
+                                     self.ptr.getLocalAeroArrayLen())
+        self.ptr.applydTdtSMulti(nvecs, <F2FScalar*>v.data, <F2FScalar*>p.data)
+        return
+
+    def applydTdtSTransMulti(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                             np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the transpose of the Jacobian containing the
+        derivatives of the temperature transfer residuals with respect to the
+        structural temperatures to a block of input vectors and store the
+        products in empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of aerodynamic temperatures, one column per vector
+        p: ndarray
+            Empty array of structural temperatures, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalAeroArrayLen(),
+                                     self.ptr.getLocalStructArrayLen())
+        self.ptr.applydTdtSTransMulti(nvecs, <F2FScalar*>v.data,
+                                      <F2FScalar*>p.data)
+        return
+
+    def applydQdqAMulti(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                        np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the Jacobian containing the derivatives of the
+        flux transfer residuals with respect to the aerodynamic heat flux to a
+        block of input vectors and store the products in empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of aerodynamic heat flux, one column per vector
+        p: ndarray
+            Empty array of structural heat flux, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalAeroArrayLen(),
+                                     self.ptr.getLocalStructArrayLen())
+        self.ptr.applydQdqAMulti(nvecs, <F2FScalar*>v.data, <F2FScalar*>p.data)
+        return
+
+    def applydQdqATransMulti(self, np.ndarray[F2FScalar, ndim=2, mode='c'] v,
+                             np.ndarray[F2FScalar, ndim=2, mode='c'] p):
+        """
+        Apply the action of the transpose of the Jacobian containing the
+        derivatives of the flux transfer residuals with respect to the
+        aerodynamic heat flux to a block of input vectors and store the
+        products in empty input array
+
+        Parameters
+        ----------
+        v: ndarray
+            Array of structural heat flux, one column per vector
+        p: ndarray
+            Empty array of aerodynamic heat flux, one column per vector
+        """
+        cdef int nvecs = _getNumVecs(v, p, self.ptr.getLocalStructArrayLen(),
+                                     self.ptr.getLocalAeroArrayLen())
+        self.ptr.applydQdqATransMulti(nvecs, <F2FScalar*>v.data,
+                                      <F2FScalar*>p.data)
+        return
+
     def testAllDerivatives(self,
             np.ndarray[F2FScalar, ndim=1, mode='c'] struct_disps,
             np.ndarray[F2FScalar, ndim=1, mode='c'] aero_loads,
@@ -837,6 +1599,10 @@ cdef class pyThermalTransfer:
         return self.ptr.testAllDerivatives(struct_array, aero_array, h, rtol, atol)
 
 
+PY_STORE_FACTOR = STORE_FACTOR
+PY_STORE_SINGLE_FACTOR = STORE_SINGLE_FACTOR
+PY_RECOMPUTE_FACTOR = RECOMPUTE_FACTOR
+
 cdef class pyMELD(pyTransferScheme):
     """
     MELD (Matching-based Extrapolation of Loads and Displacments) is scalable
@@ -867,12 +1633,16 @@ cdef class pyMELD(pyTransferScheme):
         number of structural nodes linked to each aerodynamic node
     beta: float
         weighting decay parameter
+    num_threads: int
+        number of OpenMP threads used to loop over the aerodynamic nodes
+        (values less than one use all available threads; ignored if the
+        library is built without OpenMP)
     """
     def __cinit__(self, MPI.Comm comm,
                   MPI.Comm struct, int struct_root,
                   MPI.Comm aero, int aero_root,
                   int symmetry, int num_nearest,
-                  F2FScalar beta):
+                  F2FScalar beta, int num_threads=1):
         cdef MPI_Comm c_comm = comm.ob_mpi
         cdef MPI_Comm struct_comm = struct.ob_mpi
         cdef MPI_Comm aero_comm = aero.ob_mpi
@@ -880,13 +1650,64 @@ cdef class pyMELD(pyTransferScheme):
         # Allocate the underlying class
         self.ptr = new MELD(c_comm, struct_comm, struct_root,
                             aero_comm, aero_root, symmetry,
-                            num_nearest, beta)
+                            num_nearest, beta, num_threads)
 
         return
 
     def __dealloc__(self):
         del self.ptr
 
+    def setNumThreads(self, int num_threads):
+        """
+        Set the number of threads used to loop over the aerodynamic nodes
+
+        Parameters
+        ----------
+        num_threads: int
+            number of threads (values less than one use all available threads)
+        """
+        (<MELD*>self.ptr).setNumThreads(num_threads)
+
+    def getNumThreads(self):
+        """
+        Get the number of threads used to loop over the aerodynamic nodes
+        """
+        return (<MELD*>self.ptr).getNumThreads()
+
+    def setFactorStorage(self, FactorStorage storage):
+        """
+        Set how the factored 15x15 systems used by the load transfer and its
+        Jacobian-vector products are kept for each aerodynamic node. Storing
+        them in single precision halves their memory, but the products are
+        then only accurate to single precision. Recomputing them stores
+        nothing extra but costs a factorization per node in every product.
+
+        Parameters
+        ----------
+        storage: C++ enum
+            PY_STORE_FACTOR, PY_STORE_SINGLE_FACTOR or PY_RECOMPUTE_FACTOR
+        """
+        (<MELD*>self.ptr).setFactorStorage(storage)
+
+        return
+
+    def getFactorMemoryEstimate(self, FactorStorage storage):
+        """
+        Estimate the number of bytes needed on this processor to store the
+        factored systems of the aerodynamic nodes with the given storage
+
+        Parameters
+        ----------
+        storage: C++ enum
+            PY_STORE_FACTOR, PY_STORE_SINGLE_FACTOR or PY_RECOMPUTE_FACTOR
+
+        Returns
+        -------
+        bytes: int
+            the number of bytes
+        """
+        return (<MELD*>self.ptr).getFactorMemoryEstimate(storage)
+
 cdef class pyMELDThermal(pyThermalTransfer):
     """
     MELD (Matching-based Extrapolation of Loads and Displacments) is scalable
@@ -986,6 +1807,9 @@ PY_GAUSSIAN = GAUSSIAN
 PY_MULTIQUADRIC = MULTIQUADRIC
 PY_INVERSE_MULTIQUADRIC = INVERSE_MULTIQUADRIC
 PY_THIN_PLATE_SPLINE = THIN_PLATE_SPLINE
+PY_WENDLAND_C0 = WENDLAND_C0
+PY_WENDLAND_C2 = WENDLAND_C2
+PY_WENDLAND_C4 = WENDLAND_C4
 
 cdef class pyRBF(pyTransferScheme):
     """
@@ -1005,15 +1829,21 @@ cdef class pyRBF(pyTransferScheme):
         id of the aerodynamic root process
     rbf_type: C++ enum
         type of radial basis function to use (PY_GAUSSIAN, PY_MULTIQUADRIC,
-        PY_INVERSE_MULTIQUADRIC, PY_THIN_PLATE_SPLINE)
+        PY_INVERSE_MULTIQUADRIC, PY_THIN_PLATE_SPLINE, PY_WENDLAND_C0,
+        PY_WENDLAND_C2, PY_WENDLAND_C4)
     sampling_ratio: int
         minimum number of points in leaf node of octree (one point sampled
         from each node)
+    support_radius: float
+        support radius of the compactly supported Wendland functions. If not
+        positive, the radius is chosen so that each sampled node has at least
+        20 sampled neighbors within its support
     """
     def __cinit__(self, MPI.Comm comm,
                   MPI.Comm struct, int struct_root,
                   MPI.Comm aero, int aero_root,
-                  RbfType rbf_type, int sampling_ratio):
+                  RbfType rbf_type, int sampling_ratio,
+                  double support_radius=0.0):
         """
 
         Parameters
@@ -1025,6 +1855,7 @@ cdef class pyRBF(pyTransferScheme):
         aero_root
         rbf_type
         sampling_ratio
+        support_radius
 
         Returns
         -------
@@ -1037,13 +1868,128 @@ cdef class pyRBF(pyTransferScheme):
         # Allocate the underlying class
         self.ptr = new RBF(c_comm, struct_comm, struct_root,
                            aero_comm, aero_root,
-                           rbf_type, sampling_ratio)
+                           rbf_type, sampling_ratio, support_radius)
+
+        return
+
+    def __dealloc__(self):
+        del self.ptr
+
+    def setGreedySampling(self, double tol, int max_centers=0):
+        """
+        Select the RBF centers greedily from the structural nodes. Centers are
+        added where the interpolation residual of a set of test displacement
+        fields is largest until the relative residual is below the tolerance.
+        This replaces the random sampling of one node per octree leaf bin and
+        takes effect at the next call to initialize.
+
+        Parameters
+        ----------
+        tol: float
+            tolerance on the relative residual (not positive to disable)
+        max_centers: int
+            maximum number of centers (not positive for no limit)
+        """
+        (<RBF*>self.ptr).setGreedySampling(tol, max_centers)
+
+    def setFactorReuse(self, int reuse):
+        """
+        Keep the LU factorization of the interpolation system between calls to
+        initialize. The sampled structural nodes are then kept while the number
+        of structural nodes is unchanged, so moving the aerodynamic nodes only
+        needs back-substitutions and moving a few structural nodes only needs a
+        low-rank update of the factorization. This applies to the global basis
+        functions.
+
+        Parameters
+        ----------
+        reuse: bool
+            whether to keep the factorization
+        """
+        (<RBF*>self.ptr).setFactorReuse(reuse)
+
+cdef class pyPURBF(pyTransferScheme):
+    """
+    Partition-of-unity interpolation of loads and displacements using local
+    radial basis functions (RBFs). The structural nodes are covered by
+    overlapping patches built from an octree, each with a local thin plate
+    spline interpolant, and the local interpolants are blended with smooth
+    weights. Each aerodynamic node depends only on the structural nodes of the
+    patches that contain it, so the memory scales linearly with the number of
+    nodes. The loads are transferred with the transpose of the displacement
+    transfer, so the transfer is consistent and conservative.
+
+    Parameters
+    ----------
+    comm: MPI.comm
+        MPI communicator for all processes
+    struct: MPI.comm
+        MPI communicator for the structural root process
+    struct_root: int
+        id of the structural root process
+    aero: MPI.comm
+        MPI communicator for the aerodynamic root process
+    aero_root: int
+        id of the aerodynamic root process
+    patch_points: int
+        number of structural nodes in each patch (the octree leaf bins hold
+        at most this many nodes and smaller patches are enlarged)
+    overlap: float
+        ratio of the patch radius to the half diagonal of the octree leaf bin
+    num_threads: int
+        number of OpenMP threads used for the patches and products (values
+        less than one use all available threads; ignored if the library is
+        built without OpenMP)
+    """
+    def __cinit__(self, MPI.Comm comm,
+                  MPI.Comm struct, int struct_root,
+                  MPI.Comm aero, int aero_root,
+                  int patch_points=50, double overlap=1.5,
+                  int num_threads=1):
+        cdef MPI_Comm c_comm = comm.ob_mpi
+        cdef MPI_Comm struct_comm = struct.ob_mpi
+        cdef MPI_Comm aero_comm = aero.ob_mpi
+
+        # Allocate the underlying class
+        self.ptr = new PURBF(c_comm, struct_comm, struct_root,
+                             aero_comm, aero_root,
+                             patch_points, overlap, num_threads)
 
         return
 
     def __dealloc__(self):
         del self.ptr
 
+    def initialize(self):
+        """
+        Build the patches and assemble the interpolation. Raises a ValueError
+        on all processes if the interpolation system of a patch is singular
+        """
+        self.ptr.initialize()
+
+        nfailed = (<PURBF*>self.ptr).getNumFailedPatches()
+        if nfailed > 0:
+            raise ValueError("Interpolation systems of %d patches are singular" % nfailed)
+
+        return
+
+    def setNumThreads(self, int num_threads):
+        """
+        Set the number of threads used for the patches and products
+
+        Parameters
+        ----------
+        num_threads: int
+            number of threads (values less than one use all available threads)
+        """
+        (<PURBF*>self.ptr).setNumThreads(num_threads)
+
+    def getNumThreads(self):
+        """
+        Get the number of threads used for the patches and products
+        """
+        return (<PURBF*>self.ptr).getNumThreads()
+
 cdef class pyBeamTransfer(pyTransferScheme):
     """
     Interpolation of loads and displacements for beam elements
@@ -1070,4 +2016,77 @@ cdef class pyBeamTransfer(pyTransferScheme):
                                     conn_data, nelems, order,
                                     dof_per_node)
 
-        return
\ No newline at end of file
+        return
+
+    def setNumThreads(self, int num_threads):
+        """
+        Set the number of threads used to find the closest element of each
+        aerodynamic node
+
+        Parameters
+        ----------
+        num_threads: int
+            number of threads (values less than one use all available threads)
+        """
+        (<BeamTransfer*>self.ptr).setNumThreads(num_threads)
+
+    def getNumThreads(self):
+        """
+        Get the number of threads used for the closest element search
+        """
+        return (<BeamTransfer*>self.ptr).getNumThreads()
+class pyMixedPrecisionTransfer:
+    """
+    Wrapper that runs a MELD or MELDThermal scheme in mixed precision and
+    accepts single precision (float32) arrays. The inputs are converted to
+    the scalar type of the library at the call and the outputs are copied
+    back into the single precision arrays, so the wrapper can be used in
+    place of the transfer scheme by codes that store their surfaces in
+    single precision. All other methods are forwarded to the transfer scheme.
+    """
+    def __init__(self, transfer):
+        self.transfer = transfer
+        if dtype == complex:
+            self.single_dtype = np.complex64
+        else:
+            self.single_dtype = np.float32
+        self.transfer.setPrecision(PY_MIXED_PRECISION)
+
+    def __getattr__(self, name):
+        return getattr(self.transfer, name)
+
+    def _copyIn(self, x):
+        return np.ascontiguousarray(x, dtype=dtype)
+
+    def _copyOut(self, y, x):
+        if x.dtype == y.dtype:
+            x[:] = y
+        else:
+            x[:] = y.astype(x.dtype)
+        return
+
+    def setAeroNodes(self, X):
+        self.transfer.setAeroNodes(self._copyIn(X))
+
+    def setStructNodes(self, X):
+        self.transfer.setStructNodes(self._copyIn(X))
+
+    def transferDisps(self, struct_disps, aero_disps):
+        aero = np.zeros(len(aero_disps), dtype=dtype)
+        self.transfer.transferDisps(self._copyIn(struct_disps), aero)
+        self._copyOut(aero, aero_disps)
+
+    def transferLoads(self, aero_loads, struct_loads):
+        struct = np.zeros(len(struct_loads), dtype=dtype)
+        self.transfer.transferLoads(self._copyIn(aero_loads), struct)
+        self._copyOut(struct, struct_loads)
+
+    def transferTemp(self, struct_temps, aero_temps):
+        aero = np.zeros(len(aero_temps), dtype=dtype)
+        self.transfer.transferTemp(self._copyIn(struct_temps), aero)
+        self._copyOut(aero, aero_temps)
+
+    def transferFlux(self, aero_flux, struct_flux):
+        struct = np.zeros(len(struct_flux), dtype=dtype)
+        self.transfer.transferFlux(self._copyIn(aero_flux), struct)
+        self._copyOut(struct, struct_flux)
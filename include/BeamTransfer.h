@@ -15,6 +15,10 @@ class BeamTransfer : public LDTransferScheme {
 
   void initialize();
 
+  // Set/get the number of threads used for the closest element search
+  void setNumThreads(int num_threads);
+  int getNumThreads();
+
   // Load and displacement transfers
   void transferDisps(const F2FScalar *struct_disps, F2FScalar *aero_disps);
   void transferLoads(const F2FScalar *aero_loads, F2FScalar *struct_loads);
@@ -0,0 +1,94 @@
+#ifndef INTERP_OPERATOR_H
+#define INTERP_OPERATOR_H
+
+#include "TransferScheme.h"
+
+/*
+  A linear interpolation operator from the structural nodes to the
+  aerodynamic nodes stored in block compressed sparse row (BSR) format.
+
+  The operator is assembled from an aerostructural connectivity with nn
+  structural nodes for each aerodynamic node and a dense bs x bs block for
+  each connection, or with a varying number of structural nodes given by a
+  pointer into the connectivity. Connections to reflected structural nodes
+  (index >= ncols) are folded onto the original node and repeated connections
+  are summed, so each block row stores each structural node at most once in
+  increasing order.
+
+  The values may be converted to single precision to halve the memory traffic
+  of the products, which are still accumulated in full precision.
+
+  The transpose is stored explicitly in the same format so that both products
+  are evaluated row by row without scattering into the output. Blocks are
+  stored row-major, so that block[bs*a + b] maps component b of the
+  structural node to component a of the aerodynamic node.
+*/
+class InterpOperator {
+ public:
+  InterpOperator(int bs, int nrows, int ncols, int nn, const int *conn,
+                 const F2FScalar *blocks);
+  InterpOperator(int bs, int nrows, int ncols, const int *conn_ptr,
+                 const int *conn, const F2FScalar *blocks);
+  ~InterpOperator();
+
+  // Compute y = alpha*A*x or y = alpha*A^{T}*x for a block of vectors stored
+  // row-wise
+  void mult(int nvecs, F2FScalar alpha, const F2FScalar *x, F2FScalar *y,
+            int num_threads = 1);
+  void multTranspose(int nvecs, F2FScalar alpha, const F2FScalar *x,
+                     F2FScalar *y, int num_threads = 1);
+
+  // Get the block size, the number of block rows and columns and the number
+  // of nonzero blocks
+  int getBlockSize() { return bs; }
+  int getNumRows() { return nrows; }
+  int getNumColumns() { return ncols; }
+  int getNumNonzeros() { return rowp[nrows]; }
+
+  // Store the values in single precision
+  void setSinglePrecision();
+
+  // Get the block CSR data. The values are NULL if they are stored in single
+  // precision, but they can always be copied in full precision.
+  void getArrays(const int **_rowp, const int **_cols,
+                 const F2FScalar **_vals) {
+    *_rowp = rowp;
+    *_cols = cols;
+    *_vals = vals;
+  }
+  void getValues(F2FScalar *_vals);
+
+  // Get the number of bytes allocated by the operator
+  size_t getMemoryFootprint();
+
+ private:
+  // Assemble the operator and its transpose from the connectivity
+  void assemble(const int *conn_ptr, int nn, const int *conn,
+                const F2FScalar *blocks);
+
+  // Evaluate y = alpha*B*x for a block CSR matrix B
+  template <class T>
+  static void bsrMult(int bs, int nrows, const int *rowp, const int *cols,
+                      const T *vals, int nvecs, F2FScalar alpha,
+                      const F2FScalar *x, F2FScalar *y, int num_threads);
+
+  int bs;     // Block size
+  int nrows;  // Number of block rows (aerodynamic nodes)
+  int ncols;  // Number of block columns (structural nodes)
+
+  // The operator in block CSR format
+  int *rowp;
+  int *cols;
+  F2FScalar *vals;
+
+  // The transpose of the operator in block CSR format
+  int *trowp;
+  int *tcols;
+  F2FScalar *tvals;
+
+  // The values of the operator and its transpose in single precision
+  F2FSingleScalar *vals_single;
+  F2FSingleScalar *tvals_single;
+};
+
+#endif  // INTERP_OPERATOR_H
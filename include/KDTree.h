@@ -0,0 +1,83 @@
+#ifndef KD_TREE_H
+#define KD_TREE_H
+
+#include "TransferScheme.h"
+
+/*
+  A k-d tree for K-nearest neighbor queries over a cloud of points in R^3.
+
+  The tree is stored in flat arrays: the points are copied in tree order so
+  that each leaf is a contiguous block, and each node stores the range of
+  points it contains, its split direction and location, and the index of its
+  first child (the second child immediately follows). Queries keep the K
+  closest candidates in a bounded max-heap and skip subtrees whose distance
+  from the query point exceeds the current K-th distance.
+
+  Queries can also search the reflection of the point cloud across a plane of
+  symmetry without duplicating the points: the distance from a point to a
+  reflected node is the distance from the reflected point to the node.
+  Reflected nodes are returned with the index offset by the number of points,
+  matching the aerostructural connectivity convention.
+*/
+class KDTree {
+ public:
+  KDTree(const F2FScalar *Xpts, int npts, int leaf_size = 16);
+  ~KDTree();
+
+  // Locate the K closest points sorted by distance (dist/indices must be of
+  // length K and K must not exceed the number of candidate points)
+  void locateKClosest(int K, int indices[], double dist[],
+                      const F2FScalar xpt[], int isymm = -1, double tol = 1e-7);
+
+  // Locate the K closest points to each point in a batch of query points
+  void locateKClosest(int K, int nxpts, const F2FScalar *xpts, int *indices,
+                      int isymm = -1, double tol = 1e-7, int num_threads = 1);
+
+  // Locate all the points within a distance of the query point. Returns the
+  // number of points found and stores the first max_indices of them.
+  int locateInRadius(double radius, const F2FScalar xpt[], int max_indices,
+                     int indices[]);
+
+  // Get the number of bytes allocated by the tree
+  size_t getMemoryFootprint();
+
+  // Add a candidate to the bounded max-heap of the K closest points
+  static void heapInsert(int K, int *nk, int indices[], double dist[], double d,
+                         int index);
+
+  // Sort the heap into ascending order of distance
+  static void heapSort(int nk, int indices[], double dist[]);
+
+ private:
+  // Count the nodes needed for the given number of points
+  int countNodes(int n);
+
+  // Recursively build the tree over the points in [start, end)
+  void build(int node, int start, int end, int *next_node);
+
+  // Recursively search the tree
+  void search(int node, const double x[], double rd, double off[], int K,
+              int *nk, int indices[], double dist[], int offset, int isymm,
+              double tol);
+
+  // Recursively collect the points within the radius
+  void searchRadius(int node, const double x[], double rd, double off[],
+                    double r2, int *n, int max_indices, int indices[]);
+
+  // The number of points and the maximum number of points in a leaf
+  int npts;
+  int leaf_size;
+
+  double *X;  // Point locations in tree order
+  int *perm;  // Index of each point in the original array
+
+  // The flat node arrays
+  int num_nodes;
+  int *node_start;     // First point in the node
+  int *node_end;       // One past the last point in the node
+  int *node_child;     // First child of the node (-1 for leaves)
+  int *node_dim;       // Split direction
+  double *node_split;  // Split location
+};
+
+#endif  // KD_TREE_H
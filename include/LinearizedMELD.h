@@ -20,6 +20,12 @@ class LinearizedMELD : public MELD {
   // Initialization
   void initialize();
 
+  // The linearized scheme always stores its data in full precision
+  void setPrecision(Precision prec) {}
+
+  // Get the number of bytes allocated by the transfer scheme
+  size_t getMemoryFootprint();
+
   // Load and displacement transfers
   void transferDisps(const F2FScalar *struct_disps, F2FScalar *aero_disps);
   void transferLoads(const F2FScalar *aero_loads, F2FScalar *struct_loads);
@@ -36,6 +42,36 @@ class LinearizedMELD : public MELD {
   void applydLdxA0(const F2FScalar *vecs, F2FScalar *prods);
   void applydLdxS0(const F2FScalar *vecs, F2FScalar *prods);
 
+  // The block products of MELD do not apply to the linearized scheme, so
+  // these evaluate the linearized products one column at a time
+  void applydDduSMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods) {
+    LDTransferScheme::applydDduSMulti(nvecs, vecs, prods);
+  }
+  void applydDduSTransMulti(int nvecs, const F2FScalar *vecs,
+                            F2FScalar *prods) {
+    LDTransferScheme::applydDduSTransMulti(nvecs, vecs, prods);
+  }
+  void applydLduSTransMulti(int nvecs, const F2FScalar *vecs,
+                            F2FScalar *prods) {
+    LDTransferScheme::applydLduSTransMulti(nvecs, vecs, prods);
+  }
+  void applydDdxA0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods) {
+    LDTransferScheme::applydDdxA0Multi(nvecs, vecs, prods);
+  }
+  void applydDdxS0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods) {
+    LDTransferScheme::applydDdxS0Multi(nvecs, vecs, prods);
+  }
+  void applydLdxA0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods) {
+    LDTransferScheme::applydLdxA0Multi(nvecs, vecs, prods);
+  }
+  void applydLdxS0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods) {
+    LDTransferScheme::applydLdxS0Multi(nvecs, vecs, prods);
+  }
+
+ protected:
+  // Assemble the linear displacement transfer if the nodes have moved
+  void updateInterpOperator();
+
  private:
   // Data for the transfers
   F2FScalar *global_H;
@@ -44,16 +80,13 @@ class LinearizedMELD : public MELD {
   void computePointInertiaInverse(const F2FScalar *H, F2FScalar *Hinv);
   void adjPointInertiaInverse(const F2FScalar *Hinv, const F2FScalar *Hinvd,
                               F2FScalar *Hd);
-  void computeDispContribution(const F2FScalar w, const F2FScalar *r,
-                               const F2FScalar *Hinv, const F2FScalar *q,
-                               const F2FScalar *us, F2FScalar *ua);
+  void computeDispBlock(const F2FScalar w, const F2FScalar *r,
+                        const F2FScalar *Hinv, const F2FScalar *q,
+                        F2FScalar *A);
   void addAdjDispContribution(const F2FScalar w, const F2FScalar *r,
                               const F2FScalar *Hinv, const F2FScalar *q,
                               const F2FScalar *us, const F2FScalar *uad,
                               F2FScalar *rd, F2FScalar *qd, F2FScalar *Hinvd);
-  void computeLoadContribution(const F2FScalar w, const F2FScalar *q,
-                               const F2FScalar *Hinv, const F2FScalar *r,
-                               const F2FScalar *fa, F2FScalar *fj);
   void addAdjLoadContribution(const F2FScalar w, const F2FScalar *r,
                               const F2FScalar *Hinv, const F2FScalar *q,
                               const F2FScalar *fa, const F2FScalar *fjd,
@@ -21,13 +21,17 @@
         =  2 for symmetry across z = 0
 
   Users must also specify number of nearest nodes in initialize(num_nearest)
+
+  The loops over the aerodynamic surface nodes may optionally be threaded with
+  OpenMP by specifying num_threads > 1. Results are bitwise reproducible for a
+  fixed number of threads.
 */
 class MELD : public LDTransferScheme {
  public:
   // Constructor
   MELD(MPI_Comm global_comm, MPI_Comm struct_comm, int struct_root,
        MPI_Comm aero_comm, int aero_root, int isymm, int num_nearest,
-       F2FScalar beta);
+       F2FScalar beta, int num_threads = 1);
 
   // Destructor
   ~MELD();
@@ -35,6 +39,27 @@ class MELD : public LDTransferScheme {
   // Initialization
   void initialize();
 
+  // Set/get the number of threads used in the aerodynamic node loops
+  void setNumThreads(int num_threads);
+  int getNumThreads();
+
+  // Storage of the factored 15x15 systems used by the load transfer and its
+  // Jacobian-vector products: stored in full precision, stored in single
+  // precision, or recomputed from the rotation data when they are needed
+  enum FactorStorage { STORE_FACTOR, STORE_SINGLE_FACTOR, RECOMPUTE_FACTOR };
+  void setFactorStorage(FactorStorage storage);
+
+  // Estimate the bytes needed to store the factored systems of the local
+  // aerodynamic nodes with the given storage
+  size_t getFactorMemoryEstimate(FactorStorage storage);
+
+  // Store the weights and the centroids and rotations of the aerodynamic
+  // nodes in single precision for the mixed precision transfers
+  void setPrecision(Precision prec);
+
+  // Get the number of bytes allocated by the transfer scheme
+  size_t getMemoryFootprint();
+
   // Load and displacement transfers
   void transferDisps(const F2FScalar *struct_disps, F2FScalar *aero_disps);
   void transferLoads(const F2FScalar *aero_loads, F2FScalar *struct_loads);
@@ -51,6 +76,15 @@ class MELD : public LDTransferScheme {
   void applydLdxA0(const F2FScalar *vecs, F2FScalar *prods);
   void applydLdxS0(const F2FScalar *vecs, F2FScalar *prods);
 
+  // Action of the Jacobians on a block of vectors stored row-wise
+  void applydDduSMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+  void applydDduSTransMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+  void applydLduSTransMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+  void applydDdxA0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+  void applydDdxS0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+  void applydLdxA0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+  void applydLdxS0Multi(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+
  protected:
   // Symmetry specifier
   int isymm;
@@ -66,19 +100,59 @@ class MELD : public LDTransferScheme {
   F2FScalar *global_R;
   F2FScalar *global_S;
 
+  // Single precision data for the mixed precision transfers, which replaces
+  // the data above
+  F2FSingleScalar *global_W_single;
+  F2FSingleScalar *global_xs0bar_single;
+  F2FSingleScalar *global_R_single;
+  F2FSingleScalar *global_S_single;
+
+  // Allocate the arrays for the per-node data with the current precision,
+  // converting any data that is already stored
+  void allocateNodeData();
+
+  // Get the weight of a connection or the stored data of the i-th aerodynamic
+  // node, converting the data to full precision in the work array if needed
+  F2FScalar getWeight(int k) {
+    return (global_W ? global_W[k] : F2FScalar(global_W_single[k]));
+  }
+  const F2FScalar *getNodeData(int size, int i, const F2FScalar *data,
+                               const F2FSingleScalar *data_single,
+                               F2FScalar *work);
+  void setNodeData(int size, int i, const F2FScalar *values, F2FScalar *data,
+                   F2FSingleScalar *data_single);
+
   // Data for Jacobian-vector products
+  FactorStorage factor_storage;
   F2FScalar *global_M1;
+  F2FSingleScalar *global_M1_single;
   int *global_ipiv;
 
+  // Allocate the arrays for the factored systems
+  void allocateFactorStorage();
+
+  // Store the factored system of the i-th aerodynamic node, or get it from
+  // the stored data or by computing it again in the work arrays
+  void storeFactor(int i, const F2FScalar *M1, const int *ipiv);
+  const F2FScalar *getFactor(int i, F2FScalar *M1_work, int *ipiv_work,
+                             const int **ipiv);
+
+  // Number of threads used in the aerodynamic node loops
+  int nthreads;
+  int getThreadNum();
+  void reduceThreadArrays(int size, F2FScalar *arrays);
+
   // Auxiliary functions for displacement transfer
   void computeCentroid(const int *local_conn, const F2FScalar *W,
                        const F2FScalar *X, F2FScalar *xsbar);
+  void computeNodeCentroid(int i, const F2FScalar *X, F2FScalar *xsbar);
   void computeCovariance(const F2FScalar *X, const F2FScalar *Xd,
                          const int *local_conn, const F2FScalar *W,
                          const F2FScalar *xs0bar, const F2FScalar *xsbar,
                          F2FScalar *H);
 
   // Auxiliary functions for Jacobian-vector products
+  void computeDispJacobianX(int i, const F2FScalar *r, F2FScalar *XX);
   void assembleM3(const F2FScalar *R, const F2FScalar *S, F2FScalar *A);
 };
 
@@ -36,6 +36,12 @@ class MELDThermal : public ThermalTransfer {
   // Initialization
   virtual void initialize();
 
+  // Get the number of bytes allocated by the transfer scheme
+  size_t getMemoryFootprint();
+
+  // Store the weights and the temperature transfer in single precision
+  void setPrecision(Precision prec);
+
   // Set the aerodynamic and structural node locations
   void setStructNodes(const F2FScalar *struct_X, int struct_nnodes);
   void setAeroNodes(const F2FScalar *aero_X, int aero_nnodes);
@@ -50,6 +56,12 @@ class MELDThermal : public ThermalTransfer {
   void applydQdqA(const F2FScalar *vecs, F2FScalar *prods);
   void applydQdqATrans(const F2FScalar *vecs, F2FScalar *prods);
 
+  // Action of the Jacobians on a block of vectors stored row-wise
+  void applydTdtSMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+  void applydTdtSTransMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+  void applydQdqAMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+  void applydQdqATransMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods);
+
  protected:
   // Symmetry specifier
   int isymm;
@@ -60,6 +72,14 @@ class MELDThermal : public ThermalTransfer {
   int *global_conn;       // connectivity
 
   F2FScalar *global_W;  // The global weights
+
+  // The weights in single precision, which replace global_W with mixed
+  // precision
+  F2FSingleScalar *global_W_single;
+
+  // Convert the weights and the temperature transfer to the current
+  // precision
+  void updatePrecision();
 };
 
 #endif  // MELD_THERMAL_H
@@ -1,42 +1,126 @@
 #ifndef OCTREE_H
 #define OCTREE_H
 
+#include <stdint.h>
+
 #include "TransferScheme.h"
 
 /*
-  A class implementing a matrix-based octree
+  An array-based octree built from the Morton (Z-order) codes of the points
+
+  The points are quantized to a 2^21 grid over their bounding box and sorted
+  once by their interleaved Morton codes, so that the points in any bin of the
+  tree are a contiguous range of the sorted order. The bins are created level
+  by level without recursion and each bin stores its range of the sorted
+  points, so the points in each leaf bin are available in CSR format through
+  leaf_ptr and point_ids. Only non-empty bins are created. Nothing is printed
+  unless the verbose flag is set.
+
+  The sorted order is kept when the tree is generated again with different
+  subdivision parameters, and coarser sets of leaf bins can be extracted from
+  the tree without generating it again, so one tree can be shared by several
+  transfer schemes. The tree is reference counted for this purpose.
 */
 class Octree {
  public:
-  Octree(F2FScalar *points, int num_points, int min_point_count,
+  Octree(const F2FScalar *points, int num_points, int min_point_count,
          double min_edge_length, int max_tree_depth);
 
   ~Octree();
 
+  // Reference counting for sharing the tree between transfer schemes
+  void incref() { ref_count++; }
+  void decref() {
+    ref_count--;
+    if (ref_count <= 0) {
+      delete this;
+    }
+  }
+
+  // Set the number of threads used to sort the points
+  void setNumThreads(int num_threads);
+
+  // Print messages when generating and freeing the tree
+  void setVerbose(int verbose_flag) { verbose = verbose_flag; }
+
+  // Replace the points and the subdivision parameters of the tree. The tree
+  // must be generated again before it is used.
+  void setPoints(const F2FScalar *points, int num_points);
+  void setParameters(int min_point_count, double min_edge_length,
+                     int max_tree_depth);
+  int getMinPointCount() { return min_points; }
+
+  // Check whether the tree was built over the given points
+  int hasPoints(const F2FScalar *points, int num_points);
+
   // Create octree
   void generate();
 
+  // Find the leaf bins of the tree that would be generated with a larger
+  // minimum point count. Returns the number of bins, which are stored in
+  // Morton order so that their points are consecutive in point_ids.
+  int findLeafBins(int min_point_count, int *bins);
+
+  // Locate the K closest points sorted by distance, optionally including the
+  // points reflected across a plane of symmetry with the indices offset by
+  // the number of points
+  void locateKClosest(int K, int indices[], double dist[],
+                      const F2FScalar xpt[], int isymm = -1, double tol = 1e-7);
+
+  // Locate the K closest points to each point in a batch of query points
+  void locateKClosest(int K, int nxpts, const F2FScalar *xpts, int *indices,
+                      int isymm = -1, double tol = 1e-7, int num_threads = 1);
+
+  // Get the number of bytes allocated by the tree
+  size_t getMemoryFootprint();
+
   // Public tree data
+  int npts;             // number of points
   int nbins;            // total number of bins created
   int *bin_depths;      // depth of each bin in tree
   int *bin_parents;     // ID of parent of each bin
   double *bin_corners;  // min and max corners of bins
-  int *points_bins;     // ID of bin that each point is in
+  int *bin_start;       // first entry of point_ids in each bin
+  int *bin_end;         // one past the last entry of point_ids in each bin
+  int *points_bins;     // ID of the leaf bin that each point is in
   int nleaf;            // number of leaf bins
-  int *leaf_bins;       // IDs of leaf bins
+  int *leaf_bins;       // IDs of leaf bins in Morton order
+  int *leaf_ptr;        // pointer into point_ids for each leaf bin
+  int *point_ids;       // points sorted in Morton order
 
  private:
-  // Recursive function used by initialize to create octree
-  bool divide(int bin_num);
+  // Sort the points by their Morton codes
+  void sortPoints();
 
-  // Recursion exit conditions
+  // Grow the bin arrays to hold at least the given number of bins
+  void reserveBins(int size);
+
+  // Free the tree data
+  void clearBins();
+
+  // Recursively search the bins for points closer than the current K-th
+  // closest point
+  void search(int bin, const double x[], int K, int *nk, int indices[],
+              double dist[], int offset, int isymm, double tol);
+
+  // Subdivision exit conditions
   int min_points;
   double min_edge;
   int max_depth;
 
+  // Options and reference count
+  int nthreads;
+  int verbose;
+  int ref_count;
+
   // Private tree data
-  int npts;
-  double *Xpts;
+  double *Xpts;     // point locations
+  double *Xsorted;  // point locations in Morton order
+  uint64_t *codes;  // sorted Morton codes
+  int sorted;       // flag indicating the points have been sorted
+  int max_bins;     // allocated length of the bin arrays
+  int *bin_child;   // first child of each bin (-1 for leaves)
+  int *bin_nchild;  // number of children of each bin
 };
 
 #endif  // OCTREE_H
@@ -0,0 +1,121 @@
+#ifndef PURBF_H
+#define PURBF_H
+
+#include "TransferScheme.h"
+#include "mpi.h"
+
+/*
+  Partition-of-unity radial basis function (RBF) interpolation of loads and
+  displacements
+
+  The structural nodes are covered by overlapping spherical patches, one for
+  each leaf bin of an octree of the structural nodes. Each patch holds a local
+  thin plate spline interpolant of the structural nodes within its radius,
+  augmented with the linear polynomial terms in the directions spanned by
+  those nodes. The local interpolants are blended with Shepard weights built
+  from a Wendland C2 function of the distance to each patch center, so the
+  displacement of each aerodynamic node depends only on the structural nodes
+  of the patches that contain it. Aerodynamic nodes outside of all the
+  patches use the interpolant of the nearest patch. Coincident structural
+  nodes of a patch are merged into one node of its interpolant, which
+  interpolates the average of their values.
+
+  The displacement transfer is a sparse linear operator and the load transfer
+  is its transpose. Only the patches containing local aerodynamic nodes are
+  factored, so the setup is split between the processors, the memory scales
+  linearly with the number of nodes and the patches and products may be
+  threaded with OpenMP. The patches, their structural nodes and the blending
+  functions are fixed at initialization, while the operator and its
+  derivatives with respect to the node locations are evaluated at the current
+  node locations.
+*/
+class PURBF : public LDTransferScheme {
+ public:
+  // Constructor
+  PURBF(MPI_Comm global_comm, MPI_Comm struct_comm, int struct_root,
+        MPI_Comm aero_comm, int aero_root, int patch_points = 50,
+        double overlap = 1.5, int num_threads = 1);
+
+  // Destructor
+  ~PURBF();
+
+  // Initialization
+  void initialize();
+
+  // Set/get the number of threads used for the patches and products
+  void setNumThreads(int num_threads);
+  int getNumThreads();
+
+  // Get the number of patches whose interpolation system is singular
+  int getNumFailedPatches();
+
+  // Get the number of bytes allocated by the transfer scheme
+  size_t getMemoryFootprint();
+
+  // Load and displacement transfers
+  void transferDisps(const F2FScalar *struct_disps, F2FScalar *aero_disps);
+  void transferLoads(const F2FScalar *aero_loads, F2FScalar *struct_loads);
+
+  // Action of transpose Jacobians needed for solving adjoint system
+  void applydDduS(const F2FScalar *vecs, F2FScalar *prods);
+  void applydDduSTrans(const F2FScalar *vecs, F2FScalar *prods);
+  void applydLduS(const F2FScalar *vecs, F2FScalar *prods);
+  void applydLduSTrans(const F2FScalar *vecs, F2FScalar *prods);
+
+  // Action of Jacobians needed for assembling gradient from adjoint variables
+  void applydDdxA0(const F2FScalar *vecs, F2FScalar *prods);
+  void applydDdxS0(const F2FScalar *vecs, F2FScalar *prods);
+  void applydLdxA0(const F2FScalar *vecs, F2FScalar *prods);
+  void applydLdxS0(const F2FScalar *vecs, F2FScalar *prods);
+
+ protected:
+  // Assemble the displacement transfer if the nodes have moved
+  void updateInterpOperator();
+
+ private:
+  // Build and free the patches
+  void buildPatches();
+  void clearPatches();
+
+  // Functions for the local interpolants
+  int factorPatch(int p, F2FScalar *C, int *ipiv);
+  void evalPatchBasis(int p, const F2FScalar *x, F2FScalar *e);
+  void computeBlendWeights(int i, F2FScalar *w, F2FScalar *dw);
+
+  // Add the derivative of lam^{T}*H*U w.r.t. the node locations
+  void addShapeSens(F2FScalar scale, const F2FScalar *lam, const F2FScalar *U,
+                    F2FScalar *xa_sens, F2FScalar *xs_sens);
+
+  // Radial basis function of the squared distance and blending function
+  static F2FScalar thinPlateSpline(F2FScalar r2);
+  static F2FScalar wendlandC2(F2FScalar t);
+
+  // Patch parameters
+  int npatch_points;  // target number of structural nodes in each patch
+  double overlap;     // ratio of the patch radius to the octree bin size
+  int nthreads;       // number of threads
+  int nfailed;        // number of patches that could not be factored
+
+  // Patch data
+  int npatches;
+  double *patch_centers;  // center of each patch
+  double *patch_radii;    // radius of each patch
+  int *patch_ndims;       // number of linear polynomial terms of each patch
+  double *patch_dirs;     // directions of the linear polynomial terms
+  int *patch_ptr;         // pointer into patch_nodes for each patch
+  int *patch_nodes;       // structural nodes in each patch
+  int *patch_dup_ptr;     // pointer into patch_dups for each patch node
+  int *patch_dups;        // nodes coincident with each patch node
+
+  // Patches containing each aerodynamic node
+  int *aero_ptr;
+  int *aero_patches;
+
+  // Aerodynamic nodes in each patch and the corresponding entries of
+  // aero_patches
+  int *patch_aero_ptr;
+  int *patch_aero_nodes;
+  int *patch_aero_entries;
+};
+
+#endif  // PURBF_H
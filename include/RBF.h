@@ -10,6 +10,15 @@
   The basic algorithm and notation (names of variables) were taken from
   "Unified fluid–structure interpolation and mesh motion using radial basis
   functions" by T. C. S. Rendall and C. B. Allen.
+
+  The global bases (Gaussian, multiquadric, inverse multiquadric and thin
+  plate spline) form a dense interpolation matrix. The Wendland bases have
+  compact support, so the RBF matrix and the evaluation matrix at the
+  aerodynamic nodes are sparse. These are stored in CSR format and the
+  interpolation system is solved at each transfer with conjugate gradients,
+  so the memory scales linearly with the number of nodes. If the support
+  radius is not positive, it is set so that each sampled structural node has
+  at least 20 sampled nodes within its support.
 */
 class RBF : public LDTransferScheme {
  public:
@@ -18,19 +27,34 @@ class RBF : public LDTransferScheme {
     GAUSSIAN,
     MULTIQUADRIC,
     INVERSE_MULTIQUADRIC,
-    THIN_PLATE_SPLINE
+    THIN_PLATE_SPLINE,
+    WENDLAND_C0,
+    WENDLAND_C2,
+    WENDLAND_C4
   };
 
   // Constructor
   RBF(MPI_Comm global_comm, MPI_Comm struct_comm, int struct_root,
-      MPI_Comm aero_comm, int aero_root, RbfType rbf_type, int sampling_ratio);
+      MPI_Comm aero_comm, int aero_root, RbfType rbf_type, int sampling_ratio,
+      double support_radius = 0.0);
 
   // Destructor
   ~RBF();
 
+  // Select the centers greedily from the residual of test displacement
+  // fields until the relative residual is below tol
+  void setGreedySampling(double tol, int max_centers = 0);
+
+  // Keep the factorization of the interpolation system between calls to
+  // initialize and update it for the sampled nodes that have moved
+  void setFactorReuse(int reuse);
+
   // Initialization
   void initialize();
 
+  // Get the number of bytes allocated by the transfer scheme
+  size_t getMemoryFootprint();
+
   // Load and displacement transfers
   void transferDisps(const F2FScalar *struct_disps, F2FScalar *aero_disps);
   void transferLoads(const F2FScalar *aero_loads, F2FScalar *struct_loads);
@@ -53,20 +77,69 @@ class RBF : public LDTransferScheme {
 
   // Function to build interpolation matrix
   void buildInterpolationMatrix();
+  F2FScalar *buildInverseInterpSystem(int *_npoly);
+
+  // Stored LU factorization of the interpolation system for the global bases
+  int reuse_factor;
+  F2FScalar *C_lu;
+  int *C_ipiv;
+  F2FScalar *Xfactor;  // sampled nodes when the system was factored
+  void factorInterpSystem(const F2FScalar *Xsub);
+  int applyLowRankUpdate(int nmoved, const int *moved, const F2FScalar *Xsub,
+                         int nrhs, F2FScalar *Y);
+  void clearInterpFactor();
+
+  // Greedy center selection
+  double greedy_tol;
+  int greedy_max_centers;
+  void selectCentersGreedy(int nleaf, const int *leaf_ptr, const int *leaf_pts);
 
   // Pointer to radial basis function
   F2FScalar (*phi)(F2FScalar *x, F2FScalar *y);
 
+  // Compactly supported basis function of r/support_radius
+  F2FScalar (*phi_compact)(F2FScalar t);
+  double support_radius;
+
+  // Sparse interpolation data for the compactly supported bases
+  int npoly;         // number of polynomial terms
+  int poly_dims[3];  // coordinate of each linear polynomial term
+  int selectPolynomialTerms(const F2FScalar *Xsub, int *dims);
+  int *M_rowp;  // CSR RBF matrix between the sampled nodes
+  int *M_cols;
+  F2FScalar *M_vals;
+  int *A_rowp;  // CSR RBF evaluation matrix at the aero nodes
+  int *A_cols;
+  F2FScalar *A_vals;
+  F2FScalar *Ps;  // polynomial terms at the sampled nodes
+  F2FScalar *Pa;  // polynomial terms at the aero nodes
+  F2FScalar *Z;   // M^{-1}*P^{T}
+  F2FScalar *S;   // LU factorization of P*M^{-1}*P^{T}
+  int *S_ipiv;
+
+  // Functions for the compactly supported bases
+  void buildSparseInterpolation();
+  void clearSparseInterpolation();
+  void evalPolynomial(const F2FScalar *x, F2FScalar *p);
+  void solveRBFMatrix(int nrhs, const F2FScalar *b, F2FScalar *x);
+  void solveInterpSystem(int nrhs, const F2FScalar *ga, const F2FScalar *gp,
+                         F2FScalar *a, F2FScalar *bp);
+
   // Sampling data
   int denominator;  // one point sampled for every denominator points
   int nsub;         // number of structural points sampled
   int *sample_ids;  // IDs of the sampled points
+  int sampled_ns;   // number of structural points when sampled
+  void sampleStructNodes();
 
   // Functions defining types of radial basis functions
   static F2FScalar gaussian(F2FScalar *x, F2FScalar *y);
   static F2FScalar multiquadric(F2FScalar *x, F2FScalar *y);
   static F2FScalar invMultiquadric(F2FScalar *x, F2FScalar *y);
   static F2FScalar thinPlateSpline(F2FScalar *x, F2FScalar *y);
+  static F2FScalar wendlandC0(F2FScalar t);
+  static F2FScalar wendlandC2(F2FScalar t);
+  static F2FScalar wendlandC4(F2FScalar t);
 
   // Function to write out point clouds for Tecplot visualization
   void writeCloudsToTecplot();
@@ -0,0 +1,68 @@
+#ifndef SEGMENT_BVH_H
+#define SEGMENT_BVH_H
+
+#include "TransferScheme.h"
+
+/*
+  A bounding volume hierarchy (BVH) for closest segment queries over a set of
+  line segments in R^3, such as the elements of a beam.
+
+  The tree is stored in flat arrays in the same way as the k-d tree: the
+  segments are split at the median of their midpoints along the direction of
+  largest extent, each node stores the range of segments it contains, the
+  axis-aligned bounding box of those segments and the index of its first
+  child (the second child immediately follows). Queries visit the nearer
+  child first and skip nodes whose bounding box is farther than the closest
+  segment found so far, so they return the exact closest segment.
+*/
+class SegmentBVH {
+ public:
+  SegmentBVH(const F2FScalar *Xpts, int nsegs, const int *seg_nodes,
+             int leaf_size = 4);
+  ~SegmentBVH();
+
+  // Locate the closest segment and the parametric point on it in [-1, 1].
+  // Ties are broken in favor of the segment with the lowest index.
+  void locateClosest(const F2FScalar xpt[], int *seg, double *xi, double *dist);
+
+  // Locate the closest segment to each point in a batch of query points
+  void locateClosest(int nxpts, const F2FScalar *xpts, int *segs, double *xis,
+                     int num_threads = 1);
+
+  // Compute the squared distance from a point to a segment and the
+  // parametric point on the segment in [-1, 1]
+  static double segmentDistance(const double X1[], const double X2[],
+                                const double x[], double *xi);
+
+  // Get the number of bytes allocated by the tree
+  size_t getMemoryFootprint();
+
+ private:
+  // Count the nodes needed for the given number of segments
+  int countNodes(int n);
+
+  // Recursively build the tree over the segments in [start, end)
+  void build(int node, int start, int end, int *next_node);
+
+  // Recursively search the tree
+  void search(int node, const double x[], int *seg, double *xi, double *dist);
+
+  // Squared distance from a point to the bounding box of a node
+  double boxDistance(int node, const double x[]);
+
+  // The number of segments and the maximum number of segments in a leaf
+  int nsegs;
+  int leaf_size;
+
+  double *X;  // Segment end points (6 per segment) in tree order
+  int *perm;  // Index of each segment in the original array
+
+  // The flat node arrays
+  int num_nodes;
+  int *node_start;      // First segment in the node
+  int *node_end;        // One past the last segment in the node
+  int *node_child;      // First child of the node (-1 for leaves)
+  double *node_bounds;  // Min and max corners of the node bounding box
+};
+
+#endif  // SEGMENT_BVH_H
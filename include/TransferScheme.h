@@ -2,6 +2,7 @@
 #define TRANSFER_SCHEME_H
 
 #include <complex>
+#include <cstddef>
 
 #include "mpi.h"
 
@@ -22,6 +23,15 @@ typedef F2FComplex F2FScalar;
 typedef F2FReal F2FScalar;
 #endif
 
+/*
+  Define the single precision scalar type used to store data compactly
+*/
+#ifdef FUNTOFEM_USE_COMPLEX
+typedef std::complex<float> F2FSingleScalar;
+#else
+typedef float F2FSingleScalar;
+#endif
+
 // Define the real part function for the complex data type
 inline double F2FRealPart(const F2FComplex &c) { return real(c); }
 
@@ -47,6 +57,15 @@ inline F2FComplex F2Ffabs(const F2FComplex &c) {
   return c;
 }
 
+// Persistent work arrays owned by each transfer scheme
+class TransferWorkspace;
+
+// Linear interpolation operator assembled by the linear transfer schemes
+class InterpOperator;
+
+// Octree of the structural nodes that may be shared between transfer schemes
+class Octree;
+
 class TransferScheme {
  public:
   TransferScheme(MPI_Comm global_comm, MPI_Comm struct_comm, int struct_root,
@@ -69,6 +88,33 @@ class TransferScheme {
     Xs = NULL;        // Global array of structural nodes
     Xs_local = NULL;  // Local array of structural nodes
 
+    workspace = NULL;  // Work arrays, allocated on first use
+
+    interp = NULL;  // Interpolation operator, assembled by linear schemes
+    interp_update = 0;
+
+    search_type = LOCATE_POINT_SEARCH;
+    search_threads = 1;
+    struct_octree = NULL;
+
+    use_struct_halo = 0;
+    halo_nodes = NULL;
+    halo_gather_comm = MPI_COMM_NULL;
+    halo_scatter_comm = MPI_COMM_NULL;
+    halo_nrecv = halo_nsend = 0;
+    halo_recv_count = halo_recv_ptr = NULL;
+    halo_send_count = halo_send_ptr = halo_send_nodes = NULL;
+
+    conn_reuse = 0;
+    conn_na = conn_ns = conn_nn = 0;
+    conn_isymm = -1;
+    conn_ref = NULL;
+    conn_Xa = conn_Xs = conn_gap = NULL;
+
+    precision = FULL_PRECISION;
+    Xa_single = Xs_single = NULL;
+    single_nodes_update = 1;
+
     object_id = object_count;
     object_count++;
   }
@@ -83,6 +129,33 @@ class TransferScheme {
   // Initialization
   virtual void initialize() = 0;
 
+  // Nearest neighbor search used to build the aerostructural connectivity
+  enum SearchType { LOCATE_POINT_SEARCH, KD_TREE_SEARCH, OCTREE_SEARCH };
+  void setSearchType(SearchType type, int num_threads = 1);
+
+  // Share an octree of the structural nodes with other transfer schemes. It
+  // is used by the octree search and by the schemes that sample or partition
+  // the structural nodes with an octree.
+  void setStructOctree(Octree *octree);
+
+  // Store only the structural nodes connected to the local aerodynamic nodes
+  // instead of the full structural mesh (used by the MELD schemes)
+  void setDistributedStructMesh(int distributed) {
+    use_struct_halo = distributed;
+  }
+
+  // Keep the aerostructural connectivity in initialize() when the nodes have
+  // moved too little to change the nearest structural nodes (used by the MELD
+  // schemes)
+  void setConnReuse(int reuse);
+
+  // Store the node locations and the per-node transfer data in single
+  // precision, while accumulating the transfers in full precision (used by
+  // the MELD schemes)
+  enum Precision { FULL_PRECISION, MIXED_PRECISION };
+  virtual void setPrecision(Precision prec) { precision = prec; }
+  Precision getPrecision() { return precision; }
+
   // Get information from the transfer object about the lengths of the expected
   // arrays
   int getStructNodeDof() { return struct_node_dof; }
@@ -92,7 +165,21 @@ class TransferScheme {
   int getLocalAeroArrayLen() { return aero_node_dof * na; }
   int getLocalStructArrayLen() { return struct_node_dof * ns_local; }
 
+  // Get the interpolation operator from the structural to the aerodynamic
+  // nodes in block CSR format, with the columns numbered by the global
+  // structural node. The size returns 0 if the scheme is not linear.
+  int getInterpOperatorSize(int *bs, int *nrows, int *ncols, int *nnz);
+  void getInterpOperator(int *rowp, int *cols, F2FScalar *vals);
+
+  // Get the number of bytes allocated by the transfer scheme
+  virtual size_t getMemoryFootprint();
+  size_t getWorkspaceMemoryFootprint();
+
  protected:
+  // Assemble the interpolation operator if the node locations have changed
+  // (only used by the linear schemes)
+  virtual void updateInterpOperator() {}
+
   // Distribute the structural mesh if mesh_update is true on one of the
   // processors.
   void distributeStructuralMesh();
@@ -115,14 +202,57 @@ class TransferScheme {
   void aeroGatherBcast(int local_len, const F2FScalar *local_data,
                        int global_len, F2FScalar *global_data);
 
-  // Build an aerostructural connectivity through LocatePoint search, linking
-  // each aerodynamic node with a specified number of nearest structural nodes
+  // Get the octree of the structural nodes with at most the given number of
+  // points in each leaf bin, generating it if needed
+  Octree *getStructOctree(int min_point_count);
+
+  // Build an aerostructural connectivity through a nearest neighbor search,
+  // linking each aerodynamic node with a specified number of nearest
+  // structural nodes
   void computeAeroStructConn(int isymm, int nn, int *conn, double tol = 1e-7);
+  void computeAeroStructConn(int npts, const F2FScalar *pts, int isymm, int nn,
+                             int *conn, double tol = 1e-7);
+
+  // Compute the aerostructural connectivity, keeping the connectivity of the
+  // aerodynamic nodes that have not moved enough to change it. Returns the
+  // number of aerodynamic nodes that were searched again.
+  int updateAeroStructConn(int isymm, int nn, int *conn, double tol = 1e-7);
 
   // Computes weights of structural nodes based on an exponential decay
   void computeWeights(double beta, int isymm, int nn, const int *conn,
                       F2FScalar *W, double tol = 1e-7);
 
+  // Replace the global structural mesh with the halo of structural nodes
+  // referenced by the connectivity, or discard the halo
+  void buildStructHalo(int nn, int *conn);
+  void clearStructHalo();
+
+  // Indices of the persistent scalar work arrays
+  enum WorkArrayIndex {
+    WORK_STRUCT_NODES,  // Displaced structural node locations
+    WORK_STRUCT_VECS,   // Global image of a structural input vector
+    WORK_STRUCT_PRODS,  // Global structural output (one copy per thread)
+    WORK_COLUMN_VEC,    // Single input column of a multi-vector product
+    WORK_COLUMN_PROD,   // Single output column of a multi-vector product
+    WORK_NODE_RHS,      // Per-node right-hand sides (one copy per thread)
+    WORK_HALO_BUFFER    // Packed structural values sent to/from the halo
+  };
+
+  // Indices of the persistent integer work arrays
+  enum IntWorkArrayIndex {
+    WORK_COMM_COUNTS,       // Number of values on each processor
+    WORK_COMM_DISPS,        // Offsets of the values on each processor
+    WORK_HALO_SEND_COUNTS,  // Number of values sent to each neighbor
+    WORK_HALO_SEND_DISPS,   // Offsets of the values sent to each neighbor
+    WORK_HALO_RECV_COUNTS,  // Number of values received from each neighbor
+    WORK_HALO_RECV_DISPS    // Offsets of the values from each neighbor
+  };
+
+  // Get persistent work arrays of at least the given size. These are sized
+  // in initialize() and are only reallocated if a larger size is requested.
+  F2FScalar *getWorkArray(int index, int size);
+  int *getIntWorkArray(int index, int size);
+
   // Communicators
   MPI_Comm global_comm;  // Global communicator
   MPI_Comm struct_comm;  // Communicator for the structures
@@ -135,6 +265,11 @@ class TransferScheme {
   // Keep track if the mesh has been updated
   int mesh_update;
 
+  // The interpolation operator for linear schemes, and whether the node
+  // locations have changed since it was assembled
+  InterpOperator *interp;
+  int interp_update;
+
   // Aerodynamic data
   F2FScalar *Xa;  // Aerodynamics node locations (x, y, z) at each node
   int na;         // Number of local aerodynamic nodes
@@ -154,9 +289,77 @@ class TransferScheme {
   int ns;        // Number of global structural nodes across all struct procs
   int ns_local;  // Number of local structural nodes on this processor
 
+  // Nearest neighbor search settings
+  SearchType search_type;
+  int search_threads;
+
+  // Octree of the structural nodes (possibly shared with other schemes)
+  Octree *struct_octree;
+
+  // Use the structural halo instead of the global structural mesh
+  int use_struct_halo;
+
+  // Precision of the stored transfer data, and single precision copies of
+  // the node locations that are read by the mixed precision transfers
+  Precision precision;
+  F2FSingleScalar *Xa_single;
+  F2FSingleScalar *Xs_single;
+  int single_nodes_update;  // Flag indicating that the copies are outdated
+
+  // Copy the node locations to single precision if they have changed, or
+  // free the copies
+  void updateSingleNodes();
+  void clearSingleNodes();
+
   // Transfer scheme object counter and ID
   static int object_count;
   int object_id;
+
+ private:
+  // Persistent work arrays
+  TransferWorkspace *workspace;
+
+  // Exchange values between the owned structural nodes and the halo
+  void structHaloGather(int bs, const F2FScalar *local_data,
+                        F2FScalar *halo_data);
+  void structHaloAddScatter(int bs, const F2FScalar *halo_data,
+                            F2FScalar *local_data);
+  void structHaloBlockSize(int global_len, int local_len, int *bs);
+
+  // Compute the connectivity and the gap between the distances to the nn-th
+  // and (nn+1)-th nearest structural nodes of each point
+  void computeConnGap(int npts, const F2FScalar *pts, int isymm, int nn,
+                      int *conn, double *gap, double tol);
+
+  // Free the data used to check whether the connectivity can be kept
+  void clearConnReference();
+
+  // Structural halo data. When the halo is built, Xs and ns refer to the
+  // halo nodes and halo_nodes stores their global indices.
+  int *halo_nodes;             // Global index of each halo node
+  MPI_Comm halo_gather_comm;   // Graph from the owners to the halo
+  MPI_Comm halo_scatter_comm;  // Graph from the halo to the owners
+  int halo_nrecv;              // Number of owners sending to the halo
+  int *halo_recv_count;        // Halo nodes received from each owner
+  int *halo_recv_ptr;          // Offset of the nodes from each owner
+  int halo_nsend;              // Number of processors requesting nodes
+  int *halo_send_count;        // Nodes sent to each processor
+  int *halo_send_ptr;          // Offset of the nodes sent to each processor
+  int *halo_send_nodes;        // Local index of each node sent
+
+  // Reference data for keeping the aerostructural connectivity. The node
+  // locations are stored from the last full nearest neighbor search, along
+  // with the gap between the distances to the nn-th and (nn+1)-th nearest
+  // nodes of each aerodynamic node.
+  int conn_reuse;    // Flag to keep the connectivity when it is valid
+  int conn_na;       // Number of aerodynamic nodes in the reference
+  int conn_ns;       // Number of structural nodes in the reference
+  int conn_nn;       // Number of nearest nodes in the reference
+  int conn_isymm;    // Symmetry index of the reference
+  int *conn_ref;     // Connectivity with the global structural nodes
+  double *conn_Xa;   // Aerodynamic node locations of the reference
+  double *conn_Xs;   // Structural node locations of the reference
+  double *conn_gap;  // Gap between the nn-th and (nn+1)-th distances
 };
 
 class LDTransferScheme : public TransferScheme {
@@ -167,6 +370,7 @@ class LDTransferScheme : public TransferScheme {
                        aero_root, struct_node_dof, 3) {
     Us = NULL;
     Fa = NULL;
+    rotation_type = SVD_ROTATION;
   }
   virtual ~LDTransferScheme() {
     if (Us) {
@@ -206,6 +410,38 @@ class LDTransferScheme : public TransferScheme {
   virtual void applydLdxA0(const F2FScalar *vecs, F2FScalar *prods) = 0;
   virtual void applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) = 0;
 
+  // Set the method used to compute the rotations from the covariance matrices
+  enum RotationType { SVD_ROTATION, QUATERNION_ROTATION };
+  void setRotationType(RotationType type) { rotation_type = type; }
+
+  // Action of the Jacobians on a block of nvecs vectors stored row-wise, so
+  // that entry k of vector i is stored in vecs[nvecs * i + k]. By default,
+  // these apply the single-vector products one column at a time.
+  virtual void applydDduSMulti(int nvecs, const F2FScalar *vecs,
+                               F2FScalar *prods);
+  virtual void applydDduSTransMulti(int nvecs, const F2FScalar *vecs,
+                                    F2FScalar *prods);
+  virtual void applydLduSMulti(int nvecs, const F2FScalar *vecs,
+                               F2FScalar *prods);
+  virtual void applydLduSTransMulti(int nvecs, const F2FScalar *vecs,
+                                    F2FScalar *prods);
+  virtual void applydLdfAMulti(int nvecs, const F2FScalar *vecs,
+                               F2FScalar *prods) {
+    applydDduSTransMulti(nvecs, vecs, prods);
+  }
+  virtual void applydLdfATransMulti(int nvecs, const F2FScalar *vecs,
+                                    F2FScalar *prods) {
+    applydDduSMulti(nvecs, vecs, prods);
+  }
+  virtual void applydDdxA0Multi(int nvecs, const F2FScalar *vecs,
+                                F2FScalar *prods);
+  virtual void applydDdxS0Multi(int nvecs, const F2FScalar *vecs,
+                                F2FScalar *prods);
+  virtual void applydLdxA0Multi(int nvecs, const F2FScalar *vecs,
+                                F2FScalar *prods);
+  virtual void applydLdxS0Multi(int nvecs, const F2FScalar *vecs,
+                                F2FScalar *prods);
+
   // Convert aero displacements into equivalent rigid + elastic deformation
   void transformEquivRigidMotion(const F2FScalar *aero_disps, F2FScalar *R,
                                  F2FScalar *t, F2FScalar *u);
@@ -213,6 +449,9 @@ class LDTransferScheme : public TransferScheme {
   void applydRdxA0Trans(const F2FScalar *aero_disps, const F2FScalar *vecs,
                         F2FScalar *prods);
 
+  // Get the number of bytes allocated by the transfer scheme
+  virtual size_t getMemoryFootprint();
+
   // Routines to test necessary functionality of transfer scheme
   int testAllDerivatives(const F2FScalar *struct_disps,
                          const F2FScalar *aero_loads, const F2FScalar h,
@@ -261,12 +500,28 @@ class LDTransferScheme : public TransferScheme {
   F2FScalar xa0bar[3];
   F2FScalar xabar[3];
 
-  // Auxiliary function for computing rotation from covariance matrix
+  // Method used to compute the rotations
+  RotationType rotation_type;
+
+  // Number of covariance matrices processed together by computeRotations
+  static const int ROTATION_BLOCK_SIZE = 8;
+
+  // Auxiliary functions for computing rotations from covariance matrices
   void computeRotation(const F2FScalar *H, F2FScalar *R, F2FScalar *S);
+  void computeRotations(int n, const F2FScalar *H, F2FScalar *R, F2FScalar *S);
+  void completeRotation(const F2FScalar *H, F2FScalar *R, F2FScalar *S);
+  static void computeQuaternionRotations(int n, const double *H, double *R,
+                                         int *fail);
 
   // Auxiliary functions for load transfer (needed in complex compute
   // rotation)
   void assembleM1(const F2FScalar *R, const F2FScalar *S, F2FScalar *A);
+
+  // Apply a single-vector product to each column of a block of vectors
+  void applyColumnwise(void (LDTransferScheme::*apply)(const F2FScalar *,
+                                                       F2FScalar *),
+                       int nvecs, int vec_len, const F2FScalar *vecs,
+                       int prod_len, F2FScalar *prods);
 };
 
 class ThermalTransfer : public TransferScheme {
@@ -299,6 +554,21 @@ class ThermalTransfer : public TransferScheme {
   virtual void applydQdqA(const F2FScalar *vecs, F2FScalar *prods) = 0;
   virtual void applydQdqATrans(const F2FScalar *vecs, F2FScalar *prods) = 0;
 
+  // Action of the Jacobians on a block of nvecs vectors stored row-wise, so
+  // that entry k of vector i is stored in vecs[nvecs * i + k]. By default,
+  // these apply the single-vector products one column at a time.
+  virtual void applydTdtSMulti(int nvecs, const F2FScalar *vecs,
+                               F2FScalar *prods);
+  virtual void applydTdtSTransMulti(int nvecs, const F2FScalar *vecs,
+                                    F2FScalar *prods);
+  virtual void applydQdqAMulti(int nvecs, const F2FScalar *vecs,
+                               F2FScalar *prods);
+  virtual void applydQdqATransMulti(int nvecs, const F2FScalar *vecs,
+                                    F2FScalar *prods);
+
+  // Get the number of bytes allocated by the transfer scheme
+  virtual size_t getMemoryFootprint();
+
   // Test Functions
   int testAllDerivatives(const F2FScalar *struct_temps,
                          const F2FScalar *aero_flux, const F2FScalar h,
@@ -322,6 +592,12 @@ class ThermalTransfer : public TransferScheme {
 
   // Structural data
   F2FScalar *Ts;
+
+  // Apply a single-vector product to each column of a block of vectors
+  void applyColumnwise(void (ThermalTransfer::*apply)(const F2FScalar *,
+                                                      F2FScalar *),
+                       int nvecs, int vec_len, const F2FScalar *vecs,
+                       int prod_len, F2FScalar *prods);
 };
 
 // Functions for vector and matrix math
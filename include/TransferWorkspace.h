@@ -0,0 +1,41 @@
+#ifndef TRANSFER_WORKSPACE_H
+#define TRANSFER_WORKSPACE_H
+
+#include <cstddef>
+
+#include "TransferScheme.h"
+
+/*
+  A set of persistent work arrays owned by a transfer scheme
+
+  Each array is identified by an index and is only reallocated when a larger
+  size is requested, so the transfers and Jacobian-vector products can reuse
+  the same memory from call to call instead of allocating global-length
+  arrays every time. The transfer schemes size the arrays in initialize().
+*/
+class TransferWorkspace {
+ public:
+  TransferWorkspace();
+  ~TransferWorkspace();
+
+  // Maximum number of arrays of each type
+  static const int MAX_NUM_ARRAYS = 8;
+
+  // Get a scalar or integer array of at least the given size
+  F2FScalar *getScalarArray(int index, int size);
+  int *getIntArray(int index, int size);
+
+  // Free all the arrays
+  void clear();
+
+  // Get the number of bytes allocated for the work arrays
+  size_t getMemoryFootprint();
+
+ private:
+  F2FScalar *scalar_arrays[MAX_NUM_ARRAYS];
+  int scalar_sizes[MAX_NUM_ARRAYS];
+  int *int_arrays[MAX_NUM_ARRAYS];
+  int int_sizes[MAX_NUM_ARRAYS];
+};
+
+#endif  // TRANSFER_WORKSPACE_H
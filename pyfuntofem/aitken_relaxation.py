@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+
+
+class AitkenRelaxation(object):
+    def __init__(
+        self,
+        comm,
+        theta_init=0.125,
+        theta_min=0.01,
+        theta_max=1.0,
+        mode="field",
+        tol=1e-13,
+    ):
+        """
+        Aitken under-relaxation of a set of coupling fields such as the structural
+        displacements and temperatures of all the bodies, or the columns of their
+        adjoint counterparts.
+
+        Each field is an array of shape (n,) or (n, ncols) that is distributed across
+        the processors. All the fields passed to :meth:`relax` must have the same
+        number of columns, and each column is relaxed with its own theta so that the
+        adjoint variables for each function are treated as separate problems. The
+        inner products for all the fields and columns are summed across the
+        processors with a single reduction, so theta is identical on every rank.
+
+        Parameters
+        ----------
+        comm: MPI.comm
+            MPI communicator
+        theta_init: float or list of float
+            Initial value of theta for the Aitken under-relaxation, either for all
+            the fields or for each field
+        theta_min: float
+            Minimum value of theta for the Aitken under-relaxation
+        theta_max: float
+            Maximum value of theta for the Aitken under-relaxation
+        mode: str
+            'field' to compute an independent theta for each field or 'global' to
+            compute a single theta from the inner products summed over all the
+            fields, which starts from the first value of theta_init
+        tol: float
+            Theta is only updated when the squared norm of the change in the update
+            exceeds this value times the squared norm of the update, so that the
+            relaxation also adapts to the small updates after a warm start
+        """
+
+        if mode not in ("field", "global"):
+            raise ValueError("Unknown Aitken relaxation mode '%s'" % mode)
+
+        self.comm = comm
+        self.theta_init = theta_init
+        self.theta_min = theta_min
+        self.theta_max = theta_max
+        self.mode = mode
+        self.tol = tol
+        self.reset()
+
+        return
+
+    def reset(self, fields=None):
+        """
+        Discard the relaxation history and reset theta to its initial value
+
+        Parameters
+        ----------
+        fields: list of np.ndarray
+            The starting values of the fields. If not given, the fields are assumed
+            to start from zero.
+        """
+
+        self.theta = None
+        self.prev_update = None
+        self.aitken_vecs = None
+        if fields is not None:
+            self.aitken_vecs = [self._as_columns(f).copy() for f in fields]
+
+        return
+
+    def _as_columns(self, field):
+        """
+        View a field as a two-dimensional array with one column per vector
+        """
+
+        if field.ndim == 1:
+            return field.reshape((-1, 1))
+        return field
+
+    def relax(self, fields):
+        """
+        Replace each field, in place, with the relaxed combination of the new value
+        and the previous relaxed value
+
+        Parameters
+        ----------
+        fields: list of np.ndarray
+            The new values of the coupling fields
+
+        Returns
+        -------
+        norm: float
+            Global norm of the unrelaxed update of all the fields, which is the
+            change in the fields before the relaxation
+        """
+
+        x = [self._as_columns(f) for f in fields]
+        nfields = len(x)
+        ncols = x[0].shape[1] if nfields > 0 else 1
+
+        if self.aitken_vecs is None:
+            self.aitken_vecs = [np.zeros_like(xf) for xf in x]
+        if self.prev_update is None:
+            self.prev_update = [np.zeros_like(xf) for xf in x]
+        if self.theta is None:
+            theta_init = np.reshape(np.real(self.theta_init), (-1, 1))
+            if self.mode == "global":
+                theta_init = theta_init[:1]
+            self.theta = theta_init * np.ones((nfields, ncols))
+
+        # Compute the local inner products for each field and column, then sum
+        # them across the processors with a single reduction
+        updates = []
+        local = np.zeros((3, nfields, ncols))
+        for k in range(nfields):
+            up = x[k] - self.aitken_vecs[k]
+            dup = np.real(up - self.prev_update[k])
+            local[0, k] = np.einsum("nc,nc->c", dup, np.real(up))
+            local[1, k] = np.einsum("nc,nc->c", dup, dup)
+            local[2, k] = np.einsum("nc,nc->c", np.real(up), np.real(up))
+            updates.append(up)
+
+        dots = self.comm.allreduce(local)
+        norm = np.sqrt(np.sum(dots[2]))
+
+        if self.mode == "global":
+            dots = np.broadcast_to(np.sum(dots, axis=1, keepdims=True), dots.shape)
+
+        # Only update theta for the columns where the update changed
+        mask = dots[1] > self.tol * dots[2]
+        ratio = np.zeros((nfields, ncols))
+        ratio[mask] = dots[0][mask] / dots[1][mask]
+        theta = np.where(mask, self.theta * (1.0 - ratio), self.theta)
+        self.theta = np.clip(theta, self.theta_min, self.theta_max)
+
+        for k in range(nfields):
+            self.aitken_vecs[k] += self.theta[k] * updates[k]
+            self.prev_update[k] = updates[k]
+            x[k][:] = self.aitken_vecs[k]
+
+        return norm
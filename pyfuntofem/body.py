@@ -22,6 +22,8 @@ limitations under the License.
 
 import numpy as np
 from .base import Base
+from .aitken_relaxation import AitkenRelaxation
+from .time_history import TimeHistory
 from mpi4py import MPI
 from funtofem import TransferScheme
 
@@ -146,11 +148,7 @@ class Body(Base):
         self.theta_min = 0.01
         self.theta_max = 1.0
 
-        self.aitken_init = None
-        self.aitken_vec = None
-        self.aitken_therm_vec = None
-        self.up_prev = None
-        self.therm_up_prev = None
+        self.aitken = None
 
         # forward variables
         self.struct_disps = {}
@@ -167,6 +165,9 @@ class Body(Base):
         self.aero_temps = {}
         self.aero_heat_flux = {}
 
+        # storage options of the time histories of the unsteady scenarios
+        self.time_history = None
+
         return
 
     def initialize_struct_nodes(self, struct_X, struct_id=None):
@@ -281,6 +282,8 @@ class Body(Base):
         if transfer_options is None:
             transfer_options = {"scheme": "meld", "isym": -1, "beta": 0.5, "npts": 200}
 
+        self.comm = comm
+
         # Initialize the transfer and thermal transfer objects to None
         self.transfer = None
         self.thermal_transfer = None
@@ -319,12 +322,69 @@ class Body(Base):
                         == "inverse multiquadric"
                     ):
                         basis = TransferScheme.PY_INVERSE_MULTIQUADRIC
+                    elif transfer_options["basis function"].lower() == "wendland c0":
+                        basis = TransferScheme.PY_WENDLAND_C0
+                    elif transfer_options["basis function"].lower() == "wendland c2":
+                        basis = TransferScheme.PY_WENDLAND_C2
+                    elif transfer_options["basis function"].lower() == "wendland c4":
+                        basis = TransferScheme.PY_WENDLAND_C4
                     else:
                         print("Unknown RBF basis function for body number")
                         quit()
 
+                # Support radius of the Wendland functions (0 picks a default)
+                support_radius = 0.0
+                if "support radius" in transfer_options:
+                    support_radius = transfer_options["support radius"]
+
                 self.transfer = TransferScheme.pyRBF(
-                    comm, struct_comm, struct_root, aero_comm, aero_root, basis, 1
+                    comm,
+                    struct_comm,
+                    struct_root,
+                    aero_comm,
+                    aero_root,
+                    basis,
+                    1,
+                    support_radius,
+                )
+
+                # Greedy selection of the RBF centers
+                if "center tolerance" in transfer_options:
+                    max_centers = 0
+                    if "max centers" in transfer_options:
+                        max_centers = transfer_options["max centers"]
+                    self.transfer.setGreedySampling(
+                        transfer_options["center tolerance"], max_centers
+                    )
+
+                # Keep the factorization between shape updates
+                if "reuse factorization" in transfer_options:
+                    self.transfer.setFactorReuse(
+                        transfer_options["reuse factorization"]
+                    )
+
+            elif transfer_options["scheme"].lower() == "purbf":
+                # defaults
+                patch_points = 50  # Number of structural nodes in each patch
+                overlap = 1.5  # Ratio of the patch radius to the octree bin
+                num_threads = 1  # Number of threads for the patches
+
+                if "patch points" in transfer_options:
+                    patch_points = transfer_options["patch points"]
+                if "overlap" in transfer_options:
+                    overlap = transfer_options["overlap"]
+                if "threads" in transfer_options:
+                    num_threads = transfer_options["threads"]
+
+                self.transfer = TransferScheme.pyPURBF(
+                    comm,
+                    struct_comm,
+                    struct_root,
+                    aero_comm,
+                    aero_root,
+                    patch_points,
+                    overlap,
+                    num_threads,
                 )
 
             elif transfer_options["scheme"].lower() == "meld":
@@ -332,6 +392,7 @@ class Body(Base):
                 isym = -1  # No symmetry
                 beta = 0.5  # Decay factor
                 num_nearest = 200  # Number of nearest neighbours
+                num_threads = 1  # Number of threads for the aero node loops
 
                 if "isym" in transfer_options:
                     isym = transfer_options["isym"]
@@ -339,6 +400,8 @@ class Body(Base):
                     beta = transfer_options["beta"]
                 if "npts" in transfer_options:
                     num_nearest = transfer_options["npts"]
+                if "threads" in transfer_options:
+                    num_threads = transfer_options["threads"]
 
                 self.transfer = TransferScheme.pyMELD(
                     comm,
@@ -349,7 +412,39 @@ class Body(Base):
                     isym,
                     num_nearest,
                     beta,
+                    num_threads,
                 )
+                self._set_meld_options(self.transfer, transfer_options)
+
+                # Storage of the factored systems for the load transfer
+                if "factor storage" in transfer_options:
+                    storage = transfer_options["factor storage"].lower()
+                    if storage == "double":
+                        self.transfer.setFactorStorage(TransferScheme.PY_STORE_FACTOR)
+                    elif storage == "single":
+                        self.transfer.setFactorStorage(
+                            TransferScheme.PY_STORE_SINGLE_FACTOR
+                        )
+                    elif storage == "recompute":
+                        self.transfer.setFactorStorage(
+                            TransferScheme.PY_RECOMPUTE_FACTOR
+                        )
+                    else:
+                        print("Error: Unknown factor storage for body")
+                        quit()
+
+                # Method used to compute the rotations of the aero nodes
+                if "rotation" in transfer_options:
+                    rotation = transfer_options["rotation"].lower()
+                    if rotation == "svd":
+                        self.transfer.setRotationType(TransferScheme.PY_SVD_ROTATION)
+                    elif rotation == "quaternion":
+                        self.transfer.setRotationType(
+                            TransferScheme.PY_QUATERNION_ROTATION
+                        )
+                    else:
+                        print("Error: Unknown rotation method for body")
+                        quit()
 
             elif transfer_options["scheme"].lower() == "linearized meld":
                 # defaults
@@ -374,13 +469,17 @@ class Body(Base):
                     num_nearest,
                     beta,
                 )
+                self._set_meld_options(self.transfer, transfer_options)
 
             elif transfer_options["scheme"].lower() == "beam":
-                conn = transfer_options["conn"]
                 nelems = transfer_options["nelems"]
                 order = transfer_options["order"]
                 ndof = transfer_options["ndof"]
 
+                # The scheme takes the connectivity with one row per element
+                conn = np.ascontiguousarray(transfer_options["conn"], dtype=np.intc)
+                conn = conn.reshape(nelems, order)
+
                 self.xfer_ndof = ndof
                 self.transfer = TransferScheme.pyBeamTransfer(
                     comm,
@@ -389,10 +488,12 @@ class Body(Base):
                     aero_comm,
                     aero_root,
                     conn,
-                    nelems,
-                    order,
                     ndof,
                 )
+
+                # Threads for the closest element search of the aero nodes
+                if "threads" in transfer_options:
+                    self.transfer.setNumThreads(transfer_options["threads"])
             else:
                 print("Error: Unknown transfer scheme for body")
                 quit()
@@ -427,10 +528,20 @@ class Body(Base):
                     num_nearest,
                     beta,
                 )
+                self._set_meld_options(self.thermal_transfer, transfer_options)
             else:
                 print("Error: Unknown thermal transfer scheme for body")
                 quit()
 
+        # Share one octree of the structural nodes between the transfer schemes
+        self.struct_octree = TransferScheme.pyOctree()
+        for transfer in [self.transfer, self.thermal_transfer]:
+            if isinstance(
+                transfer,
+                (TransferScheme.pyTransferScheme, TransferScheme.pyThermalTransfer),
+            ):
+                transfer.setStructOctree(self.struct_octree)
+
         # Set the node locations
         self.update_transfer()
 
@@ -444,6 +555,57 @@ class Body(Base):
 
         return
 
+    def _set_meld_options(self, transfer, transfer_options):
+        """
+        Set the options shared by the MELD schemes. The 'search' option sets the
+        nearest neighbor search used to build the connectivity: 'locate point'
+        (default), 'kd-tree' or 'octree'. The octree is shared with the other
+        transfer scheme of the body. The k-d tree and octree queries use the
+        number of threads given by the 'threads' option. The 'distributed struct
+        mesh' option stores only the structural nodes connected to the local
+        aerodynamic nodes on each processor. The 'reuse connectivity' option
+        keeps the connectivity when the nodes move too little to change it. The
+        'precision' option stores the weights and node data in single precision
+        with 'mixed' or in full precision with 'full' (default); linearized MELD
+        always uses full precision.
+        """
+
+        if "distributed struct mesh" in transfer_options:
+            transfer.setDistributedStructMesh(
+                transfer_options["distributed struct mesh"]
+            )
+
+        if "reuse connectivity" in transfer_options:
+            transfer.setConnReuse(transfer_options["reuse connectivity"])
+
+        if "precision" in transfer_options:
+            precision = transfer_options["precision"].lower()
+            if precision == "mixed":
+                transfer.setPrecision(TransferScheme.PY_MIXED_PRECISION)
+            elif precision == "full":
+                transfer.setPrecision(TransferScheme.PY_FULL_PRECISION)
+            else:
+                print("Error: Unknown precision for body")
+                quit()
+
+        if "search" in transfer_options:
+            search = transfer_options["search"].lower()
+            num_threads = 1
+            if "threads" in transfer_options:
+                num_threads = transfer_options["threads"]
+
+            if search == "kd-tree":
+                transfer.setSearchType(TransferScheme.PY_KD_TREE_SEARCH, num_threads)
+            elif search == "octree":
+                transfer.setSearchType(TransferScheme.PY_OCTREE_SEARCH, num_threads)
+            elif search == "locate point":
+                transfer.setSearchType(TransferScheme.PY_LOCATE_POINT_SEARCH)
+            else:
+                print("Error: Unknown nearest neighbor search for body")
+                quit()
+
+        return
+
     def update_transfer(self):
         """
         Update the positions of the nodes in transfer schemes
@@ -490,7 +652,56 @@ class Body(Base):
 
         super(Body, self).add_variable(vartype, var)
 
-    def initialize_variables(self, scenario):
+    def set_time_history(
+        self,
+        storage="list",
+        directory=None,
+        cache_size=4,
+        read_ahead=2,
+        asynchronous=True,
+    ):
+        """
+        Set how the loads, displacements, heat flux and temperatures of the unsteady
+        scenarios are stored over the time steps. Takes effect at the next analysis.
+
+        Parameters
+        ----------
+        storage: str
+            'list' (default) for a list of arrays, 'array' for one contiguous array
+            per variable, or 'file' for a memory-mapped file per variable
+        directory: str
+            directory of the files with 'file' storage
+        cache_size: int
+            number of time steps of each variable kept in memory with 'file' storage
+        read_ahead: int
+            number of time steps read ahead during the reverse adjoint sweep with
+            'file' storage
+        asynchronous: bool
+            whether to write and read the files in a background thread
+
+        See Also
+        --------
+        :class:`~time_history.TimeHistory`
+        """
+
+        if storage == "list":
+            self.time_history = None
+        elif storage == "array":
+            self.time_history = {}
+        elif storage == "file":
+            self.time_history = {
+                "directory": "." if directory is None else directory,
+                "cache_size": cache_size,
+                "read_ahead": read_ahead,
+                "asynchronous": asynchronous,
+            }
+        else:
+            print("Error: Unknown time history storage for body")
+            quit()
+
+        return
+
+    def initialize_variables(self, scenario, time_indices=None):
         """
         Initialize the variables each time we run an analysis.
 
@@ -498,6 +709,10 @@ class Body(Base):
         ----------
         scenario: :class:`~scenario.Scenario`
             The current scenario
+        time_indices: list of int
+            The time indices to allocate for unsteady scenarios. Defaults to all
+            of the time steps. The other time indices can be allocated later
+            with initialize_time_index
         """
 
         # We re-initialize aitken acceleration every time
@@ -513,17 +728,10 @@ class Body(Base):
                 self.struct_disps[scenario.id] = np.zeros(ns, dtype=self.dtype)
                 self.aero_disps[scenario.id] = np.zeros(na, dtype=self.dtype)
             else:
-                id = scenario.id
-                self.struct_loads[id] = []
-                self.aero_loads[id] = []
-                self.struct_disps[id] = []
-                self.aero_disps[id] = []
-
-                for time_index in range(scenario.steps + 1):
-                    self.struct_loads[id].append(np.zeros(ns, dtype=self.dtype))
-                    self.aero_loads[id].append(np.zeros(na, dtype=self.dtype))
-                    self.struct_disps[id].append(np.zeros(ns, dtype=self.dtype))
-                    self.aero_disps[id].append(np.zeros(na, dtype=self.dtype))
+                self._initialize_time_history(self.struct_loads, scenario, ns)
+                self._initialize_time_history(self.aero_loads, scenario, na)
+                self._initialize_time_history(self.struct_disps, scenario, ns)
+                self._initialize_time_history(self.aero_disps, scenario, na)
 
         if self.thermal_transfer is not None:
             ns = self.struct_nnodes
@@ -535,17 +743,99 @@ class Body(Base):
                 self.struct_temps[scenario.id] = np.zeros(ns, dtype=self.dtype)
                 self.aero_temps[scenario.id] = np.zeros(na, dtype=self.dtype)
             else:
-                id = scenario.id
-                self.struct_heat_flux[id] = []
-                self.aero_heat_flux[id] = []
-                self.struct_temps[id] = []
-                self.aero_temps[id] = []
-
-                for time_index in range(scenario.steps + 1):
-                    self.struct_heat_flux[id].append(np.zeros(ns, dtype=self.dtype))
-                    self.aero_heat_flux[id].append(np.zeros(na, dtype=self.dtype))
-                    self.struct_temps[id].append(np.zeros(ns, dtype=self.dtype))
-                    self.aero_temps[id].append(np.zeros(na, dtype=self.dtype))
+                self._initialize_time_history(self.struct_heat_flux, scenario, ns)
+                self._initialize_time_history(self.aero_heat_flux, scenario, na)
+                self._initialize_time_history(self.struct_temps, scenario, ns)
+                self._initialize_time_history(self.aero_temps, scenario, na)
+
+        if not scenario.steady and self.time_history is None:
+            if time_indices is None:
+                time_indices = range(scenario.steps + 1)
+            for time_index in time_indices:
+                self.initialize_time_index(scenario, time_index)
+
+        return
+
+    def initialize_time_index(self, scenario, time_index):
+        """
+        Allocate the variables of a time index of an unsteady scenario if they
+        are not allocated already.
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        time_index: int
+            The time index to allocate
+        """
+
+        id = scenario.id
+        if self.transfer is not None and not self._is_allocated(
+            self.struct_disps[id], time_index
+        ):
+            ns = 3 * self.struct_nnodes
+            na = 3 * self.aero_nnodes
+
+            self.struct_loads[id][time_index] = np.zeros(ns, dtype=self.dtype)
+            self.aero_loads[id][time_index] = np.zeros(na, dtype=self.dtype)
+            self.struct_disps[id][time_index] = np.zeros(ns, dtype=self.dtype)
+            self.aero_disps[id][time_index] = np.zeros(na, dtype=self.dtype)
+
+        if self.thermal_transfer is not None and not self._is_allocated(
+            self.struct_temps[id], time_index
+        ):
+            ns = self.struct_nnodes
+            na = self.aero_nnodes
+
+            self.struct_heat_flux[id][time_index] = np.zeros(ns, dtype=self.dtype)
+            self.aero_heat_flux[id][time_index] = np.zeros(na, dtype=self.dtype)
+            self.struct_temps[id][time_index] = np.zeros(ns, dtype=self.dtype)
+            self.aero_temps[id][time_index] = np.zeros(na, dtype=self.dtype)
+
+        return
+
+    def _is_allocated(self, history, time_index):
+        """
+        Check whether a time index of a time history is allocated. A
+        :class:`~time_history.TimeHistory` is preallocated, and probing its time
+        indices would move them through its cache
+        """
+
+        return isinstance(history, TimeHistory) or history[time_index] is not None
+
+    def _initialize_time_history(self, variables, scenario, size):
+        """
+        Create the time history of an interface variable of an unsteady scenario
+        """
+
+        if isinstance(variables.get(scenario.id), TimeHistory):
+            variables[scenario.id].close()
+
+        if self.time_history is None:
+            variables[scenario.id] = [None] * (scenario.steps + 1)
+        else:
+            variables[scenario.id] = TimeHistory(
+                scenario.steps + 1, size, self.dtype, **self.time_history
+            )
+
+        return
+
+    def release_time_index(self, scenario, time_index):
+        """
+        Free the variables of a time index of an unsteady scenario. They are
+        allocated again by initialize_time_index when needed. With 'file' time
+        history storage they are moved from memory to the file instead.
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        time_index: int
+            The time index to free
+        """
+
+        for name in self._get_coupling_state_names():
+            getattr(self, name)[scenario.id][time_index] = None
 
         return
 
@@ -565,6 +855,9 @@ class Body(Base):
             The current scenario
         """
 
+        # We re-initialize aitken acceleration for the adjoint
+        self.aitken_is_initialized = False
+
         # Count up the number of functions for this scenario
         nf = scenario.count_adjoint_functions()
 
@@ -603,6 +896,112 @@ class Body(Base):
 
         return
 
+    def get_coupling_state(self, scenario, adjoint=False, time_index=0):
+        """
+        Get copies of the interface variables of a scenario. These are the
+        loads, displacements, heat flux and temperatures for the forward problem
+        and the adjoint-Jacobian products for the adjoint problem.
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        adjoint: bool
+            Whether to get the adjoint-Jacobian products
+        time_index: int
+            The time index of the forward variables for unsteady scenarios
+
+        Returns
+        -------
+        state: dict
+            Copies of the arrays indexed by their name in the body
+        """
+
+        state = {}
+        for name in self._get_coupling_state_names(adjoint):
+            if adjoint:
+                state[name] = getattr(self, name).copy()
+            elif scenario.steady:
+                state[name] = getattr(self, name)[scenario.id].copy()
+            else:
+                state[name] = getattr(self, name)[scenario.id][time_index].copy()
+
+        return state
+
+    def set_coupling_state(self, scenario, state, adjoint=False, time_index=0):
+        """
+        Copy the interface variables of a scenario from a state returned by
+        get_coupling_state. Arrays whose size has changed since the state was
+        stored are left unchanged.
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        state: dict
+            The arrays indexed by their name in the body
+        adjoint: bool
+            Whether to set the adjoint-Jacobian products
+        time_index: int
+            The time index of the forward variables for unsteady scenarios. It is
+            allocated if needed
+        """
+
+        if not adjoint and not scenario.steady:
+            self.initialize_time_index(scenario, time_index)
+
+        for name in self._get_coupling_state_names(adjoint):
+            if adjoint:
+                vec = getattr(self, name)
+            elif scenario.steady:
+                vec = getattr(self, name)[scenario.id]
+            else:
+                vec = getattr(self, name)[scenario.id][time_index]
+            if name in state and state[name].shape == vec.shape:
+                vec[:] = state[name]
+
+        return
+
+    def _get_coupling_state_names(self, adjoint=False):
+        """
+        Get the names of the interface variables of the transfer schemes of the body
+        """
+
+        names = []
+        if self.transfer is not None:
+            if adjoint:
+                names.extend(
+                    [
+                        "struct_loads_ajp",
+                        "aero_loads_ajp",
+                        "struct_disps_ajp",
+                        "aero_disps_ajp",
+                        "struct_disps_ajp_disps",
+                        "struct_disps_ajp_loads",
+                    ]
+                )
+            else:
+                names.extend(
+                    ["struct_loads", "aero_loads", "struct_disps", "aero_disps"]
+                )
+
+        if self.thermal_transfer is not None:
+            if adjoint:
+                names.extend(
+                    [
+                        "struct_flux_ajp",
+                        "aero_flux_ajp",
+                        "struct_temps_ajp",
+                        "aero_temps_ajp",
+                    ]
+                )
+            else:
+                names.extend(
+                    ["struct_heat_flux", "aero_heat_flux", "struct_temps", "aero_temps"]
+                )
+
+        return names
+
     def get_aero_disps(self, scenario, time_index=0):
         """
         Get the displacements on the aerodynamic surface for the given scenario.
@@ -1023,21 +1422,22 @@ class Body(Base):
 
         if self.transfer is not None:
             # Contribute to the force integration and structural adjoint right-hand-sides
-            # from the load transfer adjoint
-            temp_fa = np.zeros(3 * self.aero_nnodes, dtype=self.dtype)
-            temp_us = np.zeros(3 * self.struct_nnodes, dtype=self.dtype)
-            for k in range(nfunctions):
-                # Solve for psi_L - Note that dL/dfS is the identity matrix. Ensure that
-                # the vector is in contiguous memory.
-                psi_L = -self.struct_loads_ajp[:, k].copy()
-
-                # Compute aero_loads_ajp = dL/dfa^{T} * psi_L
-                self.transfer.applydLdfATrans(psi_L, temp_fa)
-                self.aero_loads_ajp[:, k] = temp_fa
-
-                # Compute struct_disps_ajp_loads = dL/dus^{T} * psi_L
-                self.transfer.applydLduSTrans(psi_L, temp_us)
-                self.struct_disps_ajp_loads[:, k] = temp_us
+            # from the load transfer adjoint. The products for all the functions are
+            # computed in a single call with one column per function.
+            temp_fa = np.zeros((3 * self.aero_nnodes, nfunctions), dtype=self.dtype)
+            temp_us = np.zeros((3 * self.struct_nnodes, nfunctions), dtype=self.dtype)
+
+            # Solve for psi_L - Note that dL/dfS is the identity matrix. Ensure that
+            # the vectors are in contiguous memory.
+            psi_L = -self.struct_loads_ajp.copy()
+
+            # Compute aero_loads_ajp = dL/dfa^{T} * psi_L
+            self.transfer.applydLdfATransMulti(psi_L, temp_fa)
+            self.aero_loads_ajp[:] = temp_fa
+
+            # Compute struct_disps_ajp_loads = dL/dus^{T} * psi_L
+            self.transfer.applydLduSTransMulti(psi_L, temp_us)
+            self.struct_disps_ajp_loads[:] = temp_us
 
             # Compute the update to the struct_disps_ajp
             self.struct_disps_ajp[:] = (
@@ -1072,16 +1472,15 @@ class Body(Base):
         nfunctions = scenario.count_adjoint_functions()
 
         if self.transfer is not None:
-            temp_us = np.zeros(3 * self.struct_nnodes, dtype=self.dtype)
+            temp_us = np.zeros((3 * self.struct_nnodes, nfunctions), dtype=self.dtype)
 
-            for k in range(nfunctions):
-                # Solve for psi_D - Note that dD/dua is the identity matrix
-                # Copy the values into contiguous memory.
-                psi_D = -self.aero_disps_ajp[:, k].copy()
+            # Solve for psi_D - Note that dD/dua is the identity matrix
+            # Copy the values into contiguous memory.
+            psi_D = -self.aero_disps_ajp.copy()
 
-                # Set the dD/duS^{T} * psi_D product
-                self.transfer.applydDduSTrans(psi_D, temp_us)
-                self.struct_disps_ajp_disps[:, k] = temp_us
+            # Set the dD/duS^{T} * psi_D product for all the functions
+            self.transfer.applydDduSTransMulti(psi_D, temp_us)
+            self.struct_disps_ajp_disps[:] = temp_us
 
             # Compute the update to the struct_disps_ajp
             self.struct_disps_ajp[:] = (
@@ -1118,15 +1517,13 @@ class Body(Base):
         nfunctions = scenario.count_adjoint_functions()
 
         if self.thermal_transfer is not None:
-            temp = np.zeros(self.aero_nnodes, dtype=self.dtype)
-
-            for k in range(nfunctions):
-                psi_Q = -self.struct_flux_ajp[:, k].copy()
+            temp = np.zeros((self.aero_nnodes, nfunctions), dtype=self.dtype)
+            psi_Q = -self.struct_flux_ajp.copy()
 
-                # In the MELD interface code qA = hA so applydQdqATrans could/should?
-                # be called applydQdhATrans
-                self.thermal_transfer.applydQdqATrans(psi_Q, temp)
-                self.aero_flux_ajp[:, k] = temp
+            # In the MELD interface code qA = hA so applydQdqATrans could/should?
+            # be called applydQdhATrans
+            self.thermal_transfer.applydQdqATransMulti(psi_Q, temp)
+            self.aero_flux_ajp[:] = temp
 
         return
 
@@ -1158,13 +1555,11 @@ class Body(Base):
         nfunctions = scenario.count_adjoint_functions()
 
         if self.thermal_transfer is not None:
-            temp = np.zeros(self.struct_nnodes, dtype=self.dtype)
-
-            for k in range(nfunctions):
-                psi_T = -self.aero_temps_ajp[:, k].copy()
+            temp = np.zeros((self.struct_nnodes, nfunctions), dtype=self.dtype)
+            psi_T = -self.aero_temps_ajp.copy()
 
-                self.thermal_transfer.applydTdtSTrans(psi_T, temp)
-                self.struct_temps_ajp[:, k] = temp
+            self.thermal_transfer.applydTdtSTransMulti(psi_T, temp)
+            self.struct_temps_ajp[:] = temp
 
         return
 
@@ -1207,65 +1602,101 @@ class Body(Base):
             nfunctions = scenario.count_adjoint_functions()
 
             # Aerodynamic coordinate derivatives
-            temp_xa = np.zeros(3 * self.aero_nnodes, dtype=self.dtype)
-            temp_xs = np.zeros(3 * self.struct_nnodes, dtype=self.dtype)
-            for k in range(nfunctions):
-                # Solve for psi_L - Note that dL/dfS is the identity matrix. Ensure that
-                # the vector is in contiguous memory.
-                psi_L = -self.struct_loads_ajp[:, k].copy()
-                self.transfer.applydLdxA0(psi_L, temp_xa)
-                self.aero_shape_term[:, k] += temp_xa
-
-                self.transfer.applydLdxS0(psi_L, temp_xs)
-                self.struct_shape_term[:, k] += temp_xs
-
-                # Solve for psi_D - Note that dD/dua is the identity matrix
-                # Copy the values into contiguous memory.
-                psi_D = -self.aero_disps_ajp[:, k].copy()
-                self.transfer.applydDdxA0(psi_D, temp_xa)
-                self.aero_shape_term[:, k] += temp_xa
-
-                self.transfer.applydDdxS0(psi_D, temp_xs)
-                self.struct_shape_term[:, k] += temp_xs
+            temp_xa = np.zeros((3 * self.aero_nnodes, nfunctions), dtype=self.dtype)
+            temp_xs = np.zeros((3 * self.struct_nnodes, nfunctions), dtype=self.dtype)
+
+            # Solve for psi_L - Note that dL/dfS is the identity matrix. Ensure that
+            # the vectors are in contiguous memory.
+            psi_L = -self.struct_loads_ajp.copy()
+            self.transfer.applydLdxA0Multi(psi_L, temp_xa)
+            self.aero_shape_term[:] += temp_xa
+
+            self.transfer.applydLdxS0Multi(psi_L, temp_xs)
+            self.struct_shape_term[:] += temp_xs
+
+            # Solve for psi_D - Note that dD/dua is the identity matrix
+            # Copy the values into contiguous memory.
+            psi_D = -self.aero_disps_ajp.copy()
+            self.transfer.applydDdxA0Multi(psi_D, temp_xa)
+            self.aero_shape_term[:] += temp_xa
+
+            self.transfer.applydDdxS0Multi(psi_D, temp_xs)
+            self.struct_shape_term[:] += temp_xs
 
         return
 
     def aitken_relax(self, scenario, tol=1e-13):
         """
-        Perform Aitken relaxation for the displacements set in the
-        """
+        Perform Aitken relaxation for the structural displacements and temperatures
+        of this body. Each field is relaxed with its own theta.
 
-        if not self.aitken_is_initialized:
-            self.theta = self.theta_init
-            self.prev_update = np.zeros(3 * self.struct_nnodes, dtype=self.dtype)
-            self.aitken_vec = np.zeros(3 * self.struct_nnodes, dtype=self.dtype)
-            self.aitken_is_initialized = True
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        tol: float
+            Tolerance on the change in the update below which theta is not updated
+        """
 
+        fields = []
+        theta_init = []
         if self.transfer is not None:
-            struct_disps = self.get_struct_disps(scenario)
-            up = struct_disps - self.aitken_vec
-            norm2 = np.linalg.norm(up - self.prev_update) ** 2.0
+            fields.append(self.get_struct_disps(scenario))
+            theta_init.append(self.theta_init)
+        if self.thermal_transfer is not None:
+            fields.append(self.get_struct_temps(scenario))
+            theta_init.append(self.theta_therm_init)
 
-            # Only update theta if the displacements changed
-            if norm2 > tol:
-                # Compute the tentative theta value
-                self.theta *= 1.0 - (up - self.prev_update).dot(up) / norm2
+        self._aitken_relax_fields(fields, theta_init, tol)
 
-                self.theta = np.max(
-                    (np.min((self.theta, self.theta_max)), self.theta_min)
-                )
+        return
+
+    def aitken_adjoint_relax(self, scenario, tol=1e-13):
+        """
+        Perform Aitken relaxation for the structural load and heat flux adjoint
+        products of this body. Each field and each function is relaxed with its
+        own theta.
 
-            # handle the min/max for complex step
-            if type(self.theta) == np.complex128 or type(self.theta) == complex:
-                self.theta = self.theta.real + 0.0j
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        tol: float
+            Tolerance on the change in the update below which theta is not updated
+        """
+
+        fields = []
+        theta_init = []
+        if self.transfer is not None:
+            fields.append(self.get_struct_loads_ajp(scenario))
+            theta_init.append(self.theta_init)
+        if self.thermal_transfer is not None:
+            fields.append(self.get_struct_heat_flux_ajp(scenario))
+            theta_init.append(self.theta_therm_init)
 
-            self.aitken_vec += self.theta * up
-            self.prev_update[:] = up[:]
-            struct_disps[:] = self.aitken_vec
+        self._aitken_relax_fields(fields, theta_init, tol)
 
         return
 
-    def aitken_adjoint_relax(self, scenario, tol=1e-13):
+    def _aitken_relax_fields(self, fields, theta_init, tol):
+        """
+        Relax the fields with the Aitken relaxation of this body, creating it the
+        first time it is used after the variables are initialized
+        """
+
+        if not self.aitken_is_initialized:
+            self.aitken = AitkenRelaxation(
+                self.comm,
+                theta_init=theta_init,
+                theta_min=self.theta_min,
+                theta_max=self.theta_max,
+                tol=tol,
+            )
+            self.aitken_is_initialized = True
+
+        if len(fields) > 0:
+            self.aitken.relax(fields)
+
         return
 
     def collect_coordinate_derivatives(self, comm, discipline, root=0):
@@ -1382,121 +1813,3 @@ class Body(Base):
         """
 
         return
-
-    # def _aitken_adjoint_relax(self, scenario):
-    #     nfunctions = scenario.count_adjoint_functions()
-    #     if self.aitken_init:
-    #         self.aitken_init = False
-
-    #         # initialize the 'previous update' to zero
-    #         self.up_prev = []
-    #         self.aitken_vec = []
-    #         self.theta = []
-
-    #         # initialize the 'previous update' to zero
-    #         self.therm_up_prev = []
-    #         self.aitken_therm_vec = []
-    #         self.theta_therm = []
-
-    #         for ibody, body in enumerate(self.model.bodies):
-    #             if body.transfer is not None:
-    #                 up_prev_body = []
-    #                 aitken_vec_body = []
-    #                 theta_body = []
-    #                 for func in range(nfunctions):
-    #                     up_prev_body.append(
-    #                         np.zeros(
-    #                             body.struct_nnodes * body.xfer_ndof,
-    #                             dtype=TransferScheme.dtype,
-    #                         )
-    #                     )
-    #                     aitken_vec_body.append(
-    #                         np.zeros(
-    #                             body.struct_nnodes * body.xfer_ndof,
-    #                             dtype=TransferScheme.dtype,
-    #                         )
-    #                     )
-    #                     theta_body.append(self.theta_init)
-    #                 self.up_prev.append(up_prev_body)
-    #                 self.aitken_vec.append(aitken_vec_body)
-    #                 self.theta.append(theta_body)
-
-    #             if body.thermal_transfer is not None:
-    #                 up_prev_body = []
-    #                 aitken_therm_vec_body = []
-    #                 theta_body = []
-    #                 for func in range(nfunctions):
-    #                     up_prev_body.append(
-    #                         body.T_ref
-    #                         * np.ones(
-    #                             body.struct_nnodes * body.therm_xfer_ndof,
-    #                             dtype=TransferScheme.dtype,
-    #                         )
-    #                     )
-    #                     aitken_therm_vec_body.append(
-    #                         body.T_ref
-    #                         * np.ones(
-    #                             body.struct_nnodes * body.therm_xfer_ndof,
-    #                             dtype=TransferScheme.dtype,
-    #                         )
-    #                     )
-    #                     theta_body.append(self.theta_therm_init)
-    #                 self.therm_up_prev.append(up_prev_body)
-    #                 self.aitken_therm_vec.append(aitken_therm_vec_body)
-    #                 self.theta_therm.append(theta_body)
-
-    #     # do the Aitken update
-    #     for ibody, body in enumerate(self.model.bodies):
-    #         if body.struct_nnodes > 0:
-    #             if body.transfer is not None:
-    #                 for func in range(nfunctions):
-    #                     up = body.psi_S[:, func] - self.aitken_vec[ibody][func]
-    #                     norm2 = np.linalg.norm(up - self.up_prev[ibody][func]) ** 2.0
-
-    #                     # Only update theta if the vector changed
-    #                     if norm2 > 1e-13:
-    #                         self.theta[ibody][func] *= (
-    #                             1.0
-    #                             - (up - self.up_prev[ibody][func]).dot(up)
-    #                             / np.linalg.norm(up - self.up_prev[ibody][func]) ** 2.0
-    #                         )
-    #                         self.theta[ibody][func] = np.max(
-    #                             (
-    #                                 np.min((self.theta[ibody][func], self.theta_max)),
-    #                                 self.theta_min,
-    #                             )
-    #                         )
-    #                     self.aitken_vec[ibody][func] += self.theta[ibody][func] * up
-    #                     self.up_prev[ibody][func] = up[:]
-    #                     body.psi_S[:, func] = self.aitken_vec[ibody][func][:]
-
-    #             if body.thermal_transfer is not None:
-    #                 for func in range(nfunctions):
-    #                     up = body.psi_T_S[:, func] - self.aitken_therm_vec[ibody][func]
-    #                     norm2 = (
-    #                         np.linalg.norm(up - self.therm_up_prev[ibody][func]) ** 2.0
-    #                     )
-
-    #                     # Only update theta if the vector changed
-    #                     if norm2 > 1e-13:
-    #                         self.theta_therm[ibody][func] *= (
-    #                             1.0
-    #                             - (up - self.therm_up_prev[ibody][func]).dot(up)
-    #                             / np.linalg.norm(up - self.therm_up_prev[ibody][func])
-    #                             ** 2.0
-    #                         )
-    #                         self.theta_therm[ibody][func] = np.max(
-    #                             (
-    #                                 np.min(
-    #                                     (self.theta_therm[ibody][func], self.theta_max)
-    #                                 ),
-    #                                 self.theta_min,
-    #                             )
-    #                         )
-    #                     self.aitken_therm_vec[ibody][func] += (
-    #                         self.theta_therm[ibody][func] * up
-    #                     )
-    #                     self.therm_up_prev[ibody][func] = up[:]
-    #                     body.psi_T_S[:, func] = self.aitken_therm_vec[ibody][func][:]
-
-    #     return
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+__all__ = ["BinomialCheckpointing"]
+
+from math import comb
+
+
+class BinomialCheckpointing(object):
+    def __init__(self, steps, snapshots):
+        """
+        Binomial (revolve-style) checkpointing schedule of an unsteady adjoint.
+
+        Only snapshots of the coupled states after a few time steps are stored
+        during the forward solve. The adjoint restores the nearest snapshot and
+        recomputes the time steps after it until it reaches the states of the
+        next reverse step. The snapshots are placed so that the number of
+        recomputed time steps is close to the binomial bound of Griewank and
+        Walther's revolve algorithm for the given number of snapshots.
+
+        The schedule is a list of actions:
+
+        * ("advance", first, last): take the forward time steps first to last
+        * ("store", step): store a snapshot of the states after the time step
+        * ("restore", step): restore the states from the snapshot of the time step
+        * ("free", step): discard the snapshot of the time step
+        * ("adjoint", step): take the reverse step about the current states
+
+        The forward_actions only advance and store and end with the states of
+        the final time step. The adjoint_actions take the reverse steps from
+        the final time step back to the first one.
+
+        Parameters
+        ----------
+        steps: int
+            Number of time steps
+        snapshots: int
+            Maximum number of snapshots stored at the same time, including the
+            snapshot of the initial conditions
+        """
+
+        if snapshots < 1:
+            raise ValueError("At least one snapshot is required for checkpointing")
+
+        self.steps = steps
+        self.snapshots = snapshots
+
+        actions = self._schedule()
+        nforward = 0
+        while nforward < len(actions) and actions[nforward][0] != "adjoint":
+            nforward += 1
+        self.forward_actions = actions[:nforward]
+        self.adjoint_actions = actions[nforward:]
+
+        # Number of time steps taken again during the adjoint
+        self.recomputed_steps = 0
+        for action in self.adjoint_actions:
+            if action[0] == "advance":
+                self.recomputed_steps += action[2] - action[1] + 1
+
+        return
+
+    def _schedule(self):
+        """
+        Build the list of actions. The reversal of the time steps is split
+        recursively at binomial offsets, but the recursion is kept on an
+        explicit stack since a large number of snapshots gives one level per
+        time step
+        """
+
+        actions = [("store", 0)]
+        self._current = 0
+
+        stack = [("reverse", 0, self.steps, self.snapshots - 1)]
+        while len(stack) > 0:
+            task = stack.pop()
+            if task[0] == "free":
+                actions.append(task)
+            elif task[0] == "adjoint":
+                self._move(actions, task[1], task[1])
+                actions.append(task)
+            else:
+                _, start, end, free = task
+                self._reverse(actions, stack, start, end, free)
+
+        return actions
+
+    def _reverse(self, actions, stack, start, end, free):
+        """
+        Take the reverse steps end to start + 1 from the snapshot of start with
+        free snapshots left
+        """
+
+        nsteps = end - start
+        if nsteps <= 0:
+            return
+
+        # Without a snapshot to spare, recompute every step from the start
+        if free == 0 or nsteps == 1:
+            for step in range(end, start, -1):
+                self._move(actions, start, step)
+                actions.append(("adjoint", step))
+            return
+
+        # Find the number of sweeps over the steps that suffices for these
+        # snapshots, and split so that the steps after the new snapshot can be
+        # reversed with one snapshot less within the same number of sweeps
+        sweeps = 1
+        while comb(free + sweeps, free) < nsteps:
+            sweeps += 1
+        split = end - min(comb(free + sweeps - 1, free - 1), nsteps - 1)
+
+        self._move(actions, start, split)
+        actions.append(("store", split))
+
+        stack.append(("reverse", start, split - 1, free))
+        stack.append(("free", split))
+        stack.append(("adjoint", split))
+        stack.append(("reverse", split, end, free - 1))
+
+        return
+
+    def _move(self, actions, snapshot, step):
+        """
+        Bring the states to the given step, restoring the snapshot first if
+        the current states are not between the snapshot and the step
+        """
+
+        if self._current > step or self._current < snapshot:
+            actions.append(("restore", snapshot))
+            self._current = snapshot
+        if step > self._current:
+            actions.append(("advance", self._current + 1, step))
+            self._current = step
+
+        return
@@ -22,10 +22,14 @@ limitations under the License.
 # Drivers/Optimization
 from .funtofem_driver import *
 from .funtofem_nlbgs_driver import *
+from .funtofem_iqn_driver import *
+from .funtofem_jacobi_driver import *
 
 # from .funtofem_nlbgs_aerothermal_driver import *
 # from .funtofem_nlbgs_aerothermoelastic_driver import *
 from .funtofem_nlbgs_fsi_subiters_driver import *
+from .scenario_parallel import *
+from .checkpointing import *
 from .pyopt_optimization import *
 
 # Solver interfaces
@@ -816,20 +816,4 @@ class Fun3dInterface(SolverInterface):
 
     def step_post(self, scenario, bodies, step):
         self.fun3d_flow.step_post(step)
-
-        # save this steps forces for the adjoint
-        self.force_hist[scenario.id][step] = {}
-        for ibody, body in enumerate(bodies, 1):
-            if body.transfer is not None:
-                self.force_hist[scenario.id][step][ibody] = body.aero_loads.copy()
-
-            if body.thermal_transfer is not None:
-                self.heat_flux_hist[scenario.id][step][
-                    ibody
-                ] = body.aero_heat_flux.copy()
-                self.heat_flux_mag_hist[scenario.id][step][
-                    ibody
-                ] = body.aero_heat_flux_mag.copy()
-                self.aero_temps_hist[scenario.id][step][ibody] = body.aero_temps.copy()
-
         return 0
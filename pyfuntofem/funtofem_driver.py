@@ -23,6 +23,7 @@
 import numpy as np
 from mpi4py import MPI
 from funtofem import TransferScheme
+from .checkpointing import BinomialCheckpointing
 
 try:
     from .hermes_transfer import HermesTransfer
@@ -47,6 +48,9 @@ class FUNtoFEMDriver(object):
         aero_root,
         transfer_options=None,
         model=None,
+        scenario_parallel=None,
+        warm_start=None,
+        checkpoints=None,
     ):
         """
         Parameters
@@ -59,6 +63,23 @@ class FUNtoFEMDriver(object):
             options of the load and displacement transfer scheme
         model: :class:`~funtofem_model.FUNtoFEMmodel`
             The model containing the design data
+        scenario_parallel: :class:`~scenario_parallel.ScenarioParallel`
+            Partition of the processors used to analyze the scenarios concurrently.
+            The driver and the solvers are then created on its group_comm and only
+            analyze the scenarios of the group of this processor
+        warm_start: str
+            None (default) to start each steady coupled solve from zero, 'last' to
+            start from the interface variables and adjoint products of the
+            previous solve of the scenario, or 'extrapolate' to extrapolate them
+            linearly from the last two designs
+        checkpoints: int
+            Number of snapshots of the unsteady states stored for the adjoint.
+            None (default) stores the coupling variables of every time step.
+            Otherwise only the coupling variables of the last two time steps and
+            of the snapshots are stored, and the adjoint recomputes the time
+            steps between the snapshots following a binomial checkpointing
+            schedule. All solvers must then support restarting from the
+            snapshots, see SolverInterface.supports_checkpointing
         """
 
         # communicator
@@ -90,6 +111,31 @@ class FUNtoFEMDriver(object):
             self.fakemodel = True
 
         self.model = model
+        self.scenario_parallel = scenario_parallel
+
+        # Interface states of the previous designs for the warm starts, the
+        # number of iterations and the first residual of the first (cold) solve
+        # and the iterations saved by the last warm start of each scenario
+        if warm_start not in (None, "last", "extrapolate"):
+            raise ValueError("Unknown warm start mode '%s'" % warm_start)
+        self.warm_start = warm_start
+        self.warm_states = {}
+        self.cold_iterations = {}
+        self.reference_residuals = {}
+        self.iterations_saved = {}
+
+        # Checkpointing schedules and stored snapshots of the unsteady scenarios
+        if checkpoints is not None and checkpoints < 1:
+            raise ValueError("Number of checkpoints must be at least 1")
+        if checkpoints is not None:
+            for solver in solvers.keys():
+                if not solvers[solver].supports_checkpointing():
+                    raise ValueError(
+                        "Solver %s cannot restart from the checkpoints" % solver
+                    )
+        self.checkpoints = checkpoints
+        self.schedules = {}
+        self.snapshots = {}
 
         # Initialize transfer scheme in each body class
         for body in self.model.bodies:
@@ -138,7 +184,7 @@ class FUNtoFEMDriver(object):
             body.update_shape(complex_run)
 
         # loop over the forward problem for the different scenarios
-        for scenario in self.model.scenarios:
+        for scenario in self._get_scenarios():
 
             # tell the solvers what the variable values and functions are for this scenario
             if not self.fakemodel:
@@ -155,6 +201,9 @@ class FUNtoFEMDriver(object):
             for body in self.model.bodies:
                 body.update_transfer()
 
+            # Start from the interface variables of the previous designs
+            self._warm_start_scenario(scenario)
+
             if scenario.steady:
                 fail = self._solve_steady_forward(scenario, steps)
                 if fail != 0:
@@ -170,6 +219,11 @@ class FUNtoFEMDriver(object):
             self._post_forward(scenario, self.model.bodies)
             if fail == 0:
                 self._get_functions(scenario, self.model.bodies)
+                self._store_warm_start(scenario)
+
+        # Share the function values of the scenarios between the groups
+        if self.scenario_parallel is not None:
+            fail = self.scenario_parallel.reduce_functions(self.model, fail)
 
         return fail
 
@@ -198,7 +252,7 @@ class FUNtoFEMDriver(object):
             func.zero_derivatives()
 
         # Set the functions into the solvers
-        for scenario in self.model.scenarios:
+        for scenario in self._get_scenarios():
             # tell the solvers what the variable values and functions are for this scenario
             self._distribute_variables(scenario, self.model.bodies)
             self._distribute_functions(scenario, self.model.bodies)
@@ -209,26 +263,209 @@ class FUNtoFEMDriver(object):
 
             if scenario.steady:
                 fail = self._solve_steady_adjoint(scenario)
-                if fail != 0:
-                    return fail
             else:
                 fail = self._solve_unsteady_adjoint(scenario)
-                if fail != 0:
-                    return fail
+            if fail != 0:
+                break
 
             # Perform any operations after the adjoint solve
             self._post_adjoint(scenario, self.model.bodies)
 
             self._get_function_grads(scenario)
+            self._store_warm_start(scenario, adjoint=True)
+
+        # Share the function gradients of the scenarios between the groups
+        if self.scenario_parallel is not None:
+            fail = self.scenario_parallel.reduce_gradients(self.model, fail)
 
         return fail
 
+    def _get_scenarios(self):
+        """
+        Get the scenarios analyzed by this processor
+        """
+        if self.scenario_parallel is not None:
+            return self.scenario_parallel.get_scenarios(self.model)
+
+        return self.model.scenarios
+
+    def _get_design_vector(self):
+        """
+        Get the values of the variables of the model used to extrapolate the
+        interface variables
+        """
+        return np.array([np.real(var.value) for var in self.model.get_variables()])
+
+    def _warm_start_scenario(self, scenario, adjoint=False):
+        """
+        Set the interface variables or adjoint products of a steady scenario from
+        the states stored for the previous designs. With two previous designs, the
+        states are extrapolated along the last change of the design by the
+        projection of the new change onto it.
+        """
+        key = (scenario.id, adjoint)
+        if self.warm_start is None or not scenario.steady:
+            return
+        elif key not in self.warm_states:
+            return
+
+        history = self.warm_states[key]
+        x, states = history[-1]
+        if self.warm_start == "extrapolate" and len(history) > 1:
+            x_prev, states_prev = history[-2]
+            dx = x - x_prev
+            norm2 = np.dot(dx, dx)
+            if norm2 > 0.0:
+                alpha = np.dot(self._get_design_vector() - x, dx) / norm2
+                states = [
+                    {
+                        name: state[name] + alpha * (state[name] - state_prev[name])
+                        for name in state
+                    }
+                    for state, state_prev in zip(states, states_prev)
+                ]
+
+        for body, state in zip(self.model.bodies, states):
+            body.set_coupling_state(scenario, state, adjoint=adjoint)
+
+        return
+
+    def _store_warm_start(self, scenario, adjoint=False):
+        """
+        Store the interface variables or adjoint products of a steady scenario
+        for the next design and report the coupled iterations saved compared to
+        the first solve
+        """
+        key = (scenario.id, adjoint)
+        if self.warm_start is None or not scenario.steady:
+            return
+
+        states = [
+            body.get_coupling_state(scenario, adjoint=adjoint)
+            for body in self.model.bodies
+        ]
+        history = self.warm_states.setdefault(key, [])
+        history.append((self._get_design_vector(), states))
+        del history[:-2]
+
+        residuals = scenario.forward_residuals
+        if adjoint:
+            residuals = scenario.adjoint_residuals
+        if len(residuals) == 0:
+            return
+
+        if key not in self.cold_iterations:
+            self.cold_iterations[key] = len(residuals)
+            self.reference_residuals[key] = residuals[0]
+        else:
+            self.iterations_saved[key] = self.cold_iterations[key] - len(residuals)
+            if self.comm.Get_rank() == 0:
+                print(
+                    "Warm start of the %s problem of scenario %s saved %d of %d coupled iterations"
+                    % (
+                        "adjoint" if adjoint else "forward",
+                        scenario.name,
+                        self.iterations_saved[key],
+                        self.cold_iterations[key],
+                    )
+                )
+
+        return
+
+    def _get_checkpointing(self, scenario):
+        """
+        Get the checkpointing schedule of an unsteady scenario, or None when
+        every time step is stored
+        """
+
+        if self.checkpoints is None:
+            return None
+
+        schedule = self.schedules.get(scenario.id)
+        if schedule is None or schedule.steps != scenario.steps:
+            self.schedules[scenario.id] = BinomialCheckpointing(
+                scenario.steps, self.checkpoints
+            )
+
+        return self.schedules[scenario.id]
+
+    def _store_checkpoint(self, scenario, step):
+        """
+        Store a snapshot of the coupling variables and the solver states after
+        a time step
+        """
+
+        snapshot = {"bodies": [], "solvers": {}}
+        for body in self.model.bodies:
+            states = {}
+            for time_index in range(max(step - 1, 0), step + 1):
+                states[time_index] = body.get_coupling_state(
+                    scenario, time_index=time_index
+                )
+            snapshot["bodies"].append(states)
+
+        for solver in self.solvers.keys():
+            snapshot["solvers"][solver] = self.solvers[solver].get_checkpoint(
+                scenario, self.model.bodies, step
+            )
+
+        self.snapshots[(scenario.id, step)] = snapshot
+
+        return
+
+    def _restore_checkpoint(self, scenario, step, current):
+        """
+        Restore the coupling variables and the solver states after a time step
+        from its snapshot. The coupling variables of the current time step are
+        released
+        """
+
+        snapshot = self.snapshots[(scenario.id, step)]
+        for body, states in zip(self.model.bodies, snapshot["bodies"]):
+            for time_index in range(max(current - 1, 0), current + 1):
+                if time_index not in states:
+                    body.release_time_index(scenario, time_index)
+            for time_index in states:
+                body.set_coupling_state(
+                    scenario, states[time_index], time_index=time_index
+                )
+
+        fail = 0
+        for solver in self.solvers.keys():
+            fail = self.solvers[solver].set_checkpoint(
+                scenario, self.model.bodies, step, snapshot["solvers"][solver]
+            )
+            fail = self.comm.allreduce(fail)
+            if fail != 0:
+                if self.comm.Get_rank() == 0:
+                    print(
+                        "Solver %s could not restart from time step %d" % (solver, step)
+                    )
+                return fail
+
+        return fail
+
+    def _free_checkpoints(self, scenario):
+        """
+        Discard the stored snapshots of a scenario
+        """
+
+        for key in list(self.snapshots.keys()):
+            if key[0] == scenario.id:
+                del self.snapshots[key]
+
+        return
+
     def _initialize_forward(self, scenario, bodies):
         """
         Initialize the variables and solver data for a forward analysis
         """
+        time_indices = None
+        if not scenario.steady and self.checkpoints is not None:
+            time_indices = [0]
+
         for body in bodies:
-            body.initialize_variables(scenario)
+            body.initialize_variables(scenario, time_indices)
 
         for solver in self.solvers.keys():
             fail = self.solvers[solver].initialize(scenario, bodies)
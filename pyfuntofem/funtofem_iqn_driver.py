@@ -0,0 +1,397 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+from mpi4py import MPI
+from funtofem import TransferScheme
+from .funtofem_nlbgs_driver import FUNtoFEMnlbgs
+
+
+class InterfaceQuasiNewton(object):
+    def __init__(self, comm, history=5, theta_init=0.125):
+        """
+        Interface quasi-Newton acceleration with an inverse least-squares Jacobian
+        (IQN-ILS) for the fixed-point iteration x = H(x) on the coupling interface.
+
+        The interface variables are stored as an array of shape (n, ncols) that is
+        distributed across the processors. Each column is accelerated independently,
+        so that the columns of the adjoint variables for each function are treated
+        as separate linear problems.
+
+        Parameters
+        ----------
+        comm: MPI.comm
+            MPI communicator
+        history: int
+            Maximum number of previous iterations kept in the least-squares problem
+        theta_init: float
+            Relaxation factor used for the first iteration
+        """
+
+        self.comm = comm
+        self.history = history
+        self.theta_init = theta_init
+        self.reset()
+
+        return
+
+    def reset(self):
+        """
+        Discard the stored iteration history
+        """
+
+        self.prev_res = None
+        self.prev_xt = None
+        self.dres = []
+        self.dxt = []
+
+        return
+
+    def update(self, x, xt):
+        """
+        Compute the next iterate from the input x and the output xt = H(x) of the
+        coupled fixed-point map
+
+        Parameters
+        ----------
+        x: np.ndarray
+            The input interface variables of shape (n, ncols)
+        xt: np.ndarray
+            The output interface variables of shape (n, ncols)
+
+        Returns
+        -------
+        x_new: np.ndarray
+            The next iterate of the interface variables
+        res_norm: float
+            The global norm of the residual xt - x
+        """
+
+        res = xt - x
+
+        # Update the differences in the residuals and outputs, keeping only the
+        # most recent iterations
+        if self.prev_res is not None:
+            self.dres.append(res - self.prev_res)
+            self.dxt.append(xt - self.prev_xt)
+            if len(self.dres) > self.history:
+                self.dres.pop(0)
+                self.dxt.pop(0)
+
+        self.prev_res = res.copy()
+        self.prev_xt = xt.copy()
+
+        # Assemble the local contributions to the normal equations of the
+        # least-squares problem for each column and the residual norm, and sum
+        # them across all processors with a single reduction
+        ncols = res.shape[1]
+        m = len(self.dres)
+        rr = np.einsum("nc,nc->c", res, res)
+        if m > 0:
+            V = np.array(self.dres)
+            VtV = np.einsum("inc,jnc->cij", V, V)
+            Vtr = np.einsum("inc,nc->ci", V, res)
+            local = np.concatenate((rr, VtV.ravel(), Vtr.ravel()))
+        else:
+            local = rr
+
+        data = self.comm.allreduce(local)
+        res_norm = np.sqrt(np.sum(np.real(data[:ncols])))
+
+        if m == 0:
+            x_new = x + self.theta_init * res
+        else:
+            VtV = data[ncols : ncols + ncols * m * m].reshape((ncols, m, m))
+            Vtr = data[ncols + ncols * m * m :].reshape((ncols, m))
+
+            # Solve the least-squares problem min ||V*c + res|| for each column
+            coef = np.zeros((ncols, m), dtype=res.dtype)
+            for k in range(ncols):
+                coef[k] = np.linalg.lstsq(VtV[k], -Vtr[k], rcond=None)[0]
+
+            W = np.array(self.dxt)
+            x_new = xt + np.einsum("inc,ci->nc", W, coef)
+
+        return x_new, res_norm
+
+
+class FUNtoFEMiqn(FUNtoFEMnlbgs):
+    def __init__(
+        self,
+        solvers,
+        comm,
+        struct_comm,
+        struct_root,
+        aero_comm,
+        aero_root,
+        transfer_options=None,
+        model=None,
+        history=5,
+        theta_init=0.125,
+        scenario_parallel=None,
+        warm_start=None,
+        checkpoints=None,
+    ):
+        """
+        The FUNtoFEM driver for the steady coupled forward and adjoint problems
+        using block Gauss-Seidel iterations accelerated with interface quasi-Newton
+        (IQN-ILS) updates of the structural displacements and temperatures. The
+        unsteady problems are solved with the NLBGS algorithm.
+
+        Parameters
+        ----------
+        solvers: dict
+           the various disciplinary solvers
+        comm: MPI.comm
+            MPI communicator
+        transfer_options: dict
+            options of the load and displacement transfer scheme
+        model: :class:`~funtofem_model.FUNtoFEMmodel`
+            The model containing the design data
+        history: int
+            Maximum number of previous iterations used by the quasi-Newton update
+        theta_init: float
+            Relaxation factor used for the first coupled iteration
+        scenario_parallel: :class:`~scenario_parallel.ScenarioParallel`
+            Partition of the processors used to analyze the scenarios concurrently
+        warm_start: str
+            None, 'last' or 'extrapolate' to start the steady coupled solves from
+            the interface variables of the previous designs
+        checkpoints: int
+            Number of snapshots of the unsteady states stored for the adjoint.
+            None (default) stores every time step
+        """
+
+        super(FUNtoFEMiqn, self).__init__(
+            solvers,
+            comm,
+            struct_comm,
+            struct_root,
+            aero_comm,
+            aero_root,
+            transfer_options=transfer_options,
+            model=model,
+            scenario_parallel=scenario_parallel,
+            warm_start=warm_start,
+            checkpoints=checkpoints,
+        )
+
+        self.accelerator = InterfaceQuasiNewton(
+            comm, history=history, theta_init=theta_init
+        )
+
+        return
+
+    def _get_interface_vector(self, scenario, adjoint=False):
+        """
+        Stack the structural coupling variables of all the bodies into a single
+        array with one column for the forward problem and one column per function
+        for the adjoint problem
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        adjoint: bool
+            Whether to get the adjoint coupling variables
+        """
+
+        states = self._get_coupling_states(scenario, adjoint=adjoint)
+        if adjoint:
+            ncols = scenario.count_adjoint_functions()
+        else:
+            ncols = 1
+
+        if len(states) == 0:
+            return np.zeros((0, ncols), dtype=TransferScheme.dtype)
+
+        return np.concatenate([state.reshape((-1, ncols)) for state in states])
+
+    def _set_interface_vector(self, scenario, x, adjoint=False):
+        """
+        Copy the stacked interface array back into the coupling variables of the
+        bodies
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        x: np.ndarray
+            The stacked interface variables
+        adjoint: bool
+            Whether to set the adjoint coupling variables
+        """
+
+        offset = 0
+        for vec in self._get_coupling_vectors(scenario, adjoint=adjoint):
+            n = vec.shape[0]
+            vec[:] = x[offset : offset + n].reshape(vec.shape)
+            offset += n
+
+        return
+
+    def _solve_steady_forward(self, scenario, steps=None):
+        """
+        Solve the aerothermoelastic forward analysis using block Gauss-Seidel
+        iterations with interface quasi-Newton acceleration
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        steps: int
+            Number of iterations if not set by the model
+        """
+
+        fail = 0
+
+        # Determine if we're using the scenario's number of steps or the argument
+        if steps is None:
+            if self.model:
+                steps = scenario.steps
+            else:
+                if self.comm.Get_rank() == 0:
+                    print(
+                        "No number of steps given for the coupled problem. Using default (1000)"
+                    )
+                steps = 1000
+
+        # Reset the residual history and the quasi-Newton history
+        scenario.forward_residuals = []
+        self.accelerator.reset()
+        x = self._get_interface_vector(scenario)
+
+        for step in range(1, steps + 1):
+            # Transfer displacements and temperatures
+            for body in self.model.bodies:
+                body.transfer_disps(scenario)
+                body.transfer_temps(scenario)
+
+            # Take a step in the flow solver
+            fail = self.solvers["flow"].iterate(scenario, self.model.bodies, step)
+
+            fail = self.comm.allreduce(fail)
+            if fail != 0:
+                if self.comm.Get_rank() == 0:
+                    print("Flow solver returned fail flag")
+                return fail
+
+            # Transfer the loads and heat flux
+            for body in self.model.bodies:
+                body.transfer_loads(scenario)
+                body.transfer_heat_flux(scenario)
+
+            # Take a step in the FEM model
+            fail = self.solvers["structural"].iterate(scenario, self.model.bodies, step)
+
+            fail = self.comm.allreduce(fail)
+            if fail != 0:
+                if self.comm.Get_rank() == 0:
+                    print("Structural solver returned fail flag")
+                return fail
+
+            # Compute the quasi-Newton update of the interface variables
+            xt = self._get_interface_vector(scenario)
+            x, res = self.accelerator.update(x, xt)
+            self._set_interface_vector(scenario, x)
+
+            scenario.forward_residuals.append(res)
+            if self._check_convergence(scenario, scenario.forward_residuals):
+                break
+
+        return fail
+
+    def _solve_steady_adjoint(self, scenario):
+        """
+        Solve the aerothermoelastic adjoint analysis using block Gauss-Seidel
+        iterations with interface quasi-Newton acceleration
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        """
+
+        fail = 0
+
+        # how many steps to take for the block Gauss Seidel
+        steps = scenario.steps
+
+        # Load the current state
+        for body in self.model.bodies:
+            body.transfer_disps(scenario)
+            body.transfer_loads(scenario)
+
+        # Initialize the adjoint variables
+        self._initialize_adjoint_variables(scenario, self.model.bodies)
+
+        # Reset the residual history and the quasi-Newton history
+        scenario.adjoint_residuals = []
+        self.accelerator.reset()
+        x = self._get_interface_vector(scenario, adjoint=True)
+
+        for step in range(1, steps + 1):
+            # Get force and heat flux terms for the flow solver
+            for body in self.model.bodies:
+                body.transfer_loads_adjoint(scenario)
+                body.transfer_heat_flux_adjoint(scenario)
+
+            # Iterate over the aerodynamic adjoint
+            fail = self.solvers["flow"].iterate_adjoint(
+                scenario, self.model.bodies, step
+            )
+
+            fail = self.comm.allreduce(fail)
+            if fail != 0:
+                if self.comm.Get_rank() == 0:
+                    print("Flow solver returned fail flag")
+                return fail
+
+            # Get the structural adjoint rhs
+            for body in self.model.bodies:
+                body.transfer_disps_adjoint(scenario)
+                body.transfer_temps_adjoint(scenario)
+
+            # take a step in the structural adjoint
+            fail = self.solvers["structural"].iterate_adjoint(
+                scenario, self.model.bodies, step
+            )
+
+            fail = self.comm.allreduce(fail)
+            if fail != 0:
+                if self.comm.Get_rank() == 0:
+                    print("Structural solver returned fail flag")
+                return fail
+
+            # Compute the quasi-Newton update of the adjoint interface variables
+            xt = self._get_interface_vector(scenario, adjoint=True)
+            x, res = self.accelerator.update(x, xt)
+            self._set_interface_vector(scenario, x, adjoint=True)
+
+            scenario.adjoint_residuals.append(res)
+            if self._check_convergence(
+                scenario, scenario.adjoint_residuals, adjoint=True
+            ):
+                break
+
+        self._extract_coordinate_derivatives(scenario, self.model.bodies, steps)
+        return 0
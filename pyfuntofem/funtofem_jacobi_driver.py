@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import numpy as np
+from mpi4py import MPI
+from .funtofem_nlbgs_driver import FUNtoFEMnlbgs
+
+
+class FUNtoFEMjacobi(FUNtoFEMnlbgs):
+    def __init__(
+        self,
+        solvers,
+        comm,
+        struct_comm,
+        struct_root,
+        aero_comm,
+        aero_root,
+        transfer_options=None,
+        model=None,
+        theta_init=0.125,
+        theta_min=0.01,
+        theta_max=1.0,
+        aitken_mode="field",
+        gauss_seidel_interval=0,
+        scenario_parallel=None,
+        warm_start=None,
+        checkpoints=None,
+    ):
+        """
+        The FUNtoFEM driver for the steady coupled forward and adjoint problems
+        using block Jacobi iterations. In each iteration the displacements,
+        temperatures, loads and heat flux from the previous iteration are
+        transferred first, and then the flow and structural solvers iterate one
+        after the other without synchronizing in between. When the flow and
+        structural solvers run on disjoint communicators, the two solvers then
+        work at the same time instead of waiting for each other. The unsteady
+        problems are solved with the NLBGS algorithm.
+
+        The fail flags of the solvers are reduced with a non-blocking reduction
+        that overlaps the Aitken relaxation. The fraction of the time that the
+        processors of each discipline spend outside their solver during the last
+        steady solve is stored in idle_fractions.
+
+        Parameters
+        ----------
+        solvers: dict
+           the various disciplinary solvers
+        comm: MPI.comm
+            MPI communicator
+        transfer_options: dict
+            options of the load and displacement transfer scheme
+        model: :class:`~funtofem_model.FUNtoFEMmodel`
+            The model containing the design data
+        theta_init: float
+            Initial value of theta for the Aitken under-relaxation
+        theta_min: float
+            Minimum value of theta for the Aitken under-relaxation
+        theta_max: float
+            Maximum value of theta for the Aitken under-relaxation
+        aitken_mode: str
+            'field' to relax the displacements and temperatures of each body with
+            independent values of theta or 'global' to use a single theta for all
+            the bodies and fields
+        gauss_seidel_interval: int
+            Every gauss_seidel_interval-th iteration is a block Gauss-Seidel
+            iteration that passes the new flow solution to the structural solver.
+            Zero (default) uses only block Jacobi iterations and one gives the
+            NLBGS algorithm
+        scenario_parallel: :class:`~scenario_parallel.ScenarioParallel`
+            Partition of the processors used to analyze the scenarios concurrently
+        warm_start: str
+            None, 'last' or 'extrapolate' to start the steady coupled solves from
+            the interface variables of the previous designs
+        checkpoints: int
+            Number of snapshots of the unsteady states stored for the adjoint.
+            None (default) stores every time step
+        """
+
+        super(FUNtoFEMjacobi, self).__init__(
+            solvers,
+            comm,
+            struct_comm,
+            struct_root,
+            aero_comm,
+            aero_root,
+            transfer_options=transfer_options,
+            model=model,
+            scenario_parallel=scenario_parallel,
+            warm_start=warm_start,
+            checkpoints=checkpoints,
+            theta_init=theta_init,
+            theta_min=theta_min,
+            theta_max=theta_max,
+            aitken_mode=aitken_mode,
+        )
+
+        if gauss_seidel_interval < 0:
+            raise ValueError("Gauss-Seidel interval must be zero or positive")
+        self.gauss_seidel_interval = gauss_seidel_interval
+
+        # Disciplines that run on this processor
+        self.flow_proc = aero_comm != MPI.COMM_NULL
+        self.struct_proc = struct_comm != MPI.COMM_NULL
+
+        self.idle_fractions = {"flow": 0.0, "structural": 0.0}
+
+        return
+
+    def _is_gauss_seidel_step(self, step):
+        """
+        Check whether the coupled iteration is a block Gauss-Seidel iteration
+        """
+
+        return self.gauss_seidel_interval > 0 and step % self.gauss_seidel_interval == 0
+
+    def _reduce_fail_flags(self, flow_fail, struct_fail):
+        """
+        Start the non-blocking reduction of the fail flags of the solvers. The
+        request is returned with the buffers, which must stay allocated until the
+        reduction completes.
+        """
+
+        fails = np.array([flow_fail, struct_fail], dtype=np.intc)
+        total = np.zeros(2, dtype=np.intc)
+        request = self.comm.Iallreduce(fails, total, op=MPI.SUM)
+
+        return request, fails, total
+
+    def _check_fail_flags(self, request, fails, total):
+        """
+        Complete the reduction of the fail flags and return the fail flag
+        """
+
+        request.Wait()
+        if total[0] != 0:
+            if self.comm.Get_rank() == 0:
+                print("Flow solver returned fail flag")
+            return total[0]
+        elif total[1] != 0:
+            if self.comm.Get_rank() == 0:
+                print("Structural solver returned fail flag")
+            return total[1]
+
+        return 0
+
+    def _set_idle_fractions(self, flow_time, struct_time, elapsed):
+        """
+        Compute the fraction of the elapsed time that the processors of each
+        discipline did not spend in their solver
+        """
+
+        times = np.zeros(4)
+        if self.flow_proc:
+            times[0:2] = flow_time, elapsed
+        if self.struct_proc:
+            times[2:4] = struct_time, elapsed
+        times = self.comm.allreduce(times)
+
+        for name, busy, total in [
+            ("flow", times[0], times[1]),
+            ("structural", times[2], times[3]),
+        ]:
+            self.idle_fractions[name] = 0.0
+            if total > 0.0:
+                self.idle_fractions[name] = 1.0 - busy / total
+
+        if self.comm.Get_rank() == 0:
+            print(
+                "Idle fraction of the flow solver %.3f and the structural solver %.3f"
+                % (self.idle_fractions["flow"], self.idle_fractions["structural"])
+            )
+
+        return
+
+    def _solve_steady_forward(self, scenario, steps=None):
+        """
+        Solve the aerothermoelastic forward analysis using block Jacobi
+        iterations with Aitken under-relaxation
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        steps: int
+            Number of iterations if not set by the model
+        """
+
+        fail = 0
+
+        # Determine if we're using the scenario's number of steps or the argument
+        if steps is None:
+            if self.model:
+                steps = scenario.steps
+            else:
+                if self.comm.Get_rank() == 0:
+                    print(
+                        "No number of steps given for the coupled problem. Using default (1000)"
+                    )
+                steps = 1000
+
+        # Reset the residual history and the relaxation from the initial
+        # coupling variables
+        scenario.forward_residuals = []
+        self.aitken.reset(self._get_coupling_vectors(scenario))
+
+        flow_time = 0.0
+        struct_time = 0.0
+        start = MPI.Wtime()
+
+        for step in range(1, steps + 1):
+            gauss_seidel = self._is_gauss_seidel_step(step)
+
+            # Transfer the displacements and temperatures, and the loads and
+            # heat flux from the previous iteration for a Jacobi iteration
+            for body in self.model.bodies:
+                body.transfer_disps(scenario)
+                body.transfer_temps(scenario)
+                if not gauss_seidel:
+                    body.transfer_loads(scenario)
+                    body.transfer_heat_flux(scenario)
+
+            # Take a step in the flow solver
+            t0 = MPI.Wtime()
+            flow_fail = self.solvers["flow"].iterate(scenario, self.model.bodies, step)
+            flow_time += MPI.Wtime() - t0
+
+            # Transfer the new loads and heat flux for a Gauss-Seidel iteration
+            if gauss_seidel:
+                for body in self.model.bodies:
+                    body.transfer_loads(scenario)
+                    body.transfer_heat_flux(scenario)
+
+            # Take a step in the FEM model
+            t0 = MPI.Wtime()
+            struct_fail = self.solvers["structural"].iterate(
+                scenario, self.model.bodies, step
+            )
+            struct_time += MPI.Wtime() - t0
+
+            # Reduce the fail flags while the coupling variables are relaxed
+            reduction = self._reduce_fail_flags(flow_fail, struct_fail)
+            res = self.aitken.relax(self._get_coupling_vectors(scenario))
+            fail = self._check_fail_flags(*reduction)
+            if fail != 0:
+                return fail
+
+            # Check the change in the coupling variables before the relaxation
+            # for convergence
+            scenario.forward_residuals.append(res)
+
+            if self._check_convergence(scenario, scenario.forward_residuals):
+                break
+
+        self._set_idle_fractions(flow_time, struct_time, MPI.Wtime() - start)
+
+        return fail
+
+    def _solve_steady_adjoint(self, scenario):
+        """
+        Solve the aerothermoelastic adjoint analysis using block Jacobi
+        iterations with Aitken under-relaxation
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        """
+
+        fail = 0
+
+        # how many steps to take for the block Jacobi iterations
+        steps = scenario.steps
+
+        # Load the current state
+        for body in self.model.bodies:
+            body.transfer_disps(scenario)
+            body.transfer_loads(scenario)
+
+        # Initialize the adjoint variables
+        self._initialize_adjoint_variables(scenario, self.model.bodies)
+
+        # Reset the residual history and the relaxation from the initial
+        # coupling variables
+        scenario.adjoint_residuals = []
+        self.aitken.reset(self._get_coupling_vectors(scenario, adjoint=True))
+
+        flow_time = 0.0
+        struct_time = 0.0
+        start = MPI.Wtime()
+
+        for step in range(1, steps + 1):
+            gauss_seidel = self._is_gauss_seidel_step(step)
+
+            # Get the force and heat flux terms for the flow solver, and the
+            # structural adjoint rhs from the previous iteration for a Jacobi
+            # iteration
+            for body in self.model.bodies:
+                body.transfer_loads_adjoint(scenario)
+                body.transfer_heat_flux_adjoint(scenario)
+                if not gauss_seidel:
+                    body.transfer_disps_adjoint(scenario)
+                    body.transfer_temps_adjoint(scenario)
+
+            # Iterate over the aerodynamic adjoint
+            t0 = MPI.Wtime()
+            flow_fail = self.solvers["flow"].iterate_adjoint(
+                scenario, self.model.bodies, step
+            )
+            flow_time += MPI.Wtime() - t0
+
+            # Get the new structural adjoint rhs for a Gauss-Seidel iteration
+            if gauss_seidel:
+                for body in self.model.bodies:
+                    body.transfer_disps_adjoint(scenario)
+                    body.transfer_temps_adjoint(scenario)
+
+            # take a step in the structural adjoint
+            t0 = MPI.Wtime()
+            struct_fail = self.solvers["structural"].iterate_adjoint(
+                scenario, self.model.bodies, step
+            )
+            struct_time += MPI.Wtime() - t0
+
+            # Reduce the fail flags while the adjoint products are relaxed
+            reduction = self._reduce_fail_flags(flow_fail, struct_fail)
+            res = self.aitken.relax(self._get_coupling_vectors(scenario, adjoint=True))
+            fail = self._check_fail_flags(*reduction)
+            if fail != 0:
+                return fail
+
+            # Check the change in the adjoint coupling variables before the relaxation
+            # for convergence
+            scenario.adjoint_residuals.append(res)
+
+            if self._check_convergence(
+                scenario, scenario.adjoint_residuals, adjoint=True
+            ):
+                break
+
+        self._set_idle_fractions(flow_time, struct_time, MPI.Wtime() - start)
+
+        self._extract_coordinate_derivatives(scenario, self.model.bodies, steps)
+        return 0
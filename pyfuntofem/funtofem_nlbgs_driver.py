@@ -24,6 +24,7 @@ import numpy as np
 from mpi4py import MPI
 from funtofem import TransferScheme
 from .funtofem_driver import FUNtoFEMDriver
+from .aitken_relaxation import AitkenRelaxation
 
 try:
     from .hermes_transfer import HermesTransfer
@@ -45,6 +46,10 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
         theta_init=0.125,
         theta_min=0.01,
         theta_max=1.0,
+        aitken_mode="field",
+        scenario_parallel=None,
+        warm_start=None,
+        checkpoints=None,
     ):
         """
         The FUNtoFEM driver for the Nonlinear Block Gauss-Seidel
@@ -64,6 +69,20 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
             Initial value of theta for the Aitken under-relaxation
         theta_min: float
             Minimum value of theta for the Aitken under-relaxation
+        theta_max: float
+            Maximum value of theta for the Aitken under-relaxation
+        aitken_mode: str
+            'field' to relax the displacements and temperatures of each body with
+            independent values of theta or 'global' to use a single theta for all
+            the bodies and fields
+        scenario_parallel: :class:`~scenario_parallel.ScenarioParallel`
+            Partition of the processors used to analyze the scenarios concurrently
+        warm_start: str
+            None, 'last' or 'extrapolate' to start the steady coupled solves from
+            the interface variables of the previous designs
+        checkpoints: int
+            Number of snapshots of the unsteady states stored for the adjoint.
+            None (default) stores every time step
         """
 
         super(FUNtoFEMnlbgs, self).__init__(
@@ -75,13 +94,25 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
             aero_root,
             transfer_options=transfer_options,
             model=model,
+            scenario_parallel=scenario_parallel,
+            warm_start=warm_start,
+            checkpoints=checkpoints,
+        )
+
+        self.aitken = AitkenRelaxation(
+            comm,
+            theta_init=theta_init,
+            theta_min=theta_min,
+            theta_max=theta_max,
+            mode=aitken_mode,
         )
 
         return
 
     def _initialize_adjoint_variables(self, scenario, bodies):
         """
-        Initialize the adjoint variables
+        Initialize the adjoint variables, from the adjoint products of the
+        previous designs with a warm start
 
         Parameters
         ----------
@@ -94,8 +125,86 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
         for body in bodies:
             body.initialize_adjoint_variables(scenario)
 
+        self._warm_start_scenario(scenario, adjoint=True)
+
         return
 
+    def _get_coupling_vectors(self, scenario, adjoint=False):
+        """
+        Get the structural coupling variables of all the bodies. For the forward
+        problem these are the structural displacements and temperatures. For the
+        adjoint problem these are the structural adjoint products that drive the
+        load and heat flux transfer adjoints.
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        adjoint: bool
+            Whether to get the adjoint coupling variables
+        """
+
+        vecs = []
+        for body in self.model.bodies:
+            if adjoint:
+                body_vecs = [
+                    body.get_struct_loads_ajp(scenario),
+                    body.get_struct_heat_flux_ajp(scenario),
+                ]
+            else:
+                body_vecs = [
+                    body.get_struct_disps(scenario),
+                    body.get_struct_temps(scenario),
+                ]
+
+            for vec in body_vecs:
+                if vec is not None:
+                    vecs.append(vec)
+
+        return vecs
+
+    def _get_coupling_states(self, scenario, adjoint=False):
+        """
+        Get copies of the structural coupling variables of all the bodies
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        adjoint: bool
+            Whether to get the adjoint coupling variables
+        """
+
+        return [vec.copy() for vec in self._get_coupling_vectors(scenario, adjoint)]
+
+    def _check_convergence(self, scenario, residuals, adjoint=False):
+        """
+        Check whether the coupled iterations have converged to the absolute or
+        relative tolerances of the scenario. After a warm start, the relative
+        tolerance applies to the first residual of the first solve.
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        residuals: list of float
+            The residual history of the coupled iterations
+        adjoint: bool
+            Whether the residuals are from the adjoint problem
+        """
+
+        res = residuals[-1]
+        ref = self.reference_residuals.get((scenario.id, adjoint), residuals[0])
+        if res < scenario.coupling_atol or res < scenario.coupling_rtol * ref:
+            if self.comm.Get_rank() == 0:
+                print(
+                    "Coupled iterations converged after %d steps with residual %e"
+                    % (len(residuals), res)
+                )
+            return True
+
+        return False
+
     def _solve_steady_forward(self, scenario, steps=None):
         """
         Solve the aerothermoelastic forward analysis using the nonlinear block Gauss-Seidel algorithm.
@@ -109,7 +218,6 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
             Number of iterations if not set by the model
         """
 
-        self.aitken_init = True
         fail = 0
 
         # Determine if we're using the scenario's number of steps or the argument
@@ -123,6 +231,11 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                     )
                 steps = 1000
 
+        # Reset the residual history and the relaxation from the initial
+        # coupling variables
+        scenario.forward_residuals = []
+        self.aitken.reset(self._get_coupling_vectors(scenario))
+
         # Loop over the NLBGS steps
         for step in range(1, steps + 1):
             # Transfer displacements and temperatures
@@ -153,9 +266,13 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                     print("Structural solver returned fail flag")
                 return fail
 
-            # Under-relaxation for solver stability
-            for body in self.model.bodies:
-                body.aitken_relax(scenario)
+            # Under-relaxation for solver stability. The convergence check uses
+            # the change in the coupling variables before the relaxation
+            res = self.aitken.relax(self._get_coupling_vectors(scenario))
+            scenario.forward_residuals.append(res)
+
+            if self._check_convergence(scenario, scenario.forward_residuals):
+                break
 
         return fail
 
@@ -171,7 +288,6 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
         """
 
         fail = 0
-        self.aitken_init = True
 
         # how many steps to take for the block Gauss Seidel
         steps = scenario.steps
@@ -184,6 +300,11 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
         # Initialize the adjoint variables
         self._initialize_adjoint_variables(scenario, self.model.bodies)
 
+        # Reset the residual history and the relaxation from the initial
+        # coupling variables
+        scenario.adjoint_residuals = []
+        self.aitken.reset(self._get_coupling_vectors(scenario, adjoint=True))
+
         # loop over the adjoint NLBGS solver
         for step in range(1, steps + 1):
             # Get force and heat flux terms for the flow solver
@@ -218,8 +339,16 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                     print("Structural solver returned fail flag")
                 return fail
 
-            for body in self.model.bodies:
-                body.aitken_adjoint_relax(scenario)
+            # Under-relaxation of the adjoint products for each function. The
+            # convergence check uses the change in the adjoint coupling
+            # variables before the relaxation
+            res = self.aitken.relax(self._get_coupling_vectors(scenario, adjoint=True))
+            scenario.adjoint_residuals.append(res)
+
+            if self._check_convergence(
+                scenario, scenario.adjoint_residuals, adjoint=True
+            ):
+                break
 
         self._extract_coordinate_derivatives(scenario, self.model.bodies, steps)
         return 0
@@ -253,38 +382,20 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
                     )
                 steps = 1000
 
-        for time_index in range(1, steps + 1):
-            # Transfer displacements and temperatures
-            for body in self.model.bodies:
-                body.transfer_disps(scenario, time_index)
-                body.transfer_temps(scenario, time_index)
-
-            # Take a step in the flow solver
-            fail = self.solvers["flow"].iterate(scenario, self.model.bodies, time_index)
-
-            fail = self.comm.allreduce(fail)
-            if fail != 0:
-                if self.comm.Get_rank() == 0:
-                    print("Flow solver returned fail flag")
-                return fail
-
-            # Transfer the loads and heat flux
-            for body in self.model.bodies:
-                body.transfer_loads(scenario, time_index)
-                body.transfer_heat_flux(scenario, time_index)
-
-            # Take a step in the FEM model
-            fail = self.solvers["structural"].iterate(
-                scenario, self.model.bodies, time_index
-            )
+        schedule = self._get_checkpointing(scenario)
+        if schedule is None:
+            for time_index in range(1, steps + 1):
+                fail = self._solve_unsteady_forward_step(scenario, time_index)
+                if fail != 0:
+                    return fail
+            return fail
 
-            fail = self.comm.allreduce(fail)
-            if fail != 0:
-                if self.comm.Get_rank() == 0:
-                    print("Structural solver returned fail flag")
-                return fail
+        # Discard the snapshots of the previous forward solve
+        self._free_checkpoints(scenario)
 
-        return fail
+        return self._run_checkpointing_actions(
+            scenario, schedule.forward_actions, current=0
+        )
 
         #     # Transfer structural displacements and temperatures to aerodynamic surface
         #     for body in self.model.bodies:
@@ -366,6 +477,106 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
 
         # # end solve loop
 
+    def _solve_unsteady_forward_step(self, scenario, time_index):
+        """
+        Take one time step of the unsteady forward problem
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            the current scenario
+        time_index: int
+            the time step number
+
+        Returns
+        -------
+        fail: int
+            fail flag for the coupled solver
+        """
+
+        # Transfer displacements and temperatures
+        for body in self.model.bodies:
+            body.transfer_disps(scenario, time_index)
+            body.transfer_temps(scenario, time_index)
+
+        # Take a step in the flow solver
+        fail = self.solvers["flow"].iterate(scenario, self.model.bodies, time_index)
+
+        fail = self.comm.allreduce(fail)
+        if fail != 0:
+            if self.comm.Get_rank() == 0:
+                print("Flow solver returned fail flag")
+            return fail
+
+        # Transfer the loads and heat flux
+        for body in self.model.bodies:
+            body.transfer_loads(scenario, time_index)
+            body.transfer_heat_flux(scenario, time_index)
+
+        # Take a step in the FEM model
+        fail = self.solvers["structural"].iterate(
+            scenario, self.model.bodies, time_index
+        )
+
+        fail = self.comm.allreduce(fail)
+        if fail != 0:
+            if self.comm.Get_rank() == 0:
+                print("Structural solver returned fail flag")
+            return fail
+
+        return fail
+
+    def _run_checkpointing_actions(self, scenario, actions, current):
+        """
+        Take the actions of a checkpointing schedule. Only the coupling
+        variables of the last two time steps are kept in the bodies
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            the current scenario
+        actions: list
+            actions of a :class:`~checkpointing.BinomialCheckpointing` schedule
+        current: int
+            the time step of the current states
+
+        Returns
+        -------
+        fail: int
+            fail flag
+        """
+
+        fail = 0
+        for action in actions:
+            if action[0] == "advance":
+                for time_index in range(action[1], action[2] + 1):
+                    for body in self.model.bodies:
+                        body.initialize_time_index(scenario, time_index)
+
+                    fail = self._solve_unsteady_forward_step(scenario, time_index)
+                    if fail != 0:
+                        return fail
+
+                    if time_index > 1:
+                        for body in self.model.bodies:
+                            body.release_time_index(scenario, time_index - 2)
+                current = action[2]
+            elif action[0] == "store":
+                self._store_checkpoint(scenario, action[1])
+            elif action[0] == "restore":
+                fail = self._restore_checkpoint(scenario, action[1], current)
+                if fail != 0:
+                    return fail
+                current = action[1]
+            elif action[0] == "free":
+                del self.snapshots[(scenario.id, action[1])]
+            else:
+                fail = self._solve_unsteady_adjoint_step(scenario, action[1])
+                if fail != 0:
+                    return fail
+
+        return fail
+
     def _solve_unsteady_adjoint(self, scenario):
         """
         Solves the unsteady adjoint problem using LBGS without FSI subiterations
@@ -390,208 +601,241 @@ class FUNtoFEMnlbgs(FUNtoFEMDriver):
         steps = scenario.steps
 
         # Initialize the adjoint variables
-        nfunctions = scenario.count_adjoint_functions()
         self._initialize_adjoint_variables(scenario, self.model.bodies)
 
         # Loop over each time step in the reverse order
-        for rstep in range(1, steps + 1):
-            step = steps - rstep + 1
-
-            self.solvers["flow"].set_states(scenario, self.model.bodies, step)
-            # Due to the staggering, we linearize the transfer about t_s^(n-1)
-            self.solvers["structural"].set_states(scenario, self.model.bodies, step - 1)
-
-            for body in self.model.bodies:
-                if body.transfer is not None:
-                    body.aero_disps = np.zeros(
-                        body.aero_nnodes * 3, dtype=TransferScheme.dtype
-                    )
-                    body.transfer.transferDisps(body.struct_disps, body.aero_disps)
-
-                    struct_loads = np.zeros(
-                        body.struct_nnodes * body.xfer_ndof, dtype=TransferScheme.dtype
-                    )
-                    body.transfer.transferLoads(body.aero_loads, struct_loads)
-
-                if "rigid" in body.motion_type and "deform" in body.motion_type:
-                    rotation = np.zeros(9, dtype=TransferScheme.dtype)
-                    translation = np.zeros(3, dtype=TransferScheme.dtype)
-                    u = np.zeros(body.aero_nnodes * 3, dtype=TransferScheme.dtype)
-
-                    body.rigid_transform = np.zeros((4, 4), dtype=TransferScheme.dtype)
-
-                    body.transfer.transformEquivRigidMotion(
-                        body.aero_disps, rotation, translation, u
-                    )
+        schedule = self._get_checkpointing(scenario)
+        if schedule is None:
+            for rstep in range(1, steps + 1):
+                step = steps - rstep + 1
+                fail = self._solve_unsteady_adjoint_step(scenario, step)
+                if fail != 0:
+                    return fail
+        else:
+            fail = self._run_checkpointing_actions(
+                scenario, schedule.adjoint_actions, current=steps
+            )
+            self._free_checkpoints(scenario)
+            if fail != 0:
+                return fail
 
-                    body.rigid_transform[:3, :3] = rotation.reshape((3, 3), order="F")
-                    body.rigid_transform[:3, 3] = translation
-                    body.rigid_transform[-1, -1] = 1.0
+            if self.comm.Get_rank() == 0:
+                print(
+                    "Checkpointed adjoint of scenario %s recomputed %d time steps with %d snapshots"
+                    % (scenario.name, schedule.recomputed_steps, self.checkpoints)
+                )
 
-                    body.global_aero_disps = body.aero_disps[:]
-                    body.aero_disps = u.copy()
+        # end of solve loop
 
-            # take a step in the structural adjoint
-            fail = self.solvers["structural"].iterate_adjoint(
-                scenario, self.model.bodies, step
-            )
+        # evaluate the initial conditions
+        fail = self.solvers["flow"].iterate_adjoint(scenario, self.model.bodies, step=0)
+        fail = self.comm.allreduce(fail)
+        if fail != 0:
+            if self.comm.Get_rank() == 0:
+                print("Flow solver returned fail flag")
+            return fail
 
-            fail = self.comm.allreduce(fail)
-            if fail != 0:
-                if self.comm.Get_rank() == 0:
-                    print("Structural solver returned fail flag")
-                return fail
+        fail = self.solvers["structural"].iterate_adjoint(
+            scenario, self.model.bodies, step=0
+        )
+        fail = self.comm.allreduce(fail)
+        if fail != 0:
+            if self.comm.Get_rank() == 0:
+                print("Structural solver returned fail flag")
+            return fail
 
-            # Get load and heat flux terms for the flow solver
-            for body in self.model.bodies:
-                for func in range(nfunctions):
-                    if body.transfer is not None:
-                        # Transform load transfer adjoint variables using transpose Jacobian from
-                        # funtofem: dLdfA^T * psi_L
-                        psi_L_r = np.zeros(
-                            body.aero_nnodes * 3, dtype=TransferScheme.dtype
-                        )
-                        body.transfer.applydDduS(
-                            body.psi_S[:, func].copy(order="C"), psi_L_r
-                        )
-                        body.dLdfa[:, func] = psi_L_r
-
-                    if body.thermal_transfer is not None:
-                        # Transform heat flux transfer adjoint variables using transpose Jacobian from
-                        # funtofem: dQdftA^T * psi_Q = dTdts * psi_Q
-                        psi_Q_r = np.zeros(body.aero_nnodes, dtype=TransferScheme.dtype)
-                        body.thermal_transfer.applydQdqATrans(
-                            body.psi_T_S[:, func].copy(order="C"), psi_Q_r
-                        )
-                        body.dQdfta[:, func] = psi_Q_r
+        # extract coordinate derivative term from initial condition
+        self._extract_coordinate_derivatives(scenario, self.model.bodies, step=0)
 
-            fail = self.solvers["flow"].iterate_adjoint(
-                scenario, self.model.bodies, step
-            )
+        return 0
 
-            fail = self.comm.allreduce(fail)
-            if fail != 0:
-                if self.comm.Get_rank() == 0:
-                    print("Flow solver returned fail flag")
-                return fail
+    def _solve_unsteady_adjoint_step(self, scenario, step):
+        """
+        Take the reverse step of the unsteady adjoint problem for a time step.
+        The solvers must hold the forward states of this time step
 
-            # From the flow grid adjoint, get to the displacement adjoint
-            for body in self.model.bodies:
-                if body.transfer is not None:
-                    for func in range(nfunctions):
-                        if body.motion_type == "deform":
-                            # displacement adjoint equation
-                            body.psi_D[:, func] = -body.dGdua[:, func]
-                        elif (
-                            "rigid" in body.motion_type and "deform" in body.motion_type
-                        ):
-                            # solve the elastic deformation adjoint
-                            psi_E = np.zeros(
-                                body.aero_nnodes * 3, dtype=TransferScheme.dtype
-                            )
-                            tmt = np.linalg.inv(np.transpose(body.rigid_transform))
-                            for node in range(body.aero_nnodes):
-                                for i in range(3):
-                                    psi_E[3 * node + i] = (
-                                        tmt[i, 0] * body.dGdua[3 * node + 0, func]
-                                        + tmt[i, 1] * body.dGdua[3 * node + 1, func]
-                                        + tmt[i, 2] * body.dGdua[3 * node + 2, func]
-                                        + tmt[i, 3]
-                                    )
-
-                            # get the product dE/dT^T psi_E
-                            dEdTmat = np.zeros((3, 4), dtype=TransferScheme.dtype)
-
-                            for n in range(body.aero_nnodes):
-                                for i in range(3):
-                                    for j in range(4):
-                                        if j < 3:
-                                            dEdTmat[i, j] += (
-                                                -(
-                                                    body.aero_X[3 * n + j]
-                                                    + body.aero_disps[3 * n + j]
-                                                )
-                                                * psi_E[3 * n + i]
-                                            )
-                                        else:
-                                            dEdTmat[i, j] += -psi_E[3 * n + i]
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            the current scenario
+        step: int
+            the time step number
 
-                            dEdT = dEdTmat.flatten(order="F")
-                            dEdT = self.comm.allreduce(dEdT)
+        Returns
+        -------
+        fail: int
+            fail flag
+        """
 
-                            # solve the rigid transform adjoint
-                            psi_R = np.zeros(12, dtype=TransferScheme.dtype)
-                            dGdT_func = body.dGdT[:, :, func]
-                            dGdT = dGdT_func[:3, :4].flatten(order="F")
+        nfunctions = scenario.count_adjoint_functions()
 
-                            psi_R = -dGdT - dEdT
+        self.solvers["flow"].set_states(scenario, self.model.bodies, step)
+        # Due to the staggering, we linearize the transfer about t_s^(n-1)
+        self.solvers["structural"].set_states(scenario, self.model.bodies, step - 1)
 
-                            # now solve the displacement adjoint
-                            dRduA = np.zeros(
-                                3 * body.aero_nnodes, dtype=TransferScheme.dtype
-                            )
-                            body.transfer.applydRduATrans(psi_R, dRduA)
+        for body in self.model.bodies:
+            if body.transfer is not None:
+                body.aero_disps = np.zeros(
+                    body.aero_nnodes * 3, dtype=TransferScheme.dtype
+                )
+                body.transfer.transferDisps(body.struct_disps, body.aero_disps)
 
-                            body.psi_D[:, func] = -psi_E - dRduA
+                struct_loads = np.zeros(
+                    body.struct_nnodes * body.xfer_ndof, dtype=TransferScheme.dtype
+                )
+                body.transfer.transferLoads(body.aero_loads, struct_loads)
 
-                # form the RHS for the structural adjoint equation on the next reverse step
-                for func in range(nfunctions):
+            if "rigid" in body.motion_type and "deform" in body.motion_type:
+                rotation = np.zeros(9, dtype=TransferScheme.dtype)
+                translation = np.zeros(3, dtype=TransferScheme.dtype)
+                u = np.zeros(body.aero_nnodes * 3, dtype=TransferScheme.dtype)
 
-                    if body.transfer is not None:
-                        # calculate dDdu_s^T * psi_D
-                        psi_D_product = np.zeros(
-                            body.struct_nnodes * body.xfer_ndof,
-                            dtype=TransferScheme.dtype,
-                        )
-                        body.transfer.applydDduSTrans(
-                            body.psi_D[:, func].copy(order="C"), psi_D_product
-                        )
+                body.rigid_transform = np.zeros((4, 4), dtype=TransferScheme.dtype)
 
-                        # calculate dLdu_s^T * psi_L
-                        psi_L_product = np.zeros(
-                            body.struct_nnodes * body.xfer_ndof,
-                            dtype=TransferScheme.dtype,
-                        )
-                        body.transfer.applydLduSTrans(
-                            body.psi_L[:, func].copy(order="C"), psi_L_product
-                        )
-                        body.struct_rhs[:, func] = -psi_D_product - psi_L_product
+                body.transfer.transformEquivRigidMotion(
+                    body.aero_disps, rotation, translation, u
+                )
 
-                    if body.thermal_transfer is not None:
-                        # calculate dTdt_s^T * psi_T
-                        psi_T_product = np.zeros(
-                            body.struct_nnodes * body.therm_xfer_ndof,
-                            dtype=TransferScheme.dtype,
-                        )
-                        body.psi_T = body.dAdta
-                        body.thermal_transfer.applydTdtSTrans(
-                            body.psi_T[:, func].copy(order="C"), psi_T_product
-                        )
-                        body.struct_rhs_T[:, func] = -psi_T_product
+                body.rigid_transform[:3, :3] = rotation.reshape((3, 3), order="F")
+                body.rigid_transform[:3, 3] = translation
+                body.rigid_transform[-1, -1] = 1.0
 
-            # extract and accumulate coordinate derivative every step
-            self._extract_coordinate_derivatives(scenario, self.model.bodies, step)
+                body.global_aero_disps = body.aero_disps[:]
+                body.aero_disps = u.copy()
 
-        # end of solve loop
+        # take a step in the structural adjoint
+        fail = self.solvers["structural"].iterate_adjoint(
+            scenario, self.model.bodies, step
+        )
 
-        # evaluate the initial conditions
-        fail = self.solvers["flow"].iterate_adjoint(scenario, self.model.bodies, step=0)
         fail = self.comm.allreduce(fail)
         if fail != 0:
             if self.comm.Get_rank() == 0:
-                print("Flow solver returned fail flag")
+                print("Structural solver returned fail flag")
             return fail
 
-        fail = self.solvers["structural"].iterate_adjoint(
-            scenario, self.model.bodies, step=0
-        )
+        # Get load and heat flux terms for the flow solver
+        for body in self.model.bodies:
+            for func in range(nfunctions):
+                if body.transfer is not None:
+                    # Transform load transfer adjoint variables using transpose Jacobian from
+                    # funtofem: dLdfA^T * psi_L
+                    psi_L_r = np.zeros(body.aero_nnodes * 3, dtype=TransferScheme.dtype)
+                    body.transfer.applydDduS(
+                        body.psi_S[:, func].copy(order="C"), psi_L_r
+                    )
+                    body.dLdfa[:, func] = psi_L_r
+
+                if body.thermal_transfer is not None:
+                    # Transform heat flux transfer adjoint variables using transpose Jacobian from
+                    # funtofem: dQdftA^T * psi_Q = dTdts * psi_Q
+                    psi_Q_r = np.zeros(body.aero_nnodes, dtype=TransferScheme.dtype)
+                    body.thermal_transfer.applydQdqATrans(
+                        body.psi_T_S[:, func].copy(order="C"), psi_Q_r
+                    )
+                    body.dQdfta[:, func] = psi_Q_r
+
+        fail = self.solvers["flow"].iterate_adjoint(scenario, self.model.bodies, step)
+
         fail = self.comm.allreduce(fail)
         if fail != 0:
             if self.comm.Get_rank() == 0:
-                print("Structural solver returned fail flag")
+                print("Flow solver returned fail flag")
             return fail
 
-        # extract coordinate derivative term from initial condition
-        self._extract_coordinate_derivatives(scenario, self.model.bodies, step=0)
+        # From the flow grid adjoint, get to the displacement adjoint
+        for body in self.model.bodies:
+            if body.transfer is not None:
+                for func in range(nfunctions):
+                    if body.motion_type == "deform":
+                        # displacement adjoint equation
+                        body.psi_D[:, func] = -body.dGdua[:, func]
+                    elif "rigid" in body.motion_type and "deform" in body.motion_type:
+                        # solve the elastic deformation adjoint
+                        psi_E = np.zeros(
+                            body.aero_nnodes * 3, dtype=TransferScheme.dtype
+                        )
+                        tmt = np.linalg.inv(np.transpose(body.rigid_transform))
+                        for node in range(body.aero_nnodes):
+                            for i in range(3):
+                                psi_E[3 * node + i] = (
+                                    tmt[i, 0] * body.dGdua[3 * node + 0, func]
+                                    + tmt[i, 1] * body.dGdua[3 * node + 1, func]
+                                    + tmt[i, 2] * body.dGdua[3 * node + 2, func]
+                                    + tmt[i, 3]
+                                )
+
+                        # get the product dE/dT^T psi_E
+                        dEdTmat = np.zeros((3, 4), dtype=TransferScheme.dtype)
+
+                        for n in range(body.aero_nnodes):
+                            for i in range(3):
+                                for j in range(4):
+                                    if j < 3:
+                                        dEdTmat[i, j] += (
+                                            -(
+                                                body.aero_X[3 * n + j]
+                                                + body.aero_disps[3 * n + j]
+                                            )
+                                            * psi_E[3 * n + i]
+                                        )
+                                    else:
+                                        dEdTmat[i, j] += -psi_E[3 * n + i]
 
-        return 0
+                        dEdT = dEdTmat.flatten(order="F")
+                        dEdT = self.comm.allreduce(dEdT)
+
+                        # solve the rigid transform adjoint
+                        psi_R = np.zeros(12, dtype=TransferScheme.dtype)
+                        dGdT_func = body.dGdT[:, :, func]
+                        dGdT = dGdT_func[:3, :4].flatten(order="F")
+
+                        psi_R = -dGdT - dEdT
+
+                        # now solve the displacement adjoint
+                        dRduA = np.zeros(
+                            3 * body.aero_nnodes, dtype=TransferScheme.dtype
+                        )
+                        body.transfer.applydRduATrans(psi_R, dRduA)
+
+                        body.psi_D[:, func] = -psi_E - dRduA
+
+            # form the RHS for the structural adjoint equation on the next reverse step
+            for func in range(nfunctions):
+
+                if body.transfer is not None:
+                    # calculate dDdu_s^T * psi_D
+                    psi_D_product = np.zeros(
+                        body.struct_nnodes * body.xfer_ndof,
+                        dtype=TransferScheme.dtype,
+                    )
+                    body.transfer.applydDduSTrans(
+                        body.psi_D[:, func].copy(order="C"), psi_D_product
+                    )
+
+                    # calculate dLdu_s^T * psi_L
+                    psi_L_product = np.zeros(
+                        body.struct_nnodes * body.xfer_ndof,
+                        dtype=TransferScheme.dtype,
+                    )
+                    body.transfer.applydLduSTrans(
+                        body.psi_L[:, func].copy(order="C"), psi_L_product
+                    )
+                    body.struct_rhs[:, func] = -psi_D_product - psi_L_product
+
+                if body.thermal_transfer is not None:
+                    # calculate dTdt_s^T * psi_T
+                    psi_T_product = np.zeros(
+                        body.struct_nnodes * body.therm_xfer_ndof,
+                        dtype=TransferScheme.dtype,
+                    )
+                    body.psi_T = body.dAdta
+                    body.thermal_transfer.applydTdtSTrans(
+                        body.psi_T[:, func].copy(order="C"), psi_T_product
+                    )
+                    body.struct_rhs_T[:, func] = -psi_T_product
+
+        # extract and accumulate coordinate derivative every step
+        self._extract_coordinate_derivatives(scenario, self.model.bodies, step)
+
+        return fail
@@ -39,6 +39,8 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
         theta_init=0.125,
         theta_min=0.01,
         fsi_subiters=1,
+        scenario_parallel=None,
+        warm_start=None,
     ):
         """
         The FUNtoFEM driver for the Nonlinear Block Gauss-Seidel solvers for steady and unsteady coupled adjoint.
@@ -57,6 +59,11 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
             Initial value of theta for the Aitken under-relaxation
         theta_min: float
             Minimum value of theta for the Aitken under-relaxation
+        scenario_parallel: :class:`~scenario_parallel.ScenarioParallel`
+            Partition of the processors used to analyze the scenarios concurrently
+        warm_start: str
+            None, 'last' or 'extrapolate' to start the steady coupled solves from
+            the interface variables of the previous designs
         """
 
         super(FUNtoFEMnlbgsFSISubiters, self).__init__(
@@ -68,6 +75,8 @@ class FUNtoFEMnlbgsFSISubiters(FUNtoFEMDriver):
             aero_master,
             transfer_options=transfer_options,
             model=model,
+            scenario_parallel=scenario_parallel,
+            warm_start=warm_start,
         )
 
         # Aitken acceleration settings
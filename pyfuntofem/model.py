@@ -24,5 +24,6 @@ limitations under the License.
 from .variable import *
 from .function import *
 from .body import *
+from .time_history import *
 from .scenario import *
 from .funtofem_model import *
@@ -27,7 +27,17 @@ from .variable import Variable
 class Scenario(Base):
     """A class to hold scenario information for a design point in optimization"""
 
-    def __init__(self, name, id=0, group=None, steady=True, fun3d=True, steps=1000):
+    def __init__(
+        self,
+        name,
+        id=0,
+        group=None,
+        steady=True,
+        fun3d=True,
+        steps=1000,
+        coupling_atol=0.0,
+        coupling_rtol=0.0,
+    ):
         """
         Parameters
         ----------
@@ -44,6 +54,13 @@ class Scenario(Base):
             whether or not you are using FUN3D. If true, the scenario class will auto-populate 'aerodynamic' required by FUN3D
         steps: int
             the number of coupled time steps to run for the scenario
+        coupling_atol: float
+            absolute tolerance on the norm of the change in the structural coupling
+            variables between steady coupled iterations. A value of zero disables the check
+        coupling_rtol: float
+            tolerance on the norm of the change in the structural coupling variables
+            relative to the change in the first steady coupled iteration. A value of zero
+            disables the check
 
         See Also
         --------
@@ -62,6 +79,12 @@ class Scenario(Base):
         self.steady = steady
         self.steps = steps
 
+        # Convergence tolerances and residual histories of the steady coupled solves
+        self.coupling_atol = coupling_atol
+        self.coupling_rtol = coupling_rtol
+        self.forward_residuals = []
+        self.adjoint_residuals = []
+
         if fun3d:
             mach = Variable("Mach", id=1, upper=5.0, active=False)
             aoa = Variable("AOA", id=2, lower=-15.0, upper=15.0, active=False)
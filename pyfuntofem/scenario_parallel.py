@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+__all__ = ["ScenarioParallel"]
+
+
+class ScenarioParallel(object):
+    def __init__(self, comm, model, num_groups=None):
+        """
+        Partition of the processors into groups that analyze different scenarios
+        of a model concurrently.
+
+        The communicator is split into num_groups contiguous groups of processors
+        and the scenarios are assigned to the groups in a round-robin order. Each
+        group builds its solvers and its structural/aerodynamic split on
+        group_comm, and its driver is created with group_comm in place of the
+        global communicator and this object as the scenario_parallel argument.
+        The driver then only analyzes the scenarios of its group, and the
+        function values and gradients are exchanged between the groups with a
+        single collective at the end of each forward and adjoint solve.
+
+        Parameters
+        ----------
+        comm: MPI.comm
+            Global communicator of all the processors
+        model: :class:`~funtofem_model.FUNtoFEMmodel`
+            The model containing the scenarios
+        num_groups: int
+            Number of groups of processors. Defaults to the smaller of the number
+            of scenarios and the number of processors
+        """
+
+        nscenarios = len(model.scenarios)
+        if num_groups is None:
+            num_groups = min(nscenarios, comm.size)
+        if num_groups < 1 or num_groups > min(nscenarios, comm.size):
+            raise ValueError(
+                "Number of scenario groups must be between 1 and %d"
+                % min(nscenarios, comm.size)
+            )
+
+        self.comm = comm
+        self.num_groups = num_groups
+
+        # Contiguous blocks of processors so that the groups stay on the
+        # same nodes when the processors are numbered by node
+        self.group = comm.rank * num_groups // comm.size
+        self.group_comm = comm.Split(self.group, comm.rank)
+
+        # Group that analyzes each scenario, in the order of the model
+        self.owners = [i % num_groups for i in range(nscenarios)]
+
+        return
+
+    def get_scenarios(self, model):
+        """
+        Get the scenarios analyzed by the group of this processor
+
+        Parameters
+        ----------
+        model: :class:`~funtofem_model.FUNtoFEMmodel`
+            The model containing the scenarios
+
+        Returns
+        -------
+        scenarios: list of :class:`~scenario.Scenario`
+            The scenarios of this group in the order of the model
+        """
+
+        return [
+            scenario
+            for i, scenario in enumerate(model.scenarios)
+            if self.owners[i] == self.group
+        ]
+
+    def reduce_functions(self, model, fail=0):
+        """
+        Set the function values of all the scenarios on every processor from the
+        values computed by the groups that analyzed them
+
+        Parameters
+        ----------
+        model: :class:`~funtofem_model.FUNtoFEMmodel`
+            The model containing the scenarios
+        fail: int
+            Fail flag of the forward solves on this processor
+
+        Returns
+        -------
+        fail: int
+            Largest fail flag of all the processors
+        """
+
+        data = None
+        if self.group_comm.rank == 0:
+            data = {}
+            for scenario in self.get_scenarios(model):
+                data[scenario.id] = [func.value for func in scenario.functions]
+
+        fail, gathered = self._exchange(fail, data)
+        for values in gathered:
+            for scenario in model.scenarios:
+                if scenario.id in values:
+                    for func, value in zip(scenario.functions, values[scenario.id]):
+                        func.value = value
+
+        return fail
+
+    def reduce_gradients(self, model, fail=0):
+        """
+        Set the function gradients of all the scenarios on every processor from
+        the gradients computed by the groups that analyzed them. The gradients are
+        exchanged for the variables returned by the model's get_variables.
+
+        Parameters
+        ----------
+        model: :class:`~funtofem_model.FUNtoFEMmodel`
+            The model containing the scenarios
+        fail: int
+            Fail flag of the adjoint solves on this processor
+
+        Returns
+        -------
+        fail: int
+            Largest fail flag of all the processors
+        """
+
+        variables = model.get_variables()
+
+        data = None
+        if self.group_comm.rank == 0:
+            data = {}
+            for scenario in self.get_scenarios(model):
+                data[scenario.id] = [
+                    [func.get_gradient_component(var) for var in variables]
+                    for func in scenario.functions
+                ]
+
+        fail, gathered = self._exchange(fail, data)
+        for grads in gathered:
+            for scenario in model.scenarios:
+                if scenario.id in grads:
+                    for func, grad in zip(scenario.functions, grads[scenario.id]):
+                        for var, value in zip(variables, grad):
+                            func.set_gradient_component(var, value)
+
+        return fail
+
+    def _exchange(self, fail, data):
+        """
+        Gather the fail flags of all the processors and the data of the group
+        roots with one collective, and return the largest fail flag and the data
+        of the groups
+        """
+
+        gathered = self.comm.allgather((fail, data))
+        fail = max(f for f, d in gathered)
+
+        return fail, [d for f, d in gathered if d is not None]
@@ -569,6 +569,66 @@ class SolverInterface(object):
         """
         pass
 
+    def get_checkpoint(self, scenario, bodies, step):
+        """
+        Get a snapshot of the solver states after a time step for the checkpointed unsteady adjoint.
+        The driver stores the snapshot and passes it back to set_checkpoint when the time steps after it
+        have to be recomputed.
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        bodies: list of :class:`~body.Body` objects
+            The bodies in the model
+        step: int
+            The time step number. 0 is the initial condition
+
+        Returns
+        -------
+        checkpoint: object
+            Anything the solver needs to restart from this step, or None if the solver keeps these states itself
+        """
+        return None
+
+    def set_checkpoint(self, scenario, bodies, step, checkpoint):
+        """
+        Restore the solver states after a time step from a snapshot returned by get_checkpoint.
+        The driver then recomputes the following time steps with iterate before it calls set_states
+        and iterate_adjoint for them. Solvers that cannot restart must return a nonzero fail flag,
+        which is the default.
+
+        Parameters
+        ----------
+        scenario: :class:`~scenario.Scenario`
+            The current scenario
+        bodies: list of :class:`~body.Body` objects
+            The bodies in the model
+        step: int
+            The time step number. 0 is the initial condition
+        checkpoint: object
+            The snapshot returned by get_checkpoint for this step
+
+        Returns
+        -------
+        fail: int
+            fail flag
+        """
+        return 1
+
+    def supports_checkpointing(self):
+        """
+        Whether the solver can restart from the snapshots of get_checkpoint in set_checkpoint.
+        The drivers check this for every solver when they are given a number of checkpoints,
+        so that the unsteady adjoint does not fail after the whole forward solve has been run.
+
+        Returns
+        -------
+        supported: bool
+            True if set_checkpoint can restart the solver, False by default
+        """
+        return False
+
     def step_pre(self, scenario, bodies, step):
         """
         Operations before at a step in an FSI subiteration case. Called in NLBGS with FSI subiterations.
@@ -40,6 +40,7 @@ class TacsSteadyInterface(SolverInterface):
         gen_output=None,
         thermal_index=0,
         struct_id=None,
+        warm_start=False,
     ):
         """
         Initialize the TACS implementation of the SolverInterface for the FUNtoFEM
@@ -69,9 +70,13 @@ class TacsSteadyInterface(SolverInterface):
             Index of the structural degree of freedom corresponding to the temperature
         struct_id: list or np.ndarray
             List of the unique global ids of all the structural nodes
+        warm_start: bool
+            Start the solution of each scenario from the solution of its previous
+            analysis instead of zero
         """
 
         self.comm = comm
+        self.warm_start = warm_start
         self.tacs_comm = None
 
         # Get the list of active design variables from the FUNtoFEM model. This
@@ -400,8 +405,11 @@ class TacsSteadyInterface(SolverInterface):
                 # node locations across TACS processors)
                 self.assembler.setNodes(self.struct_X)
 
-            # Set the solution to zero
-            self.ans.zeroEntries()
+            # Set the solution to zero or to the previous solution of the scenario
+            if self.warm_start:
+                self.ans.copyValues(self.scenario_data[scenario].u)
+            else:
+                self.ans.zeroEntries()
 
             # Set the boundary conditions
             self.assembler.setBCs(self.ans)
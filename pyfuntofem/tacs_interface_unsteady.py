@@ -387,6 +387,14 @@ class TacsUnsteadyInterface(SolverInterface):
                         body.xfer_ndof * i : body.xfer_ndof * i + body.xfer_ndof
                     ] = disps[tacs_body.dof * n : tacs_body.dof * n + body.xfer_ndof]
 
+    def set_checkpoint(self, scenario, bodies, step, checkpoint):
+        # The integrator keeps the states of every time step, so the steps
+        # after the checkpoint can be taken again without restoring anything
+        return 0
+
+    def supports_checkpointing(self):
+        return True
+
     def iterate_adjoint(self, scenario, bodies, step):
         fail = 0
 
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+"""
+This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+and design optimization.
+
+Copyright (C) 2015 Georgia Tech Research Corporation.
+Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+All rights reserved.
+
+FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+you may not use this software except in compliance with the License.
+You may obtain a copy of the License at
+
+   http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+__all__ = ["TimeHistory"]
+
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+class TimeHistory(object):
+    def __init__(
+        self,
+        nsteps,
+        size,
+        dtype,
+        directory=None,
+        cache_size=4,
+        read_ahead=2,
+        asynchronous=True,
+    ):
+        """
+        Time history of an interface variable of an unsteady scenario, indexed
+        like the list of arrays that it replaces.
+
+        Without a directory the history is a single contiguous (nsteps, size)
+        array and each time index is a row of it. With a directory the history
+        is a memory-mapped temporary file in that directory, which is deleted
+        when the history is closed. Only the last cache_size time indices that
+        were accessed are then kept in memory. The other ones are written to
+        the file, by a background thread when asynchronous is True, and the
+        next read_ahead time indices are read in the background when the time
+        indices are accessed in the reverse order during the adjoint.
+
+        The arrays returned for a file-backed history are only valid while
+        their time index is in the cache, so a solver should not keep them
+        across more than cache_size time steps.
+
+        Parameters
+        ----------
+        nsteps: int
+            Number of time indices
+        size: int
+            Length of the array of each time index
+        dtype: numpy dtype
+            Data type of the arrays
+        directory: str
+            Directory of the memory-mapped file, or None to keep the history in memory
+        cache_size: int
+            Number of time indices of a file-backed history kept in memory
+        read_ahead: int
+            Number of time indices read ahead in the reverse order
+        asynchronous: bool
+            Whether to write and read the file in a background thread
+        """
+
+        if directory is not None and cache_size < 1:
+            raise ValueError("Time history cache must hold at least one time step")
+
+        self.nsteps = nsteps
+        self.size = size
+        self.dtype = np.dtype(dtype)
+        self.cache_size = cache_size
+        self.read_ahead = read_ahead
+
+        self.file = None
+        self.cache = None
+        self.executor = None
+        if directory is None:
+            self.data = np.zeros((nsteps, size), dtype=self.dtype)
+        else:
+            self.file = tempfile.TemporaryFile(dir=directory, suffix=".f2f")
+            self.data = np.memmap(
+                self.file, dtype=self.dtype, mode="w+", shape=(nsteps, max(size, 1))
+            )
+
+            # Time indices in memory in the order of access, pending reads
+            # and time indices that hold data in the file
+            self.cache = OrderedDict()
+            self.pending = {}
+            self.stored = set()
+            self.last_index = None
+
+            # A single thread keeps the writes and reads of a time index in order
+            if asynchronous:
+                self.executor = ThreadPoolExecutor(max_workers=1)
+
+        return
+
+    def __len__(self):
+        return self.nsteps
+
+    def __getitem__(self, time_index):
+        if time_index < 0:
+            time_index += self.nsteps
+
+        if self.cache is None:
+            return self.data[time_index]
+
+        if time_index in self.cache:
+            self.cache.move_to_end(time_index)
+        else:
+            self.cache[time_index] = self._read(time_index)
+            self._evict()
+
+        # Read ahead in the reverse order
+        if self.last_index is not None and time_index < self.last_index:
+            for index in range(time_index - 1, time_index - 1 - self.read_ahead, -1):
+                if index < 0:
+                    break
+                if index not in self.cache and index not in self.pending:
+                    self.pending[index] = self._submit(self._load, index)
+        self.last_index = time_index
+
+        return self.cache[time_index]
+
+    def __setitem__(self, time_index, value):
+        """
+        Set the array of a time index. Setting None drops the time index from
+        the cache of a file-backed history
+        """
+
+        if time_index < 0:
+            time_index += self.nsteps
+
+        if value is None:
+            if self.cache is not None and time_index in self.cache:
+                self._write(time_index, self.cache.pop(time_index))
+        else:
+            self[time_index][:] = value
+
+        return
+
+    def flush(self):
+        """
+        Write the cached time indices to the file and wait for the background thread
+        """
+
+        if self.cache is not None:
+            for time_index, vec in self.cache.items():
+                self._write(time_index, vec.copy())
+            for future in self.pending.values():
+                future.result()
+            self._submit(lambda: None).result()
+
+        return
+
+    def close(self):
+        """
+        Stop the background thread and delete the file
+        """
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        if self.file is not None:
+            self.data = None
+            self.cache = OrderedDict()
+            self.pending = {}
+            self.file.close()
+            self.file = None
+
+        return
+
+    def _read(self, time_index):
+        if time_index in self.pending:
+            return self.pending.pop(time_index).result()
+        if time_index not in self.stored:
+            return np.zeros(self.size, dtype=self.dtype)
+        return self._submit(self._load, time_index).result()
+
+    def _write(self, time_index, vec):
+        self.stored.add(time_index)
+        self._submit(self._store, time_index, vec)
+
+        return
+
+    def _evict(self):
+        while len(self.cache) > self.cache_size:
+            time_index, vec = self.cache.popitem(last=False)
+            self._write(time_index, vec)
+
+        # Keep the read ahead from growing the memory beyond the cache
+        while len(self.pending) > self.read_ahead:
+            self.pending.pop(next(iter(self.pending))).result()
+
+        return
+
+    def _load(self, time_index):
+        return np.array(self.data[time_index, : self.size])
+
+    def _store(self, time_index, vec):
+        self.data[time_index, : self.size] = vec
+
+        return
+
+    def _submit(self, func, *args):
+        if self.executor is not None:
+            return self.executor.submit(func, *args)
+
+        # Run synchronously with the same interface as the background thread
+        future = _DoneFuture(func(*args))
+        return future
+
+
+class _DoneFuture(object):
+    def __init__(self, result):
+        self._result = result
+
+    def result(self):
+        return self._result
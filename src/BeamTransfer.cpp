@@ -26,7 +26,11 @@
 
 #include <cstring>
 
-#include "LocatePoint.h"
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+#include "SegmentBVH.h"
 
 /*
   Create the beam transfer load and displacement transfer object. This
@@ -83,6 +87,31 @@ BeamTransfer::~BeamTransfer() {
   }
 }
 
+/*
+  Set the number of threads used to find the closest element of each
+  aerodynamic node at initialization. Without OpenMP support, the number of
+  threads is always one.
+
+  Arguments
+  ---------
+  num_threads : number of threads (values less than one use all available)
+*/
+void BeamTransfer::setNumThreads(int num_threads) {
+#ifdef _OPENMP
+  if (num_threads < 1) {
+    num_threads = omp_get_max_threads();
+  }
+  search_threads = num_threads;
+#else
+  search_threads = 1;
+#endif
+}
+
+/*
+  Get the number of threads used for the closest element search
+*/
+int BeamTransfer::getNumThreads() { return search_threads; }
+
 /*
   Initialize the number of points
 */
@@ -108,79 +137,31 @@ void BeamTransfer::initialize() {
     memset(Us, 0, dof_per_node * ns * sizeof(F2FScalar));
   }
 
-  // Set up the node to element data
-  int *node_to_beam_ptr = new int[ns + 1];
-  memset(node_to_beam_ptr, 0, (ns + 1) * sizeof(int));
-
-  // Count up all the times each element refers to each node
-  for (int i = 0; i < order * nelems; i++) {
-    node_to_beam_ptr[conn[i] + 1]++;
-  }
-
-  // Reset the array so that it will point in to the list
-  // of elements
-  for (int i = 0; i < ns; i++) {
-    node_to_beam_ptr[i + 1] += node_to_beam_ptr[i];
-  }
-
-  // Allocate the array of nodes
-  int *node_to_beam = new int[node_to_beam_ptr[ns]];
-
+  // Build a bounding volume hierarchy over the segments between the end
+  // nodes of each element
+  int *seg_nodes = new int[2 * nelems];
   for (int i = 0; i < nelems; i++) {
-    // Set the reference to the i-th element
-    for (int j = 0; j < order; j++) {
-      node_to_beam[node_to_beam_ptr[conn[order * i + j]]] = i;
-      node_to_beam_ptr[conn[order * i + j]]++;
-    }
-  }
-
-  // Reset the node->beam pointer array
-  for (int i = ns; i > 0; i--) {
-    node_to_beam_ptr[i] = node_to_beam_ptr[i - 1];
+    seg_nodes[2 * i] = conn[order * i];
+    seg_nodes[2 * i + 1] = conn[order * (i + 1) - 1];
   }
-  node_to_beam_ptr[0] = 0;
-
-  // Create instance of LocatePoint class to perform the following
-  // searches
-  int min_bin_size = 10;
-  LocatePoint *locator = new LocatePoint(Xs, ns, min_bin_size);
+  SegmentBVH *bvh = new SegmentBVH(Xs, nelems, seg_nodes);
 
   // Allocate space for the data
+  if (aero_pt_to_elem) {
+    delete[] aero_pt_to_elem;
+  }
+  if (aero_pt_to_param) {
+    delete[] aero_pt_to_param;
+  }
   aero_pt_to_elem = new int[na];
   aero_pt_to_param = new double[na];
 
-  // Find the node that is closest to the beam
-  for (int i = 0; i < na; i++) {
-    // Locate the structural node that is closest to the beam
-    int node = locator->locateClosest(&Xa[3 * i]);
-
-    // Find the minimum distance from any of the adjacent elements
-    F2FScalar min_dist = 1e20;
-    int min_elem = 0;
-    double min_xi = 0.0;
-
-    for (int j = node_to_beam_ptr[node]; j < node_to_beam_ptr[node + 1]; j++) {
-      int elem = node_to_beam[j];
-
-      double xi;
-      F2FScalar dist = findParametricPoint(
-          &Xs[3 * conn[order * elem]], &Xs[3 * conn[order * (elem + 1) - 1]],
-          &Xa[3 * i], &xi);
-      if (F2FRealPart(dist) < F2FRealPart(min_dist)) {
-        min_dist = dist;
-        min_elem = elem;
-        min_xi = xi;
-      }
-    }
-
-    // Record the closest parametric point for each aerodynamic
-    // point in the mesh
-    aero_pt_to_elem[i] = min_elem;
-    aero_pt_to_param[i] = min_xi;
-  }
+  // Record the closest element and parametric point for each aerodynamic
+  // point in the mesh
+  bvh->locateClosest(na, Xa, aero_pt_to_elem, aero_pt_to_param, search_threads);
 
-  delete[] node_to_beam_ptr;
-  delete[] node_to_beam;
+  delete bvh;
+  delete[] seg_nodes;
 }
 
 /*
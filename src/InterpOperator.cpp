@@ -0,0 +1,361 @@
+/*
+  This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+  and design optimization.
+
+  Copyright (C) 2015 Georgia Tech Research Corporation.
+  Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+  All rights reserved.
+
+  FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this software except in compliance with the License.
+  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+*/
+
+#include "InterpOperator.h"
+
+#include <cstring>
+
+/*
+  Assemble the operator from the aerostructural connectivity
+
+  Arguments
+  ---------
+  bs     : block size (degrees of freedom per node)
+  nrows  : number of aerodynamic nodes
+  ncols  : number of structural nodes
+  nn     : number of structural nodes connected to each aerodynamic node
+  conn   : aerostructural connectivity (indices >= ncols are reflected nodes)
+  blocks : bs x bs block for each connection
+*/
+InterpOperator::InterpOperator(int bs, int nrows, int ncols, int nn,
+                               const int *conn, const F2FScalar *blocks)
+    : bs(bs), nrows(nrows), ncols(ncols) {
+  vals_single = tvals_single = NULL;
+  assemble(NULL, nn, conn, blocks);
+}
+
+/*
+  Assemble the operator from an aerostructural connectivity with a varying
+  number of structural nodes connected to each aerodynamic node
+
+  Arguments
+  ---------
+  bs       : block size (degrees of freedom per node)
+  nrows    : number of aerodynamic nodes
+  ncols    : number of structural nodes
+  conn_ptr : pointer into conn for each aerodynamic node
+  conn     : aerostructural connectivity (indices >= ncols are reflected nodes)
+  blocks   : bs x bs block for each connection
+*/
+InterpOperator::InterpOperator(int bs, int nrows, int ncols,
+                               const int *conn_ptr, const int *conn,
+                               const F2FScalar *blocks)
+    : bs(bs), nrows(nrows), ncols(ncols) {
+  vals_single = tvals_single = NULL;
+  assemble(conn_ptr, 0, conn, blocks);
+}
+
+/*
+  Assemble the operator and its transpose. The connections of aerodynamic
+  node i are conn_ptr[i] to conn_ptr[i+1], or nn*i to nn*(i+1) if conn_ptr is
+  NULL.
+*/
+void InterpOperator::assemble(const int *conn_ptr, int nn, const int *conn,
+                              const F2FScalar *blocks) {
+  const int bs2 = bs * bs;
+
+  // Find the longest row and the total number of connections
+  int max_len = nn;
+  int nconn = nn * nrows;
+  if (conn_ptr) {
+    max_len = 0;
+    for (int i = 0; i < nrows; i++) {
+      if (conn_ptr[i + 1] - conn_ptr[i] > max_len) {
+        max_len = conn_ptr[i + 1] - conn_ptr[i];
+      }
+    }
+    nconn = conn_ptr[nrows];
+  }
+
+  // Sort the connections of each aerodynamic node by structural node and
+  // merge the repeated connections
+  int *order = new int[max_len];
+  int *node = new int[max_len];
+  int *tmp_cols = new int[nconn];
+  F2FScalar *tmp_vals = new F2FScalar[bs2 * nconn];
+
+  rowp = new int[nrows + 1];
+  rowp[0] = 0;
+  int nnz = 0;
+  for (int i = 0; i < nrows; i++) {
+    int start = conn_ptr ? conn_ptr[i] : nn * i;
+    int len = conn_ptr ? conn_ptr[i + 1] - start : nn;
+
+    for (int j = 0; j < len; j++) {
+      int c = conn[start + j];
+      node[j] = c < ncols ? c : c - ncols;
+
+      // Insertion sort the connections by structural node
+      int k = j;
+      while (k > 0 && node[order[k - 1]] > node[j]) {
+        order[k] = order[k - 1];
+        k--;
+      }
+      order[k] = j;
+    }
+
+    for (int k = 0; k < len; k++) {
+      int j = order[k];
+      const F2FScalar *block = &blocks[bs2 * (start + j)];
+      if (nnz > rowp[i] && tmp_cols[nnz - 1] == node[j]) {
+        F2FScalar *v = &tmp_vals[bs2 * (nnz - 1)];
+        for (int m = 0; m < bs2; m++) {
+          v[m] += block[m];
+        }
+      } else {
+        tmp_cols[nnz] = node[j];
+        memcpy(&tmp_vals[bs2 * nnz], block, bs2 * sizeof(F2FScalar));
+        nnz++;
+      }
+    }
+    rowp[i + 1] = nnz;
+  }
+
+  delete[] order;
+  delete[] node;
+
+  cols = new int[nnz];
+  vals = new F2FScalar[bs2 * nnz];
+  memcpy(cols, tmp_cols, nnz * sizeof(int));
+  memcpy(vals, tmp_vals, bs2 * nnz * sizeof(F2FScalar));
+  delete[] tmp_cols;
+  delete[] tmp_vals;
+
+  // Form the transpose. The rows are visited in order, so the columns of
+  // each row of the transpose are sorted.
+  trowp = new int[ncols + 1];
+  memset(trowp, 0, (ncols + 1) * sizeof(int));
+  for (int jp = 0; jp < nnz; jp++) {
+    trowp[cols[jp] + 1]++;
+  }
+  for (int j = 0; j < ncols; j++) {
+    trowp[j + 1] += trowp[j];
+  }
+
+  tcols = new int[nnz];
+  tvals = new F2FScalar[bs2 * nnz];
+  for (int i = 0; i < nrows; i++) {
+    for (int jp = rowp[i]; jp < rowp[i + 1]; jp++) {
+      int tp = trowp[cols[jp]];
+      trowp[cols[jp]]++;
+      tcols[tp] = i;
+
+      const F2FScalar *block = &vals[bs2 * jp];
+      F2FScalar *tblock = &tvals[bs2 * tp];
+      for (int a = 0; a < bs; a++) {
+        for (int b = 0; b < bs; b++) {
+          tblock[bs * b + a] = block[bs * a + b];
+        }
+      }
+    }
+  }
+
+  // Shift the row pointers back
+  for (int j = ncols; j > 0; j--) {
+    trowp[j] = trowp[j - 1];
+  }
+  trowp[0] = 0;
+}
+
+InterpOperator::~InterpOperator() {
+  delete[] rowp;
+  delete[] cols;
+  delete[] trowp;
+  delete[] tcols;
+  if (vals) {
+    delete[] vals;
+    delete[] tvals;
+  }
+  if (vals_single) {
+    delete[] vals_single;
+    delete[] tvals_single;
+  }
+}
+
+/*
+  Convert the values of the operator and its transpose to single precision
+*/
+void InterpOperator::setSinglePrecision() {
+  if (vals_single) {
+    return;
+  }
+
+  size_t len = bs * bs * rowp[nrows];
+  vals_single = new F2FSingleScalar[len];
+  tvals_single = new F2FSingleScalar[len];
+  for (size_t k = 0; k < len; k++) {
+    vals_single[k] = F2FSingleScalar(vals[k]);
+    tvals_single[k] = F2FSingleScalar(tvals[k]);
+  }
+  delete[] vals;
+  delete[] tvals;
+  vals = tvals = NULL;
+}
+
+/*
+  Copy the values of the operator in full precision
+
+  Returns
+  -------
+  _vals : row-major bs x bs blocks (length bs*bs*nnz)
+*/
+void InterpOperator::getValues(F2FScalar *_vals) {
+  size_t len = bs * bs * rowp[nrows];
+  if (vals) {
+    memcpy(_vals, vals, len * sizeof(F2FScalar));
+  } else {
+    for (size_t k = 0; k < len; k++) {
+      _vals[k] = F2FScalar(vals_single[k]);
+    }
+  }
+}
+
+/*
+  Get the number of bytes allocated by the operator and its transpose
+*/
+size_t InterpOperator::getMemoryFootprint() {
+  size_t nnz = rowp[nrows];
+  size_t value_size = (vals ? sizeof(F2FScalar) : sizeof(F2FSingleScalar));
+  return (nrows + ncols + 2 + 2 * nnz) * sizeof(int) +
+         2 * bs * bs * nnz * value_size;
+}
+
+/*
+  Compute y = alpha*A*x for a block of vectors stored row-wise
+
+  Arguments
+  ---------
+  nvecs       : number of vectors
+  alpha       : scalar multiple of the product
+  x           : input structural vectors
+  num_threads : number of threads used for the product
+
+  Returns
+  -------
+  y : output aerodynamic vectors
+*/
+void InterpOperator::mult(int nvecs, F2FScalar alpha, const F2FScalar *x,
+                          F2FScalar *y, int num_threads) {
+  if (vals) {
+    bsrMult(bs, nrows, rowp, cols, vals, nvecs, alpha, x, y, num_threads);
+  } else {
+    bsrMult(bs, nrows, rowp, cols, vals_single, nvecs, alpha, x, y,
+            num_threads);
+  }
+}
+
+/*
+  Compute y = alpha*A^{T}*x for a block of vectors stored row-wise
+
+  Arguments
+  ---------
+  nvecs       : number of vectors
+  alpha       : scalar multiple of the product
+  x           : input aerodynamic vectors
+  num_threads : number of threads used for the product
+
+  Returns
+  -------
+  y : output structural vectors
+*/
+void InterpOperator::multTranspose(int nvecs, F2FScalar alpha,
+                                   const F2FScalar *x, F2FScalar *y,
+                                   int num_threads) {
+  if (tvals) {
+    bsrMult(bs, ncols, trowp, tcols, tvals, nvecs, alpha, x, y, num_threads);
+  } else {
+    bsrMult(bs, ncols, trowp, tcols, tvals_single, nvecs, alpha, x, y,
+            num_threads);
+  }
+}
+
+/*
+  Compute y = alpha*B*x for a block CSR matrix B. Each block row of the
+  output is computed independently, so the rows are split between threads.
+  The values may be stored in single precision, but the sums are always
+  accumulated in full precision.
+*/
+template <class T>
+void InterpOperator::bsrMult(int bs, int nrows, const int *rowp,
+                             const int *cols, const T *vals, int nvecs,
+                             F2FScalar alpha, const F2FScalar *x, F2FScalar *y,
+                             int num_threads) {
+  const int bs2 = bs * bs;
+  const int len = bs * nvecs;
+
+  if (nvecs == 1 && bs == 1) {
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(num_threads) schedule(static)
+#endif
+    for (int i = 0; i < nrows; i++) {
+      F2FScalar yi = 0.0;
+      for (int jp = rowp[i]; jp < rowp[i + 1]; jp++) {
+        yi += F2FScalar(vals[jp]) * x[cols[jp]];
+      }
+      y[i] = alpha * yi;
+    }
+  } else if (nvecs == 1 && bs == 3) {
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(num_threads) schedule(static)
+#endif
+    for (int i = 0; i < nrows; i++) {
+      F2FScalar y0 = 0.0, y1 = 0.0, y2 = 0.0;
+      for (int jp = rowp[i]; jp < rowp[i + 1]; jp++) {
+        const T *A = &vals[9 * jp];
+        const F2FScalar *xj = &x[3 * cols[jp]];
+        y0 += (F2FScalar(A[0]) * xj[0] + F2FScalar(A[1]) * xj[1] +
+               F2FScalar(A[2]) * xj[2]);
+        y1 += (F2FScalar(A[3]) * xj[0] + F2FScalar(A[4]) * xj[1] +
+               F2FScalar(A[5]) * xj[2]);
+        y2 += (F2FScalar(A[6]) * xj[0] + F2FScalar(A[7]) * xj[1] +
+               F2FScalar(A[8]) * xj[2]);
+      }
+      y[3 * i] = alpha * y0;
+      y[3 * i + 1] = alpha * y1;
+      y[3 * i + 2] = alpha * y2;
+    }
+  } else {
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(num_threads) schedule(static)
+#endif
+    for (int i = 0; i < nrows; i++) {
+      F2FScalar *yi = &y[len * i];
+      memset(yi, 0, len * sizeof(F2FScalar));
+
+      for (int jp = rowp[i]; jp < rowp[i + 1]; jp++) {
+        const T *A = &vals[bs2 * jp];
+        const F2FScalar *xj = &x[len * cols[jp]];
+        for (int a = 0; a < bs; a++) {
+          for (int b = 0; b < bs; b++) {
+            F2FScalar Aab = A[bs * a + b];
+            for (int k = 0; k < nvecs; k++) {
+              yi[nvecs * a + k] += Aab * xj[nvecs * b + k];
+            }
+          }
+        }
+      }
+
+      for (int k = 0; k < len; k++) {
+        yi[k] *= alpha;
+      }
+    }
+  }
+}
@@ -0,0 +1,463 @@
+/*
+  This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+  and design optimization.
+
+  Copyright (C) 2015 Georgia Tech Research Corporation.
+  Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+  All rights reserved.
+
+  FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this software except in compliance with the License.
+  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+*/
+
+#include "KDTree.h"
+
+#include <math.h>
+
+#include <algorithm>
+
+/*
+  Compare two points along one coordinate direction
+*/
+class KDTreeCompare {
+ public:
+  KDTreeCompare(const double *X, int dim) : X(X), dim(dim) {}
+  bool operator()(int a, int b) const {
+    return X[3 * a + dim] < X[3 * b + dim];
+  }
+
+ private:
+  const double *X;
+  int dim;
+};
+
+/*
+  Build the k-d tree over the real part of the point locations
+
+  Arguments
+  ---------
+  Xpts      : point locations (x, y, z) for each point
+  npts      : number of points
+  leaf_size : maximum number of points stored in a leaf
+*/
+KDTree::KDTree(const F2FScalar *Xpts, int npts, int leaf_size)
+    : npts(npts), leaf_size(leaf_size) {
+  if (this->leaf_size < 1) {
+    this->leaf_size = 1;
+  }
+
+  // Copy the real part of the point locations
+  double *Xorig = new double[3 * npts];
+  for (int i = 0; i < 3 * npts; i++) {
+    Xorig[i] = F2FRealPart(Xpts[i]);
+  }
+
+  perm = new int[npts];
+  for (int i = 0; i < npts; i++) {
+    perm[i] = i;
+  }
+
+  // Allocate the flat node arrays
+  num_nodes = countNodes(npts);
+  node_start = new int[num_nodes];
+  node_end = new int[num_nodes];
+  node_child = new int[num_nodes];
+  node_dim = new int[num_nodes];
+  node_split = new double[num_nodes];
+
+  // Build the tree by recursively sorting the permutation array
+  X = Xorig;
+  int next_node = 1;
+  build(0, 0, npts, &next_node);
+
+  // Store the points in tree order so that each leaf is contiguous
+  X = new double[3 * npts];
+  for (int i = 0; i < npts; i++) {
+    X[3 * i] = Xorig[3 * perm[i]];
+    X[3 * i + 1] = Xorig[3 * perm[i] + 1];
+    X[3 * i + 2] = Xorig[3 * perm[i] + 2];
+  }
+  delete[] Xorig;
+}
+
+KDTree::~KDTree() {
+  delete[] X;
+  delete[] perm;
+  delete[] node_start;
+  delete[] node_end;
+  delete[] node_child;
+  delete[] node_dim;
+  delete[] node_split;
+}
+
+/*
+  Get the number of bytes allocated by the tree
+*/
+size_t KDTree::getMemoryFootprint() {
+  return npts * (3 * sizeof(double) + sizeof(int)) +
+         num_nodes * (4 * sizeof(int) + sizeof(double));
+}
+
+/*
+  Count the number of nodes needed to store a tree over n points
+*/
+int KDTree::countNodes(int n) {
+  if (n <= leaf_size) {
+    return 1;
+  }
+  return 1 + countNodes(n / 2) + countNodes(n - n / 2);
+}
+
+/*
+  Build the subtree for the points in [start, end) by splitting at the median
+  along the direction in which the points have the largest extent
+
+  Arguments
+  ---------
+  node      : index of the node to build
+  start     : first point in the node
+  end       : one past the last point in the node
+  next_node : next unused node index
+*/
+void KDTree::build(int node, int start, int end, int *next_node) {
+  node_start[node] = start;
+  node_end[node] = end;
+  node_child[node] = -1;
+  node_dim[node] = 0;
+  node_split[node] = 0.0;
+
+  if (end - start <= leaf_size) {
+    return;
+  }
+
+  // Find the bounding box of the points
+  double xmin[3], xmax[3];
+  for (int k = 0; k < 3; k++) {
+    xmin[k] = xmax[k] = X[3 * perm[start] + k];
+  }
+  for (int i = start + 1; i < end; i++) {
+    for (int k = 0; k < 3; k++) {
+      double x = X[3 * perm[i] + k];
+      if (x < xmin[k]) {
+        xmin[k] = x;
+      }
+      if (x > xmax[k]) {
+        xmax[k] = x;
+      }
+    }
+  }
+
+  int dim = 0;
+  for (int k = 1; k < 3; k++) {
+    if (xmax[k] - xmin[k] > xmax[dim] - xmin[dim]) {
+      dim = k;
+    }
+  }
+
+  // Partition the points about the median
+  int mid = start + (end - start) / 2;
+  std::nth_element(&perm[start], &perm[mid], &perm[end], KDTreeCompare(X, dim));
+
+  int child = *next_node;
+  *next_node += 2;
+  node_child[node] = child;
+  node_dim[node] = dim;
+  node_split[node] = X[3 * perm[mid] + dim];
+
+  build(child, start, mid, next_node);
+  build(child + 1, mid, end, next_node);
+}
+
+/*
+  Locate the K closest points to the given point
+
+  When isymm >= 0, the reflection of the points across the plane of symmetry
+  is also searched. Points within tol of the plane of symmetry are not
+  reflected. Reflected points are returned with index + npts.
+
+  Arguments
+  ---------
+  K     : number of points to locate
+  xpt   : the query point
+  isymm : symmetry index (-1 for no symmetry)
+  tol   : symmetry plane tolerance
+
+  Returns
+  -------
+  indices : indices of the closest points sorted by distance
+  dist    : squared distances to the closest points
+*/
+void KDTree::locateKClosest(int K, int indices[], double dist[],
+                            const F2FScalar xpt[], int isymm, double tol) {
+  int nk = 0;
+  double x[3], off[3] = {0.0, 0.0, 0.0};
+  for (int k = 0; k < 3; k++) {
+    x[k] = F2FRealPart(xpt[k]);
+  }
+
+  if (npts > 0) {
+    search(0, x, 0.0, off, K, &nk, indices, dist, 0, -1, tol);
+
+    // Search the reflected points by reflecting the query point
+    if (isymm >= 0) {
+      x[isymm] *= -1.0;
+      search(0, x, 0.0, off, K, &nk, indices, dist, npts, isymm, tol);
+    }
+  }
+
+  heapSort(nk, indices, dist);
+}
+
+/*
+  Locate the K closest points to each point in a batch of query points
+
+  Arguments
+  ---------
+  K           : number of points to locate
+  nxpts       : number of query points
+  xpts        : the query point locations
+  isymm       : symmetry index (-1 for no symmetry)
+  tol         : symmetry plane tolerance
+  num_threads : number of threads used for the queries
+
+  Returns
+  -------
+  indices : indices of the closest points for each query point
+*/
+void KDTree::locateKClosest(int K, int nxpts, const F2FScalar *xpts,
+                            int *indices, int isymm, double tol,
+                            int num_threads) {
+#ifdef _OPENMP
+#pragma omp parallel num_threads(num_threads)
+#endif
+  {
+    double *dist = new double[K];
+
+#ifdef _OPENMP
+#pragma omp for schedule(dynamic, 64)
+#endif
+    for (int i = 0; i < nxpts; i++) {
+      locateKClosest(K, &indices[K * i], dist, &xpts[3 * i], isymm, tol);
+    }
+
+    delete[] dist;
+  }
+}
+
+/*
+  Locate all the points within a distance of the query point. The points are
+  returned in tree order, not sorted by distance.
+
+  Arguments
+  ---------
+  radius      : search radius
+  xpt         : the query point
+  max_indices : length of the indices array
+
+  Returns
+  -------
+  indices : indices of the points within the radius
+  n       : the number of points within the radius (may exceed max_indices)
+*/
+int KDTree::locateInRadius(double radius, const F2FScalar xpt[],
+                           int max_indices, int indices[]) {
+  int n = 0;
+  double x[3], off[3] = {0.0, 0.0, 0.0};
+  for (int k = 0; k < 3; k++) {
+    x[k] = F2FRealPart(xpt[k]);
+  }
+
+  if (npts > 0) {
+    searchRadius(0, x, 0.0, off, radius * radius, &n, max_indices, indices);
+  }
+
+  return n;
+}
+
+/*
+  Recursively collect the points in the subtree that are within the squared
+  radius r2 of the query point
+*/
+void KDTree::searchRadius(int node, const double x[], double rd, double off[],
+                          double r2, int *n, int max_indices, int indices[]) {
+  int child = node_child[node];
+
+  if (child < 0) {
+    for (int i = node_start[node]; i < node_end[node]; i++) {
+      const double *xp = &X[3 * i];
+      double d =
+          ((x[0] - xp[0]) * (x[0] - xp[0]) + (x[1] - xp[1]) * (x[1] - xp[1]) +
+           (x[2] - xp[2]) * (x[2] - xp[2]));
+      if (d <= r2) {
+        if (*n < max_indices) {
+          indices[*n] = perm[i];
+        }
+        (*n)++;
+      }
+    }
+    return;
+  }
+
+  int dim = node_dim[node];
+  double diff = x[dim] - node_split[node];
+  int near = child, far = child + 1;
+  if (diff > 0.0) {
+    near = child + 1;
+    far = child;
+  }
+
+  searchRadius(near, x, rd, off, r2, n, max_indices, indices);
+
+  // Search the other child only if its cell intersects the ball
+  double old = off[dim];
+  rd += diff * diff - old * old;
+  if (rd <= r2) {
+    off[dim] = diff;
+    searchRadius(far, x, rd, off, r2, n, max_indices, indices);
+    off[dim] = old;
+  }
+}
+
+/*
+  Recursively search the subtree for points closer than the current K-th
+  closest point. The squared distance from the query point to the cell of the
+  node is tracked incrementally from the per-direction offsets.
+
+  Arguments
+  ---------
+  node   : the node to search
+  x      : the query point
+  rd     : squared distance from the query point to the node cell
+  off    : per-direction offsets from the query point to the node cell
+  K      : number of points to locate
+  offset : offset added to the indices of the points found
+  isymm  : skip the points on this plane of symmetry (-1 for none)
+  tol    : symmetry plane tolerance
+*/
+void KDTree::search(int node, const double x[], double rd, double off[], int K,
+                    int *nk, int indices[], double dist[], int offset,
+                    int isymm, double tol) {
+  int child = node_child[node];
+
+  if (child < 0) {
+    for (int i = node_start[node]; i < node_end[node]; i++) {
+      const double *xp = &X[3 * i];
+      if (isymm >= 0 && fabs(xp[isymm]) <= tol) {
+        continue;
+      }
+
+      double d =
+          ((x[0] - xp[0]) * (x[0] - xp[0]) + (x[1] - xp[1]) * (x[1] - xp[1]) +
+           (x[2] - xp[2]) * (x[2] - xp[2]));
+      if (*nk < K || d < dist[0]) {
+        heapInsert(K, nk, indices, dist, d, perm[i] + offset);
+      }
+    }
+    return;
+  }
+
+  // Search the child containing the query point first
+  int dim = node_dim[node];
+  double diff = x[dim] - node_split[node];
+  int near = child, far = child + 1;
+  if (diff > 0.0) {
+    near = child + 1;
+    far = child;
+  }
+
+  search(near, x, rd, off, K, nk, indices, dist, offset, isymm, tol);
+
+  // Search the other child only if its cell may contain a closer point
+  double old = off[dim];
+  rd += diff * diff - old * old;
+  if (*nk < K || rd < dist[0]) {
+    off[dim] = diff;
+    search(far, x, rd, off, K, nk, indices, dist, offset, isymm, tol);
+    off[dim] = old;
+  }
+}
+
+/*
+  Add a candidate to the max-heap of the K closest points, replacing the
+  farthest candidate if the heap is full
+*/
+void KDTree::heapInsert(int K, int *nk, int indices[], double dist[], double d,
+                        int index) {
+  int i = 0;
+  if (*nk < K) {
+    // Sift the new entry up from the bottom of the heap
+    i = *nk;
+    (*nk)++;
+    while (i > 0) {
+      int parent = (i - 1) / 2;
+      if (dist[parent] >= d) {
+        break;
+      }
+      dist[i] = dist[parent];
+      indices[i] = indices[parent];
+      i = parent;
+    }
+  } else {
+    // Replace the root and sift the new entry down
+    int n = *nk;
+    while (true) {
+      int c = 2 * i + 1;
+      if (c >= n) {
+        break;
+      }
+      if (c + 1 < n && dist[c + 1] > dist[c]) {
+        c++;
+      }
+      if (dist[c] <= d) {
+        break;
+      }
+      dist[i] = dist[c];
+      indices[i] = indices[c];
+      i = c;
+    }
+  }
+
+  dist[i] = d;
+  indices[i] = index;
+}
+
+/*
+  Sort the max-heap in place into ascending order of distance
+*/
+void KDTree::heapSort(int nk, int indices[], double dist[]) {
+  for (int n = nk - 1; n > 0; n--) {
+    // Move the largest entry to the end and restore the heap
+    double d = dist[n];
+    int index = indices[n];
+    dist[n] = dist[0];
+    indices[n] = indices[0];
+
+    int i = 0;
+    while (true) {
+      int c = 2 * i + 1;
+      if (c >= n) {
+        break;
+      }
+      if (c + 1 < n && dist[c + 1] > dist[c]) {
+        c++;
+      }
+      if (dist[c] <= d) {
+        break;
+      }
+      dist[i] = dist[c];
+      indices[i] = indices[c];
+      i = c;
+    }
+    dist[i] = d;
+    indices[i] = index;
+  }
+}
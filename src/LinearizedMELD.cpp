@@ -25,6 +25,7 @@
 
 #include <cstring>
 
+#include "InterpOperator.h"
 #include "MELD.h"
 #include "funtofemlapack.h"
 
@@ -68,7 +69,8 @@ LinearizedMELD::~LinearizedMELD() {
   global_beta : the weighting decay parameter
 */
 void LinearizedMELD::initialize() {
-  // global number of structural nodes
+  // Discard any previous halo and distribute the global structural mesh
+  clearStructHalo();
   distributeStructuralMesh();
 
   // Check that user doesn't set more nearest nodes than exist in total
@@ -76,6 +78,26 @@ void LinearizedMELD::initialize() {
     nn = ns;
   }
 
+  // Create the aerostructural connectivity, or keep the previous one if the
+  // nodes have not moved enough to change it
+  if (global_conn) {
+    delete[] global_conn;
+  }
+  global_conn = new int[nn * na];
+  updateAeroStructConn(isymm, nn, global_conn);
+
+  // Allocate and compute the weights
+  if (global_W) {
+    delete[] global_W;
+  }
+  global_W = new F2FScalar[nn * na];
+  computeWeights(F2FRealPart(global_beta), isymm, nn, global_conn, global_W);
+
+  // Keep only the structural nodes connected to the local aerodynamic nodes
+  if (use_struct_halo) {
+    buildStructHalo(nn, global_conn);
+  }
+
   if (Us) {
     delete[] Us;
   }
@@ -94,17 +116,34 @@ void LinearizedMELD::initialize() {
     memset(Us, 0, 3 * ns * sizeof(F2FScalar));
   }
 
-  // Create aerostructural connectivity
-  global_conn = new int[nn * na];
-  computeAeroStructConn(isymm, nn, global_conn);
-
-  // Allocate and compute the weights
-  global_W = new F2FScalar[nn * na];
-  computeWeights(F2FRealPart(global_beta), isymm, nn, global_conn, global_W);
-
   // Allocate transfer variables
+  if (global_xs0bar) {
+    delete[] global_xs0bar;
+  }
+  if (global_H) {
+    delete[] global_H;
+  }
   global_xs0bar = new F2FScalar[3 * na];
   global_H = new F2FScalar[9 * na];
+
+  // Assemble the linear displacement transfer
+  interp_update = 1;
+  updateInterpOperator();
+
+  // Size the persistent work arrays used by the transfers and products
+  getWorkArray(WORK_STRUCT_VECS, 3 * ns);
+  getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
+}
+
+/*
+  Get the number of bytes allocated by the transfer scheme
+*/
+size_t LinearizedMELD::getMemoryFootprint() {
+  size_t bytes = MELD::getMemoryFootprint();
+  if (global_H) {
+    bytes += 9 * na * sizeof(F2FScalar);
+  }
+  return bytes;
 }
 
 /*
@@ -121,14 +160,32 @@ void LinearizedMELD::initialize() {
 */
 void LinearizedMELD::transferDisps(const F2FScalar *struct_disps,
                                    F2FScalar *aero_disps) {
-  // Check if struct nodes locations need to be redistributed
-  distributeStructuralMesh();
+  // Check if struct nodes locations need to be redistributed and
+  // reassemble the transfer if the nodes have moved
+  updateInterpOperator();
 
   // Copy prescribed displacements into displacement vector
   structGatherBcast(3 * ns_local, struct_disps, 3 * ns, Us);
 
-  // Zero the outputs
-  memset(aero_disps, 0, 3 * na * sizeof(F2FScalar));
+  // Apply the linear displacement transfer
+  interp->mult(1, 1.0, Us, aero_disps, nthreads);
+}
+
+/*
+  Assemble the linear displacement transfer from the current aerodynamic and
+  structural node locations. The displacement of each aerodynamic surface node
+  is a sum of 3 x 3 blocks applied to the displacements of the connected
+  structural nodes, and the load transfer is its transpose.
+*/
+void LinearizedMELD::updateInterpOperator() {
+  // Check if struct nodes locations need to be redistributed
+  distributeStructuralMesh();
+
+  if (interp && !interp_update) {
+    return;
+  }
+
+  F2FScalar *blocks = new F2FScalar[9 * nn * na];
 
   for (int i = 0; i < na; i++) {
     // Point aerodynamic surface node location into a
@@ -153,54 +210,35 @@ void LinearizedMELD::transferDisps(const F2FScalar *struct_disps,
     F2FScalar r[3];
     vec_diff(xs0bar, xa, r);
 
-    // Sum the contributions from each structural node to the aerodynamic
-    // surface node's displacement
-    F2FScalar *ua = &aero_disps[3 * i];
-
     for (int j = 0; j < nn; j++) {
-      // Get structural node location
-      int indx = global_conn[nn * i + j];
-
+      // Get structural node location, using the symmetry condition for the
+      // reflected nodes
+      int indx = local_conn[j];
+      F2FScalar xs[3];
       if (indx < ns) {
-        F2FScalar *xs = &Xs[3 * indx];
-
-        // Form the vector q from the centroid of the undisplaced set to the
-        // node
-        F2FScalar q[3];
-        vec_diff(xs0bar, xs, q);
-
-        // Get structural node displacement
-        const F2FScalar *us = &Us[3 * indx];
-
-        // Compute and add contribution to aerodynamic surface node displacement
-        F2FScalar w = W[j];
-        F2FScalar uj[3];
-        computeDispContribution(w, r, Hinv, q, us, uj);
-        vec_add(uj, ua, ua);
+        memcpy(xs, &Xs[3 * indx], 3 * sizeof(F2FScalar));
       } else {
-        indx = indx - ns;
-
-        // Form the vector q from the centroid of the undisplaced set to the
-        // node
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;
-
-        F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
+        memcpy(xs, &Xs[3 * (indx - ns)], 3 * sizeof(F2FScalar));
+        xs[isymm] *= -1.0;
+      }
 
-        // Get structural node displacement
-        const F2FScalar *us = &Us[3 * indx];
+      // Form the vector q from the centroid of the undisplaced set to the
+      // node
+      F2FScalar q[3];
+      vec_diff(xs0bar, xs, q);
 
-        // Compute and add contribution to aerodynamic surface node displacement
-        F2FScalar w = W[j];
-        F2FScalar uj[3];
-        computeDispContribution(w, r, Hinv, q, us, uj);
-        vec_add(uj, ua, ua);
-      }
+      // Compute the contribution of the structural node displacement
+      computeDispBlock(W[j], r, Hinv, q, &blocks[9 * (nn * i + j)]);
     }
   }
+
+  if (interp) {
+    delete interp;
+  }
+  interp = new InterpOperator(3, na, ns, nn, global_conn, blocks);
+  interp_update = 0;
+
+  delete[] blocks;
 }
 
 /*
@@ -312,40 +350,43 @@ void LinearizedMELD::adjPointInertiaInverse(const F2FScalar *Hinv,
   r    : vector from centroid to aerodynamic surface node
   Hinv : inverse of point inertia matrix
   q    : vector from centroid to structural node
-  us   : displacement of structural node
 
   Returns
   -------
-  ua   : contribution to displacement of aerodynamic surface node
+  A    : row-major block mapping the structural node displacement to its
+         contribution to the aerodynamic surface node displacement
 */
-void LinearizedMELD::computeDispContribution(
-    const F2FScalar w, const F2FScalar *r, const F2FScalar *Hinv,
-    const F2FScalar *q, const F2FScalar *us, F2FScalar *ua) {
-  // Compute matrix = w*(q^{x} * Hinv * r^{x} + I)
-  F2FScalar A[9];
-  A[0] = w * (q[2] * (r[1] * Hinv[5] - r[2] * Hinv[4]) -
-              q[1] * (r[1] * Hinv[8] - r[2] * Hinv[7]) + 1.0);
-  A[1] = w * (q[1] * (r[0] * Hinv[8] - r[2] * Hinv[6]) -
-              q[2] * (r[0] * Hinv[5] - r[2] * Hinv[3]));
-  A[2] = w * (q[2] * (r[0] * Hinv[4] - r[1] * Hinv[3]) -
-              q[1] * (r[0] * Hinv[7] - r[1] * Hinv[6]));
-  A[3] = w * (q[0] * (r[1] * Hinv[8] - r[2] * Hinv[7]) -
-              q[2] * (r[1] * Hinv[2] - r[2] * Hinv[1]));
-  A[4] = w * (q[2] * (r[0] * Hinv[2] - r[2] * Hinv[0]) -
-              q[0] * (r[0] * Hinv[8] - r[2] * Hinv[6]) + 1.0);
-  A[5] = w * (q[0] * (r[0] * Hinv[7] - r[1] * Hinv[6]) -
-              q[2] * (r[0] * Hinv[1] - r[1] * Hinv[0]));
-  A[6] = w * (q[1] * (r[1] * Hinv[2] - r[2] * Hinv[1]) -
-              q[0] * (r[1] * Hinv[5] - r[2] * Hinv[4]));
-  A[7] = w * (q[0] * (r[0] * Hinv[5] - r[2] * Hinv[3]) -
-              q[1] * (r[0] * Hinv[2] - r[2] * Hinv[0]));
-  A[8] = w * (q[1] * (r[0] * Hinv[1] - r[1] * Hinv[0]) -
-              q[0] * (r[0] * Hinv[4] - r[1] * Hinv[3]) + 1.0);
-
-  // Compute matrix-vector product ua = A*us
-  ua[0] = A[0] * us[0] + A[3] * us[1] + A[6] * us[2];
-  ua[1] = A[1] * us[0] + A[4] * us[1] + A[7] * us[2];
-  ua[2] = A[2] * us[0] + A[5] * us[1] + A[8] * us[2];
+void LinearizedMELD::computeDispBlock(const F2FScalar w, const F2FScalar *r,
+                                      const F2FScalar *Hinv, const F2FScalar *q,
+                                      F2FScalar *A) {
+  // Compute matrix = w*(q^{x} * Hinv * r^{x} + I), stored so that
+  // ua = A^{T}*us
+  F2FScalar At[9];
+  At[0] = w * (q[2] * (r[1] * Hinv[5] - r[2] * Hinv[4]) -
+               q[1] * (r[1] * Hinv[8] - r[2] * Hinv[7]) + 1.0);
+  At[1] = w * (q[1] * (r[0] * Hinv[8] - r[2] * Hinv[6]) -
+               q[2] * (r[0] * Hinv[5] - r[2] * Hinv[3]));
+  At[2] = w * (q[2] * (r[0] * Hinv[4] - r[1] * Hinv[3]) -
+               q[1] * (r[0] * Hinv[7] - r[1] * Hinv[6]));
+  At[3] = w * (q[0] * (r[1] * Hinv[8] - r[2] * Hinv[7]) -
+               q[2] * (r[1] * Hinv[2] - r[2] * Hinv[1]));
+  At[4] = w * (q[2] * (r[0] * Hinv[2] - r[2] * Hinv[0]) -
+               q[0] * (r[0] * Hinv[8] - r[2] * Hinv[6]) + 1.0);
+  At[5] = w * (q[0] * (r[0] * Hinv[7] - r[1] * Hinv[6]) -
+               q[2] * (r[0] * Hinv[1] - r[1] * Hinv[0]));
+  At[6] = w * (q[1] * (r[1] * Hinv[2] - r[2] * Hinv[1]) -
+               q[0] * (r[1] * Hinv[5] - r[2] * Hinv[4]));
+  At[7] = w * (q[0] * (r[0] * Hinv[5] - r[2] * Hinv[3]) -
+               q[1] * (r[0] * Hinv[2] - r[2] * Hinv[0]));
+  At[8] = w * (q[1] * (r[0] * Hinv[1] - r[1] * Hinv[0]) -
+               q[0] * (r[0] * Hinv[4] - r[1] * Hinv[3]) + 1.0);
+
+  // Store the block in row-major order
+  for (int a = 0; a < 3; a++) {
+    for (int b = 0; b < 3; b++) {
+      A[3 * a + b] = At[a + 3 * b];
+    }
+  }
 }
 
 /*
@@ -451,126 +492,15 @@ void LinearizedMELD::transferLoads(const F2FScalar *aero_loads,
   // Copy prescribed aero loads into member variable
   memcpy(Fa, aero_loads, 3 * na * sizeof(F2FScalar));
 
-  // Zero struct loads
-  F2FScalar *struct_loads_global = new F2FScalar[3 * ns];
-  memset(struct_loads_global, 0, 3 * ns * sizeof(F2FScalar));
+  // Reassemble the transfer if the nodes have moved
+  updateInterpOperator();
 
-  // Loop over aerodynamic surface nodes
-  for (int i = 0; i < na; i++) {
-    // Get aerodynamic surface node location and load
-    F2FScalar *a = &Xa[3 * i];
-    const F2FScalar *fa = &Fa[3 * i];
-
-    // Compute vector d from centroid to aerodynamic surface node
-    F2FScalar *xs0bar = &global_xs0bar[3 * i];
-    F2FScalar r[3];
-    vec_diff(xs0bar, a, r);
-
-    // Compute inverse of point inertia matrix
-    F2FScalar Hinv[9];
-    computePointInertiaInverse(&global_H[9 * i], Hinv);
-
-    // Loop over linked structural nodes
-    for (int j = 0; j < nn; j++) {
-      // Get structural node using index from connectivity
-      int indx = global_conn[nn * i + j];
-
-      if (indx < ns) {
-        F2FScalar *xs = &Xs[3 * indx];
-
-        // Compute vector q from centroid to structural node
-        F2FScalar q[3];
-        vec_diff(xs0bar, xs, q);
-
-        // Compute load contribution
-        F2FScalar *fs = &struct_loads_global[3 * indx];
-        F2FScalar w = global_W[nn * i + j];
-        F2FScalar fj[3];
-        computeLoadContribution(w, q, Hinv, r, fa, fj);
-
-        // Add load contribution into global structural load array
-        fs[0] += fj[0];
-        fs[1] += fj[1];
-        fs[2] += fj[2];
-      } else {
-        indx = indx - ns;
-
-        // Compute vector q from centroid to structural node using the
-        // symmetry condition
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;
-
-        // Compute vector q from centroid to structural node
-        F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
-
-        // Compute load contribution
-        F2FScalar *fs = &struct_loads_global[3 * indx];
-        F2FScalar w = global_W[nn * i + j];
-        F2FScalar fj[3];
-        computeLoadContribution(w, q, Hinv, r, fa, fj);
-
-        // Add load contribution into global structural load array
-        fs[0] += fj[0];
-        fs[1] += fj[1];
-        fs[2] += fj[2];
-      }
-    }
-  }
+  // Apply the transpose of the displacement transfer
+  F2FScalar *struct_loads_global = getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
+  interp->multTranspose(1, 1.0, Fa, struct_loads_global, nthreads);
 
   // distribute the structural loads
   structAddScatter(3 * ns, struct_loads_global, 3 * ns_local, struct_loads);
-
-  delete[] struct_loads_global;
-}
-
-/*
-  Computes contribution to displacement of aerodynamic surface node from single
-  structural node in linearized MELD
-
-  Arguments
-  ---------
-  w    : weight of structural node
-  q    : vector from centroid to structural node
-  Hinv : inverse of point inertia matrix
-  r    : vector from centroid to aerodynamic surface node
-  fa   : load on aerodynamic surface node
-
-  Returns
-  -------
-  fj   : contribution to load on structural node
-*/
-void LinearizedMELD::computeLoadContribution(
-    const F2FScalar w, const F2FScalar *q, const F2FScalar *Hinv,
-    const F2FScalar *r, const F2FScalar *fa, F2FScalar *fj) {
-  // Compute matrix = w*(rx*Hinv*qx + I)
-  F2FScalar A[9];
-
-  A[0] = w * (r[1] * (Hinv[7] * q[2] - Hinv[8] * q[1]) -
-              r[2] * (Hinv[4] * q[2] - Hinv[5] * q[1]) + 1.0);
-  A[1] = w * (r[2] * (Hinv[3] * q[2] - Hinv[5] * q[0]) -
-              r[1] * (Hinv[6] * q[2] - Hinv[8] * q[0]));
-  A[2] = w * (r[1] * (Hinv[6] * q[1] - Hinv[7] * q[0]) -
-              r[2] * (Hinv[3] * q[1] - Hinv[4] * q[0]));
-  A[3] = w * (r[2] * (Hinv[1] * q[2] - Hinv[2] * q[1]) -
-              r[0] * (Hinv[7] * q[2] - Hinv[8] * q[1]));
-  A[4] = w * (r[0] * (Hinv[6] * q[2] - Hinv[8] * q[0]) -
-              r[2] * (Hinv[0] * q[2] - Hinv[2] * q[0]) + 1.0);
-  A[5] = w * (r[2] * (Hinv[0] * q[1] - Hinv[1] * q[0]) -
-              r[0] * (Hinv[6] * q[1] - Hinv[7] * q[0]));
-  A[6] = w * (r[0] * (Hinv[4] * q[2] - Hinv[5] * q[1]) -
-              r[1] * (Hinv[1] * q[2] - Hinv[2] * q[1]));
-  A[7] = w * (r[1] * (Hinv[0] * q[2] - Hinv[2] * q[0]) -
-              r[0] * (Hinv[3] * q[2] - Hinv[5] * q[0]));
-  A[8] = w * (r[0] * (Hinv[3] * q[1] - Hinv[4] * q[0]) -
-              r[1] * (Hinv[0] * q[1] - Hinv[1] * q[0]) + 1.0);
-
-  // Compute matrix-vector product ua = A*us
-  fj[0] = A[0] * fa[0] + A[3] * fa[1] + A[6] * fa[2];
-  fj[1] = A[1] * fa[0] + A[4] * fa[1] + A[7] * fa[2];
-  fj[2] = A[2] * fa[0] + A[5] * fa[1] + A[8] * fa[2];
 }
 
 /*
@@ -830,7 +760,7 @@ void LinearizedMELD::applydDdxA0(const F2FScalar *vecs, F2FScalar *prods) {
 */
 void LinearizedMELD::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
   // Set products to zero
-  F2FScalar *prods_global = new F2FScalar[3 * ns];
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
   memset(prods_global, 0.0, 3 * ns * sizeof(F2FScalar));
 
   for (int i = 0; i < na; i++) {
@@ -1034,9 +964,6 @@ void LinearizedMELD::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
 
   // distribute the results to the structural processors
   structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
-
-  // clean up allocated memory
-  delete[] prods_global;
 }
 
 /*
@@ -1052,7 +979,7 @@ void LinearizedMELD::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
   prods : output vector
 */
 void LinearizedMELD::applydLdxA0(const F2FScalar *vecs, F2FScalar *prods) {
-  F2FScalar *vecs_global = new F2FScalar[3 * ns];
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns);
   structGatherBcast(3 * ns_local, vecs, 3 * ns, vecs_global);
 
   // Zero products
@@ -1136,11 +1063,11 @@ void LinearizedMELD::applydLdxA0(const F2FScalar *vecs, F2FScalar *prods) {
   prods : output vector
 */
 void LinearizedMELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
-  F2FScalar *vecs_global = new F2FScalar[3 * ns];
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns);
   structGatherBcast(3 * ns_local, vecs, 3 * ns, vecs_global);
 
   // Set products to zero
-  F2FScalar *prods_global = new F2FScalar[3 * ns];
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
   memset(prods_global, 0.0, 3 * ns * sizeof(F2FScalar));
 
   // Loop over aerodynamic surface nodes
@@ -1341,8 +1268,4 @@ void LinearizedMELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
 
   // distribute the results to the structural processors
   structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
-
-  // clean up allocated memory
-  delete[] prods_global;
-  delete[] vecs_global;
 }
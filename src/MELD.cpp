@@ -26,17 +26,25 @@
 
 #include <cstring>
 
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
 #include "LocatePoint.h"
 #include "funtofemlapack.h"
 
 MELD::MELD(MPI_Comm global_comm, MPI_Comm struct_comm, int struct_root,
            MPI_Comm aero_comm, int aero_root, int isymm, int num_nearest,
-           F2FScalar beta)
+           F2FScalar beta, int num_threads)
     : LDTransferScheme(global_comm, struct_comm, struct_root, aero_comm,
                        aero_root),
       isymm(isymm),
       nn(num_nearest),
       global_beta(beta) {
+  // Set the number of threads used in the aerodynamic node loops
+  nthreads = 1;
+  setNumThreads(num_threads);
+
   // Initialize the aerostuctural connectivity
   global_conn = NULL;
   global_W = NULL;
@@ -46,8 +54,16 @@ MELD::MELD(MPI_Comm global_comm, MPI_Comm struct_comm, int struct_root,
   global_R = NULL;
   global_S = NULL;
 
+  // Initialize the mixed precision data
+  global_W_single = NULL;
+  global_xs0bar_single = NULL;
+  global_R_single = NULL;
+  global_S_single = NULL;
+
   // Initialize the Jacobian-vector product data
+  factor_storage = STORE_FACTOR;
   global_M1 = NULL;
+  global_M1_single = NULL;
   global_ipiv = NULL;
 
   // Notify user of the type of transfer scheme they are using
@@ -78,11 +94,26 @@ MELD::~MELD() {
   if (global_S) {
     delete[] global_S;
   }
+  if (global_W_single) {
+    delete[] global_W_single;
+  }
+  if (global_xs0bar_single) {
+    delete[] global_xs0bar_single;
+  }
+  if (global_R_single) {
+    delete[] global_R_single;
+  }
+  if (global_S_single) {
+    delete[] global_S_single;
+  }
 
   // Free the Jacobian-vector product data
   if (global_M1) {
     delete[] global_M1;
   }
+  if (global_M1_single) {
+    delete[] global_M1_single;
+  }
   if (global_ipiv) {
     delete[] global_ipiv;
   }
@@ -94,12 +125,79 @@ MELD::~MELD() {
   }
 }
 
+/*
+  Set the number of threads used to loop over the aerodynamic surface nodes
+
+  The aerodynamic nodes are split into contiguous blocks, one per thread, and
+  contributions to structural arrays are accumulated in thread-local copies
+  that are summed in a fixed order. As a result, the transfers are bitwise
+  reproducible for a fixed number of threads. Without OpenMP support, the
+  number of threads is always one.
+
+  Arguments
+  ---------
+  num_threads : number of threads (values less than one use all available)
+*/
+void MELD::setNumThreads(int num_threads) {
+#ifdef _OPENMP
+  if (num_threads < 1) {
+    num_threads = omp_get_max_threads();
+  }
+  nthreads = num_threads;
+#else
+  nthreads = 1;
+#endif
+}
+
+/*
+  Get the number of threads used to loop over the aerodynamic surface nodes
+*/
+int MELD::getNumThreads() { return nthreads; }
+
+/*
+  Get the index of the calling thread within the current parallel region
+*/
+int MELD::getThreadNum() {
+#ifdef _OPENMP
+  return omp_get_thread_num();
+#else
+  return 0;
+#endif
+}
+
+/*
+  Sum the thread-local copies of a global array into the first copy. The
+  copies are always added in order of the thread index.
+
+  Arguments
+  ---------
+  size   : length of each copy of the array
+  arrays : nthreads contiguous copies of the array
+
+  Returns
+  -------
+  arrays : the first copy contains the sum of all the copies
+*/
+void MELD::reduceThreadArrays(int size, F2FScalar *arrays) {
+  if (nthreads > 1) {
+#ifdef _OPENMP
+#pragma omp parallel for schedule(static) num_threads(nthreads)
+#endif
+    for (int j = 0; j < size; j++) {
+      for (int k = 1; k < nthreads; k++) {
+        arrays[j] += arrays[size * k + j];
+      }
+    }
+  }
+}
+
 /*
   Set aerostructural connectivity, compute weights, and allocate memory needed
   for transfers and products
 */
 void MELD::initialize() {
-  // global number of structural nodes
+  // Discard any previous halo and distribute the global structural mesh
+  clearStructHalo();
   distributeStructuralMesh();
 
   // Check that user doesn't set more nearest nodes than exist in total
@@ -107,6 +205,30 @@ void MELD::initialize() {
     nn = ns;
   }
 
+  // Create the aerostructural connectivity, or keep the previous one if the
+  // nodes have not moved enough to change it
+  if (global_conn) {
+    delete[] global_conn;
+  }
+  global_conn = new int[nn * na];
+  updateAeroStructConn(isymm, nn, global_conn);
+
+  // Allocate and compute the weights
+  if (global_W) {
+    delete[] global_W;
+  }
+  if (global_W_single) {
+    delete[] global_W_single;
+  }
+  global_W_single = NULL;
+  global_W = new F2FScalar[nn * na];
+  computeWeights(F2FRealPart(global_beta), isymm, nn, global_conn, global_W);
+
+  // Keep only the structural nodes connected to the local aerodynamic nodes
+  if (use_struct_halo) {
+    buildStructHalo(nn, global_conn);
+  }
+
   if (Us) {
     delete[] Us;
   }
@@ -125,153 +247,419 @@ void MELD::initialize() {
     memset(Us, 0, 3 * ns * sizeof(F2FScalar));
   }
 
-  // Create aerostructural connectivity
-  global_conn = new int[nn * na];
-  computeAeroStructConn(isymm, nn, global_conn);
-
-  // Allocate and compute the weights
-  global_W = new F2FScalar[nn * na];
-  computeWeights(F2FRealPart(global_beta), isymm, nn, global_conn, global_W);
-
   // Allocate and initialize load transfer variables
-  global_xs0bar = new F2FScalar[3 * na];
-  global_R = new F2FScalar[9 * na];
-  global_S = new F2FScalar[9 * na];
+  if (global_xs0bar) {
+    delete[] global_xs0bar;
+  }
+  if (global_R) {
+    delete[] global_R;
+  }
+  if (global_S) {
+    delete[] global_S;
+  }
+  if (global_xs0bar_single) {
+    delete[] global_xs0bar_single;
+  }
+  if (global_R_single) {
+    delete[] global_R_single;
+  }
+  if (global_S_single) {
+    delete[] global_S_single;
+  }
+  global_xs0bar = global_R = global_S = NULL;
+  global_xs0bar_single = global_R_single = global_S_single = NULL;
+  allocateNodeData();
 
   // Allocate and initialize Jacobian-vector product variables
-  global_M1 = new F2FScalar[15 * 15 * na];
-  global_ipiv = new int[15 * na];
+  allocateFactorStorage();
+
+  // Size the persistent work arrays used by the transfers and products
+  getWorkArray(WORK_STRUCT_NODES, 3 * ns);
+  getWorkArray(WORK_STRUCT_VECS, 3 * ns);
+  getWorkArray(WORK_STRUCT_PRODS, 3 * ns * nthreads);
+  getWorkArray(WORK_NODE_RHS, 2 * 15 * nthreads);
 }
 
 /*
-  Computes the displacements of aerodynamic surface nodes by fitting an
-  optimal rigid rotation and translation to the displacement of the set of
-  structural nodes nearest each aerodynamic surface node
+  Set how the factored 15x15 systems are kept between the load transfer and
+  the Jacobian-vector products. Storing the factors takes 225 scalars and 15
+  integers per aerodynamic node. Storing them in single precision halves this
+  at the cost of products that are only accurate to single precision, while
+  recomputing them from the rotation data stores nothing extra but assembles
+  and factors a system for each node in every product.
 
   Arguments
   ---------
-  struct_disps : structural node displacements
+  storage : STORE_FACTOR, STORE_SINGLE_FACTOR or RECOMPUTE_FACTOR
+*/
+void MELD::setFactorStorage(FactorStorage storage) {
+  factor_storage = storage;
+
+  // Reallocate the storage if the scheme has already been initialized
+  if (global_conn) {
+    allocateFactorStorage();
+  }
+}
+
+/*
+  Set the precision of the weights and of the centroids and rotations of the
+  aerodynamic nodes that are stored between the transfers. With mixed
+  precision, these are stored in single precision, the transfers read single
+  precision copies of the node locations, and all the sums are accumulated in
+  full precision. This halves the memory traffic of the transfers, which are
+  then accurate to single precision. This is intended for analyses that only
+  need the forward transfers, since the Jacobian-vector products are also
+  limited to single precision accuracy.
+
+  Arguments
+  ---------
+  prec : FULL_PRECISION or MIXED_PRECISION
+*/
+void MELD::setPrecision(Precision prec) {
+  precision = prec;
+  if (precision == FULL_PRECISION) {
+    clearSingleNodes();
+  }
+
+  // Convert the stored data if the scheme has already been initialized
+  if (global_conn) {
+    allocateNodeData();
+  }
+}
+
+/*
+  Copy an array to single precision and free the original
+*/
+static F2FSingleScalar *convertToSingle(int size, F2FScalar *data) {
+  F2FSingleScalar *single = new F2FSingleScalar[size];
+  for (int k = 0; k < size; k++) {
+    single[k] = F2FSingleScalar(data[k]);
+  }
+  delete[] data;
+  return single;
+}
+
+/*
+  Copy an array to full precision and free the original
+*/
+static F2FScalar *convertToFull(int size, F2FSingleScalar *data) {
+  F2FScalar *full = new F2FScalar[size];
+  for (int k = 0; k < size; k++) {
+    full[k] = F2FScalar(data[k]);
+  }
+  delete[] data;
+  return full;
+}
+
+/*
+  Allocate the weights and the centroid and rotation data of the aerodynamic
+  nodes with the current precision. Stored data is converted to the current
+  precision, except that the weights are computed again when returning to
+  full precision.
+*/
+void MELD::allocateNodeData() {
+  if (precision == MIXED_PRECISION) {
+    if (global_W) {
+      global_W_single = convertToSingle(nn * na, global_W);
+      global_W = NULL;
+    }
+    if (global_xs0bar) {
+      global_xs0bar_single = convertToSingle(3 * na, global_xs0bar);
+      global_R_single = convertToSingle(9 * na, global_R);
+      global_S_single = convertToSingle(9 * na, global_S);
+      global_xs0bar = global_R = global_S = NULL;
+    } else if (!global_xs0bar_single) {
+      global_xs0bar_single = new F2FSingleScalar[3 * na];
+      global_R_single = new F2FSingleScalar[9 * na];
+      global_S_single = new F2FSingleScalar[9 * na];
+    }
+  } else {
+    if (global_W_single) {
+      delete[] global_W_single;
+      global_W_single = NULL;
+      global_W = new F2FScalar[nn * na];
+      computeWeights(F2FRealPart(global_beta), isymm, nn, global_conn,
+                     global_W);
+    }
+    if (global_xs0bar_single) {
+      global_xs0bar = convertToFull(3 * na, global_xs0bar_single);
+      global_R = convertToFull(9 * na, global_R_single);
+      global_S = convertToFull(9 * na, global_S_single);
+      global_xs0bar_single = global_R_single = global_S_single = NULL;
+    } else if (!global_xs0bar) {
+      global_xs0bar = new F2FScalar[3 * na];
+      global_R = new F2FScalar[9 * na];
+      global_S = new F2FScalar[9 * na];
+    }
+  }
+}
+
+/*
+  Get the stored data of the i-th aerodynamic node in full precision
+
+  Arguments
+  ---------
+  size        : number of values per node
+  i           : aerodynamic node index
+  data        : the full precision data (NULL with mixed precision)
+  data_single : the single precision data
+  work        : work array with the given size
 
   Returns
   -------
-  aero_disps   : aerodynamic node displacements
+  the values of the node, which are stored in the work array unless they are
+  stored in full precision
 */
-void MELD::transferDisps(const F2FScalar *struct_disps, F2FScalar *aero_disps) {
-  // Check if struct nodes locations need to be redistributed
-  distributeStructuralMesh();
-
-  // Copy prescribed displacements into displacement vector
-  structGatherBcast(3 * ns_local, struct_disps, 3 * ns, Us);
+const F2FScalar *MELD::getNodeData(int size, int i, const F2FScalar *data,
+                                   const F2FSingleScalar *data_single,
+                                   F2FScalar *work) {
+  if (data) {
+    return &data[size * i];
+  }
+  for (int k = 0; k < size; k++) {
+    work[k] = F2FScalar(data_single[size * i + k]);
+  }
+  return work;
+}
 
-  // Zero the outputs
-  memset(global_xs0bar, 0.0, 3 * na * sizeof(F2FScalar));
-  memset(global_R, 0.0, 9 * na * sizeof(F2FScalar));
-  memset(global_S, 0.0, 9 * na * sizeof(F2FScalar));
-  memset(aero_disps, 0.0, 3 * na * sizeof(F2FScalar));
+/*
+  Store the data of the i-th aerodynamic node in the current precision
 
-  // Add structural displacments to structural node locations
-  F2FScalar *Xsd = new F2FScalar[3 * ns];
-  for (int j = 0; j < 3 * ns; j++) {
-    Xsd[j] = Xs[j] + Us[j];
+  Arguments
+  ---------
+  size        : number of values per node
+  i           : aerodynamic node index
+  values      : the values of the node
+  data        : the full precision data (NULL with mixed precision)
+  data_single : the single precision data
+*/
+void MELD::setNodeData(int size, int i, const F2FScalar *values,
+                       F2FScalar *data, F2FSingleScalar *data_single) {
+  if (data) {
+    memcpy(&data[size * i], values, size * sizeof(F2FScalar));
+  } else {
+    for (int k = 0; k < size; k++) {
+      data_single[size * i + k] = F2FSingleScalar(values[k]);
+    }
   }
+}
 
-  for (int i = 0; i < na; i++) {
-    const F2FScalar *xa0 = &Xa[3 * i];
+/*
+  Estimate the number of bytes needed to store the factored systems for the
+  local aerodynamic nodes
 
-    // Compute the centroids of the original and displaced sets of nodes
-    F2FScalar *xs0bar = &global_xs0bar[3 * i];
-    const int *local_conn = &global_conn[i * nn];
-    const F2FScalar *W = &global_W[i * nn];
-    computeCentroid(local_conn, W, Xs, xs0bar);
+  Arguments
+  ---------
+  storage : STORE_FACTOR, STORE_SINGLE_FACTOR or RECOMPUTE_FACTOR
 
-    F2FScalar xsbar[3];
-    computeCentroid(local_conn, W, Xsd, xsbar);
+  Returns
+  -------
+  the number of bytes
+*/
+size_t MELD::getFactorMemoryEstimate(FactorStorage storage) {
+  if (storage == STORE_FACTOR) {
+    return na * (15 * 15 * sizeof(F2FScalar) + 15 * sizeof(int));
+  } else if (storage == STORE_SINGLE_FACTOR) {
+    return na * (15 * 15 * sizeof(F2FSingleScalar) + 15 * sizeof(int));
+  }
+  return 0;
+}
+
+/*
+  Allocate the arrays for the factored systems with the current storage
+*/
+void MELD::allocateFactorStorage() {
+  if (global_M1) {
+    delete[] global_M1;
+  }
+  if (global_M1_single) {
+    delete[] global_M1_single;
+  }
+  if (global_ipiv) {
+    delete[] global_ipiv;
+  }
+  global_M1 = NULL;
+  global_M1_single = NULL;
+  global_ipiv = NULL;
+
+  if (factor_storage == STORE_FACTOR) {
+    global_M1 = new F2FScalar[15 * 15 * na];
+    global_ipiv = new int[15 * na];
+  } else if (factor_storage == STORE_SINGLE_FACTOR) {
+    global_M1_single = new F2FSingleScalar[15 * 15 * na];
+    global_ipiv = new int[15 * na];
+  }
+}
 
-    // Compute the covariance matrix
-    F2FScalar H[9];
-    computeCovariance(Xs, Xsd, local_conn, W, xs0bar, xsbar, H);
+/*
+  Store the factored system of the i-th aerodynamic node. The factor is
+  computed in place when it is stored in full precision.
 
-    // Compute the optimal rotation
-    computeRotation(H, &global_R[9 * i], &global_S[9 * i]);
+  Arguments
+  ---------
+  i    : aerodynamic node index
+  M1   : the factored system
+  ipiv : the pivots of the factorization
+*/
+void MELD::storeFactor(int i, const F2FScalar *M1, const int *ipiv) {
+  if (factor_storage == STORE_SINGLE_FACTOR) {
+    F2FSingleScalar *M1s = &global_M1_single[15 * 15 * i];
+    for (int k = 0; k < 15 * 15; k++) {
+      M1s[k] = F2FSingleScalar(M1[k]);
+    }
+    memcpy(&global_ipiv[15 * i], ipiv, 15 * sizeof(int));
+  }
+}
 
-    // Form the vector r from the initial centroid to the aerodynamic surface
-    // node
-    F2FScalar r[3];
-    vec_diff(xs0bar, xa0, r);
+/*
+  Get the factored system of the i-th aerodynamic node
 
-    // Rotate r vector using rotation matrix
-    const F2FScalar *R = &global_R[9 * i];
-    F2FScalar rho[3];
-    rho[0] = R[0] * r[0] + R[3] * r[1] + R[6] * r[2];
-    rho[1] = R[1] * r[0] + R[4] * r[1] + R[7] * r[2];
-    rho[2] = R[2] * r[0] + R[5] * r[1] + R[8] * r[2];
+  Arguments
+  ---------
+  i         : aerodynamic node index
+  M1_work   : work array for the factor (15 x 15)
+  ipiv_work : work array for the pivots (15)
 
-    // Add rotated vector to centroid of second set to obtain final location
-    F2FScalar xa[3];  // location of displaced aerodynamic node
-    F2FScalar *ua = &aero_disps[3 * i];  // displacement of aerodynamic node
-    vec_add(xsbar, rho, xa);
-    vec_diff(xa0, xa, ua);
+  Returns
+  -------
+  ipiv : the pivots of the factorization
+  the factored system, which is stored in the work arrays unless it is
+  stored in full precision
+*/
+const F2FScalar *MELD::getFactor(int i, F2FScalar *M1_work, int *ipiv_work,
+                                 const int **ipiv) {
+  if (factor_storage == STORE_FACTOR) {
+    *ipiv = &global_ipiv[15 * i];
+    return &global_M1[15 * 15 * i];
+  } else if (factor_storage == STORE_SINGLE_FACTOR) {
+    const F2FSingleScalar *M1s = &global_M1_single[15 * 15 * i];
+    for (int k = 0; k < 15 * 15; k++) {
+      M1_work[k] = F2FScalar(M1s[k]);
+    }
+    *ipiv = &global_ipiv[15 * i];
+    return M1_work;
   }
 
-  // Free memory
-  delete[] Xsd;
+  // Assemble and factor the system from the rotation data
+  F2FScalar R_work[9];
+  const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
+  F2FScalar S_work[9];
+  const F2FScalar *S = getNodeData(9, i, global_S, global_S_single, S_work);
+  assembleM1(R, S, M1_work);
+  int m = 15, info = 0;
+  LAPACKgetrf(&m, &m, M1_work, &m, ipiv_work, &info);
+  *ipiv = ipiv_work;
+  return M1_work;
 }
 
 /*
-  Computes centroids of set of structural nodes
+  Get the number of bytes allocated by the transfer scheme, including the
+  connectivity, weights and the data stored for the Jacobian-vector products
+*/
+size_t MELD::getMemoryFootprint() {
+  size_t bytes = LDTransferScheme::getMemoryFootprint();
+  if (global_conn) {
+    bytes += nn * na * sizeof(int);
+  }
+  if (global_W) {
+    bytes += nn * na * sizeof(F2FScalar);
+  }
+  if (global_xs0bar) {
+    bytes += 3 * na * sizeof(F2FScalar);
+  }
+  if (global_R) {
+    bytes += 9 * na * sizeof(F2FScalar);
+  }
+  if (global_S) {
+    bytes += 9 * na * sizeof(F2FScalar);
+  }
+  if (global_W_single) {
+    bytes += nn * na * sizeof(F2FSingleScalar);
+  }
+  if (global_xs0bar_single) {
+    bytes += 21 * na * sizeof(F2FSingleScalar);
+  }
+  if (global_M1) {
+    bytes += 15 * 15 * na * sizeof(F2FScalar);
+  }
+  if (global_M1_single) {
+    bytes += 15 * 15 * na * sizeof(F2FSingleScalar);
+  }
+  if (global_ipiv) {
+    bytes += 15 * na * sizeof(int);
+  }
+  return bytes;
+}
+
+/*
+  Computes the weighted centroid of a set of structural nodes. The weights
+  and node locations may be stored in single or full precision, and the sum
+  is always accumulated in full precision.
 
   Arguments
-  ----------
+  ---------
+  nn         : number of nodes in the set
+  ns         : number of structural nodes
+  isymm      : symmetry specifier
   local_conn : IDs of structural nodes in set
-  W : array of local weights
-  X : set of all structural nodes
+  W          : array of local weights
+  X          : set of all structural nodes
 
   Returns
-  --------
+  -------
   xsbar : centroid
 */
-void MELD::computeCentroid(const int *local_conn, const F2FScalar *W,
-                           const F2FScalar *X, F2FScalar *xsbar) {
+template <class TW, class TX>
+static void weightedCentroid(int nn, int ns, int isymm, const int *local_conn,
+                             const TW *W, const TX *X, F2FScalar *xsbar) {
   memset(xsbar, 0, 3 * sizeof(F2FScalar));
   for (int j = 0; j < nn; j++) {
+    const F2FScalar w = W[j];
     if (local_conn[j] < ns) {
-      const F2FScalar *xs = &X[3 * local_conn[j]];
+      const TX *xs = &X[3 * local_conn[j]];
 
       for (int k = 0; k < 3; k++) {
-        xsbar[k] += W[j] * xs[k];
+        xsbar[k] += w * F2FScalar(xs[k]);
       }
     } else {
-      F2FScalar rxs[3];
-      memcpy(rxs, &X[3 * (local_conn[j] - ns)], 3 * sizeof(F2FScalar));
+      const TX *xs = &X[3 * (local_conn[j] - ns)];
+      F2FScalar rxs[3] = {xs[0], xs[1], xs[2]};
       rxs[isymm] *= -1.0;
 
       for (int k = 0; k < 3; k++) {
-        xsbar[k] += W[j] * rxs[k];
+        xsbar[k] += w * rxs[k];
       }
     }
   }
 }
 
 /*
-  Computes covariance matrix from initial and displaced sets of structural nodes
+  Computes the weighted covariance matrix of the initial and displaced sets
+  of structural nodes. The weights and initial node locations may be stored
+  in single or full precision, and the sum is always accumulated in full
+  precision.
 
   Arguments
   ---------
-  X : initial structural node locations
-  Xd : displaced structural node locations
+  nn         : number of nodes in the set
+  ns         : number of structural nodes
+  isymm      : symmetry specifier
+  X          : initial structural node locations
+  Xd         : displaced structural node locations
   local_conn : IDs of structural nodes in set
-  W : array of local weights
-  xs0bar : initial centroid
-  xsbar : displaced centroid
+  W          : array of local weights
+  xs0bar     : initial centroid
+  xsbar      : displaced centroid
 
   Returns
   -------
   H : covariance matrix
 */
-void MELD::computeCovariance(const F2FScalar *X, const F2FScalar *Xd,
-                             const int *local_conn, const F2FScalar *W,
-                             const F2FScalar *xs0bar, const F2FScalar *xsbar,
-                             F2FScalar *H) {
+template <class TW, class TX>
+static void weightedCovariance(int nn, int ns, int isymm, const TX *X,
+                               const F2FScalar *Xd, const int *local_conn,
+                               const TW *W, const F2FScalar *xs0bar,
+                               const F2FScalar *xsbar, F2FScalar *H) {
   // Form the covariance matrix of the two point sets
   memset(H, 0, 9 * sizeof(F2FScalar));
 
@@ -279,143 +667,374 @@ void MELD::computeCovariance(const F2FScalar *X, const F2FScalar *Xd,
     F2FScalar q[3];  // vector from centroid to node
     F2FScalar p[3];  // vector from diplaced centroid to displaced node
 
-    if (local_conn[j] < ns) {
-      const F2FScalar *xs0 = &X[3 * local_conn[j]];
-      const F2FScalar *xs = &Xd[3 * local_conn[j]];
-
-      vec_diff(xs0bar, xs0, q);
-      vec_diff(xsbar, xs, p);
-    } else {
-      // We're dealing with a reflected node/displacement
-      F2FScalar rxs0[3];  // Reflected xs0
-      F2FScalar rxs[3];   // Reflected xs
-
-      // Copy the node locations
-      memcpy(rxs0, &X[3 * (local_conn[j] - ns)], 3 * sizeof(F2FScalar));
-      memcpy(rxs, &Xd[3 * (local_conn[j] - ns)], 3 * sizeof(F2FScalar));
+    int indx = local_conn[j];
+    if (indx >= ns) {
+      indx -= ns;
+    }
+    const TX *x0 = &X[3 * indx];
+    F2FScalar xs0[3] = {x0[0], x0[1], x0[2]};
+    F2FScalar xs[3] = {Xd[3 * indx], Xd[3 * indx + 1], Xd[3 * indx + 2]};
 
+    if (local_conn[j] >= ns) {
       // Reflect the node locations about the axis of symmetry
-      rxs0[isymm] *= -1.0;
-      rxs[isymm] *= -1.0;
-
-      vec_diff(xs0bar, rxs0, q);
-      vec_diff(xsbar, rxs, p);
+      xs0[isymm] *= -1.0;
+      xs[isymm] *= -1.0;
     }
 
+    vec_diff(xs0bar, xs0, q);
+    vec_diff(xsbar, xs, p);
+
     // H_{mn} = sum_{j}^{N} w^{(j)} p_{m}^{(j)} q_{n}^{(j)}
+    const F2FScalar w = W[j];
 
-    H[0] += W[j] * p[0] * q[0];
-    H[1] += W[j] * p[1] * q[0];
-    H[2] += W[j] * p[2] * q[0];
+    H[0] += w * p[0] * q[0];
+    H[1] += w * p[1] * q[0];
+    H[2] += w * p[2] * q[0];
 
-    H[3] += W[j] * p[0] * q[1];
-    H[4] += W[j] * p[1] * q[1];
-    H[5] += W[j] * p[2] * q[1];
+    H[3] += w * p[0] * q[1];
+    H[4] += w * p[1] * q[1];
+    H[5] += w * p[2] * q[1];
 
-    H[6] += W[j] * p[0] * q[2];
-    H[7] += W[j] * p[1] * q[2];
-    H[8] += W[j] * p[2] * q[2];
+    H[6] += w * p[0] * q[2];
+    H[7] += w * p[1] * q[2];
+    H[8] += w * p[2] * q[2];
   }
 }
 
 /*
-  Computes the loads on all structural nodes consistently and conservatively
-  from loads on aerodynamic surface nodes
+  Adds the load contributions of an aerodynamic surface node to its set of
+  structural nodes. The weights and node locations may be stored in single or
+  full precision, and the loads are always accumulated in full precision.
 
   Arguments
   ---------
-  aero_loads   : loads on aerodynamic surface nodes
+  nn         : number of nodes in the set
+  ns         : number of structural nodes
+  isymm      : symmetry specifier
+  local_conn : IDs of structural nodes in set
+  W          : array of local weights
+  Xs         : structural node locations
+  xs0bar     : initial centroid
+  X          : solution of the load transfer system
+  fa         : load on the aerodynamic node
 
   Returns
   -------
-  struct_loads : loads on structural nodes
+  loads : structural loads
 */
-void MELD::transferLoads(const F2FScalar *aero_loads, F2FScalar *struct_loads) {
-  // Copy prescribed aero loads into member variable
-  memcpy(Fa, aero_loads, 3 * na * sizeof(F2FScalar));
-
-  // Zero struct loads
-  F2FScalar *struct_loads_global = new F2FScalar[3 * ns];
-  memset(struct_loads_global, 0, 3 * ns * sizeof(F2FScalar));
+template <class TW, class TX>
+static void addNodeLoads(int nn, int ns, int isymm, const int *local_conn,
+                         const TW *W, const TX *Xs, const F2FScalar *xs0bar,
+                         const F2FScalar *X, const F2FScalar *fa,
+                         F2FScalar *loads) {
+  for (int j = 0; j < nn; j++) {
+    int indx = local_conn[j];
+    int reflect = (indx >= ns);
+    if (reflect) {
+      indx -= ns;
+    }
 
-  // Loop over all aerodynamic surface nodes
-  for (int i = 0; i < na; i++) {
-    // Compute vector d from centroid to aero node
-    const F2FScalar *xa0 = &Xa[3 * i];
-    const F2FScalar *xs0bar = &global_xs0bar[3 * i];
-    F2FScalar r[3];
-    vec_diff(xs0bar, xa0, r);
+    // Compute vector q from centroid to structural node
+    const TX *x0 = &Xs[3 * indx];
+    F2FScalar xs0[3] = {x0[0], x0[1], x0[2]};
+    if (reflect) {
+      xs0[isymm] *= -1.0;
+    }
+    F2FScalar q[3];
+    vec_diff(xs0bar, xs0, q);
+
+    const F2FScalar w = W[j];
+    F2FScalar *fs = &loads[3 * indx];
+
+    // fs = w*(X^{T}*q + w*fa)
+    F2FScalar rfs[3];
+    rfs[0] = w * (X[0] * q[0] + X[1] * q[1] + X[2] * q[2] + fa[0]);
+    rfs[1] = w * (X[3] * q[0] + X[4] * q[1] + X[5] * q[2] + fa[1]);
+    rfs[2] = w * (X[6] * q[0] + X[7] * q[1] + X[8] * q[2] + fa[2]);
+    if (reflect) {
+      rfs[isymm] *= -1.0;
+    }
 
-    // Compute X
-    const F2FScalar *R = &global_R[9 * i];
-    const F2FScalar *S = &global_S[9 * i];
-    F2FScalar *M1 = &global_M1[15 * 15 * i];
-    assembleM1(R, S, M1);
+    fs[0] += rfs[0];
+    fs[1] += rfs[1];
+    fs[2] += rfs[2];
+  }
+}
 
-    int *ipiv = &global_ipiv[15 * i];
-    int m = 15, info = 0;
-    LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
+/*
+  Computes the displacements of aerodynamic surface nodes by fitting an
+  optimal rigid rotation and translation to the displacement of the set of
+  structural nodes nearest each aerodynamic surface node
 
-    const F2FScalar *fa = &Fa[3 * i];
-    F2FScalar x[] = {-fa[0] * r[0], -fa[1] * r[0], -fa[2] * r[0],
-                     -fa[0] * r[1], -fa[1] * r[1], -fa[2] * r[1],
-                     -fa[0] * r[2], -fa[1] * r[2], -fa[2] * r[2],
-                     0.0,           0.0,           0.0,
-                     0.0,           0.0,           0.0};
-    int one = 1;
-    info = 0;
-    LAPACKgetrs("N", &m, &one, M1, &m, ipiv, x, &m, &info);
-    F2FScalar X[] = {x[0], x[1], x[2], x[3], x[4], x[5], x[6], x[7], x[8]};
+  Arguments
+  ---------
+  struct_disps : structural node displacements
 
-    // Compute load contribution of aerodynamic surface node to structural node
-    for (int j = 0; j < nn; j++) {
-      int indx = global_conn[i * nn + j];
+  Returns
+  -------
+  aero_disps   : aerodynamic node displacements
+*/
+void MELD::transferDisps(const F2FScalar *struct_disps, F2FScalar *aero_disps) {
+  // Check if struct nodes locations need to be redistributed
+  distributeStructuralMesh();
 
-      if (indx < ns) {
-        // Compute vector q from centroid to structural node
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        F2FScalar q[3];
-        vec_diff(xs0bar, xs0, q);
+  // Copy prescribed displacements into displacement vector
+  structGatherBcast(3 * ns_local, struct_disps, 3 * ns, Us);
+
+  // Copy the node locations read by the mixed precision transfer
+  if (precision == MIXED_PRECISION) {
+    updateSingleNodes();
+  }
+
+  // Zero the outputs
+  memset(aero_disps, 0.0, 3 * na * sizeof(F2FScalar));
 
-        const F2FScalar w = global_W[nn * i + j];
-        F2FScalar *fs = &struct_loads_global[3 * indx];
+  // Add structural displacments to structural node locations
+  F2FScalar *Xsd = getWorkArray(WORK_STRUCT_NODES, 3 * ns);
+  for (int j = 0; j < 3 * ns; j++) {
+    Xsd[j] = Xs[j] + Us[j];
+  }
 
-        // fs = w*(X^{T}*q + w*fa)
-        fs[0] += w * (X[0] * q[0] + X[1] * q[1] + X[2] * q[2] + fa[0]);
-        fs[1] += w * (X[3] * q[0] + X[4] * q[1] + X[5] * q[2] + fa[1]);
-        fs[2] += w * (X[6] * q[0] + X[7] * q[1] + X[8] * q[2] + fa[2]);
+  // Process the aerodynamic nodes in blocks so that the rotations of each
+  // block can be computed together
+  const int B = ROTATION_BLOCK_SIZE;
+  int nblocks = (na + B - 1) / B;
+
+#ifdef _OPENMP
+#pragma omp parallel for schedule(static) num_threads(nthreads)
+#endif
+  for (int ib = 0; ib < nblocks; ib++) {
+    int start = B * ib;
+    int nb = (na - start < B ? na - start : B);
+
+    F2FScalar xs0bar[3 * B], xsbar[3 * B];
+    F2FScalar H[9 * B], R[9 * B], S[9 * B];
+    for (int j = 0; j < nb; j++) {
+      int i = start + j;
+      const int *local_conn = &global_conn[i * nn];
+
+      // Compute the centroids of the original and displaced sets of nodes
+      // and the covariance matrix
+      if (precision == MIXED_PRECISION) {
+        const F2FSingleScalar *W = &global_W_single[i * nn];
+        weightedCentroid(nn, ns, isymm, local_conn, W, Xs_single,
+                         &xs0bar[3 * j]);
+        weightedCentroid(nn, ns, isymm, local_conn, W, Xsd, &xsbar[3 * j]);
+        weightedCovariance(nn, ns, isymm, Xs_single, Xsd, local_conn, W,
+                           &xs0bar[3 * j], &xsbar[3 * j], &H[9 * j]);
       } else {
-        indx -= ns;
+        const F2FScalar *W = &global_W[i * nn];
+        computeCentroid(local_conn, W, Xs, &xs0bar[3 * j]);
+        computeCentroid(local_conn, W, Xsd, &xsbar[3 * j]);
+        computeCovariance(Xs, Xsd, local_conn, W, &xs0bar[3 * j], &xsbar[3 * j],
+                          &H[9 * j]);
+      }
+    }
 
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;
+    // Compute the optimal rotations
+    computeRotations(nb, H, R, S);
 
-        F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
+    for (int j = 0; j < nb; j++) {
+      int i = start + j;
+      F2FScalar xa0[3];
+      if (precision == MIXED_PRECISION) {
+        for (int k = 0; k < 3; k++) {
+          xa0[k] = Xa_single[3 * i + k];
+        }
+      } else {
+        memcpy(xa0, &Xa[3 * i], 3 * sizeof(F2FScalar));
+      }
+
+      // Form the vector r from the initial centroid to the aerodynamic
+      // surface node
+      F2FScalar r[3];
+      vec_diff(&xs0bar[3 * j], xa0, r);
+
+      // Rotate r vector using rotation matrix
+      const F2FScalar *Rj = &R[9 * j];
+      F2FScalar rho[3];
+      rho[0] = Rj[0] * r[0] + Rj[3] * r[1] + Rj[6] * r[2];
+      rho[1] = Rj[1] * r[0] + Rj[4] * r[1] + Rj[7] * r[2];
+      rho[2] = Rj[2] * r[0] + Rj[5] * r[1] + Rj[8] * r[2];
+
+      // Add rotated vector to centroid of second set to obtain final location
+      F2FScalar xa[3];  // location of displaced aerodynamic node
+      F2FScalar *ua = &aero_disps[3 * i];  // displacement of aerodynamic node
+      vec_add(&xsbar[3 * j], rho, xa);
+      vec_diff(xa0, xa, ua);
+
+      // Store the centroid and the rotation for the load transfer
+      setNodeData(3, i, &xs0bar[3 * j], global_xs0bar, global_xs0bar_single);
+      setNodeData(9, i, &R[9 * j], global_R, global_R_single);
+      setNodeData(9, i, &S[9 * j], global_S, global_S_single);
+    }
+  }
+}
+
+/*
+  Computes centroids of set of structural nodes
+
+  Arguments
+  ----------
+  local_conn : IDs of structural nodes in set
+  W : array of local weights
+  X : set of all structural nodes
 
-        const F2FScalar w = global_W[nn * i + j];
-        F2FScalar *fs = &struct_loads_global[3 * indx];
+  Returns
+  --------
+  xsbar : centroid
+*/
+void MELD::computeCentroid(const int *local_conn, const F2FScalar *W,
+                           const F2FScalar *X, F2FScalar *xsbar) {
+  weightedCentroid(nn, ns, isymm, local_conn, W, X, xsbar);
+}
 
-        F2FScalar rfs[3];
-        rfs[0] = w * (X[0] * q[0] + X[1] * q[1] + X[2] * q[2] + fa[0]);
-        rfs[1] = w * (X[3] * q[0] + X[4] * q[1] + X[5] * q[2] + fa[1]);
-        rfs[2] = w * (X[6] * q[0] + X[7] * q[1] + X[8] * q[2] + fa[2]);
-        rfs[isymm] *= -1.0;
+/*
+  Computes the centroid of the set of structural nodes of the i-th
+  aerodynamic node with the stored weights
 
-        // fs = w*(X^{T}*q + w*fa)
-        fs[0] += rfs[0];
-        fs[1] += rfs[1];
-        fs[2] += rfs[2];
+  Arguments
+  ----------
+  i : aerodynamic node index
+  X : set of all structural nodes
+
+  Returns
+  --------
+  xsbar : centroid
+*/
+void MELD::computeNodeCentroid(int i, const F2FScalar *X, F2FScalar *xsbar) {
+  if (precision == MIXED_PRECISION) {
+    weightedCentroid(nn, ns, isymm, &global_conn[i * nn],
+                     &global_W_single[i * nn], X, xsbar);
+  } else {
+    weightedCentroid(nn, ns, isymm, &global_conn[i * nn], &global_W[i * nn], X,
+                     xsbar);
+  }
+}
+
+/*
+  Computes covariance matrix from initial and displaced sets of structural nodes
+
+  Arguments
+  ---------
+  X : initial structural node locations
+  Xd : displaced structural node locations
+  local_conn : IDs of structural nodes in set
+  W : array of local weights
+  xs0bar : initial centroid
+  xsbar : displaced centroid
+
+  Returns
+  -------
+  H : covariance matrix
+*/
+void MELD::computeCovariance(const F2FScalar *X, const F2FScalar *Xd,
+                             const int *local_conn, const F2FScalar *W,
+                             const F2FScalar *xs0bar, const F2FScalar *xsbar,
+                             F2FScalar *H) {
+  weightedCovariance(nn, ns, isymm, X, Xd, local_conn, W, xs0bar, xsbar, H);
+}
+
+/*
+  Computes the loads on all structural nodes consistently and conservatively
+  from loads on aerodynamic surface nodes
+
+  Arguments
+  ---------
+  aero_loads   : loads on aerodynamic surface nodes
+
+  Returns
+  -------
+  struct_loads : loads on structural nodes
+*/
+void MELD::transferLoads(const F2FScalar *aero_loads, F2FScalar *struct_loads) {
+  // Copy prescribed aero loads into member variable
+  memcpy(Fa, aero_loads, 3 * na * sizeof(F2FScalar));
+
+  // Copy the node locations read by the mixed precision transfer
+  if (precision == MIXED_PRECISION) {
+    updateSingleNodes();
+  }
+
+  // Zero struct loads
+  // Allocate one copy of the global array for each thread
+  F2FScalar *struct_loads_global =
+      getWorkArray(WORK_STRUCT_PRODS, 3 * ns * nthreads);
+  memset(struct_loads_global, 0, 3 * ns * nthreads * sizeof(F2FScalar));
+
+  // Loop over all aerodynamic surface nodes
+#ifdef _OPENMP
+#pragma omp parallel num_threads(nthreads)
+#endif
+  {
+    // Each thread accumulates into its own block of the global array
+    F2FScalar *loads_thread = &struct_loads_global[3 * ns * getThreadNum()];
+#ifdef _OPENMP
+#pragma omp for schedule(static)
+#endif
+    for (int i = 0; i < na; i++) {
+      // Compute vector d from centroid to aero node
+      F2FScalar xa0[3];
+      if (precision == MIXED_PRECISION) {
+        for (int k = 0; k < 3; k++) {
+          xa0[k] = Xa_single[3 * i + k];
+        }
+      } else {
+        memcpy(xa0, &Xa[3 * i], 3 * sizeof(F2FScalar));
+      }
+      F2FScalar xs0bar_work[3];
+      const F2FScalar *xs0bar =
+          getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
+      F2FScalar r[3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Compute X
+      F2FScalar R_work[9], S_work[9];
+      const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
+      const F2FScalar *S = getNodeData(9, i, global_S, global_S_single, S_work);
+      F2FScalar M1_work[15 * 15];
+      int ipiv_work[15];
+      F2FScalar *M1 = M1_work;
+      int *ipiv = ipiv_work;
+      if (factor_storage == STORE_FACTOR) {
+        M1 = &global_M1[15 * 15 * i];
+        ipiv = &global_ipiv[15 * i];
+      }
+      assembleM1(R, S, M1);
+
+      int m = 15, info = 0;
+      LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
+      storeFactor(i, M1, ipiv);
+
+      const F2FScalar *fa = &Fa[3 * i];
+      F2FScalar x[] = {-fa[0] * r[0], -fa[1] * r[0], -fa[2] * r[0],
+                       -fa[0] * r[1], -fa[1] * r[1], -fa[2] * r[1],
+                       -fa[0] * r[2], -fa[1] * r[2], -fa[2] * r[2],
+                       0.0,           0.0,           0.0,
+                       0.0,           0.0,           0.0};
+      int one = 1;
+      info = 0;
+      LAPACKgetrs("N", &m, &one, M1, &m, ipiv, x, &m, &info);
+      F2FScalar X[] = {x[0], x[1], x[2], x[3], x[4], x[5], x[6], x[7], x[8]};
+
+      // Compute load contribution of aerodynamic surface node to structural
+      // node
+      const int *local_conn = &global_conn[i * nn];
+      if (precision == MIXED_PRECISION) {
+        addNodeLoads(nn, ns, isymm, local_conn, &global_W_single[nn * i],
+                     Xs_single, xs0bar, X, fa, loads_thread);
+      } else {
+        addNodeLoads(nn, ns, isymm, local_conn, &global_W[nn * i], Xs, xs0bar,
+                     X, fa, loads_thread);
       }
     }
   }
 
   // distribute the structural loads
-  structAddScatter(3 * ns, struct_loads_global, 3 * ns_local, struct_loads);
+  // Sum the thread contributions in a fixed order
+  reduceThreadArrays(3 * ns, struct_loads_global);
 
-  delete[] struct_loads_global;
+  structAddScatter(3 * ns, struct_loads_global, 3 * ns_local, struct_loads);
 }
 
 /*
@@ -431,229 +1050,271 @@ void MELD::transferLoads(const F2FScalar *aero_loads, F2FScalar *struct_loads) {
   prods : output vector
 */
 void MELD::applydDduS(const F2FScalar *vecs, F2FScalar *prods) {
-  // Make a global image of the input vector
-  F2FScalar *vecs_global = new F2FScalar[3 * ns];
-  structGatherBcast(3 * ns_local, vecs, 3 * ns, vecs_global);
+  MELD::applydDduSMulti(1, vecs, prods);
+}
+
+/*
+  Apply the action of the displacement transfer w.r.t structural displacements
+  transpose Jacobian to the input vector
+
+  Arguments
+  ----------
+  vecs  : input vector
+
+  Returns
+  --------
+  prods : output vector
+*/
+void MELD::applydDduSTrans(const F2FScalar *vecs, F2FScalar *prods) {
+  MELD::applydDduSTransMulti(1, vecs, prods);
+}
+
+/*
+  Compute the matrices X = dR/dH * r that are needed for the products with the
+  displacement transfer Jacobian at the i-th aerodynamic node
+
+  Arguments
+  ---------
+  i  : aerodynamic node index
+  r  : vector from the centroid to the aerodynamic node
+
+  Returns
+  -------
+  XX : the three 3x3 matrices X for each component of the aero displacement
+*/
+void MELD::computeDispJacobianX(int i, const F2FScalar *r, F2FScalar *XX) {
+  F2FScalar R_work[9];
+  const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
+  F2FScalar S_work[9];
+  const F2FScalar *S = getNodeData(9, i, global_S, global_S_single, S_work);
+  F2FScalar M1[15 * 15];
+  assembleM1(R, S, M1);
+  int ipiv[15];
+  int m = 15, info = 0;
+  LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
+
+  // Solve for all three right-hand sides at once
+  F2FScalar x[15 * 3];
+  memset(x, 0.0, 15 * 3 * sizeof(F2FScalar));
+  for (int k = 0; k < 3; k++) {
+    x[15 * k + k] -= r[0];
+    x[15 * k + k + 3] -= r[1];
+    x[15 * k + k + 6] -= r[2];
+  }
+  int nrhs = 3;
+  info = 0;
+  LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+
+  for (int k = 0; k < 3; k++) {
+    memcpy(&XX[9 * k], &x[15 * k], 9 * sizeof(F2FScalar));
+  }
+}
+
+/*
+  Apply the action of the displacement transfer w.r.t structural displacments
+  Jacobian to a block of input vectors stored row-wise. The matrices X are
+  computed once for each aerodynamic node and shared by all the vectors.
+
+  Arguments
+  ---------
+  nvecs : number of vectors
+  vecs  : input vectors
+
+  Returns
+  --------
+  prods : output vectors
+*/
+void MELD::applydDduSMulti(int nvecs, const F2FScalar *vecs, F2FScalar *prods) {
+  // Make a global image of the input vectors
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns * nvecs);
+  structGatherBcast(3 * ns_local * nvecs, vecs, 3 * ns * nvecs, vecs_global);
 
   // Zero array of Jacobian-vector products every call
-  memset(prods, 0, 3 * na * sizeof(F2FScalar));
+  memset(prods, 0, 3 * na * nvecs * sizeof(F2FScalar));
 
   // Loop over all aerodynamic surface nodes
+#ifdef _OPENMP
+#pragma omp parallel for schedule(static) num_threads(nthreads)
+#endif
   for (int i = 0; i < na; i++) {
-    F2FScalar *prod = &prods[3 * i];
+    F2FScalar *prod = &prods[3 * nvecs * i];
 
     // Compute vector r from centroid to aero node
     const F2FScalar *xa0 = &Xa[3 * i];
-    const F2FScalar *xs0bar = &global_xs0bar[3 * i];
+    F2FScalar xs0bar_work[3];
+    const F2FScalar *xs0bar =
+        getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
     F2FScalar r[3];
     vec_diff(xs0bar, xa0, r);
 
     // Compute XX
-    const F2FScalar *R = &global_R[9 * i];
-    const F2FScalar *S = &global_S[9 * i];
-    F2FScalar M1[15 * 15];
-    assembleM1(R, S, M1);
-    int ipiv[15];
-    int m = 15, info = 0;
-    LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
-    F2FScalar x[15];
     F2FScalar XX[9 * 3];
-
-    memset(x, 0.0, 15 * sizeof(F2FScalar));
-    x[0] -= r[0];
-    x[3] -= r[1];
-    x[6] -= r[2];
-    int nrhs = 1;
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[0], x, 9 * sizeof(F2FScalar));
-
-    memset(x, 0.0, 15 * sizeof(F2FScalar));
-    x[1] -= r[0];
-    x[4] -= r[1];
-    x[7] -= r[2];
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[9], x, 9 * sizeof(F2FScalar));
-
-    memset(x, 0.0, 15 * sizeof(F2FScalar));
-    x[2] -= r[0];
-    x[5] -= r[1];
-    x[8] -= r[2];
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[18], x, 9 * sizeof(F2FScalar));
+    computeDispJacobianX(i, r, XX);
 
     // Loop over linked structural nodes and add up nonzero contributions to
     // Jacobian-vector product
     for (int j = 0; j < nn; j++) {
       int indx = global_conn[nn * i + j];
 
-      // Compute vector q from centroid to structural node and get components
-      // of vector input corresponding to current structural node
+      // Compute vector q from centroid to structural node
       F2FScalar q[3];
-      F2FScalar v[3];
+      bool reflect = false;
       if (indx < ns) {
         const F2FScalar *xs0 = &Xs[3 * indx];
         vec_diff(xs0bar, xs0, q);
-        memcpy(v, &vecs_global[3 * indx], 3 * sizeof(F2FScalar));
       } else {
         indx -= ns;
+        reflect = true;
         const F2FScalar *xs0 = &Xs[3 * indx];
         F2FScalar rxs0[3];
         memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
         rxs0[isymm] *= -1.0;
         vec_diff(xs0bar, rxs0, q);
-        memcpy(v, &vecs_global[3 * indx], 3 * sizeof(F2FScalar));
-        v[isymm] *= -1.0;
+      }
+
+      // Compute T[3 * k + l] = q^{T} * X_{k} * e_{l}, which is shared by all
+      // the input vectors
+      F2FScalar T[9];
+      for (int k = 0; k < 3; k++) {
+        F2FScalar *X = &XX[9 * k];
+        for (int l = 0; l < 3; l++) {
+          T[3 * k + l] =
+              q[0] * X[3 * l] + q[1] * X[3 * l + 1] + q[2] * X[3 * l + 2];
+        }
       }
 
       // Compute each component of the Jacobian vector product as follows:
       // Jv[k] = w * [ q[0] q[1] q[2] ][ X[0] X[3] X[6] ][ v[0] ] + w*v[k]
       //                               [ X[1] X[4] X[7] ][ v[1] ]
       //                               [ X[2] X[5] X[8] ][ v[2] ]
-      F2FScalar w = global_W[nn * i + j];
+      F2FScalar w = getWeight(nn * i + j);
+      const F2FScalar *vs = &vecs_global[3 * nvecs * indx];
 
-      for (int k = 0; k < 3; k++) {
-        F2FScalar *X = &XX[9 * k];
-        prod[k] -= w * (q[0] * (X[0] * v[0] + X[3] * v[1] + X[6] * v[2]) +
-                        q[1] * (X[1] * v[0] + X[4] * v[1] + X[7] * v[2]) +
-                        q[2] * (X[2] * v[0] + X[5] * v[1] + X[8] * v[2])) +
-                   w * v[k];
+      for (int n = 0; n < nvecs; n++) {
+        F2FScalar v[] = {vs[n], vs[nvecs + n], vs[2 * nvecs + n]};
+        if (reflect) {
+          v[isymm] *= -1.0;
+        }
+
+        for (int k = 0; k < 3; k++) {
+          prod[nvecs * k + n] -= w * (T[3 * k] * v[0] + T[3 * k + 1] * v[1] +
+                                      T[3 * k + 2] * v[2]) +
+                                 w * v[k];
+        }
       }
     }
   }
-
-  // Clean up the allocated memory
-  delete[] vecs_global;
 }
 
 /*
   Apply the action of the displacement transfer w.r.t structural displacements
-  transpose Jacobian to the input vector
+  transpose Jacobian to a block of input vectors stored row-wise
 
   Arguments
   ----------
-  vecs  : input vector
+  nvecs : number of vectors
+  vecs  : input vectors
 
   Returns
   --------
-  prods : output vector
+  prods : output vectors
 */
-void MELD::applydDduSTrans(const F2FScalar *vecs, F2FScalar *prods) {
+void MELD::applydDduSTransMulti(int nvecs, const F2FScalar *vecs,
+                                F2FScalar *prods) {
   // Zero array of transpose Jacobian-vector products every call
-  F2FScalar *prods_global = new F2FScalar[3 * ns];
-  memset(prods_global, 0, 3 * ns * sizeof(F2FScalar));
+  // Allocate one copy of the global array for each thread
+  int size = 3 * ns * nvecs;
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, size * nthreads);
+  memset(prods_global, 0, size * nthreads * sizeof(F2FScalar));
 
   // Loop over aerodynamic surface nodes
-  for (int i = 0; i < na; i++) {
-    const F2FScalar *v = &vecs[3 * i];
-
-    // Compute vector r from centroid to aero node
-    const F2FScalar *xa0 = &Xa[3 * i];
-    const F2FScalar *xs0bar = &global_xs0bar[3 * i];
-    F2FScalar r[3];
-    vec_diff(xs0bar, xa0, r);
-
-    // Compute XX
-    const F2FScalar *R = &global_R[9 * i];
-    const F2FScalar *S = &global_S[9 * i];
-    F2FScalar M1[15 * 15];
-    assembleM1(R, S, M1);
-    int ipiv[15];
-    int m = 15, info = 0;
-    LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
-    F2FScalar x[15];
-    F2FScalar XX[9 * 3];
-
-    memset(x, 0.0, 15 * sizeof(F2FScalar));
-    x[0] -= r[0];
-    x[3] -= r[1];
-    x[6] -= r[2];
-    int nrhs = 1;
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[0], x, 9 * sizeof(F2FScalar));
-
-    memset(x, 0.0, 15 * sizeof(F2FScalar));
-    x[1] -= r[0];
-    x[4] -= r[1];
-    x[7] -= r[2];
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[9], x, 9 * sizeof(F2FScalar));
-
-    memset(x, 0.0, 15 * sizeof(F2FScalar));
-    x[2] -= r[0];
-    x[5] -= r[1];
-    x[8] -= r[2];
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    memcpy(&XX[18], x, 9 * sizeof(F2FScalar));
-
-    // Loop over linked structural nodes and add up nonzero contributions to
-    // Jacobian-vector product
-    for (int j = 0; j < nn; j++) {
-      int indx = global_conn[nn * i + j];
+#ifdef _OPENMP
+#pragma omp parallel num_threads(nthreads)
+#endif
+  {
+    // Each thread accumulates into its own block of the global array
+    F2FScalar *prods_thread = &prods_global[size * getThreadNum()];
+#ifdef _OPENMP
+#pragma omp for schedule(static)
+#endif
+    for (int i = 0; i < na; i++) {
+      const F2FScalar *vs = &vecs[3 * nvecs * i];
+
+      // Compute vector r from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3 * i];
+      F2FScalar xs0bar_work[3];
+      const F2FScalar *xs0bar =
+          getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
+      F2FScalar r[3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Compute XX
+      F2FScalar XX[9 * 3];
+      computeDispJacobianX(i, r, XX);
+
+      // Loop over linked structural nodes and add up nonzero contributions to
+      // Jacobian-vector product
+      for (int j = 0; j < nn; j++) {
+        int indx = global_conn[nn * i + j];
 
-      if (indx < ns) {
         // Compute vector q from centroid to structural node
-        const F2FScalar *xs0 = &Xs[3 * indx];
         F2FScalar q[3];
-        vec_diff(xs0bar, xs0, q);
-
-        // Compute each component of the transpose Jacobian-vector product as
-        // follows:
-        // J^{T}*v = w[X_{1}^{T}*q X_{2}^{T}*q X_{3}^{T}*q]*v + w*v
-        F2FScalar w = global_W[nn * i + j];
-        F2FScalar *prod = &prods_global[3 * indx];
-        prod[0] -= w * v[0];
-        prod[1] -= w * v[1];
-        prod[2] -= w * v[2];
-
-        for (int k = 0; k < 3; k++) {
-          F2FScalar *X = &XX[9 * k];
-          prod[0] -= w * (X[0] * q[0] + X[1] * q[1] + X[2] * q[2]) * v[k];
-          prod[1] -= w * (X[3] * q[0] + X[4] * q[1] + X[5] * q[2]) * v[k];
-          prod[2] -= w * (X[6] * q[0] + X[7] * q[1] + X[8] * q[2]) * v[k];
+        bool reflect = false;
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          vec_diff(xs0bar, xs0, q);
+        } else {
+          indx -= ns;
+          reflect = true;
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;
+          vec_diff(xs0bar, rxs0, q);
         }
-      } else {
-        indx -= ns;
-
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;
-
-        F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
-
-        F2FScalar w = global_W[nn * i + j];
-        F2FScalar rprod[] = {0.0, 0.0, 0.0};
-        rprod[0] += w * v[0];
-        rprod[1] += w * v[1];
-        rprod[2] += w * v[2];
 
+        // Compute T[3 * k + l] = X_{k}^{T} * q, which is shared by all the
+        // input vectors
+        F2FScalar T[9];
         for (int k = 0; k < 3; k++) {
           F2FScalar *X = &XX[9 * k];
-          rprod[0] += w * (X[0] * q[0] + X[1] * q[1] + X[2] * q[2]) * v[k];
-          rprod[1] += w * (X[3] * q[0] + X[4] * q[1] + X[5] * q[2]) * v[k];
-          rprod[2] += w * (X[6] * q[0] + X[7] * q[1] + X[8] * q[2]) * v[k];
+          for (int l = 0; l < 3; l++) {
+            T[3 * k + l] =
+                X[3 * l] * q[0] + X[3 * l + 1] * q[1] + X[3 * l + 2] * q[2];
+          }
         }
-        rprod[isymm] *= -1.0;
 
-        F2FScalar *prod = &prods_global[3 * indx];
-        prod[0] -= rprod[0];
-        prod[1] -= rprod[1];
-        prod[2] -= rprod[2];
+        // Compute each component of the transpose Jacobian-vector product as
+        // follows:
+        // J^{T}*v = w[X_{1}^{T}*q X_{2}^{T}*q X_{3}^{T}*q]*v + w*v
+        F2FScalar w = getWeight(nn * i + j);
+        F2FScalar *prod = &prods_thread[3 * nvecs * indx];
+
+        for (int n = 0; n < nvecs; n++) {
+          F2FScalar v[] = {vs[n], vs[nvecs + n], vs[2 * nvecs + n]};
+
+          F2FScalar rprod[3];
+          for (int l = 0; l < 3; l++) {
+            rprod[l] = w * v[l] +
+                       w * (T[l] * v[0] + T[3 + l] * v[1] + T[6 + l] * v[2]);
+          }
+          if (reflect) {
+            rprod[isymm] *= -1.0;
+          }
+
+          prod[n] -= rprod[0];
+          prod[nvecs + n] -= rprod[1];
+          prod[2 * nvecs + n] -= rprod[2];
+        }
       }
     }
   }
+
   // distribute the results to the structural processors
-  structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
+  // Sum the thread contributions in a fixed order
+  reduceThreadArrays(size, prods_global);
 
-  // clean up allocated memory
-  delete[] prods_global;
+  structAddScatter(size, prods_global, 3 * ns_local * nvecs, prods);
 }
 
 /*
@@ -667,163 +1328,179 @@ void MELD::applydDduSTrans(const F2FScalar *vecs, F2FScalar *prods) {
   Returns
   --------
   prods : output vector
-*/
-void MELD::applydLduS(const F2FScalar *vecs, F2FScalar *prods) {
-  F2FScalar *vecs_global = new F2FScalar[3 * ns];
-  structGatherBcast(3 * ns_local, vecs, 3 * ns, vecs_global);
-
-  // Zero products
-  F2FScalar *prods_global = new F2FScalar[3 * ns];
-  memset(prods_global, 0, 3 * ns * sizeof(F2FScalar));
-
-  // Loop over aerodynamic surface nodes
-  for (int i = 0; i < na; i++) {
-    // Compute vector r from centroid to aero node
-    const F2FScalar *xa0 = &Xa[3 * i];
-    const F2FScalar *xs0bar = &global_xs0bar[3 * i];
-    F2FScalar r[3];
-    vec_diff(xs0bar, xa0, r);
-
-    // Get the load on the aerodynamic surface node
-    const F2FScalar *fa = &Fa[3 * i];
-
-    // Recompute X and Y
-    const F2FScalar *M1 = &global_M1[15 * 15 * i];
-    const int *ipiv = &global_ipiv[15 * i];
-    F2FScalar x[] = {-fa[0] * r[0], -fa[1] * r[0], -fa[2] * r[0],
-                     -fa[0] * r[1], -fa[1] * r[1], -fa[2] * r[1],
-                     -fa[0] * r[2], -fa[1] * r[2], -fa[2] * r[2],
-                     0.0,           0.0,           0.0,
-                     0.0,           0.0,           0.0};
-    int m = 15, nrhs = 1, info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    F2FScalar XT[] = {x[0], x[3], x[6], x[1], x[4], x[7], x[2], x[5], x[8]};
-    F2FScalar nY[] = {-x[9],  -x[10], -x[11], -x[10], -x[12],
-                      -x[13], -x[11], -x[13], -x[14]};
-
-    // Assemble X and Y into matrix M2
-    F2FScalar M2[15 * 15];
-    assembleM1(XT, nY, M2);
-
-    // Assemble matrix M3 from R and S
-    F2FScalar M3[15 * 15];
-    const F2FScalar *R = &global_R[9 * i];
-    const F2FScalar *S = &global_S[9 * i];
-    assembleM3(R, S, M3);
-
-    // Build right-hand side of first system to be solved
-    F2FScalar z2[15];
-    memset(z2, 0.0, 15 * sizeof(F2FScalar));
-    for (int j = 0; j < nn; j++) {
-      int indx = global_conn[nn * i + j];
-
-      // Get vector q and subset of input vector
-      F2FScalar q[3];
-      F2FScalar v[3];
-      if (indx < ns) {
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        vec_diff(xs0bar, xs0, q);
-        memcpy(v, &vecs_global[3 * indx], 3 * sizeof(F2FScalar));
-      } else {
-        indx -= ns;
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;
-        vec_diff(xs0bar, rxs0, q);
-        memcpy(v, &vecs_global[3 * indx], 3 * sizeof(F2FScalar));
-        v[isymm] *= -1.0;
-      }
-
-      F2FScalar w = global_W[nn * i + j];
-
-      z2[0] -= w * q[0] * v[0];
-      z2[1] -= w * q[1] * v[0];
-      z2[2] -= w * q[2] * v[0];
-      z2[3] -= w * q[0] * v[1];
-      z2[4] -= w * q[1] * v[1];
-      z2[5] -= w * q[2] * v[1];
-      z2[6] -= w * q[0] * v[2];
-      z2[7] -= w * q[1] * v[2];
-      z2[8] -= w * q[2] * v[2];
-    }
-
-    // Solve the first linear system
-    int ipiv3[15];
-    info = 0;
-    LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M3, &m, ipiv3, z2, &m, &info);
-
-    // Compute right-hand side of second system
-    F2FScalar z1[15];
-    F2FScalar alpha = -1.0, beta = 0.0;
-    int inc = 1;
-    BLASgemv("N", &m, &m, &alpha, M2, &m, z2, &inc, &beta, z1, &inc);
-
-    // Solve the second system
-    info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, z1, &m, &info);
-
-    // Extract ZH
-    F2FScalar ZH[9] = {z1[0], z1[1], z1[2], z1[3], z1[4],
-                       z1[5], z1[6], z1[7], z1[8]};
-
-    // Loop over linked structural nodes and add contributions from aerodynamic
-    // surface node to global structural loads
-    for (int j = 0; j < nn; j++) {
-      int indx = global_conn[nn * i + j];
-
-      if (indx < ns) {
-        // Compute vector q from centroid to structural node
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        F2FScalar q[3];
-        vec_diff(xs0bar, xs0, q);
-
-        // Compute load contribution of aerodynamic surface node to structural
-        // node
-        const F2FScalar w = global_W[nn * i + j];
-        F2FScalar *prod = &prods_global[3 * indx];
-
-        // prod = w * [ ZH[0] ZH[1] ZH[2] ][ q[0] ]
-        //            [ ZH[3] ZH[4] ZH[5] ][ q[1] ]
-        //            [ ZH[6] ZH[7] ZH[8] ][ q[2] ]
-        prod[0] -= w * (ZH[0] * q[0] + ZH[1] * q[1] + ZH[2] * q[2]);
-        prod[1] -= w * (ZH[3] * q[0] + ZH[4] * q[1] + ZH[5] * q[2]);
-        prod[2] -= w * (ZH[6] * q[0] + ZH[7] * q[1] + ZH[8] * q[2]);
-      } else {
-        indx -= ns;
+*/
+void MELD::applydLduS(const F2FScalar *vecs, F2FScalar *prods) {
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns);
+  structGatherBcast(3 * ns_local, vecs, 3 * ns, vecs_global);
 
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;
+  // Zero products
+  // Allocate one copy of the global array for each thread
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, 3 * ns * nthreads);
+  memset(prods_global, 0, 3 * ns * nthreads * sizeof(F2FScalar));
 
+  // Loop over aerodynamic surface nodes
+#ifdef _OPENMP
+#pragma omp parallel num_threads(nthreads)
+#endif
+  {
+    // Each thread accumulates into its own block of the global array
+    F2FScalar *prods_thread = &prods_global[3 * ns * getThreadNum()];
+#ifdef _OPENMP
+#pragma omp for schedule(static)
+#endif
+    for (int i = 0; i < na; i++) {
+      // Compute vector r from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3 * i];
+      F2FScalar xs0bar_work[3];
+      const F2FScalar *xs0bar =
+          getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
+      F2FScalar r[3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Get the load on the aerodynamic surface node
+      const F2FScalar *fa = &Fa[3 * i];
+
+      // Recompute X and Y
+      F2FScalar M1_work[15 * 15];
+      int ipiv_work[15];
+      const int *ipiv = NULL;
+      const F2FScalar *M1 = getFactor(i, M1_work, ipiv_work, &ipiv);
+      F2FScalar x[] = {-fa[0] * r[0], -fa[1] * r[0], -fa[2] * r[0],
+                       -fa[0] * r[1], -fa[1] * r[1], -fa[2] * r[1],
+                       -fa[0] * r[2], -fa[1] * r[2], -fa[2] * r[2],
+                       0.0,           0.0,           0.0,
+                       0.0,           0.0,           0.0};
+      int m = 15, nrhs = 1, info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      F2FScalar XT[] = {x[0], x[3], x[6], x[1], x[4], x[7], x[2], x[5], x[8]};
+      F2FScalar nY[] = {-x[9],  -x[10], -x[11], -x[10], -x[12],
+                        -x[13], -x[11], -x[13], -x[14]};
+
+      // Assemble X and Y into matrix M2
+      F2FScalar M2[15 * 15];
+      assembleM1(XT, nY, M2);
+
+      // Assemble matrix M3 from R and S
+      F2FScalar M3[15 * 15];
+      F2FScalar R_work[9];
+      const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
+      F2FScalar S_work[9];
+      const F2FScalar *S = getNodeData(9, i, global_S, global_S_single, S_work);
+      assembleM3(R, S, M3);
+
+      // Build right-hand side of first system to be solved
+      F2FScalar z2[15];
+      memset(z2, 0.0, 15 * sizeof(F2FScalar));
+      for (int j = 0; j < nn; j++) {
+        int indx = global_conn[nn * i + j];
+
+        // Get vector q and subset of input vector
         F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
-
-        const F2FScalar w = global_W[nn * i + j];
-        F2FScalar *prod = &prods_global[3 * indx];
+        F2FScalar v[3];
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          vec_diff(xs0bar, xs0, q);
+          memcpy(v, &vecs_global[3 * indx], 3 * sizeof(F2FScalar));
+        } else {
+          indx -= ns;
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;
+          vec_diff(xs0bar, rxs0, q);
+          memcpy(v, &vecs_global[3 * indx], 3 * sizeof(F2FScalar));
+          v[isymm] *= -1.0;
+        }
 
-        F2FScalar rprod[3];
-        rprod[0] = w * (ZH[0] * q[0] + ZH[1] * q[1] + ZH[2] * q[2]);
-        rprod[1] = w * (ZH[3] * q[0] + ZH[4] * q[1] + ZH[5] * q[2]);
-        rprod[2] = w * (ZH[6] * q[0] + ZH[7] * q[1] + ZH[8] * q[2]);
-        rprod[isymm] *= -1.0;
+        F2FScalar w = getWeight(nn * i + j);
+
+        z2[0] -= w * q[0] * v[0];
+        z2[1] -= w * q[1] * v[0];
+        z2[2] -= w * q[2] * v[0];
+        z2[3] -= w * q[0] * v[1];
+        z2[4] -= w * q[1] * v[1];
+        z2[5] -= w * q[2] * v[1];
+        z2[6] -= w * q[0] * v[2];
+        z2[7] -= w * q[1] * v[2];
+        z2[8] -= w * q[2] * v[2];
+      }
 
-        prod[0] -= rprod[0];
-        prod[1] -= rprod[1];
-        prod[2] -= rprod[2];
+      // Solve the first linear system
+      int ipiv3[15];
+      info = 0;
+      LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
+      info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M3, &m, ipiv3, z2, &m, &info);
+
+      // Compute right-hand side of second system
+      F2FScalar z1[15];
+      F2FScalar alpha = -1.0, beta = 0.0;
+      int inc = 1;
+      BLASgemv("N", &m, &m, &alpha, M2, &m, z2, &inc, &beta, z1, &inc);
+
+      // Solve the second system
+      info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, z1, &m, &info);
+
+      // Extract ZH
+      F2FScalar ZH[9] = {z1[0], z1[1], z1[2], z1[3], z1[4],
+                         z1[5], z1[6], z1[7], z1[8]};
+
+      // Loop over linked structural nodes and add contributions from
+      // aerodynamic surface node to global structural loads
+      for (int j = 0; j < nn; j++) {
+        int indx = global_conn[nn * i + j];
+
+        if (indx < ns) {
+          // Compute vector q from centroid to structural node
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          F2FScalar q[3];
+          vec_diff(xs0bar, xs0, q);
+
+          // Compute load contribution of aerodynamic surface node to structural
+          // node
+          const F2FScalar w = getWeight(nn * i + j);
+          F2FScalar *prod = &prods_thread[3 * indx];
+
+          // prod = w * [ ZH[0] ZH[1] ZH[2] ][ q[0] ]
+          //            [ ZH[3] ZH[4] ZH[5] ][ q[1] ]
+          //            [ ZH[6] ZH[7] ZH[8] ][ q[2] ]
+          prod[0] -= w * (ZH[0] * q[0] + ZH[1] * q[1] + ZH[2] * q[2]);
+          prod[1] -= w * (ZH[3] * q[0] + ZH[4] * q[1] + ZH[5] * q[2]);
+          prod[2] -= w * (ZH[6] * q[0] + ZH[7] * q[1] + ZH[8] * q[2]);
+        } else {
+          indx -= ns;
+
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;
+
+          F2FScalar q[3];
+          vec_diff(xs0bar, rxs0, q);
+
+          const F2FScalar w = getWeight(nn * i + j);
+          F2FScalar *prod = &prods_thread[3 * indx];
+
+          F2FScalar rprod[3];
+          rprod[0] = w * (ZH[0] * q[0] + ZH[1] * q[1] + ZH[2] * q[2]);
+          rprod[1] = w * (ZH[3] * q[0] + ZH[4] * q[1] + ZH[5] * q[2]);
+          rprod[2] = w * (ZH[6] * q[0] + ZH[7] * q[1] + ZH[8] * q[2]);
+          rprod[isymm] *= -1.0;
+
+          prod[0] -= rprod[0];
+          prod[1] -= rprod[1];
+          prod[2] -= rprod[2];
+        }
       }
     }
   }
 
   // distribute the results to the structural processors
-  structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
+  // Sum the thread contributions in a fixed order
+  reduceThreadArrays(3 * ns, prods_global);
 
-  // clean up allocated memory
-  delete[] vecs_global;
-  delete[] prods_global;
+  structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
 }
 
 /*
@@ -839,162 +1516,207 @@ void MELD::applydLduS(const F2FScalar *vecs, F2FScalar *prods) {
   prods : output vector
 */
 void MELD::applydLduSTrans(const F2FScalar *vecs, F2FScalar *prods) {
-  F2FScalar *vecs_global = new F2FScalar[3 * ns];
-  structGatherBcast(3 * ns_local, vecs, 3 * ns, vecs_global);
-
-  // Zero products every call
-  F2FScalar *prods_global = new F2FScalar[3 * ns];
-  memset(prods_global, 0, 3 * ns * sizeof(F2FScalar));
+  MELD::applydLduSTransMulti(1, vecs, prods);
+}
 
-  // Loop over all aerodynamic surface nodes
-  for (int i = 0; i < na; i++) {
-    // Compute vector r from centroid to aero node
-    const F2FScalar *xa0 = &Xa[3 * i];
-    const F2FScalar *xs0bar = &global_xs0bar[3 * i];
-    F2FScalar r[3];
-    vec_diff(xs0bar, xa0, r);
+/*
+  Apply the action of the load transfer w.r.t structural displacements
+  transpose Jacobian to a block of input vectors stored row-wise. The matrices
+  M2 and M3 are assembled and factored once for each aerodynamic node and the
+  linear systems are solved for all the vectors at once.
 
-    // Get the load on the aerodynamic surface node
-    const F2FScalar *fa = &Fa[3 * i];
+  Arguments
+  ---------
+  nvecs : number of vectors
+  vecs  : input vectors
 
-    // Recompute X and Y
-    const F2FScalar *M1 = &global_M1[15 * 15 * i];
-    const int *ipiv = &global_ipiv[15 * i];
-    F2FScalar x[] = {-fa[0] * r[0], -fa[1] * r[0], -fa[2] * r[0],
-                     -fa[0] * r[1], -fa[1] * r[1], -fa[2] * r[1],
-                     -fa[0] * r[2], -fa[1] * r[2], -fa[2] * r[2],
-                     0.0,           0.0,           0.0,
-                     0.0,           0.0,           0.0};
-    int m = 15, nrhs = 1, info = 0;
-    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
-    F2FScalar XT[] = {x[0], x[3], x[6], x[1], x[4], x[7], x[2], x[5], x[8]};
-    F2FScalar nY[] = {-x[9],  -x[10], -x[11], -x[10], -x[12],
-                      -x[13], -x[11], -x[13], -x[14]};
+  Returns
+  --------
+  prods : output vectors
+*/
+void MELD::applydLduSTransMulti(int nvecs, const F2FScalar *vecs,
+                                F2FScalar *prods) {
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns * nvecs);
+  structGatherBcast(3 * ns_local * nvecs, vecs, 3 * ns * nvecs, vecs_global);
 
-    // Assemble X and Y into matrix M2
-    F2FScalar M2[15 * 15];
-    assembleM1(XT, nY, M2);
+  // Zero products every call
+  // Allocate one copy of the global array for each thread
+  int size = 3 * ns * nvecs;
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, size * nthreads);
+  memset(prods_global, 0, size * nthreads * sizeof(F2FScalar));
 
-    // Assemble matrix M3 from R and S
-    F2FScalar M3[15 * 15];
-    const F2FScalar *R = &global_R[9 * i];
-    const F2FScalar *S = &global_S[9 * i];
-    assembleM3(R, S, M3);
+  // Space for the right-hand sides of the two linear systems
+  F2FScalar *rhs_global =
+      getWorkArray(WORK_NODE_RHS, 2 * 15 * nvecs * nthreads);
 
-    // Build right-hand side of first system to be solved
-    F2FScalar y2[15];
-    memset(y2, 0.0, 15 * sizeof(F2FScalar));
-    for (int j = 0; j < nn; j++) {
-      int indx = global_conn[nn * i + j];
+  // Loop over all aerodynamic surface nodes
+#ifdef _OPENMP
+#pragma omp parallel num_threads(nthreads)
+#endif
+  {
+    // Each thread accumulates into its own block of the global array
+    F2FScalar *prods_thread = &prods_global[size * getThreadNum()];
+    F2FScalar *y2 = &rhs_global[2 * 15 * nvecs * getThreadNum()];
+    F2FScalar *y1 = &y2[15 * nvecs];
+#ifdef _OPENMP
+#pragma omp for schedule(static)
+#endif
+    for (int i = 0; i < na; i++) {
+      // Compute vector r from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3 * i];
+      F2FScalar xs0bar_work[3];
+      const F2FScalar *xs0bar =
+          getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
+      F2FScalar r[3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Get the load on the aerodynamic surface node
+      const F2FScalar *fa = &Fa[3 * i];
+
+      // Recompute X and Y
+      F2FScalar M1_work[15 * 15];
+      int ipiv_work[15];
+      const int *ipiv = NULL;
+      const F2FScalar *M1 = getFactor(i, M1_work, ipiv_work, &ipiv);
+      F2FScalar x[] = {-fa[0] * r[0], -fa[1] * r[0], -fa[2] * r[0],
+                       -fa[0] * r[1], -fa[1] * r[1], -fa[2] * r[1],
+                       -fa[0] * r[2], -fa[1] * r[2], -fa[2] * r[2],
+                       0.0,           0.0,           0.0,
+                       0.0,           0.0,           0.0};
+      int m = 15, nrhs = 1, info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      F2FScalar XT[] = {x[0], x[3], x[6], x[1], x[4], x[7], x[2], x[5], x[8]};
+      F2FScalar nY[] = {-x[9],  -x[10], -x[11], -x[10], -x[12],
+                        -x[13], -x[11], -x[13], -x[14]};
+
+      // Assemble X and Y into matrix M2
+      F2FScalar M2[15 * 15];
+      assembleM1(XT, nY, M2);
+
+      // Assemble matrix M3 from R and S
+      F2FScalar M3[15 * 15];
+      F2FScalar R_work[9];
+      const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
+      F2FScalar S_work[9];
+      const F2FScalar *S = getNodeData(9, i, global_S, global_S_single, S_work);
+      assembleM3(R, S, M3);
+
+      // Build the right-hand sides of first system to be solved, one column
+      // for each input vector
+      memset(y2, 0.0, 15 * nvecs * sizeof(F2FScalar));
+      for (int j = 0; j < nn; j++) {
+        int indx = global_conn[nn * i + j];
+
+        // Get vector q
+        F2FScalar q[3];
+        bool reflect = false;
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          vec_diff(xs0bar, xs0, q);
+        } else {
+          indx -= ns;
+          reflect = true;
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;
+          vec_diff(xs0bar, rxs0, q);
+        }
 
-      // Get vector q and subset of input vector
-      F2FScalar q[3];
-      F2FScalar v[3];
-      if (indx < ns) {
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        vec_diff(xs0bar, xs0, q);
-        memcpy(v, &vecs_global[3 * indx], 3 * sizeof(F2FScalar));
-      } else {
-        indx -= ns;
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;
-        vec_diff(xs0bar, rxs0, q);
-        memcpy(v, &vecs_global[3 * indx], 3 * sizeof(F2FScalar));
-        v[isymm] *= -1.0;
+        F2FScalar w = getWeight(nn * i + j);
+        const F2FScalar *vs = &vecs_global[3 * nvecs * indx];
+
+        for (int n = 0; n < nvecs; n++) {
+          // Get the subset of the input vector
+          F2FScalar v[] = {vs[n], vs[nvecs + n], vs[2 * nvecs + n]};
+          if (reflect) {
+            v[isymm] *= -1.0;
+          }
+
+          F2FScalar *y = &y2[15 * n];
+          y[0] -= w * q[0] * v[0];
+          y[1] -= w * q[1] * v[0];
+          y[2] -= w * q[2] * v[0];
+          y[3] -= w * q[0] * v[1];
+          y[4] -= w * q[1] * v[1];
+          y[5] -= w * q[2] * v[1];
+          y[6] -= w * q[0] * v[2];
+          y[7] -= w * q[1] * v[2];
+          y[8] -= w * q[2] * v[2];
+        }
       }
 
-      F2FScalar w = global_W[nn * i + j];
-
-      y2[0] -= w * q[0] * v[0];
-      y2[1] -= w * q[1] * v[0];
-      y2[2] -= w * q[2] * v[0];
-      y2[3] -= w * q[0] * v[1];
-      y2[4] -= w * q[1] * v[1];
-      y2[5] -= w * q[2] * v[1];
-      y2[6] -= w * q[0] * v[2];
-      y2[7] -= w * q[1] * v[2];
-      y2[8] -= w * q[2] * v[2];
-    }
-
-    // Solve the first linear system
-    const char *t = "T";
-    int ipiv3[15];
-    info = 0;
-    LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
-    info = 0;
-    LAPACKgetrs(t, &m, &nrhs, M3, &m, ipiv, y2, &m, &info);
-
-    // Compute right-hand side of second system
-    F2FScalar y1[15];
-    F2FScalar alpha = -1.0, beta = 0.0;
-    int inc = 1;
-    BLASgemv(t, &m, &m, &alpha, M2, &m, y2, &inc, &beta, y1, &inc);
+      // Solve the first linear system
+      const char *t = "T";
+      int ipiv3[15];
+      info = 0;
+      LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
+      info = 0;
+      nrhs = nvecs;
+      LAPACKgetrs(t, &m, &nrhs, M3, &m, ipiv, y2, &m, &info);
 
-    // Solve the second system
-    info = 0;
-    LAPACKgetrs(t, &m, &nrhs, M1, &m, ipiv, y1, &m, &info);
+      // Compute right-hand sides of second system
+      F2FScalar alpha = -1.0, beta = 0.0;
+      BLASgemm(t, "N", &m, &nrhs, &m, &alpha, M2, &m, y2, &m, &beta, y1, &m);
 
-    // Extract YF
-    F2FScalar YF[] = {y1[0], y1[1], y1[2], y1[3], y1[4],
-                      y1[5], y1[6], y1[7], y1[8]};
+      // Solve the second system
+      info = 0;
+      LAPACKgetrs(t, &m, &nrhs, M1, &m, ipiv, y1, &m, &info);
 
-    // Loop over linked structural nodes and add contributions from aerodynamic
-    // surface node to global structural loads
-    for (int j = 0; j < nn; j++) {
-      int indx = global_conn[nn * i + j];
+      // Loop over linked structural nodes and add contributions from
+      // aerodynamic surface node to global structural loads
+      for (int j = 0; j < nn; j++) {
+        int indx = global_conn[nn * i + j];
 
-      if (indx < ns) {
         // Compute vector q from centroid to structural node
-        const F2FScalar *xs0 = &Xs[3 * indx];
         F2FScalar q[3];
-        vec_diff(xs0bar, xs0, q);
+        bool reflect = false;
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          vec_diff(xs0bar, xs0, q);
+        } else {
+          indx -= ns;
+          reflect = true;
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;
+          vec_diff(xs0bar, rxs0, q);
+        }
 
         // Compute load contribution of aerodynamic surface node to structural
         // node
-        F2FScalar w = global_W[nn * i + j];
-        F2FScalar *prod = &prods_global[3 * indx];
-
-        // prod  = w * [ YF[0] YF[3] YF[6] ][ q[0] ]
-        //             [ YF[1] YF[4] YF[7] ][ q[1] ]
-        //             [ YF[2] YF[5] YF[8] ][ q[2] ]
-        prod[0] -= w * (YF[0] * q[0] + YF[3] * q[1] + YF[6] * q[2]);
-        prod[1] -= w * (YF[1] * q[0] + YF[4] * q[1] + YF[7] * q[2]);
-        prod[2] -= w * (YF[2] * q[0] + YF[5] * q[1] + YF[8] * q[2]);
-      } else {
-        indx -= ns;
-
-        const F2FScalar *xs0 = &Xs[3 * indx];
-        F2FScalar rxs0[3];
-        memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
-        rxs0[isymm] *= -1.0;
-
-        F2FScalar q[3];
-        vec_diff(xs0bar, rxs0, q);
-
-        const F2FScalar w = global_W[nn * i + j];
-        F2FScalar *prod = &prods_global[3 * indx];
-
-        F2FScalar rprod[3];
-        rprod[0] = w * (YF[0] * q[0] + YF[3] * q[1] + YF[6] * q[2]);
-        rprod[1] = w * (YF[1] * q[0] + YF[4] * q[1] + YF[7] * q[2]);
-        rprod[2] = w * (YF[2] * q[0] + YF[5] * q[1] + YF[8] * q[2]);
-        rprod[isymm] *= -1.0;
-
-        prod[0] -= rprod[0];
-        prod[1] -= rprod[1];
-        prod[2] -= rprod[2];
+        const F2FScalar w = getWeight(nn * i + j);
+        F2FScalar *prod = &prods_thread[3 * nvecs * indx];
+
+        for (int n = 0; n < nvecs; n++) {
+          // Extract YF
+          const F2FScalar *YF = &y1[15 * n];
+
+          // prod  = w * [ YF[0] YF[3] YF[6] ][ q[0] ]
+          //             [ YF[1] YF[4] YF[7] ][ q[1] ]
+          //             [ YF[2] YF[5] YF[8] ][ q[2] ]
+          F2FScalar rprod[3];
+          rprod[0] = w * (YF[0] * q[0] + YF[3] * q[1] + YF[6] * q[2]);
+          rprod[1] = w * (YF[1] * q[0] + YF[4] * q[1] + YF[7] * q[2]);
+          rprod[2] = w * (YF[2] * q[0] + YF[5] * q[1] + YF[8] * q[2]);
+          if (reflect) {
+            rprod[isymm] *= -1.0;
+          }
+
+          prod[n] -= rprod[0];
+          prod[nvecs + n] -= rprod[1];
+          prod[2 * nvecs + n] -= rprod[2];
+        }
       }
     }
   }
 
   // distribute the results to the structural processors
-  structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
+  // Sum the thread contributions in a fixed order
+  reduceThreadArrays(size, prods_global);
 
-  // clean up allocated memory
-  delete[] vecs_global;
-  delete[] prods_global;
+  structAddScatter(size, prods_global, 3 * ns_local * nvecs, prods);
 }
 
 /*
@@ -1143,7 +1865,8 @@ void MELD::applydDdxA0(const F2FScalar *vecs, F2FScalar *prods) {
     // Get vector of adjoint variables and rotation matrix for each aerodynamic
     // node
     const F2FScalar *lam = &vecs[3 * i];
-    const F2FScalar *R = &global_R[9 * i];
+    F2FScalar R_work[9];
+    const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
 
     // Compute vector-matrix product
     F2FScalar *prod = &prods[3 * i];
@@ -1167,11 +1890,11 @@ void MELD::applydDdxA0(const F2FScalar *vecs, F2FScalar *prods) {
 */
 void MELD::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
   // Set products to zero
-  F2FScalar *prods_global = new F2FScalar[3 * ns];
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
   memset(prods_global, 0.0, 3 * ns * sizeof(F2FScalar));
 
   // Add structural displacments to structural node locations
-  F2FScalar *Xsd = new F2FScalar[3 * ns];
+  F2FScalar *Xsd = getWorkArray(WORK_STRUCT_NODES, 3 * ns);
   for (int j = 0; j < 3 * ns; j++) {
     Xsd[j] = Xs[j] + Us[j];
   }
@@ -1181,17 +1904,21 @@ void MELD::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
 
     // Compute vector r from centroid to aero node
     const F2FScalar *xa0 = &Xa[3 * i];
-    const F2FScalar *xs0bar = &global_xs0bar[3 * i];
+    F2FScalar xs0bar_work[3];
+    const F2FScalar *xs0bar =
+        getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
     F2FScalar r[3];
     vec_diff(xs0bar, xa0, r);
 
     // Compute displaced centroid xsbar
     F2FScalar xsbar[3];
-    computeCentroid(&global_conn[i * nn], &global_W[i * nn], Xsd, xsbar);
+    computeNodeCentroid(i, Xsd, xsbar);
 
     // Compute X
-    const F2FScalar *R = &global_R[9 * i];
-    const F2FScalar *S = &global_S[9 * i];
+    F2FScalar R_work[9];
+    const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
+    F2FScalar S_work[9];
+    const F2FScalar *S = getNodeData(9, i, global_S, global_S_single, S_work);
     F2FScalar M1[15 * 15];
     assembleM1(R, S, M1);
     int ipiv[15];
@@ -1232,7 +1959,7 @@ void MELD::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
         vec_diff(xsbar, xs, p);
 
         // Compute the contribution to the products
-        F2FScalar w = global_W[nn * i + j];
+        F2FScalar w = getWeight(nn * i + j);
         F2FScalar *prod = &prods_global[3 * indx];
 
         // prod = -w*q^{T}*X - w*p^{T}*X^{T} + w*lam^{T}*(R - I)
@@ -1265,7 +1992,7 @@ void MELD::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
         F2FScalar p[3];
         vec_diff(xsbar, rxs, p);
 
-        F2FScalar w = global_W[nn * i + j];
+        F2FScalar w = getWeight(nn * i + j);
         F2FScalar *prod = &prods_global[3 * indx];
 
         F2FScalar rprod[3];
@@ -1289,10 +2016,6 @@ void MELD::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
 
   // distribute the results to the structural processors
   structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
-
-  // clean up allocated memory
-  delete[] Xsd;
-  delete[] prods_global;
 }
 
 /*
@@ -1308,7 +2031,7 @@ void MELD::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
   prods : output vector
 */
 void MELD::applydLdxA0(const F2FScalar *vecs, F2FScalar *prods) {
-  F2FScalar *vecs_global = new F2FScalar[3 * ns];
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns);
   structGatherBcast(3 * ns_local, vecs, 3 * ns, vecs_global);
 
   // Zero products
@@ -1316,12 +2039,16 @@ void MELD::applydLdxA0(const F2FScalar *vecs, F2FScalar *prods) {
 
   for (int i = 0; i < na; i++) {
     const F2FScalar *fa = &Fa[3 * i];
-    const F2FScalar *xs0bar = &global_xs0bar[3 * i];
+    F2FScalar xs0bar_work[3];
+    const F2FScalar *xs0bar =
+        getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
     F2FScalar *prod = &prods[3 * i];
 
     // Compute X1, X2, X3
-    const F2FScalar *M1 = &global_M1[15 * 15 * i];
-    const int *ipiv = &global_ipiv[15 * i];
+    F2FScalar M1_work[15 * 15];
+    int ipiv_work[15];
+    const int *ipiv = NULL;
+    const F2FScalar *M1 = getFactor(i, M1_work, ipiv_work, &ipiv);
     int m = 15, nrhs = 1, info = 0;
     F2FScalar x[15];
 
@@ -1371,7 +2098,7 @@ void MELD::applydLdxA0(const F2FScalar *vecs, F2FScalar *prods) {
       }
 
       // Compute the contribution to the products
-      const F2FScalar w = global_W[nn * i + j];
+      const F2FScalar w = getWeight(nn * i + j);
 
       prod[0] -= w * q[0] * (X1[0] * lam[0] + X1[3] * lam[1] + X1[6] * lam[2]) +
                  w * q[1] * (X1[1] * lam[0] + X1[4] * lam[1] + X1[7] * lam[2]) +
@@ -1386,9 +2113,6 @@ void MELD::applydLdxA0(const F2FScalar *vecs, F2FScalar *prods) {
                  w * q[2] * (X3[2] * lam[0] + X3[5] * lam[1] + X3[8] * lam[2]);
     }
   }
-
-  // Clean up the allocated memory
-  delete[] vecs_global;
 }
 
 /*
@@ -1404,15 +2128,15 @@ void MELD::applydLdxA0(const F2FScalar *vecs, F2FScalar *prods) {
   prods : output vector
 */
 void MELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
-  F2FScalar *vecs_global = new F2FScalar[3 * ns];
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns);
   structGatherBcast(3 * ns_local, vecs, 3 * ns, vecs_global);
 
   // Zero products
-  F2FScalar *prods_global = new F2FScalar[3 * ns];
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
   memset(prods_global, 0, 3 * ns * sizeof(F2FScalar));
 
   // Add structural displacments to structural node locations
-  F2FScalar *Xsd = new F2FScalar[3 * ns];
+  F2FScalar *Xsd = getWorkArray(WORK_STRUCT_NODES, 3 * ns);
   for (int j = 0; j < 3 * ns; j++) {
     Xsd[j] = Xs[j] + Us[j];
   }
@@ -1421,20 +2145,24 @@ void MELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
   for (int i = 0; i < na; i++) {
     // Compute vector r from centroid to aero node
     const F2FScalar *xa0 = &Xa[3 * i];
-    const F2FScalar *xs0bar = &global_xs0bar[3 * i];
+    F2FScalar xs0bar_work[3];
+    const F2FScalar *xs0bar =
+        getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
     F2FScalar r[3];
     vec_diff(xs0bar, xa0, r);
 
     // Compute displaced centroid xsbar
     F2FScalar xsbar[3];
-    computeCentroid(&global_conn[i * nn], &global_W[i * nn], Xsd, xsbar);
+    computeNodeCentroid(i, Xsd, xsbar);
 
     // Get the load on the aerodynamic surface node
     const F2FScalar *fa = &Fa[3 * i];
 
     // Recompute X and Y
-    const F2FScalar *M1 = &global_M1[15 * 15 * i];
-    const int *ipiv = &global_ipiv[15 * i];
+    F2FScalar M1_work[15 * 15];
+    int ipiv_work[15];
+    const int *ipiv = NULL;
+    const F2FScalar *M1 = getFactor(i, M1_work, ipiv_work, &ipiv);
     F2FScalar x[] = {-fa[0] * r[0], -fa[1] * r[0], -fa[2] * r[0],
                      -fa[0] * r[1], -fa[1] * r[1], -fa[2] * r[1],
                      -fa[0] * r[2], -fa[1] * r[2], -fa[2] * r[2],
@@ -1452,8 +2180,10 @@ void MELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
 
     // Assemble matrix M3 from R and S
     F2FScalar M3[15 * 15];
-    const F2FScalar *R = &global_R[9 * i];
-    const F2FScalar *S = &global_S[9 * i];
+    F2FScalar R_work[9];
+    const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
+    F2FScalar S_work[9];
+    const F2FScalar *S = getNodeData(9, i, global_S, global_S_single, S_work);
     assembleM3(R, S, M3);
 
     // Build right-hand side of first system to be solved
@@ -1480,7 +2210,7 @@ void MELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
         lam[isymm] *= -1.0;
       }
 
-      F2FScalar w = global_W[nn * i + j];
+      F2FScalar w = getWeight(nn * i + j);
 
       z2[0] -= w * q[0] * lam[0];
       z2[1] -= w * q[1] * lam[0];
@@ -1516,8 +2246,7 @@ void MELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
 
     // Compute centroid of adjoint variables
     F2FScalar lambar[3];
-    computeCentroid(&global_conn[i * nn], &global_W[i * nn], vecs_global,
-                    lambar);
+    computeNodeCentroid(i, vecs_global, lambar);
 
     // Compute X1, X2, X3
     memset(x, 0.0, 15 * sizeof(F2FScalar));
@@ -1567,7 +2296,7 @@ void MELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
         lam[isymm] *= -1.0;
       }
 
-      F2FScalar w = global_W[nn * i + j];
+      F2FScalar w = getWeight(nn * i + j);
       for (int m = 0; m < 3; m++) {
         for (int n = 0; n < 3; n++) {
           qXlam[0] += w * q[m] * X1[m + 3 * n] * lam[n];
@@ -1600,7 +2329,7 @@ void MELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
         vec_diff(lambar, lam, lamp);
 
         // Take contribution of first term
-        F2FScalar w = global_W[nn * i + j];
+        F2FScalar w = getWeight(nn * i + j);
         F2FScalar *prod = &prods_global[3 * indx];
         prod[0] -= w * (q[0] * ZH[0] + q[1] * ZH[1] + q[2] * ZH[2]) +
                    w * (ZH[0] * p[0] + ZH[3] * p[1] + ZH[6] * p[2]);
@@ -1643,7 +2372,7 @@ void MELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
         F2FScalar lamp[3];
         vec_diff(lambar, lam, lamp);
 
-        F2FScalar w = global_W[nn * i + j];
+        F2FScalar w = getWeight(nn * i + j);
         F2FScalar *prod = &prods_global[3 * indx];
 
         F2FScalar rprod[3];
@@ -1674,9 +2403,560 @@ void MELD::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
 
   // distribute the results to the structural processors
   structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
+}
+
+/*
+  Apply the action of the displacement transfer w.r.t initial aerodynamic
+  surface node locations Jacobian to the right of a block of transposed input
+  vectors stored row-wise
+
+  Arguments
+  ----------
+  nvecs : number of vectors
+  vecs  : input vectors
+
+  Returns
+  --------
+  prods : output vectors
+*/
+void MELD::applydDdxA0Multi(int nvecs, const F2FScalar *vecs,
+                            F2FScalar *prods) {
+#ifdef _OPENMP
+#pragma omp parallel for schedule(static) num_threads(nthreads)
+#endif
+  for (int i = 0; i < na; i++) {
+    // Get the rotation matrix once for all the vectors
+    const F2FScalar *lams = &vecs[3 * nvecs * i];
+    F2FScalar R_work[9];
+    const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
+
+    // Compute vector-matrix products
+    F2FScalar *prod = &prods[3 * nvecs * i];
+    for (int n = 0; n < nvecs; n++) {
+      F2FScalar lam[] = {lams[n], lams[nvecs + n], lams[2 * nvecs + n]};
+      prod[n] = -(lam[0] * (R[0] - 1.0) + lam[1] * R[1] + lam[2] * R[2]);
+      prod[nvecs + n] =
+          -(lam[0] * R[3] + lam[1] * (R[4] - 1.0) + lam[2] * R[5]);
+      prod[2 * nvecs + n] =
+          -(lam[0] * R[6] + lam[1] * R[7] + lam[2] * (R[8] - 1.0));
+    }
+  }
+}
+
+/*
+  Apply the action of the displacement transfer w.r.t initial structural node
+  locations Jacobian to the right of a block of transposed input vectors
+  stored row-wise. M1 is factored once for each aerodynamic node and solved
+  for all the vectors at once.
+
+  Arguments
+  ----------
+  nvecs : number of vectors
+  vecs  : input vectors
+
+  Returns
+  --------
+  prods : output vectors
+*/
+void MELD::applydDdxS0Multi(int nvecs, const F2FScalar *vecs,
+                            F2FScalar *prods) {
+  // Set products to zero
+  // Allocate one copy of the global array for each thread
+  int size = 3 * ns * nvecs;
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, size * nthreads);
+  memset(prods_global, 0, size * nthreads * sizeof(F2FScalar));
+
+  // Add structural displacments to structural node locations
+  F2FScalar *Xsd = getWorkArray(WORK_STRUCT_NODES, 3 * ns);
+  for (int j = 0; j < 3 * ns; j++) {
+    Xsd[j] = Xs[j] + Us[j];
+  }
+
+  // Space for the right-hand sides of the linear systems
+  F2FScalar *rhs_global = getWorkArray(WORK_NODE_RHS, 15 * nvecs * nthreads);
+
+#ifdef _OPENMP
+#pragma omp parallel num_threads(nthreads)
+#endif
+  {
+    // Each thread accumulates into its own block of the global array
+    F2FScalar *prods_thread = &prods_global[size * getThreadNum()];
+    F2FScalar *x = &rhs_global[15 * nvecs * getThreadNum()];
+#ifdef _OPENMP
+#pragma omp for schedule(static)
+#endif
+    for (int i = 0; i < na; i++) {
+      const F2FScalar *lams = &vecs[3 * nvecs * i];
+
+      // Compute vector r from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3 * i];
+      F2FScalar xs0bar_work[3];
+      const F2FScalar *xs0bar =
+          getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
+      F2FScalar r[3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Compute displaced centroid xsbar
+      F2FScalar xsbar[3];
+      computeNodeCentroid(i, Xsd, xsbar);
+
+      // Compute X for each input vector
+      F2FScalar R_work[9];
+      const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
+      F2FScalar S_work[9];
+      const F2FScalar *S = getNodeData(9, i, global_S, global_S_single, S_work);
+      F2FScalar M1[15 * 15];
+      assembleM1(R, S, M1);
+      int ipiv[15];
+      int m = 15, info = 0;
+      LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
+
+      memset(x, 0.0, 15 * nvecs * sizeof(F2FScalar));
+      for (int n = 0; n < nvecs; n++) {
+        F2FScalar *X = &x[15 * n];
+        for (int k = 0; k < 3; k++) {
+          for (int l = 0; l < 3; l++) {
+            X[3 * k + l] = -lams[nvecs * l + n] * r[k];
+          }
+        }
+      }
+      int nrhs = nvecs;
+      info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+
+      for (int j = 0; j < nn; j++) {
+        int indx = global_conn[nn * i + j];
+
+        // Compute vector q from centroid to structural node and vector p from
+        // displaced centroid to displaced structural node
+        F2FScalar q[3], p[3];
+        bool reflect = false;
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          vec_diff(xs0bar, xs0, q);
+          F2FScalar *xs = &Xsd[3 * indx];
+          vec_diff(xsbar, xs, p);
+        } else {
+          indx -= ns;
+          reflect = true;
+
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;
+          vec_diff(xs0bar, rxs0, q);
+
+          F2FScalar *xs = &Xsd[3 * indx];
+          F2FScalar rxs[3];
+          memcpy(rxs, xs, 3 * sizeof(F2FScalar));
+          rxs[isymm] *= -1.0;
+          vec_diff(xsbar, rxs, p);
+        }
+
+        // Compute the contribution to the products
+        F2FScalar w = getWeight(nn * i + j);
+        F2FScalar *prod = &prods_thread[3 * nvecs * indx];
+
+        for (int n = 0; n < nvecs; n++) {
+          F2FScalar lam[] = {lams[n], lams[nvecs + n], lams[2 * nvecs + n]};
+          const F2FScalar *X = &x[15 * n];
+
+          // prod = -w*q^{T}*X - w*p^{T}*X^{T} + w*lam^{T}*(R - I)
+          F2FScalar rprod[3];
+          rprod[0] =
+              -w * (q[0] * X[0] + q[1] * X[1] + q[2] * X[2]) -
+              w * (X[0] * p[0] + X[3] * p[1] + X[6] * p[2]) +
+              w * (lam[0] * (R[0] - 1.0) + lam[1] * R[1] + lam[2] * R[2]);
+          rprod[1] =
+              -w * (q[0] * X[3] + q[1] * X[4] + q[2] * X[5]) -
+              w * (X[1] * p[0] + X[4] * p[1] + X[7] * p[2]) +
+              w * (lam[0] * R[3] + lam[1] * (R[4] - 1.0) + lam[2] * R[5]);
+          rprod[2] =
+              -w * (q[0] * X[6] + q[1] * X[7] + q[2] * X[8]) -
+              w * (X[2] * p[0] + X[5] * p[1] + X[8] * p[2]) +
+              w * (lam[0] * R[6] + lam[1] * R[7] + lam[2] * (R[8] - 1.0));
+          if (reflect) {
+            rprod[isymm] *= -1.0;
+          }
+
+          prod[n] += rprod[0];
+          prod[nvecs + n] += rprod[1];
+          prod[2 * nvecs + n] += rprod[2];
+        }
+      }
+    }
+  }
+
+  // distribute the results to the structural processors
+  // Sum the thread contributions in a fixed order
+  reduceThreadArrays(size, prods_global);
+
+  structAddScatter(size, prods_global, 3 * ns_local * nvecs, prods);
+}
+
+/*
+  Apply the action of the load transfer w.r.t initial aerodynamic surface node
+  locations Jacobian to the right of a block of transposed input vectors
+  stored row-wise. The matrices X1, X2 and X3 are computed once for each
+  aerodynamic node and shared by all the vectors.
+
+  Arguments
+  ---------
+  nvecs : number of vectors
+  vecs  : input vectors
+
+  Returns
+  --------
+  prods : output vectors
+*/
+void MELD::applydLdxA0Multi(int nvecs, const F2FScalar *vecs,
+                            F2FScalar *prods) {
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns * nvecs);
+  structGatherBcast(3 * ns_local * nvecs, vecs, 3 * ns * nvecs, vecs_global);
+
+  // Zero products
+  memset(prods, 0, 3 * na * nvecs * sizeof(F2FScalar));
+
+#ifdef _OPENMP
+#pragma omp parallel for schedule(static) num_threads(nthreads)
+#endif
+  for (int i = 0; i < na; i++) {
+    const F2FScalar *fa = &Fa[3 * i];
+    F2FScalar xs0bar_work[3];
+    const F2FScalar *xs0bar =
+        getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
+    F2FScalar *prod = &prods[3 * nvecs * i];
+
+    // Compute X1, X2, X3 with all three right-hand sides at once
+    F2FScalar M1_work[15 * 15];
+    int ipiv_work[15];
+    const int *ipiv = NULL;
+    const F2FScalar *M1 = getFactor(i, M1_work, ipiv_work, &ipiv);
+    F2FScalar x[15 * 3];
+    memset(x, 0.0, 15 * 3 * sizeof(F2FScalar));
+    for (int k = 0; k < 3; k++) {
+      x[15 * k + 3 * k] -= fa[0];
+      x[15 * k + 3 * k + 1] -= fa[1];
+      x[15 * k + 3 * k + 2] -= fa[2];
+    }
+    int m = 15, nrhs = 3, info = 0;
+    LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+
+    for (int j = 0; j < nn; j++) {
+      int indx = global_conn[nn * i + j];
+
+      // Compute vector q from centroid to structural node
+      F2FScalar q[3];
+      bool reflect = false;
+      if (indx < ns) {
+        const F2FScalar *xs0 = &Xs[3 * indx];
+        vec_diff(xs0bar, xs0, q);
+      } else {
+        indx -= ns;
+        reflect = true;
+        const F2FScalar *xs0 = &Xs[3 * indx];
+        F2FScalar rxs0[3];
+        memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
+        rxs0[isymm] *= -1.0;
+        vec_diff(xs0bar, rxs0, q);
+      }
+
+      // Compute T[3 * k + l] = q^{T} * X_{k} * e_{l}, which is shared by all
+      // the input vectors
+      F2FScalar T[9];
+      for (int k = 0; k < 3; k++) {
+        const F2FScalar *X = &x[15 * k];
+        for (int l = 0; l < 3; l++) {
+          T[3 * k + l] =
+              q[0] * X[3 * l] + q[1] * X[3 * l + 1] + q[2] * X[3 * l + 2];
+        }
+      }
+
+      // Compute the contribution to the products
+      const F2FScalar w = getWeight(nn * i + j);
+      const F2FScalar *vs = &vecs_global[3 * nvecs * indx];
+
+      for (int n = 0; n < nvecs; n++) {
+        // Get the components of the input vector at the structural node
+        F2FScalar lam[] = {vs[n], vs[nvecs + n], vs[2 * nvecs + n]};
+        if (reflect) {
+          lam[isymm] *= -1.0;
+        }
+
+        for (int k = 0; k < 3; k++) {
+          prod[nvecs * k + n] -=
+              w * (T[3 * k] * lam[0] + T[3 * k + 1] * lam[1] +
+                   T[3 * k + 2] * lam[2]);
+        }
+      }
+    }
+  }
+}
+
+/*
+  Apply the action of the load transfer w.r.t initial structural node
+  locations Jacobian to the right of a block of transposed input vectors
+  stored row-wise. X, Y, M2 and M3 are assembled and factored once for each
+  aerodynamic node and the linear systems are solved for all the vectors at
+  once.
+
+  Arguments
+  ---------
+  nvecs : number of vectors
+  vecs  : input vectors
+
+  Returns
+  -------
+  prods : output vectors
+*/
+void MELD::applydLdxS0Multi(int nvecs, const F2FScalar *vecs,
+                            F2FScalar *prods) {
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns * nvecs);
+  structGatherBcast(3 * ns_local * nvecs, vecs, 3 * ns * nvecs, vecs_global);
+
+  // Zero products
+  // Allocate one copy of the global array for each thread
+  int size = 3 * ns * nvecs;
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, size * nthreads);
+  memset(prods_global, 0, size * nthreads * sizeof(F2FScalar));
+
+  // Add structural displacments to structural node locations
+  F2FScalar *Xsd = getWorkArray(WORK_STRUCT_NODES, 3 * ns);
+  for (int j = 0; j < 3 * ns; j++) {
+    Xsd[j] = Xs[j] + Us[j];
+  }
+
+  // Space for the right-hand sides of the two linear systems, the centroids
+  // of the adjoint variables and the vectors of the third term
+  int nrhs_work = (2 * 15 + 2 * 3) * nvecs;
+  F2FScalar *rhs_global = getWorkArray(WORK_NODE_RHS, nrhs_work * nthreads);
+
+  // Loop over aerodynamic surface nodes
+#ifdef _OPENMP
+#pragma omp parallel num_threads(nthreads)
+#endif
+  {
+    // Each thread accumulates into its own block of the global array
+    F2FScalar *prods_thread = &prods_global[size * getThreadNum()];
+    F2FScalar *z2 = &rhs_global[nrhs_work * getThreadNum()];
+    F2FScalar *z1 = &z2[15 * nvecs];
+    F2FScalar *lambar = &z1[15 * nvecs];
+    F2FScalar *qXlam = &lambar[3 * nvecs];
+#ifdef _OPENMP
+#pragma omp for schedule(static)
+#endif
+    for (int i = 0; i < na; i++) {
+      // Compute vector r from centroid to aero node
+      const F2FScalar *xa0 = &Xa[3 * i];
+      F2FScalar xs0bar_work[3];
+      const F2FScalar *xs0bar =
+          getNodeData(3, i, global_xs0bar, global_xs0bar_single, xs0bar_work);
+      F2FScalar r[3];
+      vec_diff(xs0bar, xa0, r);
+
+      // Compute displaced centroid xsbar
+      F2FScalar xsbar[3];
+      computeNodeCentroid(i, Xsd, xsbar);
+
+      // Get the load on the aerodynamic surface node
+      const F2FScalar *fa = &Fa[3 * i];
+
+      // Recompute X and Y
+      F2FScalar M1_work[15 * 15];
+      int ipiv_work[15];
+      const int *ipiv = NULL;
+      const F2FScalar *M1 = getFactor(i, M1_work, ipiv_work, &ipiv);
+      F2FScalar x[] = {-fa[0] * r[0], -fa[1] * r[0], -fa[2] * r[0],
+                       -fa[0] * r[1], -fa[1] * r[1], -fa[2] * r[1],
+                       -fa[0] * r[2], -fa[1] * r[2], -fa[2] * r[2],
+                       0.0,           0.0,           0.0,
+                       0.0,           0.0,           0.0};
+      int m = 15, nrhs = 1, info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, x, &m, &info);
+      F2FScalar XT[] = {x[0], x[3], x[6], x[1], x[4], x[7], x[2], x[5], x[8]};
+      F2FScalar nY[] = {-x[9],  -x[10], -x[11], -x[10], -x[12],
+                        -x[13], -x[11], -x[13], -x[14]};
+
+      // Assemble X and Y into matrix M2
+      F2FScalar M2[15 * 15];
+      assembleM1(XT, nY, M2);
+
+      // Assemble matrix M3 from R and S
+      F2FScalar M3[15 * 15];
+      F2FScalar R_work[9];
+      const F2FScalar *R = getNodeData(9, i, global_R, global_R_single, R_work);
+      F2FScalar S_work[9];
+      const F2FScalar *S = getNodeData(9, i, global_S, global_S_single, S_work);
+      assembleM3(R, S, M3);
+
+      // Compute X1, X2, X3 with all three right-hand sides at once
+      F2FScalar xx[15 * 3];
+      memset(xx, 0.0, 15 * 3 * sizeof(F2FScalar));
+      for (int k = 0; k < 3; k++) {
+        xx[15 * k + 3 * k] -= fa[0];
+        xx[15 * k + 3 * k + 1] -= fa[1];
+        xx[15 * k + 3 * k + 2] -= fa[2];
+      }
+      nrhs = 3;
+      info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, xx, &m, &info);
+
+      // Build the right-hand sides of the first system to be solved, the
+      // centroids of the adjoint variables and the vectors for the third term,
+      // one column for each input vector
+      memset(z2, 0.0, 15 * nvecs * sizeof(F2FScalar));
+      memset(lambar, 0.0, 2 * 3 * nvecs * sizeof(F2FScalar));
+      for (int j = 0; j < nn; j++) {
+        int indx = global_conn[nn * i + j];
+
+        // Get vector q
+        F2FScalar q[3];
+        bool reflect = false;
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          vec_diff(xs0bar, xs0, q);
+        } else {
+          indx -= ns;
+          reflect = true;
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;
+          vec_diff(xs0bar, rxs0, q);
+        }
+
+        // Compute T[3 * k + l] = q^{T} * X_{k} * e_{l}, which is shared by
+        // all the input vectors
+        F2FScalar T[9];
+        for (int k = 0; k < 3; k++) {
+          const F2FScalar *X = &xx[15 * k];
+          for (int l = 0; l < 3; l++) {
+            T[3 * k + l] =
+                q[0] * X[3 * l] + q[1] * X[3 * l + 1] + q[2] * X[3 * l + 2];
+          }
+        }
+
+        F2FScalar w = getWeight(nn * i + j);
+        const F2FScalar *vs = &vecs_global[3 * nvecs * indx];
+
+        for (int n = 0; n < nvecs; n++) {
+          // Get the subset of the input vector
+          F2FScalar lam[] = {vs[n], vs[nvecs + n], vs[2 * nvecs + n]};
+          if (reflect) {
+            lam[isymm] *= -1.0;
+          }
+
+          F2FScalar *z = &z2[15 * n];
+          for (int k = 0; k < 3; k++) {
+            z[3 * k] -= w * q[0] * lam[k];
+            z[3 * k + 1] -= w * q[1] * lam[k];
+            z[3 * k + 2] -= w * q[2] * lam[k];
+          }
+
+          for (int k = 0; k < 3; k++) {
+            lambar[3 * n + k] += w * lam[k];
+            qXlam[3 * n + k] += w * (T[3 * k] * lam[0] + T[3 * k + 1] * lam[1] +
+                                     T[3 * k + 2] * lam[2]);
+          }
+        }
+      }
+
+      // Solve the first linear system
+      int ipiv3[15];
+      info = 0;
+      LAPACKgetrf(&m, &m, M3, &m, ipiv3, &info);
+      info = 0;
+      nrhs = nvecs;
+      LAPACKgetrs("N", &m, &nrhs, M3, &m, ipiv3, z2, &m, &info);
+
+      // Compute right-hand sides of second system
+      F2FScalar alpha = -1.0, beta = 0.0;
+      BLASgemm("N", "N", &m, &nrhs, &m, &alpha, M2, &m, z2, &m, &beta, z1, &m);
+
+      // Solve the second system
+      info = 0;
+      LAPACKgetrs("N", &m, &nrhs, M1, &m, ipiv, z1, &m, &info);
+
+      // Loop over linked structural nodes and add contributions from
+      // aerodynamic surface node to global structural loads
+      for (int j = 0; j < nn; j++) {
+        int indx = global_conn[nn * i + j];
+
+        // Compute vector q from centroid to structural node and vector p from
+        // displaced centroid to displaced structural node
+        F2FScalar q[3], p[3];
+        bool reflect = false;
+        if (indx < ns) {
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          vec_diff(xs0bar, xs0, q);
+          F2FScalar *xs = &Xsd[3 * indx];
+          vec_diff(xsbar, xs, p);
+        } else {
+          indx -= ns;
+          reflect = true;
+
+          const F2FScalar *xs0 = &Xs[3 * indx];
+          F2FScalar rxs0[3];
+          memcpy(rxs0, xs0, 3 * sizeof(F2FScalar));
+          rxs0[isymm] *= -1.0;
+          vec_diff(xs0bar, rxs0, q);
+
+          F2FScalar *xs = &Xsd[3 * indx];
+          F2FScalar rxs[3];
+          memcpy(rxs, xs, 3 * sizeof(F2FScalar));
+          rxs[isymm] *= -1.0;
+          vec_diff(xsbar, rxs, p);
+        }
+
+        F2FScalar w = getWeight(nn * i + j);
+        const F2FScalar *vs = &vecs_global[3 * nvecs * indx];
+        F2FScalar *prod = &prods_thread[3 * nvecs * indx];
+
+        for (int n = 0; n < nvecs; n++) {
+          // Compute vector lamp from centroid of adjoint variables to the
+          // components of the adjoint variable corresponding to this node
+          F2FScalar lam[] = {vs[n], vs[nvecs + n], vs[2 * nvecs + n]};
+          if (reflect) {
+            lam[isymm] *= -1.0;
+          }
+          F2FScalar lamp[3];
+          vec_diff(&lambar[3 * n], lam, lamp);
+
+          // Extract ZH
+          const F2FScalar *ZH = &z1[15 * n];
+
+          // Take contributions of the first, second and third terms
+          F2FScalar rprod[3];
+          rprod[0] = w * (q[0] * ZH[0] + q[1] * ZH[1] + q[2] * ZH[2]) +
+                     w * (ZH[0] * p[0] + ZH[3] * p[1] + ZH[6] * p[2]);
+          rprod[1] = w * (q[0] * ZH[3] + q[1] * ZH[4] + q[2] * ZH[5]) +
+                     w * (ZH[1] * p[0] + ZH[4] * p[1] + ZH[7] * p[2]);
+          rprod[2] = w * (q[0] * ZH[6] + q[1] * ZH[7] + q[2] * ZH[8]) +
+                     w * (ZH[2] * p[0] + ZH[5] * p[1] + ZH[8] * p[2]);
+
+          rprod[0] += w * (lamp[0] * XT[0] + lamp[1] * XT[1] + lamp[2] * XT[2]);
+          rprod[1] += w * (lamp[0] * XT[3] + lamp[1] * XT[4] + lamp[2] * XT[5]);
+          rprod[2] += w * (lamp[0] * XT[6] + lamp[1] * XT[7] + lamp[2] * XT[8]);
+
+          rprod[0] -= w * qXlam[3 * n];
+          rprod[1] -= w * qXlam[3 * n + 1];
+          rprod[2] -= w * qXlam[3 * n + 2];
+
+          if (reflect) {
+            rprod[isymm] *= -1.0;
+          }
+
+          prod[n] -= rprod[0];
+          prod[nvecs + n] -= rprod[1];
+          prod[2 * nvecs + n] -= rprod[2];
+        }
+      }
+    }
+  }
+
+  // distribute the results to the structural processors
+  // Sum the thread contributions in a fixed order
+  reduceThreadArrays(size, prods_global);
 
-  // Free allocated memory
-  delete[] Xsd;
-  delete[] vecs_global;
-  delete[] prods_global;
+  structAddScatter(size, prods_global, 3 * ns_local * nvecs, prods);
 }
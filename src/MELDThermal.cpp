@@ -27,6 +27,7 @@
 
 #include <cstring>
 
+#include "InterpOperator.h"
 #include "LocatePoint.h"
 #include "funtofemlapack.h"
 
@@ -40,6 +41,7 @@ MELDThermal::MELDThermal(MPI_Comm global_comm, MPI_Comm struct_comm,
       global_beta(beta) {
   global_conn = NULL;
   global_W = NULL;
+  global_W_single = NULL;
 
   // Space to be allocated for the structural temperatures and aero
   // normal component of the heat flux
@@ -65,6 +67,9 @@ MELDThermal::~MELDThermal() {
   if (global_W) {
     delete[] global_W;
   }
+  if (global_W_single) {
+    delete[] global_W_single;
+  }
 
   int rank;
   MPI_Comm_rank(global_comm, &rank);
@@ -78,9 +83,47 @@ MELDThermal::~MELDThermal() {
   for transfers and products
 */
 void MELDThermal::initialize() {
-  // global number of structural nodes
+  // Discard any previous halo and distribute the global structural mesh
+  clearStructHalo();
   distributeStructuralMesh();
 
+  // Check that user doesn't set more nearest nodes than exist in total
+  if (nn > ns) {
+    nn = ns;
+  }
+
+  // Create the aerostructural connectivity, or keep the previous one if the
+  // nodes have not moved enough to change it
+  if (global_conn) {
+    delete[] global_conn;
+  }
+  global_conn = new int[nn * na];
+  updateAeroStructConn(isymm, nn, global_conn);
+
+  // Allocate and compute the weights
+  if (global_W) {
+    delete[] global_W;
+  }
+  if (global_W_single) {
+    delete[] global_W_single;
+  }
+  global_W_single = NULL;
+  global_W = new F2FScalar[nn * na];
+  computeWeights(F2FRealPart(global_beta), isymm, nn, global_conn, global_W);
+
+  // Keep only the structural nodes connected to the local aerodynamic nodes
+  if (use_struct_halo) {
+    buildStructHalo(nn, global_conn);
+  }
+
+  // The temperature transfer is a fixed weighted sum, so assemble it once
+  if (interp) {
+    delete interp;
+  }
+  interp = new InterpOperator(1, na, ns, nn, global_conn, global_W);
+  interp_update = 0;
+  updatePrecision();
+
   if (Ts) {
     delete[] Ts;
   }
@@ -91,18 +134,68 @@ void MELDThermal::initialize() {
   }
   Ha = new F2FScalar[na];
 
-  // Check that user doesn't set more nearest nodes than exist in total
-  if (nn > ns) {
-    nn = ns;
+  // Size the persistent work arrays used by the transfers and products
+  getWorkArray(WORK_STRUCT_VECS, ns);
+  getWorkArray(WORK_STRUCT_PRODS, ns);
+}
+
+/*
+  Get the number of bytes allocated by the transfer scheme, including the
+  connectivity and weights
+*/
+size_t MELDThermal::getMemoryFootprint() {
+  size_t bytes = ThermalTransfer::getMemoryFootprint();
+  if (global_conn) {
+    bytes += nn * na * sizeof(int);
+  }
+  if (global_W) {
+    bytes += nn * na * sizeof(F2FScalar);
+  }
+  if (global_W_single) {
+    bytes += nn * na * sizeof(F2FSingleScalar);
   }
+  return bytes;
+}
 
-  // Create aerostructural connectivity
-  global_conn = new int[nn * na];
-  computeAeroStructConn(isymm, nn, global_conn);
+/*
+  Set the precision of the weights and of the temperature transfer assembled
+  from them. With mixed precision, both are stored in single precision and
+  the transfers and products are accumulated in full precision, which halves
+  their memory traffic but limits them to single precision accuracy.
 
-  // Allocate and compute the weights
-  global_W = new F2FScalar[nn * na];
-  computeWeights(F2FRealPart(global_beta), isymm, nn, global_conn, global_W);
+  Arguments
+  ---------
+  prec : FULL_PRECISION or MIXED_PRECISION
+*/
+void MELDThermal::setPrecision(Precision prec) {
+  precision = prec;
+  if (global_conn) {
+    updatePrecision();
+  }
+}
+
+/*
+  Convert the weights and the temperature transfer to the current precision.
+  The weights are computed again when returning to full precision.
+*/
+void MELDThermal::updatePrecision() {
+  if (precision == MIXED_PRECISION && global_W) {
+    global_W_single = new F2FSingleScalar[nn * na];
+    for (int k = 0; k < nn * na; k++) {
+      global_W_single[k] = F2FSingleScalar(global_W[k]);
+    }
+    delete[] global_W;
+    global_W = NULL;
+    interp->setSinglePrecision();
+  } else if (precision == FULL_PRECISION && global_W_single) {
+    delete[] global_W_single;
+    global_W_single = NULL;
+    global_W = new F2FScalar[nn * na];
+    computeWeights(F2FRealPart(global_beta), isymm, nn, global_conn, global_W);
+
+    delete interp;
+    interp = new InterpOperator(1, na, ns, nn, global_conn, global_W);
+  }
 }
 
 /*
@@ -126,24 +219,8 @@ void MELDThermal::transferTemp(const F2FScalar *struct_temps,
   // Copy the temperature into the global temperature vector
   structGatherBcast(ns_local, struct_temps, ns, Ts);
 
-  // Zero the outputs
-  memset(aero_temps, 0.0, na * sizeof(F2FScalar));
-
-  for (int i = 0; i < na; i++) {
-    const int *local_conn = &global_conn[i * nn];
-    const F2FScalar *w = &global_W[i * nn];
-
-    F2FScalar Taero = 0.0;
-    for (int j = 0; j < nn; j++) {
-      if (local_conn[j] < ns) {
-        Taero += w[j] * Ts[local_conn[j]];
-      } else {
-        Taero += w[j] * Ts[local_conn[j] - ns];
-      }
-    }
-
-    aero_temps[i] = Taero;
-  }
+  // Apply the weighted sum over the connected structural nodes
+  interp->mult(1, 1.0, Ts, aero_temps);
 }
 
 /*
@@ -163,29 +240,11 @@ void MELDThermal::transferFlux(const F2FScalar *aero_flux,
   // Copy prescribed aero loads into member variable
   memcpy(Ha, aero_flux, na * sizeof(F2FScalar));
 
-  // Zero struct flux
-  F2FScalar *struct_flux_global = new F2FScalar[ns];
-  memset(struct_flux_global, 0, ns * sizeof(F2FScalar));
-
-  for (int i = 0; i < na; i++) {
-    const int *local_conn = &global_conn[i * nn];
-    const F2FScalar *w = &global_W[i * nn];
-    const F2FScalar *ha = &Ha[i];
-
-    for (int j = 0; j < nn; j++) {
-      int index = 0;
-      if (local_conn[j] < ns) {
-        index = local_conn[j];
-      } else {
-        index = local_conn[j] - ns;
-      }
-      struct_flux_global[index] += w[j] * ha[0];
-    }
-  }
+  // Apply the transpose of the temperature transfer
+  F2FScalar *struct_flux_global = getWorkArray(WORK_STRUCT_PRODS, ns);
+  interp->multTranspose(1, 1.0, Ha, struct_flux_global);
 
   structAddScatter(ns, struct_flux_global, ns_local, struct_flux);
-
-  delete[] struct_flux_global;
 }
 
 /*
@@ -201,37 +260,7 @@ void MELDThermal::transferFlux(const F2FScalar *aero_flux,
   prods : output aerodynamic vector
 */
 void MELDThermal::applydTdtS(const F2FScalar *vecs, F2FScalar *prods) {
-  // Make a global image of the input vector
-  F2FScalar *vecs_global = new F2FScalar[ns];
-  structGatherBcast(ns_local, vecs, ns, vecs_global);
-
-  // Zero array of Jacobian-vector products every call
-  memset(prods, 0, na * sizeof(F2FScalar));
-
-  // Loop over all aerodynamic surface nodes
-  for (int i = 0; i < na; i++) {
-    // Loop over linked structural nodes and add up nonzero contributions to
-    // Jacobian-vector product
-    for (int j = 0; j < nn; j++) {
-      int indx = global_conn[nn * i + j];
-
-      F2FScalar v;
-      if (indx < ns) {
-        v = vecs_global[indx];
-      } else {
-        indx -= ns;
-        v = vecs_global[indx];
-      }
-
-      // Compute each component of the Jacobian vector product as follows:
-      // Jv[k] = w*v[k]
-      F2FScalar w = global_W[nn * i + j];
-      prods[i] -= w * v;
-    }
-  }
-
-  // Clean up the allocated memory
-  delete[] vecs_global;
+  applydTdtSMulti(1, vecs, prods);
 }
 
 /*
@@ -247,32 +276,52 @@ void MELDThermal::applydTdtS(const F2FScalar *vecs, F2FScalar *prods) {
   prods : output structural vector
 */
 void MELDThermal::applydTdtSTrans(const F2FScalar *vecs, F2FScalar *prods) {
-  // Zero array of transpose Jacobian-vector products every call
-  F2FScalar *prods_global = new F2FScalar[ns];
-  memset(prods_global, 0, ns * sizeof(F2FScalar));
-
-  // Loop over aerodynamic surface nodes
-  for (int i = 0; i < na; i++) {
-    // Loop over linked structural nodes and add up nonzero contributions to
-    // Jacobian-vector product
-    for (int j = 0; j < nn; j++) {
-      int indx = global_conn[nn * i + j];
-      F2FScalar w = global_W[nn * i + j];
-
-      if (indx < ns) {
-        prods_global[indx] -= w * vecs[i];
-      } else {
-        indx -= ns;
-        prods_global[indx] -= w * vecs[i];
-      }
-    }
-  }
+  applydTdtSTransMulti(1, vecs, prods);
+}
 
-  // distribute the results to the structural processors
-  structAddScatter(ns, prods_global, ns_local, prods);
+/*
+  Apply the action of the temperature transfer w.r.t structural temperature
+  Jacobian to a block of input vectors stored row-wise
+
+  Arguments
+  ---------
+  nvecs : number of vectors
+  vecs  : input structural vectors
+
+  Returns
+  --------
+  prods : output aerodynamic vectors
+*/
+void MELDThermal::applydTdtSMulti(int nvecs, const F2FScalar *vecs,
+                                  F2FScalar *prods) {
+  // Make a global image of the input vectors
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, ns * nvecs);
+  structGatherBcast(ns_local * nvecs, vecs, ns * nvecs, vecs_global);
+
+  // Jv[k] = -w*v[k] summed over the connected structural nodes
+  interp->mult(nvecs, -1.0, vecs_global, prods);
+}
+
+/*
+  Apply the action of the temperature transfer w.r.t structural temperature
+  transpose Jacobian to a block of input vectors stored row-wise
+
+  Arguments
+  ----------
+  nvecs : number of vectors
+  vecs  : input aerodynamic vectors
 
-  // clean up allocated memory
-  delete[] prods_global;
+  Returns
+  --------
+  prods : output structural vectors
+*/
+void MELDThermal::applydTdtSTransMulti(int nvecs, const F2FScalar *vecs,
+                                       F2FScalar *prods) {
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, ns * nvecs);
+  interp->multTranspose(nvecs, -1.0, vecs, prods_global);
+
+  // distribute the results to the structural processors
+  structAddScatter(ns * nvecs, prods_global, ns_local * nvecs, prods);
 }
 
 /*
@@ -306,3 +355,39 @@ void MELDThermal::applydQdqA(const F2FScalar *vecs, F2FScalar *prods) {
 void MELDThermal::applydQdqATrans(const F2FScalar *vecs, F2FScalar *prods) {
   applydTdtS(vecs, prods);
 }
+
+/*
+  Apply the action of the flux transfer w.r.t aerodynamic flux Jacobian to a
+  block of input vectors stored row-wise
+
+  Arguments
+  ---------
+  nvecs : number of vectors
+  vecs  : input aerodynamic vectors
+
+  Returns
+  --------
+  prods : output structural vectors
+*/
+void MELDThermal::applydQdqAMulti(int nvecs, const F2FScalar *vecs,
+                                  F2FScalar *prods) {
+  applydTdtSTransMulti(nvecs, vecs, prods);
+}
+
+/*
+  Apply the action of the flux transfer w.r.t aerodynamic flux transpose
+  Jacobian to a block of input vectors stored row-wise
+
+  Arguments
+  ---------
+  nvecs : number of vectors
+  vecs  : input structural vectors
+
+  Returns
+  --------
+  prods : output aerodynamic vectors
+*/
+void MELDThermal::applydQdqATransMulti(int nvecs, const F2FScalar *vecs,
+                                       F2FScalar *prods) {
+  applydTdtSMulti(nvecs, vecs, prods);
+}
@@ -21,10 +21,49 @@
 
 #include "Octree.h"
 
+#include <math.h>
 #include <stdio.h>
 
+#include <algorithm>
 #include <cstring>
 
+#include "KDTree.h"
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+// Number of bits of the Morton code in each coordinate direction
+static const int OCTREE_MAX_LEVEL = 21;
+
+/*
+  Spread the lower 21 bits of an integer so that there are two zero bits
+  between each of them
+*/
+static uint64_t spreadBits(uint64_t v) {
+  v &= 0x1fffff;
+  v = (v | (v << 32)) & 0x1f00000000ffffULL;
+  v = (v | (v << 16)) & 0x1f0000ff0000ffULL;
+  v = (v | (v << 8)) & 0x100f00f00f00f00fULL;
+  v = (v | (v << 4)) & 0x10c30c30c30c30c3ULL;
+  v = (v | (v << 2)) & 0x1249249249249249ULL;
+  return v;
+}
+
+/*
+  Compare two points by their Morton codes, breaking ties by their index
+*/
+class OctreeCompare {
+ public:
+  OctreeCompare(const uint64_t *codes) : codes(codes) {}
+  bool operator()(int a, int b) const {
+    return codes[a] < codes[b] || (codes[a] == codes[b] && a < b);
+  }
+
+ private:
+  const uint64_t *codes;
+};
+
 /*
   Constructor for octree object
 
@@ -34,214 +73,575 @@
   num_points      : number of points
   min_point_count : minimum number of points in smallest bin
   min_edge_length : minimum edge length of bin
-  max_tree_depth  : deepest allowed level of tree
+  max_tree_depth  : deepest allowed level of tree (at most 21)
 */
-Octree::Octree(F2FScalar *points, int num_points, int min_point_count,
+Octree::Octree(const F2FScalar *points, int num_points, int min_point_count,
                double min_edge_length, int max_tree_depth) {
-  // Allocate memory for points
+  nthreads = 1;
+  verbose = 0;
+  ref_count = 0;
+
+  npts = 0;
+  Xpts = Xsorted = NULL;
+  codes = NULL;
+  point_ids = NULL;
+  sorted = 0;
+
+  nbins = max_bins = 0;
+  bin_depths = bin_parents = NULL;
+  bin_corners = NULL;
+  bin_start = bin_end = bin_child = bin_nchild = NULL;
+  points_bins = NULL;
+  nleaf = 0;
+  leaf_bins = leaf_ptr = NULL;
+
+  setParameters(min_point_count, min_edge_length, max_tree_depth);
+  setPoints(points, num_points);
+}
+
+/*
+  Destructor
+*/
+Octree::~Octree() {
+  clearBins();
+  if (Xpts) delete[] Xpts;
+  if (Xsorted) delete[] Xsorted;
+  if (codes) delete[] codes;
+  if (point_ids) delete[] point_ids;
+
+  if (verbose) {
+    printf("Octree: freeing octree data...\n\n");
+  }
+}
+
+/*
+  Set the number of threads used to sort the points
+
+  Arguments
+  ---------
+  num_threads : number of threads (all available threads if not positive)
+*/
+void Octree::setNumThreads(int num_threads) {
+  nthreads = num_threads;
+#ifdef _OPENMP
+  if (nthreads < 1) {
+    nthreads = omp_get_max_threads();
+  }
+#else
+  nthreads = 1;
+#endif
+}
+
+/*
+  Replace the points of the tree
+
+  Arguments
+  ---------
+  points     : points coordinates x1, y1, z1, ..., xn, yn, zn
+  num_points : number of points
+*/
+void Octree::setPoints(const F2FScalar *points, int num_points) {
+  clearBins();
+  if (Xpts) delete[] Xpts;
+  if (Xsorted) delete[] Xsorted;
+  if (codes) delete[] codes;
+  if (point_ids) delete[] point_ids;
+  Xsorted = NULL;
+  codes = NULL;
+  point_ids = NULL;
+  sorted = 0;
+
+  // Only copy the real parts of the points in complex mode
   npts = num_points;
   Xpts = new double[3 * npts];
-
-  // If in complex mode, strip off imaginary parts and only copy in real parts
-#ifdef FUNTOFEM_USE_COMPLEX
   for (int i = 0; i < 3 * npts; i++) {
     Xpts[i] = F2FRealPart(points[i]);
   }
-#else
-  memcpy(Xpts, points, 3 * npts * sizeof(double));
-#endif
+}
 
-  // Initialize recursion exit conditions
+/*
+  Set the subdivision exit conditions
+
+  Arguments
+  ---------
+  min_point_count : minimum number of points in smallest bin
+  min_edge_length : minimum edge length of bin
+  max_tree_depth  : deepest allowed level of tree (at most 21)
+*/
+void Octree::setParameters(int min_point_count, double min_edge_length,
+                           int max_tree_depth) {
   min_points = min_point_count;
   min_edge = min_edge_length;
   max_depth = max_tree_depth;
+  if (max_depth > OCTREE_MAX_LEVEL) {
+    max_depth = OCTREE_MAX_LEVEL;
+  }
+}
 
-  printf("Octree: creating octree with %i points...\n", npts);
+/*
+  Check whether the tree was built over the real parts of the given points
+
+  Arguments
+  ---------
+  points     : points coordinates x1, y1, z1, ..., xn, yn, zn
+  num_points : number of points
+*/
+int Octree::hasPoints(const F2FScalar *points, int num_points) {
+  if (num_points != npts) {
+    return 0;
+  }
+  for (int i = 0; i < 3 * npts; i++) {
+    if (Xpts[i] != F2FRealPart(points[i])) {
+      return 0;
+    }
+  }
+  return 1;
 }
 
 /*
-  Destructor
+  Get the number of bytes allocated by the tree
 */
-Octree::~Octree() {
-  // Delete tree data
-  if (Xpts) delete[] Xpts;
+size_t Octree::getMemoryFootprint() {
+  size_t bytes = npts * (6 * sizeof(double) + sizeof(uint64_t) + sizeof(int));
+  if (points_bins) {
+    bytes += npts * sizeof(int);
+    bytes += (2 * nleaf + 1) * sizeof(int);
+  }
+  bytes += max_bins * (6 * sizeof(int) + 6 * sizeof(double));
+  return bytes;
+}
+
+/*
+  Free the tree data
+*/
+void Octree::clearBins() {
   if (bin_depths) delete[] bin_depths;
   if (bin_parents) delete[] bin_parents;
   if (bin_corners) delete[] bin_corners;
+  if (bin_start) delete[] bin_start;
+  if (bin_end) delete[] bin_end;
+  if (bin_child) delete[] bin_child;
+  if (bin_nchild) delete[] bin_nchild;
   if (points_bins) delete[] points_bins;
   if (leaf_bins) delete[] leaf_bins;
+  if (leaf_ptr) delete[] leaf_ptr;
+  nbins = max_bins = 0;
+  bin_depths = bin_parents = NULL;
+  bin_corners = NULL;
+  bin_start = bin_end = bin_child = bin_nchild = NULL;
+  points_bins = NULL;
+  nleaf = 0;
+  leaf_bins = leaf_ptr = NULL;
+}
+
+/*
+  Grow the bin arrays by doubling their length until they hold at least the
+  given number of bins
+*/
+void Octree::reserveBins(int size) {
+  if (size <= max_bins) {
+    return;
+  }
+  int new_max = (max_bins > 0 ? 2 * max_bins : 64);
+  while (new_max < size) {
+    new_max *= 2;
+  }
+
+  int *arrays[6] = {bin_depths, bin_parents, bin_start,
+                    bin_end,    bin_child,   bin_nchild};
+  for (int k = 0; k < 6; k++) {
+    int *new_array = new int[new_max];
+    if (arrays[k]) {
+      memcpy(new_array, arrays[k], nbins * sizeof(int));
+      delete[] arrays[k];
+    }
+    arrays[k] = new_array;
+  }
+  bin_depths = arrays[0];
+  bin_parents = arrays[1];
+  bin_start = arrays[2];
+  bin_end = arrays[3];
+  bin_child = arrays[4];
+  bin_nchild = arrays[5];
+
+  double *new_corners = new double[6 * new_max];
+  if (bin_corners) {
+    memcpy(new_corners, bin_corners, 6 * nbins * sizeof(double));
+    delete[] bin_corners;
+  }
+  bin_corners = new_corners;
+  max_bins = new_max;
+}
+
+/*
+  Compute the Morton codes of the points on a 2^21 grid over their bounding
+  box and sort the points by their codes. With more than one thread, blocks
+  of the points are sorted concurrently and then merged.
+*/
+void Octree::sortPoints() {
+  // Find the bounding box of the points
+  double xmin[3] = {0.0, 0.0, 0.0}, xmax[3] = {0.0, 0.0, 0.0};
+  for (int i = 0; i < npts; i++) {
+    for (int k = 0; k < 3; k++) {
+      if (i == 0 || Xpts[3 * i + k] < xmin[k]) xmin[k] = Xpts[3 * i + k];
+      if (i == 0 || Xpts[3 * i + k] > xmax[k]) xmax[k] = Xpts[3 * i + k];
+    }
+  }
 
-  printf("Octree: freeing octree data...\n\n");
+  // Create the base-level bin
+  reserveBins(1);
+  memcpy(bin_corners, xmin, 3 * sizeof(double));
+  memcpy(&bin_corners[3], xmax, 3 * sizeof(double));
+
+  // Compute the codes with the bits of the x, y and z indices interleaved
+  // so that each group of three bits is the octant i = xi + 2*yi + 4*zi
+  double scale[3];
+  for (int k = 0; k < 3; k++) {
+    scale[k] = 0.0;
+    if (xmax[k] > xmin[k]) {
+      scale[k] = (1 << OCTREE_MAX_LEVEL) / (xmax[k] - xmin[k]);
+    }
+  }
+
+  uint64_t *unsorted = new uint64_t[npts];
+  int *ids = new int[npts];
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(nthreads)
+#endif
+  for (int i = 0; i < npts; i++) {
+    uint64_t code = 0;
+    for (int k = 0; k < 3; k++) {
+      uint64_t q = (uint64_t)((Xpts[3 * i + k] - xmin[k]) * scale[k]);
+      if (q >= (1 << OCTREE_MAX_LEVEL)) {
+        q = (1 << OCTREE_MAX_LEVEL) - 1;
+      }
+      code |= spreadBits(q) << k;
+    }
+    unsorted[i] = code;
+    ids[i] = i;
+  }
+
+  // Sort blocks of the points and merge them pairwise
+  OctreeCompare compare(unsorted);
+  int nblocks = (nthreads < npts ? nthreads : 1);
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(nthreads)
+#endif
+  for (int b = 0; b < nblocks; b++) {
+    std::sort(&ids[(long)b * npts / nblocks],
+              &ids[(long)(b + 1) * npts / nblocks], compare);
+  }
+  for (int width = 1; width < nblocks; width *= 2) {
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(nthreads)
+#endif
+    for (int b = 0; b < nblocks - width; b += 2 * width) {
+      int end = (b + 2 * width < nblocks ? b + 2 * width : nblocks);
+      std::inplace_merge(&ids[(long)b * npts / nblocks],
+                         &ids[(long)(b + width) * npts / nblocks],
+                         &ids[(long)end * npts / nblocks], compare);
+    }
+  }
+
+  // Store the codes and the point locations in Morton order
+  point_ids = ids;
+  codes = new uint64_t[npts];
+  Xsorted = new double[3 * npts];
+  for (int j = 0; j < npts; j++) {
+    codes[j] = unsorted[ids[j]];
+    memcpy(&Xsorted[3 * j], &Xpts[3 * ids[j]], 3 * sizeof(double));
+  }
+  delete[] unsorted;
+
+  sorted = 1;
 }
 
 /*
-  Allocate memory for tree data and run tree generator function
+  Create the tree
+
+  The points are sorted by their Morton codes the first time the tree is
+  generated. The bins are then created level by level: each bin that does
+  not satisfy the exit conditions is split into its non-empty octants, whose
+  ranges of the sorted points are found from the next three bits of the
+  codes.
 */
 void Octree::generate() {
-  // Create base-level bin
+  if (verbose) {
+    printf("Octree: creating octree with %i points...\n", npts);
+  }
+
+  // Keep the base-level bin corners when regenerating the tree
+  double base[6];
+  if (sorted) {
+    memcpy(base, bin_corners, 6 * sizeof(double));
+  }
+  clearBins();
+  if (!sorted) {
+    sortPoints();
+    memcpy(base, bin_corners, 6 * sizeof(double));
+  } else {
+    reserveBins(1);
+    memcpy(bin_corners, base, 6 * sizeof(double));
+  }
+
+  // The smallest edge of a bin ignores the directions in which all of the
+  // points lie in a plane
+  double base_edge = -1.0;
+  for (int k = 0; k < 3; k++) {
+    double edge = base[3 + k] - base[k];
+    if (edge > 0.0 && (base_edge < 0.0 || edge < base_edge)) {
+      base_edge = edge;
+    }
+  }
+
+  // Create the base-level bin
   nbins = 1;
-  bin_depths = new int[nbins];
   bin_depths[0] = 0;
-  bin_parents = new int[nbins];
   bin_parents[0] = 0;
-  bin_corners = new double[6 * nbins];
-  points_bins = new int[npts];
-  memset(points_bins, 0, npts * sizeof(int));  // all points start in base bin
-  nleaf = 0;
-  leaf_bins = new int[nbins];  // cannot allocate an array of length zero
+  bin_start[0] = 0;
+  bin_end[0] = npts;
+
+  for (int bin = 0; bin < nbins; bin++) {
+    int depth = bin_depths[bin];
+    int start = bin_start[bin];
+    int end = bin_end[bin];
+    bin_child[bin] = -1;
+    bin_nchild[bin] = 0;
+
+    // Check if the exit conditions are satisfied
+    double edge = base_edge / (1 << depth);
+    if (end - start <= min_points || edge < min_edge || depth >= max_depth) {
+      continue;
+    }
 
-  // Find corners of base bin
-  double xmin[] = {Xpts[0], Xpts[1], Xpts[2]};
-  double xmax[] = {Xpts[0], Xpts[1], Xpts[2]};
-  for (int i = 1; i < npts; i++) {
-    if (Xpts[3 * i + 0] < xmin[0]) xmin[0] = Xpts[3 * i + 0];  // min x
-    if (Xpts[3 * i + 1] < xmin[1]) xmin[1] = Xpts[3 * i + 1];  // min y
-    if (Xpts[3 * i + 2] < xmin[2]) xmin[2] = Xpts[3 * i + 2];  // min z
+    // Split the bin into its non-empty octants
+    reserveBins(nbins + 8);
+    bin_child[bin] = nbins;
+    int shift = 3 * (OCTREE_MAX_LEVEL - 1 - depth);
+    double *corners = &bin_corners[6 * bin];
+    int j = start;
+    while (j < end) {
+      int octant = (codes[j] >> shift) & 7;
+      int child = nbins;
+      nbins++;
+      bin_nchild[bin]++;
+
+      bin_depths[child] = depth + 1;
+      bin_parents[child] = bin;
+      bin_start[child] = j;
+      while (j < end && (int)((codes[j] >> shift) & 7) == octant) {
+        j++;
+      }
+      bin_end[child] = j;
+
+      // Determine the corners of the new bin
+      for (int k = 0; k < 3; k++) {
+        double xcen = 0.5 * (corners[k] + corners[3 + k]);
+        if (octant & (1 << k)) {
+          bin_corners[6 * child + k] = xcen;
+          bin_corners[6 * child + 3 + k] = corners[3 + k];
+        } else {
+          bin_corners[6 * child + k] = corners[k];
+          bin_corners[6 * child + 3 + k] = xcen;
+        }
+      }
+    }
+  }
 
-    if (Xpts[3 * i + 0] > xmax[0]) xmax[0] = Xpts[3 * i + 0];  // max x
-    if (Xpts[3 * i + 1] > xmax[1]) xmax[1] = Xpts[3 * i + 1];  // max y
-    if (Xpts[3 * i + 2] > xmax[2]) xmax[2] = Xpts[3 * i + 2];  // max z
+  // Collect the leaf bins in Morton order and the points in each of them
+  leaf_bins = new int[nbins];
+  nleaf = findLeafBins(min_points, leaf_bins);
+  leaf_ptr = new int[nleaf + 1];
+  points_bins = new int[npts];
+  for (int i = 0; i < nleaf; i++) {
+    leaf_ptr[i] = bin_start[leaf_bins[i]];
+    for (int j = bin_start[leaf_bins[i]]; j < bin_end[leaf_bins[i]]; j++) {
+      points_bins[point_ids[j]] = leaf_bins[i];
+    }
   }
-  memcpy(bin_corners, xmin, 3 * sizeof(double));
-  memcpy(&bin_corners[3], xmax, 3 * sizeof(double));
+  leaf_ptr[nleaf] = npts;
 
-  // Recursively divide the base bin to create the tree
-  bool is_base_leaf_bin = divide(0);
-  if (is_base_leaf_bin) {
-    leaf_bins[nleaf] = 0;  // base-level bin is only leaf
-    printf("Octree error: the base-level bin could not be subdivided.\n");
+  if (verbose && nleaf == 1 && npts > min_points) {
+    printf("Octree warning: the base-level bin could not be subdivided.\n");
   }
 }
 
 /*
-  Recursive function for generating tree
+  Find the leaf bins of the tree that would be generated with a larger
+  minimum point count: the bins with at most min_point_count points whose
+  parent has more, and the leaf bins with more points
 
   Arguments
   ---------
-  bin_id : ID of bin
+  min_point_count : minimum number of points in smallest bin
 
   Returns
   -------
-  divide : boolean indicating whether the bin satisfies the exit conditions
+  bins  : the IDs of the bins in Morton order (at most nbins)
+  nbins : the number of bins found
 */
-bool Octree::divide(int bin_id) {
-  // Count points in bin
-  int bin_count = 0;
-  for (int i = 0; i < npts; i++) {
-    if (points_bins[i] == bin_id) {
-      bin_count++;
+int Octree::findLeafBins(int min_point_count, int *bins) {
+  if (nbins == 0 || npts == 0) {
+    return 0;
+  }
+
+  // Traverse the tree depth-first with an explicit stack
+  int count = 0;
+  int *stack = new int[8 * (max_depth + 1) + 1];
+  int nstack = 1;
+  stack[0] = 0;
+  while (nstack > 0) {
+    nstack--;
+    int bin = stack[nstack];
+    if (bin_child[bin] < 0 ||
+        bin_end[bin] - bin_start[bin] <= min_point_count) {
+      bins[count] = bin;
+      count++;
+    } else {
+      // Push the children in reverse so that they are visited in order
+      for (int c = bin_nchild[bin] - 1; c >= 0; c--) {
+        stack[nstack] = bin_child[bin] + c;
+        nstack++;
+      }
     }
   }
-  bool count_check = bin_count <= min_points;
+  delete[] stack;
 
-  // Find smallest edge of bin
-  double edge_x = bin_corners[6 * bin_id + 3] - bin_corners[6 * bin_id + 0];
-  double edge_y = bin_corners[6 * bin_id + 4] - bin_corners[6 * bin_id + 1];
-  double edge_z = bin_corners[6 * bin_id + 5] - bin_corners[6 * bin_id + 2];
-  double edge_s;
-  edge_s = (edge_y < edge_x) ? edge_y : edge_x;
-  edge_s = (edge_z < edge_s) ? edge_z : edge_s;
-  bool edge_check = edge_s < min_edge;
+  return count;
+}
 
-  // Find depth of bin
-  int bin_depth = bin_depths[bin_id];
-  bool depth_check = bin_depth >= max_depth;
+/*
+  Locate the K closest points to a given point
 
-  // Check if exit conditions are satisfied
-  if (count_check || edge_check || depth_check) {
-    if (bin_count > 0) {
-      return true;
-    } else {
-      return false;
+  Arguments
+  ---------
+  K     : number of points to locate
+  xpt   : the query point
+  isymm : symmetry index (-1 for no symmetry)
+  tol   : symmetry plane tolerance
+
+  Returns
+  -------
+  indices : indices of the closest points sorted by distance
+  dist    : squared distances to the closest points
+*/
+void Octree::locateKClosest(int K, int indices[], double dist[],
+                            const F2FScalar xpt[], int isymm, double tol) {
+  int nk = 0;
+  double x[3];
+  for (int k = 0; k < 3; k++) {
+    x[k] = F2FRealPart(xpt[k]);
+  }
+
+  if (nbins > 0) {
+    search(0, x, K, &nk, indices, dist, 0, -1, tol);
+
+    // Search the reflected points by reflecting the query point
+    if (isymm >= 0) {
+      x[isymm] *= -1.0;
+      search(0, x, K, &nk, indices, dist, npts, isymm, tol);
     }
   }
 
-  // Find center of bin
-  double xcen[] = {
-      0.5 * (bin_corners[6 * bin_id + 3] + bin_corners[6 * bin_id + 0]),
-      0.5 * (bin_corners[6 * bin_id + 4] + bin_corners[6 * bin_id + 1]),
-      0.5 * (bin_corners[6 * bin_id + 5] + bin_corners[6 * bin_id + 2])};
+  KDTree::heapSort(nk, indices, dist);
+}
 
-  // Add 8 new bins
-  for (int i = 0; i < 8; i++) {
-    // Reallocate memory for the old data plus that of one new bin
-    int *new_bin_depths = new int[nbins + 1];
-    memcpy(new_bin_depths, bin_depths, nbins * sizeof(int));
-    delete[] bin_depths;
-    bin_depths = new_bin_depths;
+/*
+  Locate the K closest points to each point in a batch of query points
 
-    int *new_bin_parents = new int[nbins + 1];
-    memcpy(new_bin_parents, bin_parents, nbins * sizeof(int));
-    delete[] bin_parents;
-    bin_parents = new_bin_parents;
+  Arguments
+  ---------
+  K           : number of points to locate
+  nxpts       : number of query points
+  xpts        : the query point locations
+  isymm       : symmetry index (-1 for no symmetry)
+  tol         : symmetry plane tolerance
+  num_threads : number of threads used for the queries
 
-    double *new_bin_corners = new double[6 * (nbins + 1)];
-    memcpy(new_bin_corners, bin_corners, 6 * nbins * sizeof(double));
-    delete[] bin_corners;
-    bin_corners = new_bin_corners;
-
-    // Update depths and parents arrays
-    int new_bin_id = nbins;
-    nbins += 1;
-    bin_depths[new_bin_id] = bin_depths[bin_id] + 1;
-    bin_parents[new_bin_id] = bin_id;
-
-    // Extract bin indices from loop variable
-    int xi = (i & 1) >> 0;
-    int yi = (i & 2) >> 1;
-    int zi = (i & 4) >> 2;
-
-    // Determine the corners of the new bin
-    if (xi == 0) {
-      bin_corners[6 * new_bin_id + 0] = bin_corners[6 * bin_id + 0];
-      bin_corners[6 * new_bin_id + 3] = xcen[0];
-    } else {
-      bin_corners[6 * new_bin_id + 0] = xcen[0];
-      bin_corners[6 * new_bin_id + 3] = bin_corners[6 * bin_id + 3];
-    }
-    if (yi == 0) {
-      bin_corners[6 * new_bin_id + 1] = bin_corners[6 * bin_id + 1];
-      bin_corners[6 * new_bin_id + 4] = xcen[1];
-    } else {
-      bin_corners[6 * new_bin_id + 1] = xcen[1];
-      bin_corners[6 * new_bin_id + 4] = bin_corners[6 * bin_id + 4];
+  Returns
+  -------
+  indices : indices of the closest points for each query point
+*/
+void Octree::locateKClosest(int K, int nxpts, const F2FScalar *xpts,
+                            int *indices, int isymm, double tol,
+                            int num_threads) {
+#ifdef _OPENMP
+#pragma omp parallel num_threads(num_threads)
+#endif
+  {
+    double *dist = new double[K];
+
+#ifdef _OPENMP
+#pragma omp for schedule(dynamic, 64)
+#endif
+    for (int i = 0; i < nxpts; i++) {
+      locateKClosest(K, &indices[K * i], dist, &xpts[3 * i], isymm, tol);
     }
-    if (zi == 0) {
-      bin_corners[6 * new_bin_id + 2] = bin_corners[6 * bin_id + 2];
-      bin_corners[6 * new_bin_id + 5] = xcen[2];
-    } else {
-      bin_corners[6 * new_bin_id + 2] = xcen[2];
-      bin_corners[6 * new_bin_id + 5] = bin_corners[6 * bin_id + 5];
-    }
-
-    // Find the points that fall inside the new bin
-    for (int i = 0; i < npts; i++) {
-      if (points_bins[i] == bin_id) {
-        double *x = &Xpts[3 * i];
-        double *min_corner = &bin_corners[6 * new_bin_id];
-        double *max_corner = &bin_corners[6 * new_bin_id + 3];
-        bool is_in_bin = x[0] >= min_corner[0] and x[0] <= max_corner[0] and
-                         x[1] >= min_corner[1] and x[1] <= max_corner[1] and
-                         x[2] >= min_corner[2] and x[2] <= max_corner[2];
-        if (is_in_bin) {
-          points_bins[i] = new_bin_id;
-        }
+
+    delete[] dist;
+  }
+}
+
+/*
+  Recursively search the bin for points closer than the current K-th closest
+  point, visiting the children in order of their distance from the query
+  point
+
+  Arguments
+  ---------
+  bin    : the bin to search
+  x      : the query point
+  K      : number of points to locate
+  offset : offset added to the indices of the points found
+  isymm  : skip the points on this plane of symmetry (-1 for none)
+  tol    : symmetry plane tolerance
+*/
+void Octree::search(int bin, const double x[], int K, int *nk, int indices[],
+                    double dist[], int offset, int isymm, double tol) {
+  if (bin_child[bin] < 0) {
+    for (int j = bin_start[bin]; j < bin_end[bin]; j++) {
+      const double *xp = &Xsorted[3 * j];
+      if (isymm >= 0 && fabs(xp[isymm]) <= tol) {
+        continue;
+      }
+
+      double d =
+          ((x[0] - xp[0]) * (x[0] - xp[0]) + (x[1] - xp[1]) * (x[1] - xp[1]) +
+           (x[2] - xp[2]) * (x[2] - xp[2]));
+      if (*nk < K || d < dist[0]) {
+        KDTree::heapInsert(K, nk, indices, dist, d, point_ids[j] + offset);
       }
     }
+    return;
+  }
 
-    // Divide the new bin and keep track of leaf bins
-    bool is_leaf_bin = divide(new_bin_id);
-    if (is_leaf_bin) {
-      if (nleaf > 0) {
-        int *new_leaf_bins = new int[nleaf + 1];
-        memcpy(new_leaf_bins, leaf_bins, nleaf * sizeof(int));
-        delete[] leaf_bins;
-        leaf_bins = new_leaf_bins;
+  // Compute the squared distance from the query point to each child
+  int nchild = bin_nchild[bin];
+  int child[8];
+  double rd[8];
+  for (int c = 0; c < nchild; c++) {
+    child[c] = bin_child[bin] + c;
+    const double *corners = &bin_corners[6 * child[c]];
+    rd[c] = 0.0;
+    for (int k = 0; k < 3; k++) {
+      if (x[k] < corners[k]) {
+        rd[c] += (corners[k] - x[k]) * (corners[k] - x[k]);
+      } else if (x[k] > corners[3 + k]) {
+        rd[c] += (x[k] - corners[3 + k]) * (x[k] - corners[3 + k]);
       }
-      leaf_bins[nleaf] = new_bin_id;
-      nleaf++;
+    }
+
+    // Insertion sort by distance
+    for (int cc = c; cc > 0 && rd[cc] < rd[cc - 1]; cc--) {
+      std::swap(rd[cc], rd[cc - 1]);
+      std::swap(child[cc], child[cc - 1]);
     }
   }
 
-  return false;
+  // Search the children that may contain a closer point
+  for (int c = 0; c < nchild; c++) {
+    if (*nk < K || rd[c] < dist[0]) {
+      search(child[c], x, K, nk, indices, dist, offset, isymm, tol);
+    }
+  }
 }
@@ -0,0 +1,1209 @@
+/*
+  This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+  and design optimization.
+
+  Copyright (C) 2015 Georgia Tech Research Corporation.
+  Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+  All rights reserved.
+
+  FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this software except in compliance with the License.
+  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+*/
+
+#include "PURBF.h"
+
+#include <math.h>
+#include <stdio.h>
+
+#include <cstring>
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+#include "InterpOperator.h"
+#include "KDTree.h"
+#include "Octree.h"
+#include "funtofemlapack.h"
+
+PURBF::PURBF(MPI_Comm global_comm, MPI_Comm struct_comm, int struct_root,
+             MPI_Comm aero_comm, int aero_root, int patch_points,
+             double overlap, int num_threads)
+    : LDTransferScheme(global_comm, struct_comm, struct_root, aero_comm,
+                       aero_root),
+      npatch_points(patch_points),
+      overlap(overlap) {
+  // Set the number of threads used for the patches and products
+  nthreads = 1;
+  setNumThreads(num_threads);
+
+  // Initialize the patch data
+  nfailed = 0;
+  npatches = 0;
+  patch_centers = NULL;
+  patch_radii = NULL;
+  patch_ndims = NULL;
+  patch_dirs = NULL;
+  patch_ptr = NULL;
+  patch_nodes = NULL;
+  patch_dup_ptr = NULL;
+  patch_dups = NULL;
+  aero_ptr = NULL;
+  aero_patches = NULL;
+  patch_aero_ptr = NULL;
+  patch_aero_nodes = NULL;
+  patch_aero_entries = NULL;
+
+  // Notify user of the type of transfer scheme they are using
+  int rank;
+  MPI_Comm_rank(global_comm, &rank);
+  if (rank == struct_root) {
+    printf("Transfer scheme [%i]: Creating scheme of type PURBF...\n",
+           object_id);
+  }
+}
+
+PURBF::~PURBF() {
+  // Free the patch data
+  clearPatches();
+
+  int rank;
+  MPI_Comm_rank(global_comm, &rank);
+  if (rank == struct_root) {
+    printf("Transfer scheme [%i]: freeing PURBF data...\n", object_id);
+  }
+}
+
+/*
+  Set the number of threads used to factor the patches and apply the
+  transfers. Without OpenMP support, the number of threads is always one.
+
+  Arguments
+  ---------
+  num_threads : number of threads (values less than one use all available)
+*/
+void PURBF::setNumThreads(int num_threads) {
+#ifdef _OPENMP
+  if (num_threads < 1) {
+    num_threads = omp_get_max_threads();
+  }
+  nthreads = num_threads;
+#else
+  nthreads = 1;
+#endif
+}
+
+/*
+  Get the number of threads used for the patches and products
+*/
+int PURBF::getNumThreads() { return nthreads; }
+
+/*
+  Get the number of patches whose local interpolation system could not be
+  factored when the transfer was last assembled. After initialization this is
+  summed over all the processors. The transfers are not defined if it is
+  nonzero.
+*/
+int PURBF::getNumFailedPatches() { return nfailed; }
+
+/*
+  Build the patches and assemble the displacement transfer
+*/
+void PURBF::initialize() {
+  // global number of structural nodes
+  distributeStructuralMesh();
+
+  if (Us) {
+    delete[] Us;
+  }
+  Us = NULL;
+  if (Fa) {
+    delete[] Fa;
+  }
+  Fa = NULL;
+
+  if (na > 0) {
+    Fa = new F2FScalar[3 * na];
+    memset(Fa, 0, 3 * na * sizeof(F2FScalar));
+  }
+  if (ns > 0) {
+    Us = new F2FScalar[3 * ns];
+    memset(Us, 0, 3 * ns * sizeof(F2FScalar));
+  }
+
+  // Cover the structural nodes with patches
+  buildPatches();
+
+  // Assemble the displacement transfer
+  interp_update = 1;
+  updateInterpOperator();
+  MPI_Allreduce(MPI_IN_PLACE, &nfailed, 1, MPI_INT, MPI_SUM, global_comm);
+
+  // Size the persistent work arrays used by the transfers and products
+  getWorkArray(WORK_STRUCT_VECS, 3 * ns);
+  getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
+}
+
+/*
+  Get the number of bytes allocated by the transfer scheme
+*/
+size_t PURBF::getMemoryFootprint() {
+  size_t bytes = LDTransferScheme::getMemoryFootprint();
+  if (patch_ptr) {
+    bytes += npatches * (13 * sizeof(double) + 3 * sizeof(int));
+    bytes += (2 * patch_ptr[npatches] + 2) * sizeof(int);
+    bytes += patch_dup_ptr[patch_ptr[npatches]] * sizeof(int);
+  }
+  if (aero_ptr) {
+    bytes += (na + 1 + 3 * aero_ptr[na]) * sizeof(int);
+  }
+  return bytes;
+}
+
+/*
+  Free the patch data
+*/
+void PURBF::clearPatches() {
+  delete[] patch_centers;
+  delete[] patch_radii;
+  delete[] patch_ndims;
+  delete[] patch_dirs;
+  delete[] patch_ptr;
+  delete[] patch_nodes;
+  delete[] patch_dup_ptr;
+  delete[] patch_dups;
+  delete[] aero_ptr;
+  delete[] aero_patches;
+  delete[] patch_aero_ptr;
+  delete[] patch_aero_nodes;
+  delete[] patch_aero_entries;
+  npatches = 0;
+  patch_centers = NULL;
+  patch_radii = NULL;
+  patch_ndims = NULL;
+  patch_dirs = NULL;
+  patch_ptr = NULL;
+  patch_nodes = NULL;
+  patch_dup_ptr = NULL;
+  patch_dups = NULL;
+  aero_ptr = NULL;
+  aero_patches = NULL;
+  patch_aero_ptr = NULL;
+  patch_aero_nodes = NULL;
+  patch_aero_entries = NULL;
+}
+
+/*
+  Cover the structural nodes with overlapping patches centered on the leaf
+  bins of an octree and find the patches containing each aerodynamic node
+*/
+void PURBF::buildPatches() {
+  clearPatches();
+
+  // Without structural nodes, there are no patches and the transfers are zero
+  if (ns == 0) {
+    patch_ptr = new int[1];
+    patch_ptr[0] = 0;
+    patch_dup_ptr = new int[1];
+    patch_dup_ptr[0] = 0;
+    patch_aero_ptr = new int[1];
+    patch_aero_ptr[0] = 0;
+    aero_ptr = new int[na + 1];
+    memset(aero_ptr, 0, (na + 1) * sizeof(int));
+    return;
+  }
+
+  // Place a patch on each leaf bin of an octree with about npatch_points
+  // nodes in each leaf bin
+  Octree *octree = getStructOctree(npatch_points);
+  int *bins = new int[octree->nbins];
+  npatches = octree->findLeafBins(npatch_points, bins);
+  patch_centers = new double[3 * npatches];
+  patch_radii = new double[npatches];
+  for (int p = 0; p < npatches; p++) {
+    const double *corners = &octree->bin_corners[6 * bins[p]];
+    double d2 = 0.0;
+    for (int k = 0; k < 3; k++) {
+      patch_centers[3 * p + k] = 0.5 * (corners[k] + corners[3 + k]);
+      d2 += (corners[3 + k] - corners[k]) * (corners[3 + k] - corners[k]);
+    }
+    patch_radii[p] = 0.5 * overlap * sqrt(d2);
+  }
+  delete[] bins;
+
+  // Find the structural nodes in each patch, increasing the radius so that
+  // each patch has at least npatch_points nodes
+  KDTree *tree = new KDTree(Xs, ns);
+  int kmin = (npatch_points < ns ? npatch_points : ns);
+  int *indices = new int[kmin > 0 ? kmin : 1];
+  double *dist = new double[kmin > 0 ? kmin : 1];
+
+  patch_ptr = new int[npatches + 1];
+  patch_ptr[0] = 0;
+  for (int p = 0; p < npatches; p++) {
+    F2FScalar c[3];
+    for (int k = 0; k < 3; k++) {
+      c[k] = patch_centers[3 * p + k];
+    }
+
+    int count = tree->locateInRadius(patch_radii[p], c, 0, NULL);
+    if (count < kmin) {
+      tree->locateKClosest(kmin, indices, dist, c);
+      patch_radii[p] = 1.01 * sqrt(dist[kmin - 1]);
+      if (patch_radii[p] <= 0.0) {
+        patch_radii[p] = 1.0;
+      }
+      count = tree->locateInRadius(patch_radii[p], c, 0, NULL);
+    }
+    patch_ptr[p + 1] = patch_ptr[p] + count;
+  }
+
+  patch_nodes = new int[patch_ptr[npatches]];
+  for (int p = 0; p < npatches; p++) {
+    F2FScalar c[3];
+    for (int k = 0; k < 3; k++) {
+      c[k] = patch_centers[3 * p + k];
+    }
+    tree->locateInRadius(patch_radii[p], c, patch_ptr[p + 1] - patch_ptr[p],
+                         &patch_nodes[patch_ptr[p]]);
+  }
+  delete tree;
+  delete[] indices;
+  delete[] dist;
+
+  // Merge the coincident structural nodes of each patch, which would give
+  // identical rows of the interpolation system. The first node of each
+  // group is kept in patch_nodes and the others are stored in patch_dups.
+  int nentries = patch_ptr[npatches];
+  int *reps = new int[nentries];
+  int *unique_ptr = new int[npatches + 1];
+  unique_ptr[0] = 0;
+  for (int p = 0; p < npatches; p++) {
+    double tol = 1e-10 * patch_radii[p];
+    int count = 0;
+    for (int j = patch_ptr[p]; j < patch_ptr[p + 1]; j++) {
+      const F2FScalar *x = &Xs[3 * patch_nodes[j]];
+      reps[j] = j;
+      for (int k = patch_ptr[p]; k < j; k++) {
+        if (reps[k] != k) {
+          continue;
+        }
+        const F2FScalar *y = &Xs[3 * patch_nodes[k]];
+        double d2 = 0.0;
+        for (int l = 0; l < 3; l++) {
+          double d = F2FRealPart(x[l] - y[l]);
+          d2 += d * d;
+        }
+        if (d2 <= tol * tol) {
+          reps[j] = k;
+          break;
+        }
+      }
+      if (reps[j] == j) {
+        count++;
+      }
+    }
+    unique_ptr[p + 1] = unique_ptr[p] + count;
+  }
+
+  int nunique = unique_ptr[npatches];
+  int *unique_nodes = new int[nunique];
+  int *unique = new int[nentries];
+  for (int j = 0, u = 0; j < nentries; j++) {
+    if (reps[j] == j) {
+      unique[j] = u;
+      unique_nodes[u] = patch_nodes[j];
+      u++;
+    }
+  }
+
+  patch_dup_ptr = new int[nunique + 1];
+  memset(patch_dup_ptr, 0, (nunique + 1) * sizeof(int));
+  for (int j = 0; j < nentries; j++) {
+    if (reps[j] != j) {
+      patch_dup_ptr[unique[reps[j]] + 1]++;
+    }
+  }
+  for (int u = 0; u < nunique; u++) {
+    patch_dup_ptr[u + 1] += patch_dup_ptr[u];
+  }
+  patch_dups = new int[nentries - nunique];
+  for (int j = 0; j < nentries; j++) {
+    if (reps[j] != j) {
+      int u = unique[reps[j]];
+      patch_dups[patch_dup_ptr[u]] = patch_nodes[j];
+      patch_dup_ptr[u]++;
+    }
+  }
+  for (int u = nunique; u > 0; u--) {
+    patch_dup_ptr[u] = patch_dup_ptr[u - 1];
+  }
+  patch_dup_ptr[0] = 0;
+
+  delete[] patch_ptr;
+  delete[] patch_nodes;
+  patch_ptr = unique_ptr;
+  patch_nodes = unique_nodes;
+  delete[] reps;
+  delete[] unique;
+
+  // Find the directions spanned by the nodes of each patch from the
+  // eigenvectors of their covariance, so that the polynomial terms of
+  // flat or slender patches are independent
+  patch_ndims = new int[npatches];
+  patch_dirs = new double[9 * npatches];
+  for (int p = 0; p < npatches; p++) {
+    int m = patch_ptr[p + 1] - patch_ptr[p];
+    const int *nodes = &patch_nodes[patch_ptr[p]];
+    const double *c = &patch_centers[3 * p];
+    double R = patch_radii[p];
+
+    double mean[3] = {0.0, 0.0, 0.0};
+    for (int j = 0; j < m; j++) {
+      for (int k = 0; k < 3; k++) {
+        mean[k] += (F2FRealPart(Xs[3 * nodes[j] + k]) - c[k]) / (R * m);
+      }
+    }
+
+    double A[9];
+    memset(A, 0, 9 * sizeof(double));
+    for (int j = 0; j < m; j++) {
+      double y[3];
+      for (int k = 0; k < 3; k++) {
+        y[k] = (F2FRealPart(Xs[3 * nodes[j] + k]) - c[k]) / R - mean[k];
+      }
+      for (int k = 0; k < 3; k++) {
+        for (int l = 0; l < 3; l++) {
+          A[k + 3 * l] += y[k] * y[l];
+        }
+      }
+    }
+
+    int N = 3, lwork = 64, liwork = 32, info = 0;
+    double eigs[3], work[64];
+    int iwork[32];
+    LAPACKsyevd("V", "U", &N, A, &N, eigs, work, &lwork, iwork, &liwork, &info);
+
+    // Keep the directions with non-negligible spread, largest first
+    patch_ndims[p] = 0;
+    for (int k = 2; k >= 0; k--) {
+      if (eigs[k] > 1e-10 * eigs[2] && eigs[2] > 0.0) {
+        memcpy(&patch_dirs[9 * p + 3 * patch_ndims[p]], &A[3 * k],
+               3 * sizeof(double));
+        patch_ndims[p]++;
+      }
+    }
+  }
+
+  // Find the patches containing each aerodynamic node. Nodes outside of all
+  // patches are assigned to the patch with the nearest scaled distance.
+  double max_radius = 0.0;
+  F2FScalar *centers = new F2FScalar[3 * npatches];
+  for (int p = 0; p < npatches; p++) {
+    for (int k = 0; k < 3; k++) {
+      centers[3 * p + k] = patch_centers[3 * p + k];
+    }
+    if (patch_radii[p] > max_radius) {
+      max_radius = patch_radii[p];
+    }
+  }
+  KDTree *ctree = new KDTree(centers, npatches);
+
+  int max_size = 16;
+  int *cands = new int[max_size];
+  aero_ptr = new int[na + 1];
+  aero_ptr[0] = 0;
+  for (int pass = 0; pass < 2; pass++) {
+    for (int i = 0; i < na; i++) {
+      int n = ctree->locateInRadius(max_radius, &Xa[3 * i], max_size, cands);
+      if (n > max_size) {
+        max_size = 2 * n;
+        delete[] cands;
+        cands = new int[max_size];
+        ctree->locateInRadius(max_radius, &Xa[3 * i], max_size, cands);
+      }
+
+      int count = 0;
+      for (int k = 0; k < n; k++) {
+        int p = cands[k];
+        double d2 = 0.0;
+        for (int l = 0; l < 3; l++) {
+          double d = F2FRealPart(Xa[3 * i + l]) - patch_centers[3 * p + l];
+          d2 += d * d;
+        }
+        if (d2 < patch_radii[p] * patch_radii[p]) {
+          if (pass == 1) {
+            aero_patches[aero_ptr[i] + count] = p;
+          }
+          count++;
+        }
+      }
+
+      if (count == 0 && npatches > 0) {
+        int best = 0;
+        double tbest = 0.0;
+        for (int p = 0; p < npatches; p++) {
+          double d2 = 0.0;
+          for (int l = 0; l < 3; l++) {
+            double d = F2FRealPart(Xa[3 * i + l]) - patch_centers[3 * p + l];
+            d2 += d * d;
+          }
+          double t = sqrt(d2) / patch_radii[p];
+          if (p == 0 || t < tbest) {
+            best = p;
+            tbest = t;
+          }
+        }
+        if (pass == 1) {
+          aero_patches[aero_ptr[i]] = best;
+        }
+        count = 1;
+      }
+
+      if (pass == 0) {
+        aero_ptr[i + 1] = aero_ptr[i] + count;
+      }
+    }
+
+    if (pass == 0) {
+      aero_patches = new int[aero_ptr[na]];
+    }
+  }
+  delete ctree;
+  delete[] centers;
+  delete[] cands;
+
+  // Find the aerodynamic nodes in each patch
+  patch_aero_ptr = new int[npatches + 1];
+  memset(patch_aero_ptr, 0, (npatches + 1) * sizeof(int));
+  for (int ip = 0; ip < aero_ptr[na]; ip++) {
+    patch_aero_ptr[aero_patches[ip] + 1]++;
+  }
+  for (int p = 0; p < npatches; p++) {
+    patch_aero_ptr[p + 1] += patch_aero_ptr[p];
+  }
+  patch_aero_nodes = new int[aero_ptr[na]];
+  patch_aero_entries = new int[aero_ptr[na]];
+  for (int i = 0; i < na; i++) {
+    for (int ip = aero_ptr[i]; ip < aero_ptr[i + 1]; ip++) {
+      int p = aero_patches[ip];
+      int k = patch_aero_ptr[p];
+      patch_aero_nodes[k] = i;
+      patch_aero_entries[k] = ip;
+      patch_aero_ptr[p]++;
+    }
+  }
+  for (int p = npatches; p > 0; p--) {
+    patch_aero_ptr[p] = patch_aero_ptr[p - 1];
+  }
+  patch_aero_ptr[0] = 0;
+}
+
+/*
+  Assemble and factor the local interpolation system of a patch
+
+  [ M    P ]
+  [ P^T  0 ]
+
+  where M contains the radial basis function between the structural nodes of
+  the patch and P contains the polynomial terms at the nodes
+
+  Arguments
+  ---------
+  p    : patch index
+
+  Returns
+  -------
+  C    : LU factorization of the system (column-major)
+  ipiv : pivots of the factorization
+  fail : nonzero if the system is singular
+*/
+int PURBF::factorPatch(int p, F2FScalar *C, int *ipiv) {
+  int m = patch_ptr[p + 1] - patch_ptr[p];
+  int n = m + 1 + patch_ndims[p];
+  const int *nodes = &patch_nodes[patch_ptr[p]];
+
+  // Column j holds the basis and polynomial terms at node j, the remaining
+  // columns are the transpose of the polynomial terms
+  memset(C, 0, n * n * sizeof(F2FScalar));
+  for (int j = 0; j < m; j++) {
+    evalPatchBasis(p, &Xs[3 * nodes[j]], &C[n * j]);
+    for (int l = m; l < n; l++) {
+      C[j + n * l] = C[l + n * j];
+    }
+  }
+
+  int info = 0;
+  LAPACKgetrf(&n, &n, C, &n, ipiv, &info);
+  if (info) {
+    printf("PURBF error: Factorization of the system for patch %d failed\n", p);
+  }
+
+  return (info != 0);
+}
+
+/*
+  Evaluate the radial basis functions and polynomial terms of a patch at a
+  point
+
+  Arguments
+  ---------
+  p : patch index
+  x : point
+
+  Returns
+  -------
+  e : the basis functions of the structural nodes of the patch followed by
+      the polynomial terms
+*/
+void PURBF::evalPatchBasis(int p, const F2FScalar *x, F2FScalar *e) {
+  int m = patch_ptr[p + 1] - patch_ptr[p];
+  const int *nodes = &patch_nodes[patch_ptr[p]];
+  double R = patch_radii[p];
+
+  for (int j = 0; j < m; j++) {
+    const F2FScalar *y = &Xs[3 * nodes[j]];
+    F2FScalar r2 =
+        ((x[0] - y[0]) * (x[0] - y[0]) + (x[1] - y[1]) * (x[1] - y[1]) +
+         (x[2] - y[2]) * (x[2] - y[2])) /
+        (R * R);
+    e[j] = thinPlateSpline(r2);
+  }
+
+  const double *c = &patch_centers[3 * p];
+  e[m] = 1.0;
+  for (int k = 0; k < patch_ndims[p]; k++) {
+    const double *d = &patch_dirs[9 * p + 3 * k];
+    e[m + 1 + k] =
+        (d[0] * (x[0] - c[0]) + d[1] * (x[1] - c[1]) + d[2] * (x[2] - c[2])) /
+        R;
+  }
+}
+
+/*
+  Compute the Shepard weights of the patches containing an aerodynamic node
+  and optionally their derivatives w.r.t. the node location
+
+  Arguments
+  ---------
+  i  : aerodynamic node
+
+  Returns
+  -------
+  w  : weights of the patches containing the node
+  dw : derivatives of the weights (3 per patch) or NULL
+*/
+void PURBF::computeBlendWeights(int i, F2FScalar *w, F2FScalar *dw) {
+  const F2FScalar *x = &Xa[3 * i];
+  int start = aero_ptr[i];
+  int len = aero_ptr[i + 1] - start;
+
+  F2FScalar sum = 0.0;
+  F2FScalar dsum[3] = {0.0, 0.0, 0.0};
+  for (int k = 0; k < len; k++) {
+    int p = aero_patches[start + k];
+    const double *c = &patch_centers[3 * p];
+    double R = patch_radii[p];
+
+    F2FScalar d[3] = {x[0] - c[0], x[1] - c[1], x[2] - c[2]};
+    F2FScalar t = sqrt(d[0] * d[0] + d[1] * d[1] + d[2] * d[2]) / R;
+    w[k] = wendlandC2(t);
+    sum += w[k];
+
+    if (dw) {
+      // d(psi)/dx = -20*(1 - t)^3*(x - c)/R^2
+      F2FScalar s = 0.0;
+      if (F2FRealPart(t) < 1.0) {
+        s = -20.0 * (1.0 - t) * (1.0 - t) * (1.0 - t) / (R * R);
+      }
+      for (int l = 0; l < 3; l++) {
+        dw[3 * k + l] = s * d[l];
+        dsum[l] += dw[3 * k + l];
+      }
+    }
+  }
+
+  // Use equal weights for nodes outside of all the patches
+  if (F2FRealPart(sum) <= 0.0) {
+    for (int k = 0; k < len; k++) {
+      w[k] = 1.0 / len;
+    }
+    if (dw) {
+      memset(dw, 0, 3 * len * sizeof(F2FScalar));
+    }
+    return;
+  }
+
+  for (int k = 0; k < len; k++) {
+    w[k] = w[k] / sum;
+    if (dw) {
+      for (int l = 0; l < 3; l++) {
+        dw[3 * k + l] = (dw[3 * k + l] - w[k] * dsum[l]) / sum;
+      }
+    }
+  }
+}
+
+/*
+  Assemble the displacement transfer from the current aerodynamic and
+  structural node locations. The displacement of each aerodynamic node is
+  the blend of the local interpolants of the patches that contain it.
+*/
+void PURBF::updateInterpOperator() {
+  // Check if struct nodes locations need to be redistributed
+  distributeStructuralMesh();
+
+  if (interp && !interp_update) {
+    return;
+  }
+
+  // Each aerodynamic node is connected to the nodes of its patches,
+  // including the merged coincident nodes
+  int nentries = aero_ptr[na];
+  int *entry_ptr = new int[nentries + 1];
+  entry_ptr[0] = 0;
+  for (int ip = 0; ip < nentries; ip++) {
+    int p = aero_patches[ip];
+    entry_ptr[ip + 1] = entry_ptr[ip] + patch_ptr[p + 1] - patch_ptr[p] +
+                        patch_dup_ptr[patch_ptr[p + 1]] -
+                        patch_dup_ptr[patch_ptr[p]];
+  }
+  int *conn_ptr = new int[na + 1];
+  for (int i = 0; i <= na; i++) {
+    conn_ptr[i] = entry_ptr[aero_ptr[i]];
+  }
+  int *conn = new int[entry_ptr[nentries]];
+  F2FScalar *weights = new F2FScalar[entry_ptr[nentries]];
+  for (int ip = 0; ip < nentries; ip++) {
+    int p = aero_patches[ip];
+    int *c = &conn[entry_ptr[ip]];
+    for (int j = patch_ptr[p]; j < patch_ptr[p + 1]; j++) {
+      *c++ = patch_nodes[j];
+      for (int k = patch_dup_ptr[j]; k < patch_dup_ptr[j + 1]; k++) {
+        *c++ = patch_dups[k];
+      }
+    }
+  }
+
+  // Compute the blending weights
+  F2FScalar *W = new F2FScalar[nentries];
+  for (int i = 0; i < na; i++) {
+    computeBlendWeights(i, &W[aero_ptr[i]], NULL);
+  }
+
+  // Evaluate the local interpolants at the aerodynamic nodes of each patch.
+  // Each patch writes to its own entries, so the patches are independent.
+  int fail = 0;
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(nthreads) schedule(dynamic) \
+    reduction(+ : fail)
+#endif
+  for (int p = 0; p < npatches; p++) {
+    int nrhs = patch_aero_ptr[p + 1] - patch_aero_ptr[p];
+    if (nrhs == 0) {
+      continue;
+    }
+
+    int m = patch_ptr[p + 1] - patch_ptr[p];
+    int n = m + 1 + patch_ndims[p];
+    F2FScalar *C = new F2FScalar[n * n];
+    int *ipiv = new int[n];
+    fail += factorPatch(p, C, ipiv);
+
+    // Solve C*h = e for the basis at each aerodynamic node, C is symmetric
+    F2FScalar *E = new F2FScalar[n * nrhs];
+    for (int k = 0; k < nrhs; k++) {
+      int i = patch_aero_nodes[patch_aero_ptr[p] + k];
+      evalPatchBasis(p, &Xa[3 * i], &E[n * k]);
+    }
+    int info = 0;
+    LAPACKgetrs("N", &n, &nrhs, C, &n, ipiv, E, &n, &info);
+
+    // The weight of a merged node is split evenly between its coincident
+    // nodes
+    const int *dup_ptr = &patch_dup_ptr[patch_ptr[p]];
+    for (int k = 0; k < nrhs; k++) {
+      int ip = patch_aero_entries[patch_aero_ptr[p] + k];
+      F2FScalar *w = &weights[entry_ptr[ip]];
+      for (int j = 0; j < m; j++) {
+        int ndups = dup_ptr[j + 1] - dup_ptr[j];
+        F2FScalar wj = W[ip] * E[n * k + j] / (ndups + 1.0);
+        for (int l = 0; l <= ndups; l++) {
+          *w++ = wj;
+        }
+      }
+    }
+
+    delete[] C;
+    delete[] ipiv;
+    delete[] E;
+  }
+
+  if (interp) {
+    delete interp;
+  }
+  interp = new InterpOperator(1, na, ns, conn_ptr, conn, weights);
+  interp_update = 0;
+  nfailed = fail;
+
+  delete[] entry_ptr;
+  delete[] conn_ptr;
+  delete[] conn;
+  delete[] weights;
+  delete[] W;
+}
+
+/*
+  Add the derivative of J = lam^{T}*H*U w.r.t. the aerodynamic and structural
+  node locations, where H is the displacement transfer
+
+  Arguments
+  ---------
+  scale   : scalar multiple of the derivative
+  lam     : aerodynamic vector
+  U       : structural vector (all structural nodes)
+
+  Returns
+  -------
+  xa_sens : derivative w.r.t. the aerodynamic node locations or NULL
+  xs_sens : derivative w.r.t. the structural node locations or NULL
+*/
+void PURBF::addShapeSens(F2FScalar scale, const F2FScalar *lam,
+                         const F2FScalar *U, F2FScalar *xa_sens,
+                         F2FScalar *xs_sens) {
+  // Check if struct nodes locations need to be redistributed
+  distributeStructuralMesh();
+
+  // The blending weights and lam^{T} times the local interpolant of each
+  // aerodynamic node and patch
+  int nentries = aero_ptr[na];
+  F2FScalar *W = new F2FScalar[nentries];
+  F2FScalar *g = new F2FScalar[nentries];
+  for (int i = 0; i < na; i++) {
+    computeBlendWeights(i, &W[aero_ptr[i]], NULL);
+  }
+
+  for (int p = 0; p < npatches; p++) {
+    int nrhs = patch_aero_ptr[p + 1] - patch_aero_ptr[p];
+    if (nrhs == 0) {
+      continue;
+    }
+
+    int m = patch_ptr[p + 1] - patch_ptr[p];
+    int ndims = patch_ndims[p];
+    int n = m + 1 + ndims;
+    const int *nodes = &patch_nodes[patch_ptr[p]];
+    const double *c = &patch_centers[3 * p];
+    const double *dirs = &patch_dirs[9 * p];
+    double R = patch_radii[p];
+
+    F2FScalar *C = new F2FScalar[n * n];
+    int *ipiv = new int[n];
+    factorPatch(p, C, ipiv);
+
+    // Compute the coefficients of the local interpolant of U, which takes
+    // the average of U over the coincident nodes of the merged nodes
+    F2FScalar *coef = new F2FScalar[3 * n];
+    F2FScalar *q = new F2FScalar[3 * n];
+    F2FScalar *e = new F2FScalar[n];
+    memset(coef, 0, 3 * n * sizeof(F2FScalar));
+    memset(q, 0, 3 * n * sizeof(F2FScalar));
+    const int *dup_ptr = &patch_dup_ptr[patch_ptr[p]];
+    for (int j = 0; j < m; j++) {
+      for (int d = 0; d < 3; d++) {
+        coef[j + n * d] = U[3 * nodes[j] + d];
+        for (int k = dup_ptr[j]; k < dup_ptr[j + 1]; k++) {
+          coef[j + n * d] += U[3 * patch_dups[k] + d];
+        }
+        coef[j + n * d] /= (dup_ptr[j + 1] - dup_ptr[j] + 1.0);
+      }
+    }
+    int nvecs = 3, info = 0;
+    LAPACKgetrs("N", &n, &nvecs, C, &n, ipiv, coef, &n, &info);
+
+    // Scaled structural node locations
+    F2FScalar *y = new F2FScalar[3 * m];
+    for (int j = 0; j < m; j++) {
+      for (int l = 0; l < 3; l++) {
+        y[3 * j + l] = (Xs[3 * nodes[j] + l] - c[l]) / R;
+      }
+    }
+
+    for (int k = 0; k < nrhs; k++) {
+      int i = patch_aero_nodes[patch_aero_ptr[p] + k];
+      int ip = patch_aero_entries[patch_aero_ptr[p] + k];
+      const F2FScalar *li = &lam[3 * i];
+
+      // Evaluate the local interpolant
+      evalPatchBasis(p, &Xa[3 * i], e);
+      g[ip] = 0.0;
+      for (int d = 0; d < 3; d++) {
+        F2FScalar s = 0.0;
+        for (int j = 0; j < n; j++) {
+          s += e[j] * coef[j + n * d];
+          q[j + n * d] += W[ip] * li[d] * e[j];
+        }
+        g[ip] += li[d] * s;
+      }
+
+      // Add the contributions from the basis at the aerodynamic node
+      F2FScalar xi[3];
+      for (int l = 0; l < 3; l++) {
+        xi[l] = (Xa[3 * i + l] - c[l]) / R;
+      }
+      F2FScalar dx[3] = {0.0, 0.0, 0.0};
+      for (int j = 0; j < m; j++) {
+        F2FScalar r[3] = {xi[0] - y[3 * j], xi[1] - y[3 * j + 1],
+                          xi[2] - y[3 * j + 2]};
+        F2FScalar r2 = r[0] * r[0] + r[1] * r[1] + r[2] * r[2];
+        if (F2FRealPart(r2) == 0.0) {
+          continue;
+        }
+        F2FScalar a =
+            W[ip] * (log(r2) + 1.0) *
+            (li[0] * coef[j] + li[1] * coef[j + n] + li[2] * coef[j + 2 * n]) /
+            R;
+        if (xs_sens) {
+          F2FScalar *xs = &xs_sens[3 * nodes[j]];
+          xs[0] -= scale * a * r[0];
+          xs[1] -= scale * a * r[1];
+          xs[2] -= scale * a * r[2];
+        }
+        dx[0] += a * r[0];
+        dx[1] += a * r[1];
+        dx[2] += a * r[2];
+      }
+      if (xa_sens) {
+        for (int kd = 0; kd < ndims; kd++) {
+          F2FScalar a =
+              W[ip] *
+              (li[0] * coef[m + 1 + kd] + li[1] * coef[m + 1 + kd + n] +
+               li[2] * coef[m + 1 + kd + 2 * n]) /
+              R;
+          for (int l = 0; l < 3; l++) {
+            dx[l] += a * dirs[3 * kd + l];
+          }
+        }
+        for (int l = 0; l < 3; l++) {
+          xa_sens[3 * i + l] += scale * dx[l];
+        }
+      }
+    }
+
+    // Add the contributions from the local interpolation system
+    if (xs_sens) {
+      // z = C^{-T}*q, C is symmetric
+      LAPACKgetrs("N", &n, &nvecs, C, &n, ipiv, q, &n, &info);
+      const F2FScalar *z = q;
+
+      for (int j = 0; j < m; j++) {
+        F2FScalar dy[3] = {0.0, 0.0, 0.0};
+        for (int k = 0; k < m; k++) {
+          F2FScalar r[3] = {y[3 * j] - y[3 * k], y[3 * j + 1] - y[3 * k + 1],
+                            y[3 * j + 2] - y[3 * k + 2]};
+          F2FScalar r2 = r[0] * r[0] + r[1] * r[1] + r[2] * r[2];
+          if (F2FRealPart(r2) == 0.0) {
+            continue;
+          }
+          F2FScalar a = 0.0;
+          for (int d = 0; d < 3; d++) {
+            a +=
+                z[j + n * d] * coef[k + n * d] + z[k + n * d] * coef[j + n * d];
+          }
+          a *= (log(r2) + 1.0);
+          dy[0] += a * r[0];
+          dy[1] += a * r[1];
+          dy[2] += a * r[2];
+        }
+        for (int kd = 0; kd < ndims; kd++) {
+          F2FScalar a = 0.0;
+          for (int d = 0; d < 3; d++) {
+            a += z[j + n * d] * coef[m + 1 + kd + n * d] +
+                 z[m + 1 + kd + n * d] * coef[j + n * d];
+          }
+          for (int l = 0; l < 3; l++) {
+            dy[l] += a * dirs[3 * kd + l];
+          }
+        }
+
+        F2FScalar *xs = &xs_sens[3 * nodes[j]];
+        for (int l = 0; l < 3; l++) {
+          xs[l] -= scale * dy[l] / R;
+        }
+      }
+    }
+
+    delete[] C;
+    delete[] ipiv;
+    delete[] coef;
+    delete[] q;
+    delete[] e;
+    delete[] y;
+  }
+
+  // Add the contributions from the blending weights
+  if (xa_sens) {
+    int max_len = 0;
+    for (int i = 0; i < na; i++) {
+      if (aero_ptr[i + 1] - aero_ptr[i] > max_len) {
+        max_len = aero_ptr[i + 1] - aero_ptr[i];
+      }
+    }
+    F2FScalar *w = new F2FScalar[max_len];
+    F2FScalar *dw = new F2FScalar[3 * max_len];
+    for (int i = 0; i < na; i++) {
+      computeBlendWeights(i, w, dw);
+      for (int ip = aero_ptr[i]; ip < aero_ptr[i + 1]; ip++) {
+        const F2FScalar *dwk = &dw[3 * (ip - aero_ptr[i])];
+        for (int l = 0; l < 3; l++) {
+          xa_sens[3 * i + l] += scale * g[ip] * dwk[l];
+        }
+      }
+    }
+    delete[] w;
+    delete[] dw;
+  }
+
+  delete[] W;
+  delete[] g;
+}
+
+/*
+  Computes the displacements of the aerodynamic surface nodes by blending the
+  local interpolants of the structural displacements
+
+  Arguments
+  ---------
+  struct_disps : structural node displacements
+
+  Returns
+  -------
+  aero_disps   : aerodynamic node displacements
+*/
+void PURBF::transferDisps(const F2FScalar *struct_disps,
+                          F2FScalar *aero_disps) {
+  // Check if struct nodes locations need to be redistributed and
+  // reassemble the transfer if the nodes have moved
+  updateInterpOperator();
+
+  // Copy prescribed displacements into displacement vector
+  structGatherBcast(3 * ns_local, struct_disps, 3 * ns, Us);
+
+  // Apply the displacement transfer to each component
+  interp->mult(3, 1.0, Us, aero_disps, nthreads);
+}
+
+/*
+  Computes the loads on the structural nodes with the transpose of the
+  displacement transfer, so the transfer is conservative
+
+  Arguments
+  ---------
+  aero_loads   : loads on aerodynamic surface nodes
+
+  Returns
+  -------
+  struct_loads : loads on structural nodes
+*/
+void PURBF::transferLoads(const F2FScalar *aero_loads,
+                          F2FScalar *struct_loads) {
+  // Copy prescribed aero loads into member variable
+  memcpy(Fa, aero_loads, 3 * na * sizeof(F2FScalar));
+
+  // Reassemble the transfer if the nodes have moved
+  updateInterpOperator();
+
+  // Apply the transpose of the displacement transfer
+  F2FScalar *struct_loads_global = getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
+  interp->multTranspose(3, 1.0, Fa, struct_loads_global, nthreads);
+
+  // distribute the structural loads
+  structAddScatter(3 * ns, struct_loads_global, 3 * ns_local, struct_loads);
+}
+
+/*
+  Apply the action of the displacement transfer w.r.t structural displacments
+  Jacobian to the input vector
+
+  Arguments
+  ----------
+  vecs  : input vector
+
+  Returns
+  --------
+  prods : output vector
+*/
+void PURBF::applydDduS(const F2FScalar *vecs, F2FScalar *prods) {
+  transferDisps(vecs, prods);
+
+  // Reverse sign due to definition of diplacement transfer residual
+  for (int i = 0; i < 3 * na; i++) {
+    prods[i] *= -1.0;
+  }
+}
+
+/*
+  Apply the action of the displacement transfer w.r.t structural displacements
+  transpose Jacobian to the input vector
+
+  Arguments
+  ----------
+  vecs  : input vector
+
+  Returns
+  --------
+  prods : output vector
+*/
+void PURBF::applydDduSTrans(const F2FScalar *vecs, F2FScalar *prods) {
+  // Apply the transpose without overwriting the stored aerodynamic loads
+  updateInterpOperator();
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
+  interp->multTranspose(3, -1.0, vecs, prods_global, nthreads);
+  structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
+}
+
+/*
+  Apply the action of the load transfer w.r.t structural displacements Jacobian
+  to the input vector
+
+  Arguments
+  ----------
+  vecs  : input vector
+
+  Returns
+  --------
+  prods : output vector
+*/
+void PURBF::applydLduS(const F2FScalar *vecs, F2FScalar *prods) {
+  memset(prods, 0, 3 * ns_local * sizeof(F2FScalar));
+}
+
+/*
+  Apply the action of the load transfer w.r.t structural displacements
+  transpose Jacobian to the input vector
+
+  Arguments
+  ----------
+  vecs  : input vector
+
+  Returns
+  --------
+  prods : output vector
+*/
+void PURBF::applydLduSTrans(const F2FScalar *vecs, F2FScalar *prods) {
+  memset(prods, 0, 3 * ns_local * sizeof(F2FScalar));
+}
+
+/*
+  Apply the action of the displacement transfer w.r.t initial aerodynamic
+  surface node locations Jacobian to the right of the transposed input vector
+
+  Arguments
+  ----------
+  vecs  : input vector
+
+  Returns
+  --------
+  prods : output vector
+*/
+void PURBF::applydDdxA0(const F2FScalar *vecs, F2FScalar *prods) {
+  memset(prods, 0, 3 * na * sizeof(F2FScalar));
+  addShapeSens(-1.0, vecs, Us, prods, NULL);
+}
+
+/*
+  Apply the action of the displacement transfer w.r.t initial structural node
+  locations Jacobian to the right of the transposed input vector
+
+  Arguments
+  ----------
+  vecs  : input vector
+
+  Returns
+  --------
+  prods : output vector
+*/
+void PURBF::applydDdxS0(const F2FScalar *vecs, F2FScalar *prods) {
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
+  memset(prods_global, 0, 3 * ns * sizeof(F2FScalar));
+  addShapeSens(-1.0, vecs, Us, NULL, prods_global);
+
+  // distribute the results to the structural processors
+  structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
+}
+
+/*
+  Apply the action of the load transfer w.r.t initial aerodynamic surface node
+  locations Jacobian to the right of the transposed input vector
+
+  Arguments
+  ----------
+  vecs  : input vector
+
+  Returns
+  --------
+  prods : output vector
+*/
+void PURBF::applydLdxA0(const F2FScalar *vecs, F2FScalar *prods) {
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns);
+  structGatherBcast(3 * ns_local, vecs, 3 * ns, vecs_global);
+
+  memset(prods, 0, 3 * na * sizeof(F2FScalar));
+  addShapeSens(-1.0, Fa, vecs_global, prods, NULL);
+}
+
+/*
+  Apply the action of the load transfer w.r.t initial structural node locations
+  Jacobian to the right of the transposed input vector
+
+  Arguments
+  ----------
+  vecs  : input vector
+
+  Returns
+  --------
+  prods : output vector
+*/
+void PURBF::applydLdxS0(const F2FScalar *vecs, F2FScalar *prods) {
+  F2FScalar *vecs_global = getWorkArray(WORK_STRUCT_VECS, 3 * ns);
+  structGatherBcast(3 * ns_local, vecs, 3 * ns, vecs_global);
+
+  F2FScalar *prods_global = getWorkArray(WORK_STRUCT_PRODS, 3 * ns);
+  memset(prods_global, 0, 3 * ns * sizeof(F2FScalar));
+  addShapeSens(-1.0, Fa, vecs_global, NULL, prods_global);
+
+  // distribute the results to the structural processors
+  structAddScatter(3 * ns, prods_global, 3 * ns_local, prods);
+}
+
+/*
+  Thin plate spline radial basis function phi = r^2*log(r) of the squared
+  scaled distance r2 between the points
+*/
+F2FScalar PURBF::thinPlateSpline(F2FScalar r2) {
+  if (F2FRealPart(r2) == 0.0) {
+    return 0.0;
+  }
+  return 0.5 * r2 * log(r2);
+}
+
+/*
+  Wendland C2 function (1 - t)^{4}*(4*t + 1) used to blend the patches, where
+  t is the distance to the patch center divided by the patch radius
+*/
+F2FScalar PURBF::wendlandC2(F2FScalar t) {
+  if (F2FRealPart(t) >= 1.0) {
+    return 0.0;
+  }
+  F2FScalar s = (1.0 - t) * (1.0 - t);
+  return s * s * (4.0 * t + 1.0);
+}
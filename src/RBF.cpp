@@ -24,18 +24,24 @@
 #include <math.h>
 #include <stdio.h>
 
+#include <algorithm>
 #include <cstdlib>
 #include <cstring>
+#include <functional>
 
+#include "KDTree.h"
 #include "Octree.h"
 #include "funtofemlapack.h"
 
 RBF::RBF(MPI_Comm global_comm, MPI_Comm struct_comm, int struct_root,
          MPI_Comm aero_comm, int aero_root, RbfType rbf_type,
-         int sampling_ratio)
+         int sampling_ratio, double support_radius)
     : LDTransferScheme(global_comm, struct_comm, struct_root, aero_comm,
-                       aero_root) {
+                       aero_root),
+      support_radius(support_radius) {
   // Point to the selected type of RBF
+  phi = NULL;
+  phi_compact = NULL;
   switch (rbf_type) {
     case GAUSSIAN:
       phi = &gaussian;
@@ -49,11 +55,36 @@ RBF::RBF(MPI_Comm global_comm, MPI_Comm struct_comm, int struct_root,
     case THIN_PLATE_SPLINE:
       phi = &thinPlateSpline;
       break;
+    case WENDLAND_C0:
+      phi_compact = &wendlandC0;
+      break;
+    case WENDLAND_C2:
+      phi_compact = &wendlandC2;
+      break;
+    case WENDLAND_C4:
+      phi_compact = &wendlandC4;
+      break;
   }
 
   // Initialize sampling data
   denominator = sampling_ratio;
   sample_ids = NULL;
+  greedy_tol = 0.0;
+  greedy_max_centers = 0;
+  sampled_ns = 0;
+
+  // Initialize the interpolation data
+  interp_mat = NULL;
+  reuse_factor = 0;
+  C_lu = Xfactor = NULL;
+  C_ipiv = NULL;
+  npoly = 0;
+  M_rowp = M_cols = NULL;
+  M_vals = NULL;
+  A_rowp = A_cols = NULL;
+  A_vals = NULL;
+  Ps = Pa = Z = S = NULL;
+  S_ipiv = NULL;
 
   // Initialize object id
   object_id = TransferScheme::object_count++;
@@ -72,6 +103,13 @@ RBF::~RBF() {
     delete[] sample_ids;
   }
 
+  // Free the interpolation data
+  if (interp_mat) {
+    delete[] interp_mat;
+  }
+  clearInterpFactor();
+  clearSparseInterpolation();
+
   int rank;
   MPI_Comm_rank(global_comm, &rank);
   if (rank == struct_root) {
@@ -79,6 +117,41 @@ RBF::~RBF() {
   }
 }
 
+/*
+  Select the RBF centers greedily from the structural nodes instead of
+  sampling one node from each octree leaf bin
+
+  Arguments
+  ---------
+  tol         : tolerance on the relative residual of the test fields (the
+                greedy selection is disabled if not positive)
+  max_centers : maximum number of centers (no limit if not positive)
+*/
+void RBF::setGreedySampling(double tol, int max_centers) {
+  greedy_tol = tol;
+  greedy_max_centers = max_centers;
+}
+
+/*
+  Keep the factorization of the interpolation system for the global bases
+  between calls to initialize
+
+  When the factorization is reused, the sampled structural nodes are kept as
+  long as the number of structural nodes is unchanged. Moving the aerodynamic
+  nodes then only requires back-substitutions, and moving a few sampled
+  structural nodes requires a low-rank update of the factorization.
+
+  Arguments
+  ---------
+  reuse : flag to keep the factorization
+*/
+void RBF::setFactorReuse(int reuse) {
+  reuse_factor = reuse;
+  if (!reuse_factor) {
+    clearInterpFactor();
+  }
+}
+
 /*
   Sample the structural nodes and build the interpolation matrix
 */
@@ -104,60 +177,81 @@ void RBF::initialize() {
     memset(Us, 0, 3 * ns * sizeof(F2FScalar));
   }
 
-  // Sample the structural nodes
-  if (denominator > 1) {
-    printf("Transfer scheme [%i]: attempting to sample nodes using octree...\n",
-           object_id);
+  // Sample the structural nodes, unless the factorization is reused and the
+  // structural mesh still has the same number of nodes
+  if (!(reuse_factor && sample_ids && ns == sampled_ns)) {
+    clearInterpFactor();
+    sampleStructNodes();
+  }
 
-    // Generate an octree
-    int min_point_count = denominator;
-    double min_edge_length = 1.0e-6;
-    int max_tree_depth = 50;
-    Octree *octree =
-        new Octree(Xs, ns, min_point_count, min_edge_length, max_tree_depth);
-    octree->generate();
-    nsub = octree->nleaf;
-    sample_ids = new int[nsub];
+  // Build the sparse interpolation for the compactly supported bases
+  if (phi_compact) {
+    buildSparseInterpolation();
+    return;
+  }
 
-    // Randomly sample one point from each leaf bin of the octree
-    for (int i = 0; i < nsub; i++) {
-      int bin_id = octree->leaf_bins[i];
-      int num_bin_pts = 0;
-      int *bin_points_ids = new int[1];  // must allocate array to start
-
-      // First find the ids of the points in each leaf bin
-      for (int j = 0; j < ns; j++) {
-        if (octree->points_bins[j] == bin_id) {
-          if (num_bin_pts > 0) {
-            int *new_bin_points_ids = new int[num_bin_pts + 1];
-            memcpy(new_bin_points_ids, bin_points_ids,
-                   num_bin_pts * sizeof(int));
-            delete[] bin_points_ids;
-            bin_points_ids = new_bin_points_ids;
-          }
-          bin_points_ids[num_bin_pts] = j;
-          num_bin_pts++;
-        }
-      }
+  // Allocate memory for interpolation matrix
+  if (interp_mat) {
+    delete[] interp_mat;
+  }
+  interp_mat = new F2FScalar[na * nsub];
 
-      // Then randomly pick one id
-      double h = 1.0 / num_bin_pts;
-      double random_num = (1.0 * rand()) / RAND_MAX;
-      int k = 0;
-      while (k < num_bin_pts) {
-        if (random_num < (k + 1) * h) break;
-        k++;
-      }
+  // Build the interpolation matrix
+  buildInterpolationMatrix();
+}
+
+/*
+  Sample the structural nodes used as the centers of the radial basis
+  functions
+*/
+void RBF::sampleStructNodes() {
+  if (sample_ids) {
+    delete[] sample_ids;
+  }
+  sample_ids = NULL;
 
-      // Add id to array of sampled ids
-      sample_ids[i] = bin_points_ids[k];
+  // Greedy selection needs the interpolation system of a global basis
+  bool greedy = greedy_tol > 0.0;
+  if (greedy && phi_compact) {
+    printf(
+        "RBF warning: greedy center selection is not available for the "
+        "compactly supported bases\n");
+    greedy = false;
+  }
 
-      // Free allocated memory
-      delete[] bin_points_ids;
+  if (denominator > 1 || greedy) {
+    printf("Transfer scheme [%i]: attempting to sample nodes using octree...\n",
+           object_id);
+
+    // Use the leaf bins of the octree of the structural nodes, whose points
+    // are consecutive in the Morton order of the octree
+    int min_point_count = denominator > 1 ? denominator : 8;
+    Octree *octree = getStructOctree(min_point_count);
+    int *leaf_bins = new int[octree->nbins];
+    int nleaf = octree->findLeafBins(min_point_count, leaf_bins);
+    int *leaf_ptr = new int[nleaf + 1];
+    for (int i = 0; i < nleaf; i++) {
+      leaf_ptr[i] = octree->bin_start[leaf_bins[i]];
+    }
+    leaf_ptr[nleaf] = ns;
+    const int *leaf_pts = octree->point_ids;
+
+    if (greedy) {
+      // Add centers where the interpolation residual is largest
+      selectCentersGreedy(nleaf, leaf_ptr, leaf_pts);
+    } else {
+      // Randomly sample one point from each leaf bin of the octree
+      nsub = nleaf;
+      sample_ids = new int[nsub];
+      for (int i = 0; i < nsub; i++) {
+        int num_bin_pts = leaf_ptr[i + 1] - leaf_ptr[i];
+        int k = (int)(num_bin_pts * (rand() / (RAND_MAX + 1.0)));
+        sample_ids[i] = leaf_pts[leaf_ptr[i] + k];
+      }
     }
 
-    // Delete octree
-    delete octree;
+    delete[] leaf_bins;
+    delete[] leaf_ptr;
 
     // Report actual sampling
     double percent_sampled = (100.0 * nsub) / ns;
@@ -174,175 +268,1012 @@ void RBF::initialize() {
       sample_ids[i] = i;
     }
   }
-
-  // Allocate memory for interpolation matrix
-  interp_mat = new F2FScalar[na * nsub];
-
-  // Build the interpolation matrix
-  buildInterpolationMatrix();
+  sampled_ns = ns;
 }
 
 /*
-  Auxiliary function for building the interpolation matrix
+  Greedily select the RBF centers from the structural nodes
+
+  Starting from the nodes at the extremes of the bounding box, the sampled
+  structural nodes are interpolated to all structural nodes for a set of
+  quadratic and cubic test displacement fields. At each step, the node with
+  the largest residual in each leaf bin is a candidate, and the candidates
+  with the largest residuals are added as centers. This is repeated until the
+  residual relative to the magnitude of each field is below greedy_tol or the
+  maximum number of centers is reached.
+
+  Arguments
+  ---------
+  nleaf    : number of leaf bins
+  leaf_ptr : pointer into leaf_pts for each leaf bin
+  leaf_pts : structural nodes in each leaf bin
 */
-void RBF::buildInterpolationMatrix() {
-  if (na > 0) {
-    // Check how many first order polynomial terms to include
-    int npoly = 4;
-    double xsum = 0.0;
-    double ysum = 0.0;
-    double zsum = 0.0;
+void RBF::selectCentersGreedy(int nleaf, const int *leaf_ptr,
+                              const int *leaf_pts) {
+  const int nfields = 9;
+  int max_centers = ns;
+  if (greedy_max_centers > 0 && greedy_max_centers < ns) {
+    max_centers = greedy_max_centers;
+  }
 
-    for (int i = 0; i < nsub; i++) {
-      xsum += F2FRealPart(abs(Xs[3 * i + 0]));
-      ysum += F2FRealPart(abs(Xs[3 * i + 1]));
-      zsum += F2FRealPart(abs(Xs[3 * i + 2]));
+  // Find the nodes at the extremes of the bounding box
+  int seeds[6] = {0, 0, 0, 0, 0, 0};
+  for (int i = 1; i < ns; i++) {
+    for (int k = 0; k < 3; k++) {
+      if (F2FRealPart(Xs[3 * i + k]) < F2FRealPart(Xs[3 * seeds[k] + k])) {
+        seeds[k] = i;
+      }
+      if (F2FRealPart(Xs[3 * i + k]) > F2FRealPart(Xs[3 * seeds[3 + k] + k])) {
+        seeds[3 + k] = i;
+      }
+    }
+  }
+
+  // Evaluate the test fields in the normalized coordinates of the bounding
+  // box
+  double xmin[3], extent = 0.0;
+  for (int k = 0; k < 3; k++) {
+    xmin[k] = F2FRealPart(Xs[3 * seeds[k] + k]);
+    double dx = F2FRealPart(Xs[3 * seeds[3 + k] + k]) - xmin[k];
+    if (dx > extent) {
+      extent = dx;
+    }
+  }
+  if (extent <= 0.0) {
+    extent = 1.0;
+  }
+
+  double *F = new double[nfields * ns];
+  double fscale[nfields];
+  for (int f = 0; f < nfields; f++) {
+    fscale[f] = 0.0;
+  }
+  for (int i = 0; i < ns; i++) {
+    double x[3];
+    for (int k = 0; k < 3; k++) {
+      x[k] = (F2FRealPart(Xs[3 * i + k]) - xmin[k]) / extent;
+    }
+    double *Fi = &F[nfields * i];
+    Fi[0] = x[0] * x[0];
+    Fi[1] = x[1] * x[1];
+    Fi[2] = x[2] * x[2];
+    Fi[3] = x[0] * x[1];
+    Fi[4] = x[1] * x[2];
+    Fi[5] = x[0] * x[2];
+    Fi[6] = x[0] * x[0] * x[0];
+    Fi[7] = x[1] * x[1] * x[1];
+    Fi[8] = x[2] * x[2] * x[2];
+    for (int f = 0; f < nfields; f++) {
+      if (fabs(Fi[f]) > fscale[f]) {
+        fscale[f] = fabs(Fi[f]);
+      }
+    }
+  }
+  for (int f = 0; f < nfields; f++) {
+    if (fscale[f] == 0.0) {
+      fscale[f] = 1.0;
     }
+  }
 
-    bool x_all_zero = xsum < 1.0e-15;
-    if (x_all_zero) npoly--;
-    bool y_all_zero = ysum < 1.0e-15;
-    if (y_all_zero) npoly--;
-    bool z_all_zero = zsum < 1.0e-15;
-    if (z_all_zero) npoly--;
+  // Start from the extreme nodes
+  sample_ids = new int[max_centers];
+  int *is_center = new int[ns];
+  memset(is_center, 0, ns * sizeof(int));
+  nsub = 0;
+  for (int k = 0; k < 6 && nsub < max_centers; k++) {
+    if (!is_center[seeds[k]]) {
+      is_center[seeds[k]] = 1;
+      sample_ids[nsub] = seeds[k];
+      nsub++;
+    }
+  }
 
-    // Build the P matrix
-    F2FScalar *P = new F2FScalar[npoly * nsub];
+  double *err = new double[ns];
+  std::pair<double, int> *cands = new std::pair<double, int>[nleaf];
+  double max_err = 0.0;
+  while (true) {
+    // Solve for the coefficients of the test fields
+    int npoly = 4;
+    F2FScalar *invCss = buildInverseInterpSystem(&npoly);
+    int nc = nsub + npoly;
+    F2FScalar *Fsub = new F2FScalar[nsub * nfields];
     for (int j = 0; j < nsub; j++) {
-      int indx = sample_ids[j];
-      P[0 + npoly * j] = 1.0;
-      if (npoly > 1) {
+      for (int f = 0; f < nfields; f++) {
+        Fsub[j + nsub * f] = F[nfields * sample_ids[j] + f];
+      }
+    }
+    F2FScalar *coef = new F2FScalar[nc * nfields];
+    int nf = nfields;
+    F2FScalar alpha = 1.0, beta = 0.0;
+    BLASgemm("N", "N", &nc, &nf, &nsub, &alpha, invCss, &nc, Fsub, &nsub, &beta,
+             coef, &nc);
+
+    // Evaluate the residual of the test fields at the structural nodes
+    max_err = 0.0;
+    for (int i = 0; i < ns; i++) {
+      err[i] = 0.0;
+      if (is_center[i]) {
+        continue;
+      }
+
+      F2FScalar r[nfields];
+      for (int f = 0; f < nfields; f++) {
+        r[f] = F[nfields * i + f] - coef[nc * f];
         for (int k = 1; k < npoly; k++) {
-          P[k + npoly * j] = Xs[3 * indx + k - 1];
+          r[f] -= Xs[3 * i + k - 1] * coef[k + nc * f];
+        }
+      }
+      for (int j = 0; j < nsub; j++) {
+        F2FScalar p = phi(&Xs[3 * i], &Xs[3 * sample_ids[j]]);
+        for (int f = 0; f < nfields; f++) {
+          r[f] -= p * coef[npoly + j + nc * f];
         }
       }
+      for (int f = 0; f < nfields; f++) {
+        double e = fabs(F2FRealPart(r[f])) / fscale[f];
+        if (e > err[i]) {
+          err[i] = e;
+        }
+      }
+      if (err[i] > max_err) {
+        max_err = err[i];
+      }
     }
 
-    // Build the M matrix
-    F2FScalar *M = new F2FScalar[nsub * nsub];
-    for (int i = 0; i < nsub; i++) {
-      for (int j = 0; j < nsub; j++) {
-        int indx1 = sample_ids[i];
-        int indx2 = sample_ids[j];
-        F2FScalar *x = &Xs[3 * indx1];
-        F2FScalar *y = &Xs[3 * indx2];
-        M[i + nsub * j] = phi(x, y);
+    delete[] invCss;
+    delete[] Fsub;
+    delete[] coef;
+
+    if (max_err <= greedy_tol || nsub >= max_centers) {
+      break;
+    }
+
+    // Find the node with the largest residual in each leaf bin
+    int ncands = 0;
+    for (int l = 0; l < nleaf; l++) {
+      int best = -1;
+      for (int jp = leaf_ptr[l]; jp < leaf_ptr[l + 1]; jp++) {
+        int j = leaf_pts[jp];
+        if (err[j] > greedy_tol && (best < 0 || err[j] > err[best])) {
+          best = j;
+        }
+      }
+      if (best >= 0) {
+        cands[ncands] = std::pair<double, int>(err[best], best);
+        ncands++;
       }
     }
 
-    /*
-      Need to build the C_{ss}^{-1} matrix, which is composed of a top half
-      (corresponding to the polynomial coefficients) and a bottom half
-      (corresponding to and the radial basis function coefficients)
+    // Add the worst candidates, growing the set of centers by at most half
+    // at each step
+    std::sort(cands, cands + ncands, std::greater<std::pair<double, int> >());
+    int nadd = nsub / 2 > 1 ? nsub / 2 : 1;
+    if (nadd > ncands) {
+      nadd = ncands;
+    }
+    if (nadd > max_centers - nsub) {
+      nadd = max_centers - nsub;
+    }
+    for (int k = 0; k < nadd; k++) {
+      is_center[cands[k].second] = 1;
+      sample_ids[nsub] = cands[k].second;
+      nsub++;
+    }
+  }
 
-      The top half is M_{p}*P*M^{-1}
+  printf(
+      "Transfer scheme [%i]: greedy selection chose %i centers with a "
+      "maximum relative residual of %e\n",
+      object_id, nsub, max_err);
 
-      The bottom half is M^{-1} - M^{-1}*P^{T}*M_{p}*P*M^{-1}
+  delete[] F;
+  delete[] is_center;
+  delete[] err;
+  delete[] cands;
+}
 
-      It is a bit difficult to understand the procedure for assembling these
-      matrices from the calls to BLAS, so I have tried to add clarifying
-      comments. If something remains unclear, it is best to refer back to the
-      paper cited in the header file.
-    */
+/*
+  Get the number of bytes allocated by the transfer scheme, including the
+  dense or sparse interpolation data
+*/
+size_t RBF::getMemoryFootprint() {
+  size_t bytes = LDTransferScheme::getMemoryFootprint();
+  if (sample_ids) {
+    bytes += nsub * sizeof(int);
+  }
+  if (interp_mat) {
+    bytes += na * nsub * sizeof(F2FScalar);
+  }
+  if (C_lu) {
+    size_t n = nsub + npoly;
+    bytes += (n * n + 3 * nsub) * sizeof(F2FScalar) + n * sizeof(int);
+  }
+  if (M_rowp) {
+    bytes += (nsub + 1 + M_rowp[nsub]) * sizeof(int);
+    bytes += M_rowp[nsub] * sizeof(F2FScalar);
+  }
+  if (A_rowp) {
+    bytes += (na + 1 + A_rowp[na]) * sizeof(int);
+    bytes += A_rowp[na] * sizeof(F2FScalar);
+  }
+  if (Z) {
+    bytes +=
+        (2 * npoly * nsub + npoly * na + npoly * npoly) * sizeof(F2FScalar);
+    bytes += npoly * sizeof(int);
+  }
+  return bytes;
+}
 
-    // Invert the M matrix
-    F2FScalar *invM = new F2FScalar[nsub * nsub];
-    memset(invM, 0.0, nsub * nsub * sizeof(F2FScalar));
-    for (int i = 0; i < nsub; i++) invM[i + nsub * i] = 1.0;
-    int *ipiv = new int[nsub];
-    int info = 0;
-    LAPACKgetrf(&nsub, &nsub, M, &nsub, ipiv, &info);
-    LAPACKgetrs("N", &nsub, &nsub, M, &nsub, ipiv, invM, &nsub, &info);
-    delete[] ipiv;
+/*
+  Free the sparse interpolation data
+*/
+void RBF::clearSparseInterpolation() {
+  delete[] M_rowp;
+  delete[] M_cols;
+  delete[] M_vals;
+  delete[] A_rowp;
+  delete[] A_cols;
+  delete[] A_vals;
+  delete[] Ps;
+  delete[] Pa;
+  delete[] Z;
+  delete[] S;
+  delete[] S_ipiv;
+  M_rowp = M_cols = NULL;
+  M_vals = NULL;
+  A_rowp = A_cols = NULL;
+  A_vals = NULL;
+  Ps = Pa = Z = S = NULL;
+  S_ipiv = NULL;
+}
 
-    // M_{p}^{-1} = P*M^{-1}*P^{T}
-    F2FScalar *invMp = new F2FScalar[npoly * npoly];
-    F2FScalar alpha = 1.0, beta = 0.0;
-    F2FScalar *Psized = new F2FScalar[npoly * nsub];  // work matrix
-    BLASgemm("N", "N", &npoly, &nsub, &nsub, &alpha, P, &npoly, invM, &nsub,
-             &beta, Psized, &npoly);
-#ifdef FUNTOFEM_USE_COMPLEX
-    const char *t = "C";
-#else
-    const char *t = "T";
-#endif
-    BLASgemm("N", t, &npoly, &npoly, &nsub, &alpha, Psized, &npoly, P, &npoly,
-             &beta, invMp, &npoly);
-
-    // Invert M_{p}^{-1} to obtain M_{p}
-    F2FScalar *Mp = new F2FScalar[npoly * npoly];
-    memset(Mp, 0.0, npoly * npoly * sizeof(F2FScalar));
-    for (int i = 0; i < npoly; i++) Mp[i + npoly * i] = 1.0;
-    ipiv = new int[npoly];
-    LAPACKgetrf(&npoly, &npoly, invMp, &npoly, ipiv, &info);
-    LAPACKgetrs("N", &npoly, &npoly, invMp, &npoly, ipiv, Mp, &npoly, &info);
-    delete[] ipiv;
-
-    // Build top half
-    F2FScalar *top_half = new F2FScalar[npoly * nsub];  // more work matrices
-    BLASgemm("N", "N", &npoly, &nsub, &npoly, &alpha, Mp, &npoly, Psized,
-             &npoly, &beta, top_half, &npoly);
-
-    // Use the top half to build the bottom half
-    BLASgemm(t, "N", &nsub, &nsub, &npoly, &alpha, P, &npoly, top_half, &npoly,
-             &beta, M, &nsub);
-    F2FScalar *bot_half = new F2FScalar[nsub * nsub];
-    memcpy(bot_half, invM, nsub * nsub * sizeof(F2FScalar));
-    alpha = -1.0;
-    beta = 1.0;
-    BLASgemm("N", "N", &nsub, &nsub, &nsub, &alpha, invM, &nsub, M, &nsub,
-             &beta, bot_half, &nsub);
+/*
+  Build the sparse interpolation for the compactly supported bases
 
-    // Copy the top and bottom halves into one matrix C_{ss}^{-1}
-    F2FScalar *invCss = new F2FScalar[(nsub + npoly) * nsub];
-    for (int i = 0; i < npoly; i++) {
-      for (int j = 0; j < nsub; j++) {
-        invCss[i + (nsub + npoly) * j] = top_half[i + npoly * j];
+  The interpolation system for the coefficients a of the radial basis
+  functions and b of the polynomial terms is
+
+  [ M  P^{T} ][ a ] = [ ga ]
+  [ P  0     ][ b ]   [ gp ]
+
+  where M is sparse. This is solved by eliminating a, so that only the
+  factorization of the small matrix S = P*M^{-1}*P^{T} and the npoly columns
+  Z = M^{-1}*P^{T} are stored.
+*/
+void RBF::buildSparseInterpolation() {
+  clearSparseInterpolation();
+
+  // Copy the sampled structural nodes
+  F2FScalar *Xsub = new F2FScalar[3 * nsub];
+  for (int j = 0; j < nsub; j++) {
+    memcpy(&Xsub[3 * j], &Xs[3 * sample_ids[j]], 3 * sizeof(F2FScalar));
+  }
+
+  // Only include the linear polynomial terms in the directions spanned by
+  // the sampled nodes, otherwise S is singular
+  npoly = selectPolynomialTerms(Xsub, poly_dims);
+
+  KDTree *tree = new KDTree(Xsub, nsub);
+
+  // Set the support radius so that each sampled node has at least
+  // num_support sampled nodes within its support
+  double radius = support_radius;
+  if (radius <= 0.0 && nsub > 0) {
+    const int num_support = 20;
+    int K = nsub < num_support ? nsub : num_support;
+    int *indices = new int[K];
+    double *dist = new double[K];
+    double max_dist = 0.0;
+    for (int j = 0; j < nsub; j++) {
+      tree->locateKClosest(K, indices, dist, &Xsub[3 * j]);
+      if (dist[K - 1] > max_dist) {
+        max_dist = dist[K - 1];
+      }
+    }
+    radius = 1.1 * sqrt(max_dist);
+    if (radius <= 0.0) {
+      radius = 1.0;
+    }
+    delete[] indices;
+    delete[] dist;
+  }
+
+  // Assemble the CSR RBF matrix between the sampled nodes and the CSR
+  // evaluation matrix at the aerodynamic nodes. The rows are counted first
+  // and then filled.
+  for (int mat = 0; mat < 2; mat++) {
+    int nrows = (mat == 0 ? nsub : na);
+    const F2FScalar *X = (mat == 0 ? Xsub : Xa);
+
+    int *rowp = new int[nrows + 1];
+    rowp[0] = 0;
+    for (int i = 0; i < nrows; i++) {
+      rowp[i + 1] = rowp[i] + tree->locateInRadius(radius, &X[3 * i], 0, NULL);
+    }
+
+    int *cols = new int[rowp[nrows]];
+    F2FScalar *vals = new F2FScalar[rowp[nrows]];
+    for (int i = 0; i < nrows; i++) {
+      int n = rowp[i + 1] - rowp[i];
+      tree->locateInRadius(radius, &X[3 * i], n, &cols[rowp[i]]);
+
+      const F2FScalar *x = &X[3 * i];
+      for (int jp = rowp[i]; jp < rowp[i + 1]; jp++) {
+        const F2FScalar *y = &Xsub[3 * cols[jp]];
+        F2FScalar r =
+            sqrt((x[0] - y[0]) * (x[0] - y[0]) + (x[1] - y[1]) * (x[1] - y[1]) +
+                 (x[2] - y[2]) * (x[2] - y[2]));
+        vals[jp] = phi_compact(r / radius);
+      }
+    }
+
+    if (mat == 0) {
+      M_rowp = rowp;
+      M_cols = cols;
+      M_vals = vals;
+    } else {
+      A_rowp = rowp;
+      A_cols = cols;
+      A_vals = vals;
+    }
+  }
+  delete tree;
+
+  // Evaluate the polynomial terms at the sampled and aerodynamic nodes
+  Ps = new F2FScalar[npoly * nsub];
+  for (int j = 0; j < nsub; j++) {
+    evalPolynomial(&Xsub[3 * j], &Ps[npoly * j]);
+  }
+  Pa = new F2FScalar[npoly * na];
+  for (int i = 0; i < na; i++) {
+    evalPolynomial(&Xa[3 * i], &Pa[npoly * i]);
+  }
+
+  // Compute Z = M^{-1}*P^{T}
+  Z = new F2FScalar[npoly * nsub];
+  solveRBFMatrix(npoly, Ps, Z);
+
+  // Compute and factor S = P*M^{-1}*P^{T}
+  S = new F2FScalar[npoly * npoly];
+  memset(S, 0, npoly * npoly * sizeof(F2FScalar));
+  for (int j = 0; j < nsub; j++) {
+    for (int k = 0; k < npoly; k++) {
+      for (int l = 0; l < npoly; l++) {
+        S[k + npoly * l] += Ps[npoly * j + k] * Z[npoly * j + l];
       }
     }
+  }
+  S_ipiv = new int[npoly];
+  int info = 0;
+  LAPACKgetrf(&npoly, &npoly, S, &npoly, S_ipiv, &info);
+  if (info) {
+    printf("RBF error: Factorization of the polynomial system failed\n");
+  }
+
+  delete[] Xsub;
+}
+
+/*
+  Select the linear polynomial terms in the directions spanned by the sampled
+  structural nodes
+
+  Arguments
+  ---------
+  Xsub : sampled structural node locations
+
+  Returns
+  -------
+  dims : coordinate of each linear polynomial term
+  npoly : number of polynomial terms, including the constant
+*/
+int RBF::selectPolynomialTerms(const F2FScalar *Xsub, int *dims) {
+  double xmin[3] = {0.0, 0.0, 0.0}, xmax[3] = {0.0, 0.0, 0.0};
+  for (int j = 0; j < nsub; j++) {
+    for (int k = 0; k < 3; k++) {
+      double x = F2FRealPart(Xsub[3 * j + k]);
+      if (j == 0 || x < xmin[k]) {
+        xmin[k] = x;
+      }
+      if (j == 0 || x > xmax[k]) {
+        xmax[k] = x;
+      }
+    }
+  }
+  double extent = 0.0;
+  for (int k = 0; k < 3; k++) {
+    if (xmax[k] - xmin[k] > extent) {
+      extent = xmax[k] - xmin[k];
+    }
+  }
+  int np = 1;
+  for (int k = 0; k < 3; k++) {
+    if (xmax[k] - xmin[k] > 1e-12 * extent) {
+      dims[np - 1] = k;
+      np++;
+    }
+  }
+  return np;
+}
+
+/*
+  Evaluate the polynomial terms at a point
+
+  Arguments
+  ---------
+  x : the point
+
+  Returns
+  -------
+  p : the npoly polynomial terms
+*/
+void RBF::evalPolynomial(const F2FScalar *x, F2FScalar *p) {
+  p[0] = 1.0;
+  for (int k = 1; k < npoly; k++) {
+    p[k] = x[poly_dims[k - 1]];
+  }
+}
+
+/*
+  Solve M*x = b for a block of right-hand sides stored row-wise using
+  conjugate gradients. The products are not conjugated, so this also applies
+  to the complex-step perturbation of a real symmetric matrix.
+
+  Arguments
+  ---------
+  nrhs : number of right-hand sides
+  b    : right-hand sides
+
+  Returns
+  -------
+  x    : solutions
+*/
+void RBF::solveRBFMatrix(int nrhs, const F2FScalar *b, F2FScalar *x) {
+  const double rtol = 1e-14;
+  const int max_iters = 10 * nsub + 100;
+
+  F2FScalar *r = new F2FScalar[3 * nrhs * nsub];
+  F2FScalar *p = &r[nrhs * nsub];
+  F2FScalar *q = &r[2 * nrhs * nsub];
+  F2FScalar *rr = new F2FScalar[2 * nrhs];
+  F2FScalar *pq = &rr[nrhs];
+  double *tol = new double[nrhs];
+  int *converged = new int[nrhs];
+
+  memset(x, 0, nrhs * nsub * sizeof(F2FScalar));
+  memcpy(r, b, nrhs * nsub * sizeof(F2FScalar));
+  memcpy(p, b, nrhs * nsub * sizeof(F2FScalar));
+
+  int nconverged = 0;
+  for (int m = 0; m < nrhs; m++) {
+    rr[m] = 0.0;
+    double bnorm = 0.0;
+    for (int i = 0; i < nsub; i++) {
+      rr[m] += r[nrhs * i + m] * r[nrhs * i + m];
+      bnorm += std::abs(b[nrhs * i + m]) * std::abs(b[nrhs * i + m]);
+    }
+    tol[m] = rtol * rtol * bnorm;
+    converged[m] = (bnorm == 0.0);
+    nconverged += converged[m];
+  }
+
+  int iter = 0;
+  for (; iter < max_iters && nconverged < nrhs; iter++) {
+    // q = M*p
     for (int i = 0; i < nsub; i++) {
+      F2FScalar *qi = &q[nrhs * i];
+      for (int m = 0; m < nrhs; m++) {
+        qi[m] = 0.0;
+      }
+      for (int jp = M_rowp[i]; jp < M_rowp[i + 1]; jp++) {
+        const F2FScalar *pj = &p[nrhs * M_cols[jp]];
+        for (int m = 0; m < nrhs; m++) {
+          qi[m] += M_vals[jp] * pj[m];
+        }
+      }
+    }
+
+    for (int m = 0; m < nrhs; m++) {
+      pq[m] = 0.0;
+    }
+    for (int i = 0; i < nsub; i++) {
+      for (int m = 0; m < nrhs; m++) {
+        pq[m] += p[nrhs * i + m] * q[nrhs * i + m];
+      }
+    }
+
+    for (int m = 0; m < nrhs; m++) {
+      if (converged[m]) {
+        continue;
+      }
+
+      F2FScalar alpha = rr[m] / pq[m];
+      F2FScalar rr_new = 0.0;
+      double rnorm = 0.0;
+      for (int i = 0; i < nsub; i++) {
+        x[nrhs * i + m] += alpha * p[nrhs * i + m];
+        r[nrhs * i + m] -= alpha * q[nrhs * i + m];
+        rr_new += r[nrhs * i + m] * r[nrhs * i + m];
+        rnorm += std::abs(r[nrhs * i + m]) * std::abs(r[nrhs * i + m]);
+      }
+
+      if (rnorm <= tol[m]) {
+        converged[m] = 1;
+        nconverged++;
+        continue;
+      }
+
+      F2FScalar beta = rr_new / rr[m];
+      rr[m] = rr_new;
+      for (int i = 0; i < nsub; i++) {
+        p[nrhs * i + m] = r[nrhs * i + m] + beta * p[nrhs * i + m];
+      }
+    }
+  }
+
+  if (nconverged < nrhs) {
+    printf("RBF warning: CG did not converge in %d iterations\n", iter);
+  }
+
+  delete[] r;
+  delete[] rr;
+  delete[] tol;
+  delete[] converged;
+}
+
+/*
+  Solve the interpolation system for a block of right-hand sides
+
+  Arguments
+  ---------
+  nrhs : number of right-hand sides
+  ga   : right-hand sides for the RBF coefficients (nsub x nrhs, row-wise)
+  gp   : right-hand sides for the polynomial terms (npoly x nrhs, column-wise)
+         or NULL if they are zero
+
+  Returns
+  -------
+  a    : RBF coefficients (nsub x nrhs, row-wise)
+  bp   : polynomial coefficients (npoly x nrhs, column-wise)
+*/
+void RBF::solveInterpSystem(int nrhs, const F2FScalar *ga, const F2FScalar *gp,
+                            F2FScalar *a, F2FScalar *bp) {
+  // y = M^{-1}*ga
+  solveRBFMatrix(nrhs, ga, a);
+
+  // b = S^{-1}*(P*y - gp)
+  memset(bp, 0, npoly * nrhs * sizeof(F2FScalar));
+  for (int j = 0; j < nsub; j++) {
+    const F2FScalar *p = &Ps[npoly * j];
+    for (int m = 0; m < nrhs; m++) {
+      for (int k = 0; k < npoly; k++) {
+        bp[k + npoly * m] += p[k] * a[nrhs * j + m];
+      }
+    }
+  }
+  if (gp) {
+    for (int k = 0; k < npoly * nrhs; k++) {
+      bp[k] -= gp[k];
+    }
+  }
+  int info = 0;
+  LAPACKgetrs("N", &npoly, &nrhs, S, &npoly, S_ipiv, bp, &npoly, &info);
+
+  // a = y - Z*b
+  for (int j = 0; j < nsub; j++) {
+    for (int m = 0; m < nrhs; m++) {
+      for (int k = 0; k < npoly; k++) {
+        a[nrhs * j + m] -= Z[npoly * j + k] * bp[k + npoly * m];
+      }
+    }
+  }
+}
+
+/*
+  Build the interpolation matrix for the global bases
+
+  The interpolation system for the coefficients a of the radial basis
+  functions and b of the polynomial terms is
+
+  C*[ a ] = [ M  P^{T} ][ a ] = [ us ]
+    [ b ]   [ P  0     ][ b ]   [ 0  ]
+
+  The columns of B are the basis functions evaluated at the aerodynamic
+  nodes, so that ua = B^{T}*C^{-1}*[us; 0]. Since C is symmetric, the rows of
+  the interpolation matrix are the first nsub rows of Y = C^{-1}*B, which are
+  found by back-substitution with the LU factorization of C.
+
+  When the factorization is reused, the change in C since it was factored is
+  confined to the rows and columns of the k sampled nodes that have moved. If
+  k is small, this change is written as U*V^{T} with 2k columns and the
+  Sherman-Morrison-Woodbury formula is applied instead of factoring C again.
+*/
+void RBF::buildInterpolationMatrix() {
+  if (na > 0) {
+    // Copy the sampled structural nodes
+    F2FScalar *Xsub = new F2FScalar[3 * nsub];
+    for (int j = 0; j < nsub; j++) {
+      memcpy(&Xsub[3 * j], &Xs[3 * sample_ids[j]], 3 * sizeof(F2FScalar));
+    }
+
+    // Find the sampled nodes that have moved since C was factored. The
+    // factorization is only updated if this is cheaper than factoring again.
+    int dims[3];
+    int np = selectPolynomialTerms(Xsub, dims);
+    int nmoved = -1;
+    int *moved = NULL;
+    if (C_lu && np == npoly &&
+        memcmp(dims, poly_dims, (np - 1) * sizeof(int)) == 0) {
+      moved = new int[nsub];
+      nmoved = 0;
       for (int j = 0; j < nsub; j++) {
-        invCss[npoly + i + (nsub + npoly) * j] = bot_half[i + nsub * j];
+        if (Xsub[3 * j] != Xfactor[3 * j] ||
+            Xsub[3 * j + 1] != Xfactor[3 * j + 1] ||
+            Xsub[3 * j + 2] != Xfactor[3 * j + 2]) {
+          moved[nmoved] = j;
+          nmoved++;
+        }
+      }
+      double size = nsub + npoly;
+      if (6.0 * nmoved * (size + na) >= size * size) {
+        nmoved = -1;
       }
     }
 
-    // Build the A_{as} matrix, the entries of which are the evaluation of the
-    // polynomial and radial basis functions at the aerodynamic nodes
-    F2FScalar *Aas = new F2FScalar[na * (nsub + npoly)];
+    if (nmoved < 0) {
+      npoly = np;
+      memcpy(poly_dims, dims, (np - 1) * sizeof(int));
+      factorInterpSystem(Xsub);
+    }
+
+    // Evaluate the basis functions at the aerodynamic nodes
+    int n = nsub + npoly;
+    F2FScalar *Y = new F2FScalar[n * na];
     for (int i = 0; i < na; i++) {
-      Aas[i + na * 0] = 1.0;
-      Aas[i + na * 1] = Xa[3 * i + 0];
-      Aas[i + na * 2] = Xa[3 * i + 1];
-      Aas[i + na * 3] = Xa[3 * i + 2];
+      F2FScalar *x = &Xa[3 * i];
       for (int j = 0; j < nsub; j++) {
-        int indx = sample_ids[j];
-        F2FScalar *x = &Xa[3 * i];
-        F2FScalar *y = &Xs[3 * indx];
-        Aas[i + na * (j + npoly)] = phi(x, y);
+        Y[j + n * i] = phi(x, &Xsub[3 * j]);
+      }
+      evalPolynomial(x, &Y[nsub + n * i]);
+    }
+    F2FScalar *B = NULL;
+    if (nmoved > 0) {
+      B = new F2FScalar[n * na];
+      memcpy(B, Y, n * na * sizeof(F2FScalar));
+    }
+
+    // Back-substitute with the factorization and update it if needed
+    int info = 0;
+    LAPACKgetrs("N", &n, &na, C_lu, &n, C_ipiv, Y, &n, &info);
+    if (nmoved > 0) {
+      if (applyLowRankUpdate(nmoved, moved, Xsub, na, Y)) {
+        // Factor the system again if the update is ill-conditioned
+        factorInterpSystem(Xsub);
+        memcpy(Y, B, n * na * sizeof(F2FScalar));
+        LAPACKgetrs("N", &n, &na, C_lu, &n, C_ipiv, Y, &n, &info);
       }
+      delete[] B;
     }
 
-    // Multiply A_{as} and C_{ss}^{-1} to get the interpolation matrix
-    int k = nsub + npoly;
-    alpha = 1.0;
-    beta = 0.0;
-    BLASgemm("N", "N", &na, &nsub, &k, &alpha, Aas, &na, invCss, &k, &beta,
-             interp_mat, &na);
+    for (int i = 0; i < na; i++) {
+      for (int j = 0; j < nsub; j++) {
+        interp_mat[i + na * j] = Y[j + n * i];
+      }
+    }
 
     // Free allocated memory
-    delete[] P;
-    delete[] M;
-    delete[] invM;
-    delete[] invMp;
-    delete[] Psized;
-    delete[] Mp;
-    delete[] top_half;
-    delete[] bot_half;
-    delete[] invCss;
-    delete[] Aas;
+    delete[] Xsub;
+    delete[] Y;
+    if (moved) {
+      delete[] moved;
+    }
+    if (!reuse_factor) {
+      clearInterpFactor();
+    }
+  }
+}
+
+/*
+  Assemble and factor the interpolation system for the sampled structural
+  nodes and store the node locations for later updates
+
+  Arguments
+  ---------
+  Xsub : sampled structural node locations
+*/
+void RBF::factorInterpSystem(const F2FScalar *Xsub) {
+  clearInterpFactor();
+
+  int n = nsub + npoly;
+  C_lu = new F2FScalar[n * n];
+  C_ipiv = new int[n];
+  Xfactor = new F2FScalar[3 * nsub];
+  memcpy(Xfactor, Xsub, 3 * nsub * sizeof(F2FScalar));
+
+  for (int j = 0; j < nsub; j++) {
+    F2FScalar *y = &Xfactor[3 * j];
+    for (int i = 0; i < nsub; i++) {
+      C_lu[i + n * j] = phi(&Xfactor[3 * i], y);
+    }
+    evalPolynomial(y, &C_lu[nsub + n * j]);
+    for (int k = 0; k < npoly; k++) {
+      C_lu[j + n * (nsub + k)] = C_lu[nsub + k + n * j];
+    }
+  }
+  for (int k = 0; k < npoly; k++) {
+    for (int l = 0; l < npoly; l++) {
+      C_lu[nsub + k + n * (nsub + l)] = 0.0;
+    }
+  }
+
+  int info = 0;
+  LAPACKgetrf(&n, &n, C_lu, &n, C_ipiv, &info);
+  if (info) {
+    printf("RBF error: Factorization of the interpolation system failed\n");
   }
 }
 
+/*
+  Correct the solutions Y = C0^{-1}*B with the stored factorization of C0 for
+  the change in the interpolation system when nmoved of the sampled nodes
+  have moved
+
+  The change is D = E*R + Q*E^{T}, where E selects the moved nodes, R holds
+  their rows of D and Q holds their columns of D with the rows of the moved
+  nodes set to zero. With U = [E, Q] and V = [R^{T}, E],
+
+  Y = Y - Z*(I + V^{T}*Z)^{-1}*V^{T}*Y,  where Z = C0^{-1}*U
+
+  Arguments
+  ---------
+  nmoved : number of sampled nodes that have moved
+  moved  : indices of the sampled nodes that have moved
+  Xsub   : current sampled structural node locations
+  nrhs   : number of solutions
+  Y      : solutions with the stored factorization
+
+  Returns
+  -------
+  Y      : solutions of the updated system
+  fail   : nonzero if the update is singular and Y is unchanged
+*/
+int RBF::applyLowRankUpdate(int nmoved, const int *moved, const F2FScalar *Xsub,
+                            int nrhs, F2FScalar *Y) {
+  int n = nsub + npoly;
+  int k = nmoved;
+  int m = 2 * nmoved;
+
+  // Compute the rows R of the change in C for the moved nodes
+  F2FScalar *R = new F2FScalar[k * n];
+  F2FScalar *p = new F2FScalar[2 * npoly];
+  for (int l = 0; l < k; l++) {
+    int a = moved[l];
+    F2FScalar *x = const_cast<F2FScalar *>(&Xsub[3 * a]);
+    F2FScalar *x0 = &Xfactor[3 * a];
+    for (int j = 0; j < nsub; j++) {
+      R[l + k * j] = phi(x, const_cast<F2FScalar *>(&Xsub[3 * j])) -
+                     phi(x0, &Xfactor[3 * j]);
+    }
+    evalPolynomial(x, p);
+    evalPolynomial(x0, &p[npoly]);
+    for (int q = 0; q < npoly; q++) {
+      R[l + k * (nsub + q)] = p[q] - p[npoly + q];
+    }
+  }
+  delete[] p;
+
+  // Form U = [E, Q] and compute Z = C0^{-1}*U
+  F2FScalar *Z = new F2FScalar[n * m];
+  memset(Z, 0, n * m * sizeof(F2FScalar));
+  for (int l = 0; l < k; l++) {
+    Z[moved[l] + n * l] = 1.0;
+    for (int j = 0; j < n; j++) {
+      Z[j + n * (k + l)] = R[l + k * j];
+    }
+    for (int ll = 0; ll < k; ll++) {
+      Z[moved[ll] + n * (k + l)] = 0.0;
+    }
+  }
+  int info = 0;
+  LAPACKgetrs("N", &n, &m, C_lu, &n, C_ipiv, Z, &n, &info);
+
+  // Form the capacitance matrix T = I + V^{T}*Z and W = V^{T}*Y
+  F2FScalar *T = new F2FScalar[m * m];
+  F2FScalar *W = new F2FScalar[m * nrhs];
+  F2FScalar alpha = 1.0, beta = 0.0;
+  BLASgemm("N", "N", &k, &m, &n, &alpha, R, &k, Z, &n, &beta, T, &m);
+  BLASgemm("N", "N", &k, &nrhs, &n, &alpha, R, &k, Y, &n, &beta, W, &m);
+  for (int l = 0; l < k; l++) {
+    for (int c = 0; c < m; c++) {
+      T[k + l + m * c] = Z[moved[l] + n * c];
+    }
+    for (int c = 0; c < nrhs; c++) {
+      W[k + l + m * c] = Y[moved[l] + n * c];
+    }
+  }
+  for (int l = 0; l < m; l++) {
+    T[l + m * l] += 1.0;
+  }
+
+  // Y = Y - Z*T^{-1}*W
+  int *ipiv = new int[m];
+  LAPACKgetrf(&m, &m, T, &m, ipiv, &info);
+  if (info == 0) {
+    LAPACKgetrs("N", &m, &nrhs, T, &m, ipiv, W, &m, &info);
+    alpha = -1.0;
+    beta = 1.0;
+    BLASgemm("N", "N", &n, &nrhs, &m, &alpha, Z, &n, W, &m, &beta, Y, &n);
+  }
+
+  delete[] R;
+  delete[] Z;
+  delete[] T;
+  delete[] W;
+  delete[] ipiv;
+
+  return info;
+}
+
+/*
+  Free the stored factorization of the interpolation system
+*/
+void RBF::clearInterpFactor() {
+  if (C_lu) {
+    delete[] C_lu;
+  }
+  if (C_ipiv) {
+    delete[] C_ipiv;
+  }
+  if (Xfactor) {
+    delete[] Xfactor;
+  }
+  C_lu = NULL;
+  C_ipiv = NULL;
+  Xfactor = NULL;
+}
+
+/*
+  Build the inverse of the interpolation system C_{ss} for the sampled
+  structural nodes
+
+  Returns
+  -------
+  npoly  : number of polynomial terms
+  invCss : (nsub + npoly) x nsub matrix stored column-major
+*/
+F2FScalar *RBF::buildInverseInterpSystem(int *_npoly) {
+  // Check how many first order polynomial terms to include
+  int npoly = 4;
+  double xsum = 0.0;
+  double ysum = 0.0;
+  double zsum = 0.0;
+
+  for (int i = 0; i < nsub; i++) {
+    xsum += F2FRealPart(abs(Xs[3 * i + 0]));
+    ysum += F2FRealPart(abs(Xs[3 * i + 1]));
+    zsum += F2FRealPart(abs(Xs[3 * i + 2]));
+  }
+
+  bool x_all_zero = xsum < 1.0e-15;
+  if (x_all_zero) npoly--;
+  bool y_all_zero = ysum < 1.0e-15;
+  if (y_all_zero) npoly--;
+  bool z_all_zero = zsum < 1.0e-15;
+  if (z_all_zero) npoly--;
+
+  // Build the P matrix
+  F2FScalar *P = new F2FScalar[npoly * nsub];
+  for (int j = 0; j < nsub; j++) {
+    int indx = sample_ids[j];
+    P[0 + npoly * j] = 1.0;
+    if (npoly > 1) {
+      for (int k = 1; k < npoly; k++) {
+        P[k + npoly * j] = Xs[3 * indx + k - 1];
+      }
+    }
+  }
+
+  // Build the M matrix
+  F2FScalar *M = new F2FScalar[nsub * nsub];
+  for (int i = 0; i < nsub; i++) {
+    for (int j = 0; j < nsub; j++) {
+      int indx1 = sample_ids[i];
+      int indx2 = sample_ids[j];
+      F2FScalar *x = &Xs[3 * indx1];
+      F2FScalar *y = &Xs[3 * indx2];
+      M[i + nsub * j] = phi(x, y);
+    }
+  }
+
+  /*
+    Need to build the C_{ss}^{-1} matrix, which is composed of a top half
+    (corresponding to the polynomial coefficients) and a bottom half
+    (corresponding to and the radial basis function coefficients)
+
+    The top half is M_{p}*P*M^{-1}
+
+    The bottom half is M^{-1} - M^{-1}*P^{T}*M_{p}*P*M^{-1}
+
+    It is a bit difficult to understand the procedure for assembling these
+    matrices from the calls to BLAS, so I have tried to add clarifying
+    comments. If something remains unclear, it is best to refer back to the
+    paper cited in the header file.
+  */
+
+  // Invert the M matrix
+  F2FScalar *invM = new F2FScalar[nsub * nsub];
+  memset(invM, 0.0, nsub * nsub * sizeof(F2FScalar));
+  for (int i = 0; i < nsub; i++) invM[i + nsub * i] = 1.0;
+  int *ipiv = new int[nsub];
+  int info = 0;
+  LAPACKgetrf(&nsub, &nsub, M, &nsub, ipiv, &info);
+  LAPACKgetrs("N", &nsub, &nsub, M, &nsub, ipiv, invM, &nsub, &info);
+  delete[] ipiv;
+
+  // M_{p}^{-1} = P*M^{-1}*P^{T}
+  F2FScalar *invMp = new F2FScalar[npoly * npoly];
+  F2FScalar alpha = 1.0, beta = 0.0;
+  F2FScalar *Psized = new F2FScalar[npoly * nsub];  // work matrix
+  BLASgemm("N", "N", &npoly, &nsub, &nsub, &alpha, P, &npoly, invM, &nsub,
+           &beta, Psized, &npoly);
+#ifdef FUNTOFEM_USE_COMPLEX
+  const char *t = "C";
+#else
+  const char *t = "T";
+#endif
+  BLASgemm("N", t, &npoly, &npoly, &nsub, &alpha, Psized, &npoly, P, &npoly,
+           &beta, invMp, &npoly);
+
+  // Invert M_{p}^{-1} to obtain M_{p}
+  F2FScalar *Mp = new F2FScalar[npoly * npoly];
+  memset(Mp, 0.0, npoly * npoly * sizeof(F2FScalar));
+  for (int i = 0; i < npoly; i++) Mp[i + npoly * i] = 1.0;
+  ipiv = new int[npoly];
+  LAPACKgetrf(&npoly, &npoly, invMp, &npoly, ipiv, &info);
+  LAPACKgetrs("N", &npoly, &npoly, invMp, &npoly, ipiv, Mp, &npoly, &info);
+  delete[] ipiv;
+
+  // Build top half
+  F2FScalar *top_half = new F2FScalar[npoly * nsub];  // more work matrices
+  BLASgemm("N", "N", &npoly, &nsub, &npoly, &alpha, Mp, &npoly, Psized, &npoly,
+           &beta, top_half, &npoly);
+
+  // Use the top half to build the bottom half
+  BLASgemm(t, "N", &nsub, &nsub, &npoly, &alpha, P, &npoly, top_half, &npoly,
+           &beta, M, &nsub);
+  F2FScalar *bot_half = new F2FScalar[nsub * nsub];
+  memcpy(bot_half, invM, nsub * nsub * sizeof(F2FScalar));
+  alpha = -1.0;
+  beta = 1.0;
+  BLASgemm("N", "N", &nsub, &nsub, &nsub, &alpha, invM, &nsub, M, &nsub, &beta,
+           bot_half, &nsub);
+
+  // Copy the top and bottom halves into one matrix C_{ss}^{-1}
+  F2FScalar *invCss = new F2FScalar[(nsub + npoly) * nsub];
+  for (int i = 0; i < npoly; i++) {
+    for (int j = 0; j < nsub; j++) {
+      invCss[i + (nsub + npoly) * j] = top_half[i + npoly * j];
+    }
+  }
+  for (int i = 0; i < nsub; i++) {
+    for (int j = 0; j < nsub; j++) {
+      invCss[npoly + i + (nsub + npoly) * j] = bot_half[i + nsub * j];
+    }
+  }
+
+  // Free allocated memory
+  delete[] P;
+  delete[] M;
+  delete[] invM;
+  delete[] invMp;
+  delete[] Psized;
+  delete[] Mp;
+  delete[] top_half;
+  delete[] bot_half;
+
+  *_npoly = npoly;
+  return invCss;
+}
+
 /*
   Computes the displacements of aerodynamic surface nodes by fitting an
   optimal rigid rotation and translation to the displacement of the set of
@@ -366,7 +1297,37 @@ void RBF::transferDisps(const F2FScalar *struct_disps, F2FScalar *aero_disps) {
   // Zero the outputs
   memset(aero_disps, 0.0, 3 * na * sizeof(F2FScalar));
 
-  if (na > 0) {
+  if (phi_compact) {
+    // Solve for the interpolation coefficients
+    F2FScalar *US = new F2FScalar[3 * nsub];
+    for (int j = 0; j < nsub; j++) {
+      memcpy(&US[3 * j], &Us[3 * sample_ids[j]], 3 * sizeof(F2FScalar));
+    }
+    F2FScalar *a = new F2FScalar[3 * nsub];
+    F2FScalar *b = new F2FScalar[3 * npoly];
+    solveInterpSystem(3, US, NULL, a, b);
+
+    // Evaluate the interpolant at the aerodynamic nodes
+    for (int i = 0; i < na; i++) {
+      F2FScalar *ua = &aero_disps[3 * i];
+      const F2FScalar *p = &Pa[npoly * i];
+      for (int k = 0; k < npoly; k++) {
+        ua[0] += p[k] * b[k];
+        ua[1] += p[k] * b[k + npoly];
+        ua[2] += p[k] * b[k + 2 * npoly];
+      }
+      for (int jp = A_rowp[i]; jp < A_rowp[i + 1]; jp++) {
+        const F2FScalar *aj = &a[3 * A_cols[jp]];
+        ua[0] += A_vals[jp] * aj[0];
+        ua[1] += A_vals[jp] * aj[1];
+        ua[2] += A_vals[jp] * aj[2];
+      }
+    }
+
+    delete[] US;
+    delete[] a;
+    delete[] b;
+  } else if (na > 0) {
     // Rearrange structural displacements
     F2FScalar *US = new F2FScalar[nsub * 3];
     for (int i = 0; i < nsub; i++) {
@@ -416,7 +1377,44 @@ void RBF::transferLoads(const F2FScalar *aero_loads, F2FScalar *struct_loads) {
   F2FScalar *struct_loads_global = new F2FScalar[3 * ns];
   memset(struct_loads_global, 0, 3 * ns * sizeof(F2FScalar));
 
-  if (na > 0) {
+  if (phi_compact) {
+    // Apply the transpose of the evaluation at the aerodynamic nodes
+    F2FScalar *ga = new F2FScalar[3 * nsub];
+    F2FScalar *gp = new F2FScalar[3 * npoly];
+    memset(ga, 0, 3 * nsub * sizeof(F2FScalar));
+    memset(gp, 0, 3 * npoly * sizeof(F2FScalar));
+
+    for (int i = 0; i < na; i++) {
+      const F2FScalar *fa = &Fa[3 * i];
+      const F2FScalar *p = &Pa[npoly * i];
+      for (int k = 0; k < npoly; k++) {
+        gp[k] += p[k] * fa[0];
+        gp[k + npoly] += p[k] * fa[1];
+        gp[k + 2 * npoly] += p[k] * fa[2];
+      }
+      for (int jp = A_rowp[i]; jp < A_rowp[i + 1]; jp++) {
+        F2FScalar *g = &ga[3 * A_cols[jp]];
+        g[0] += A_vals[jp] * fa[0];
+        g[1] += A_vals[jp] * fa[1];
+        g[2] += A_vals[jp] * fa[2];
+      }
+    }
+
+    // Apply the transpose of the inverse of the (symmetric) interpolation
+    // system and keep the RBF coefficients
+    F2FScalar *a = new F2FScalar[3 * nsub];
+    F2FScalar *b = new F2FScalar[3 * npoly];
+    solveInterpSystem(3, ga, gp, a, b);
+    for (int j = 0; j < nsub; j++) {
+      memcpy(&struct_loads_global[3 * sample_ids[j]], &a[3 * j],
+             3 * sizeof(F2FScalar));
+    }
+
+    delete[] ga;
+    delete[] gp;
+    delete[] a;
+    delete[] b;
+  } else if (na > 0) {
     // Copy Fa into matrix
     F2FScalar *Fxyz = new F2FScalar[na * 3];
     for (int i = 0; i < na; i++) {
@@ -689,6 +1687,71 @@ F2FScalar RBF::thinPlateSpline(F2FScalar *x, F2FScalar *y) {
   return eval;
 }
 
+/*
+  Defines the Wendland C0 compactly supported radial basis function
+
+  phi(t) = (1 - t)^{2} for t < 1 and 0 otherwise,
+  where t = r/support_radius
+
+  Arguments
+  ---------
+  t   : scaled distance between the points
+
+  Returns
+  -------
+  phi : evaluation of radial basis function
+*/
+F2FScalar RBF::wendlandC0(F2FScalar t) {
+  if (F2FRealPart(t) >= 1.0) {
+    return 0.0;
+  }
+  return (1.0 - t) * (1.0 - t);
+}
+
+/*
+  Defines the Wendland C2 compactly supported radial basis function
+
+  phi(t) = (1 - t)^{4}*(4*t + 1) for t < 1 and 0 otherwise,
+  where t = r/support_radius
+
+  Arguments
+  ---------
+  t   : scaled distance between the points
+
+  Returns
+  -------
+  phi : evaluation of radial basis function
+*/
+F2FScalar RBF::wendlandC2(F2FScalar t) {
+  if (F2FRealPart(t) >= 1.0) {
+    return 0.0;
+  }
+  F2FScalar s = (1.0 - t) * (1.0 - t);
+  return s * s * (4.0 * t + 1.0);
+}
+
+/*
+  Defines the Wendland C4 compactly supported radial basis function
+
+  phi(t) = (1 - t)^{6}*(35*t^{2} + 18*t + 3)/3 for t < 1 and 0 otherwise,
+  where t = r/support_radius
+
+  Arguments
+  ---------
+  t   : scaled distance between the points
+
+  Returns
+  -------
+  phi : evaluation of radial basis function
+*/
+F2FScalar RBF::wendlandC4(F2FScalar t) {
+  if (F2FRealPart(t) >= 1.0) {
+    return 0.0;
+  }
+  F2FScalar s = (1.0 - t) * (1.0 - t) * (1.0 - t);
+  return s * s * (35.0 * t * t + 18.0 * t + 3.0) / 3.0;
+}
+
 /*
   Write full and sampled structural point clouds to ASCII file that can be read
   into Tecplot
@@ -0,0 +1,341 @@
+/*
+  This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+  and design optimization.
+
+  Copyright (C) 2015 Georgia Tech Research Corporation.
+  Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+  All rights reserved.
+
+  FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this software except in compliance with the License.
+  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+*/
+
+#include "SegmentBVH.h"
+
+#include <math.h>
+
+#include <algorithm>
+
+/*
+  Compare two segments by their midpoints along one coordinate direction
+*/
+class SegmentBVHCompare {
+ public:
+  SegmentBVHCompare(const double *X, int dim) : X(X), dim(dim) {}
+  bool operator()(int a, int b) const {
+    return X[6 * a + dim] + X[6 * a + 3 + dim] <
+           X[6 * b + dim] + X[6 * b + 3 + dim];
+  }
+
+ private:
+  const double *X;
+  int dim;
+};
+
+/*
+  Build the tree over the real part of the segment end points
+
+  Arguments
+  ---------
+  Xpts      : point locations (x, y, z) for each point
+  nsegs     : number of segments
+  seg_nodes : the first and last point of each segment
+  leaf_size : maximum number of segments stored in a leaf
+*/
+SegmentBVH::SegmentBVH(const F2FScalar *Xpts, int nsegs, const int *seg_nodes,
+                       int leaf_size)
+    : nsegs(nsegs), leaf_size(leaf_size) {
+  if (this->leaf_size < 1) {
+    this->leaf_size = 1;
+  }
+
+  // Copy the real part of the segment end points
+  double *Xorig = new double[6 * nsegs];
+  for (int i = 0; i < nsegs; i++) {
+    for (int k = 0; k < 3; k++) {
+      Xorig[6 * i + k] = F2FRealPart(Xpts[3 * seg_nodes[2 * i] + k]);
+      Xorig[6 * i + 3 + k] = F2FRealPart(Xpts[3 * seg_nodes[2 * i + 1] + k]);
+    }
+  }
+
+  perm = new int[nsegs];
+  for (int i = 0; i < nsegs; i++) {
+    perm[i] = i;
+  }
+
+  // Allocate the flat node arrays
+  num_nodes = countNodes(nsegs);
+  node_start = new int[num_nodes];
+  node_end = new int[num_nodes];
+  node_child = new int[num_nodes];
+  node_bounds = new double[6 * num_nodes];
+
+  // Build the tree by recursively sorting the permutation array
+  X = Xorig;
+  int next_node = 1;
+  build(0, 0, nsegs, &next_node);
+
+  // Store the segments in tree order so that each leaf is contiguous
+  X = new double[6 * nsegs];
+  for (int i = 0; i < nsegs; i++) {
+    for (int k = 0; k < 6; k++) {
+      X[6 * i + k] = Xorig[6 * perm[i] + k];
+    }
+  }
+  delete[] Xorig;
+}
+
+SegmentBVH::~SegmentBVH() {
+  delete[] X;
+  delete[] perm;
+  delete[] node_start;
+  delete[] node_end;
+  delete[] node_child;
+  delete[] node_bounds;
+}
+
+/*
+  Get the number of bytes allocated by the tree
+*/
+size_t SegmentBVH::getMemoryFootprint() {
+  return nsegs * (6 * sizeof(double) + sizeof(int)) +
+         num_nodes * (3 * sizeof(int) + 6 * sizeof(double));
+}
+
+/*
+  Count the number of nodes needed to store a tree over n segments
+*/
+int SegmentBVH::countNodes(int n) {
+  if (n <= leaf_size) {
+    return 1;
+  }
+  return 1 + countNodes(n / 2) + countNodes(n - n / 2);
+}
+
+/*
+  Build the subtree for the segments in [start, end) by splitting at the
+  median of the midpoints along the direction in which they have the largest
+  extent
+
+  Arguments
+  ---------
+  node      : index of the node to build
+  start     : first segment in the node
+  end       : one past the last segment in the node
+  next_node : next unused node index
+*/
+void SegmentBVH::build(int node, int start, int end, int *next_node) {
+  node_start[node] = start;
+  node_end[node] = end;
+  node_child[node] = -1;
+
+  // Find the bounding box of the segments and of their midpoints
+  double *bounds = &node_bounds[6 * node];
+  double cmin[3] = {0.0, 0.0, 0.0}, cmax[3] = {0.0, 0.0, 0.0};
+  for (int i = start; i < end; i++) {
+    const double *xs = &X[6 * perm[i]];
+    for (int k = 0; k < 3; k++) {
+      double lo = (xs[k] < xs[3 + k] ? xs[k] : xs[3 + k]);
+      double hi = (xs[k] < xs[3 + k] ? xs[3 + k] : xs[k]);
+      double c = 0.5 * (xs[k] + xs[3 + k]);
+      if (i == start || lo < bounds[k]) {
+        bounds[k] = lo;
+      }
+      if (i == start || hi > bounds[3 + k]) {
+        bounds[3 + k] = hi;
+      }
+      if (i == start || c < cmin[k]) {
+        cmin[k] = c;
+      }
+      if (i == start || c > cmax[k]) {
+        cmax[k] = c;
+      }
+    }
+  }
+
+  if (end - start <= leaf_size) {
+    return;
+  }
+
+  int dim = 0;
+  for (int k = 1; k < 3; k++) {
+    if (cmax[k] - cmin[k] > cmax[dim] - cmin[dim]) {
+      dim = k;
+    }
+  }
+
+  // Partition the segments about the median
+  int mid = start + (end - start) / 2;
+  std::nth_element(&perm[start], &perm[mid], &perm[end],
+                   SegmentBVHCompare(X, dim));
+
+  int child = *next_node;
+  *next_node += 2;
+  node_child[node] = child;
+
+  build(child, start, mid, next_node);
+  build(child + 1, mid, end, next_node);
+}
+
+/*
+  Compute the squared distance from a point to a segment, using the same
+  parametrization as the beam elements
+
+  Arguments
+  ---------
+  X1 : the first end point of the segment
+  X2 : the second end point of the segment
+  x  : the point
+
+  Returns
+  -------
+  xi   : the parametric location of the closest point in [-1, 1]
+  dist : the squared distance to the closest point
+*/
+double SegmentBVH::segmentDistance(const double X1[], const double X2[],
+                                   const double x[], double *xi) {
+  double d[3] = {X2[0] - X1[0], X2[1] - X1[1], X2[2] - X1[2]};
+  double L2 = d[0] * d[0] + d[1] * d[1] + d[2] * d[2];
+  double proj =
+      d[0] * (x[0] - X1[0]) + d[1] * (x[1] - X1[1]) + d[2] * (x[2] - X1[2]);
+
+  // Clamp the projection to the end points of the segment
+  double t = 0.0;
+  if (L2 > 0.0 && proj > 0.0) {
+    t = (proj < L2 ? proj / L2 : 1.0);
+  }
+  *xi = -1.0 + 2.0 * t;
+
+  double r[3];
+  for (int k = 0; k < 3; k++) {
+    r[k] = x[k] - X1[k] - t * d[k];
+  }
+  return r[0] * r[0] + r[1] * r[1] + r[2] * r[2];
+}
+
+/*
+  Squared distance from a point to the bounding box of a node
+*/
+double SegmentBVH::boxDistance(int node, const double x[]) {
+  const double *bounds = &node_bounds[6 * node];
+  double d = 0.0;
+  for (int k = 0; k < 3; k++) {
+    if (x[k] < bounds[k]) {
+      d += (bounds[k] - x[k]) * (bounds[k] - x[k]);
+    } else if (x[k] > bounds[3 + k]) {
+      d += (x[k] - bounds[3 + k]) * (x[k] - bounds[3 + k]);
+    }
+  }
+  return d;
+}
+
+/*
+  Locate the closest segment to the given point
+
+  Arguments
+  ---------
+  xpt : the query point
+
+  Returns
+  -------
+  seg  : index of the closest segment (-1 if there are no segments)
+  xi   : the parametric location of the closest point on the segment
+  dist : the squared distance to the closest segment
+*/
+void SegmentBVH::locateClosest(const F2FScalar xpt[], int *seg, double *xi,
+                               double *dist) {
+  double x[3];
+  for (int k = 0; k < 3; k++) {
+    x[k] = F2FRealPart(xpt[k]);
+  }
+
+  *seg = -1;
+  *xi = 0.0;
+  *dist = 1e300;
+  if (nsegs > 0) {
+    search(0, x, seg, xi, dist);
+  }
+}
+
+/*
+  Locate the closest segment to each point in a batch of query points
+
+  Arguments
+  ---------
+  nxpts       : number of query points
+  xpts        : the query point locations
+  num_threads : number of threads used for the queries
+
+  Returns
+  -------
+  segs : index of the closest segment to each query point
+  xis  : the parametric location of the closest point on each segment
+*/
+void SegmentBVH::locateClosest(int nxpts, const F2FScalar *xpts, int *segs,
+                               double *xis, int num_threads) {
+#ifdef _OPENMP
+#pragma omp parallel for num_threads(num_threads) schedule(dynamic, 64)
+#endif
+  for (int i = 0; i < nxpts; i++) {
+    double dist;
+    locateClosest(&xpts[3 * i], &segs[i], &xis[i], &dist);
+  }
+}
+
+/*
+  Recursively search the subtree for a segment closer than the current
+  closest segment
+
+  Arguments
+  ---------
+  node : the node to search
+  x    : the query point
+  seg  : the closest segment found so far
+  xi   : the parametric location on the closest segment
+  dist : the squared distance to the closest segment
+*/
+void SegmentBVH::search(int node, const double x[], int *seg, double *xi,
+                        double *dist) {
+  int child = node_child[node];
+
+  if (child < 0) {
+    for (int i = node_start[node]; i < node_end[node]; i++) {
+      double t;
+      double d = segmentDistance(&X[6 * i], &X[6 * i + 3], x, &t);
+      if (d < *dist || (d == *dist && perm[i] < *seg)) {
+        *dist = d;
+        *seg = perm[i];
+        *xi = t;
+      }
+    }
+    return;
+  }
+
+  // Search the child whose bounding box is closer first
+  int near = child, far = child + 1;
+  double dnear = boxDistance(near, x);
+  double dfar = boxDistance(far, x);
+  if (dfar < dnear) {
+    near = child + 1;
+    far = child;
+    double tmp = dnear;
+    dnear = dfar;
+    dfar = tmp;
+  }
+
+  if (dnear <= *dist) {
+    search(near, x, seg, xi, dist);
+  }
+  if (dfar <= *dist) {
+    search(far, x, seg, xi, dist);
+  }
+}
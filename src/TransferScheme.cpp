@@ -21,14 +21,23 @@
 
 #include "TransferScheme.h"
 
+#include <math.h>
 #include <stdio.h>
 #include <stdlib.h>
 
 #include <cstring>
 
+#include "InterpOperator.h"
+#include "KDTree.h"
 #include "LocatePoint.h"
+#include "Octree.h"
+#include "TransferWorkspace.h"
 #include "funtofemlapack.h"
 
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
 // Initialize object counter to zero
 int TransferScheme::object_count = 0;
 
@@ -45,6 +54,177 @@ TransferScheme::~TransferScheme() {
   if (Xs_local) {
     delete[] Xs_local;
   }
+
+  // Free the single precision node locations
+  clearSingleNodes();
+
+  // Free the structural halo
+  clearStructHalo();
+
+  // Free the reference data for keeping the connectivity
+  clearConnReference();
+
+  // Free the interpolation operator
+  if (interp) {
+    delete interp;
+  }
+
+  // Release the octree of the structural nodes
+  if (struct_octree) {
+    struct_octree->decref();
+  }
+
+  // Free the work arrays
+  if (workspace) {
+    delete workspace;
+  }
+}
+
+/*
+  Get a persistent scalar work array with at least the given number of
+  entries. The contents of the array are not initialized.
+
+  Arguments
+  ---------
+  index : index of the work array
+  size  : minimum number of entries
+
+  Returns
+  -------
+  pointer to the work array
+*/
+F2FScalar *TransferScheme::getWorkArray(int index, int size) {
+  if (!workspace) {
+    workspace = new TransferWorkspace();
+  }
+  return workspace->getScalarArray(index, size);
+}
+
+/*
+  Get a persistent integer work array with at least the given number of
+  entries. The contents of the array are not initialized.
+
+  Arguments
+  ---------
+  index : index of the work array
+  size  : minimum number of entries
+
+  Returns
+  -------
+  pointer to the work array
+*/
+int *TransferScheme::getIntWorkArray(int index, int size) {
+  if (!workspace) {
+    workspace = new TransferWorkspace();
+  }
+  return workspace->getIntArray(index, size);
+}
+
+/*
+  Get the number of bytes allocated for the persistent work arrays
+*/
+size_t TransferScheme::getWorkspaceMemoryFootprint() {
+  if (workspace) {
+    return workspace->getMemoryFootprint();
+  }
+  return 0;
+}
+
+/*
+  Get the number of bytes allocated by the transfer scheme for the node
+  locations and the persistent work arrays
+*/
+size_t TransferScheme::getMemoryFootprint() {
+  size_t bytes = getWorkspaceMemoryFootprint();
+  if (Xa) {
+    bytes += 3 * na * sizeof(F2FScalar);
+  }
+  if (Xs) {
+    bytes += 3 * ns * sizeof(F2FScalar);
+  }
+  if (Xs_local) {
+    bytes += 3 * ns_local * sizeof(F2FScalar);
+  }
+  if (Xa_single) {
+    bytes += 3 * na * sizeof(F2FSingleScalar);
+  }
+  if (Xs_single) {
+    bytes += 3 * ns * sizeof(F2FSingleScalar);
+  }
+  if (halo_nodes) {
+    bytes += ns * sizeof(int);
+    bytes += 2 * (halo_nrecv + halo_nsend) * sizeof(int);
+    bytes += halo_send_ptr[halo_nsend] * sizeof(int);
+  }
+  if (interp) {
+    bytes += interp->getMemoryFootprint();
+  }
+  if (struct_octree) {
+    bytes += struct_octree->getMemoryFootprint();
+  }
+  if (conn_ref) {
+    bytes += conn_nn * conn_na * sizeof(int);
+    bytes += (4 * conn_na + 3 * conn_ns) * sizeof(double);
+  }
+  return bytes;
+}
+
+/*
+  Get the size of the interpolation operator from the structural to the
+  aerodynamic nodes. This is collective on the global communicator.
+
+  Returns
+  -------
+  bs    : block size (degrees of freedom per node)
+  nrows : number of block rows (local aerodynamic nodes)
+  ncols : number of block columns (global structural nodes)
+  nnz   : number of nonzero blocks
+
+  Returns 1 if the scheme assembles the operator and 0 otherwise
+*/
+int TransferScheme::getInterpOperatorSize(int *bs, int *nrows, int *ncols,
+                                          int *nnz) {
+  *bs = *nrows = *ncols = *nnz = 0;
+
+  updateInterpOperator();
+  if (!interp) {
+    return 0;
+  }
+
+  *bs = interp->getBlockSize();
+  *nrows = interp->getNumRows();
+  *nnz = interp->getNumNonzeros();
+  MPI_Allreduce(&ns_local, ncols, 1, MPI_INT, MPI_SUM, global_comm);
+
+  return 1;
+}
+
+/*
+  Copy the interpolation operator in block CSR format, with the columns
+  numbered by the global structural node
+
+  Returns
+  -------
+  rowp : pointer to the start of each block row (length nrows + 1)
+  cols : global structural node of each block (length nnz)
+  vals : row-major bs x bs blocks (length bs*bs*nnz)
+*/
+void TransferScheme::getInterpOperator(int *rowp, int *cols, F2FScalar *vals) {
+  if (!interp) {
+    return;
+  }
+
+  const int *_rowp, *_cols;
+  const F2FScalar *_vals;
+  interp->getArrays(&_rowp, &_cols, &_vals);
+
+  int nrows = interp->getNumRows();
+  int nnz = interp->getNumNonzeros();
+  memcpy(rowp, _rowp, (nrows + 1) * sizeof(int));
+  interp->getValues(vals);
+  for (int jp = 0; jp < nnz; jp++) {
+    cols[jp] = halo_nodes ? halo_nodes[_cols[jp]] : _cols[jp];
+  }
 }
 
 /*
@@ -52,6 +232,8 @@ TransferScheme::~TransferScheme() {
 */
 void TransferScheme::setAeroNodes(const F2FScalar *aero_X, int aero_nnodes) {
   na = aero_nnodes;
+  interp_update = 1;
+  single_nodes_update = 1;
 
   // Free the aerodynamic data if any is allocated
   if (Xa) {
@@ -95,12 +277,170 @@ void TransferScheme::setStructNodes(const F2FScalar *struct_X,
   }
 }
 
+/*
+  Set the nearest neighbor search used to build the aerostructural
+  connectivity in initialize()
+
+  Arguments
+  ---------
+  type        : LOCATE_POINT_SEARCH, KD_TREE_SEARCH or OCTREE_SEARCH
+  num_threads : number of threads for the k-d tree and octree queries
+*/
+void TransferScheme::setSearchType(SearchType type, int num_threads) {
+  search_type = type;
+  search_threads = num_threads;
+#ifdef _OPENMP
+  if (search_threads < 1) {
+    search_threads = omp_get_max_threads();
+  }
+#else
+  search_threads = 1;
+#endif
+}
+
+/*
+  Keep the aerostructural connectivity when the schemes are initialized again
+  after the node locations have changed. The nearest neighbor search is only
+  repeated for the aerodynamic nodes that may have moved enough to change
+  their nearest structural nodes. Checking this requires storing the node
+  locations and connectivity from the last search.
+
+  Arguments
+  ---------
+  reuse : flag to keep the connectivity when it is still valid
+*/
+void TransferScheme::setConnReuse(int reuse) {
+  conn_reuse = reuse;
+  if (!conn_reuse) {
+    clearConnReference();
+  }
+}
+
+/*
+  Copy the aerodynamic and structural node locations to single precision for
+  the mixed precision transfers. The copies are only made again when the node
+  locations have changed since the last call.
+*/
+void TransferScheme::updateSingleNodes() {
+  if (!single_nodes_update && (Xa_single || na == 0) &&
+      (Xs_single || ns == 0)) {
+    return;
+  }
+
+  clearSingleNodes();
+  if (na > 0) {
+    Xa_single = new F2FSingleScalar[3 * na];
+    for (int i = 0; i < 3 * na; i++) {
+      Xa_single[i] = F2FSingleScalar(Xa[i]);
+    }
+  }
+  if (ns > 0) {
+    Xs_single = new F2FSingleScalar[3 * ns];
+    for (int i = 0; i < 3 * ns; i++) {
+      Xs_single[i] = F2FSingleScalar(Xs[i]);
+    }
+  }
+  single_nodes_update = 0;
+}
+
+/*
+  Free the single precision copies of the node locations
+*/
+void TransferScheme::clearSingleNodes() {
+  if (Xa_single) {
+    delete[] Xa_single;
+  }
+  if (Xs_single) {
+    delete[] Xs_single;
+  }
+  Xa_single = Xs_single = NULL;
+  single_nodes_update = 1;
+}
+
+/*
+  Free the reference data used to check whether the connectivity can be kept
+*/
+void TransferScheme::clearConnReference() {
+  if (conn_ref) {
+    delete[] conn_ref;
+    delete[] conn_Xa;
+    delete[] conn_Xs;
+    delete[] conn_gap;
+  }
+  conn_ref = NULL;
+  conn_Xa = conn_Xs = conn_gap = NULL;
+  conn_na = conn_ns = conn_nn = 0;
+  conn_isymm = -1;
+}
+
+/*
+  Share an octree of the structural nodes with other transfer schemes, such
+  as the load/displacement and thermal transfer schemes of a body. The octree
+  is generated again whenever it does not match the structural nodes of the
+  scheme using it, so it only needs to be generated once while the schemes
+  share the same structural mesh.
+
+  Arguments
+  ---------
+  octree : the octree (NULL for an octree owned by this scheme)
+*/
+void TransferScheme::setStructOctree(Octree *octree) {
+  if (octree) {
+    octree->incref();
+  }
+  if (struct_octree) {
+    struct_octree->decref();
+  }
+  struct_octree = octree;
+}
+
+/*
+  Get the octree of the global structural nodes. The octree is created if no
+  octree has been set, and generated again if it was built over other points
+  or with more points in its leaf bins than requested.
+
+  Arguments
+  ---------
+  min_point_count : largest number of points needed in each leaf bin
+
+  Returns
+  -------
+  octree : the octree of the structural nodes
+*/
+Octree *TransferScheme::getStructOctree(int min_point_count) {
+  if (!struct_octree) {
+    struct_octree = new Octree(Xs, ns, min_point_count, 1.0e-6, 21);
+    struct_octree->setNumThreads(search_threads);
+    struct_octree->incref();
+  } else if (!struct_octree->hasPoints(Xs, ns)) {
+    struct_octree->setPoints(Xs, ns);
+  }
+
+  if (struct_octree->nbins == 0 ||
+      struct_octree->getMinPointCount() > min_point_count) {
+    if (struct_octree->getMinPointCount() > min_point_count) {
+      struct_octree->setParameters(min_point_count, 1.0e-6, 21);
+    }
+    struct_octree->generate();
+  }
+
+  return struct_octree;
+}
+
 void TransferScheme::distributeStructuralMesh() {
   // Check if the mesh has been updated
   MPI_Allreduce(MPI_IN_PLACE, &mesh_update, 1, MPI_INT, MPI_SUM, global_comm);
 
   if (mesh_update > 0) {
     mesh_update = 0;
+    interp_update = 1;
+    single_nodes_update = 1;
+
+    // Only update the locations of the halo nodes if the halo has been built
+    if (halo_nodes) {
+      structGatherBcast(3 * ns_local, Xs_local, 3 * ns, Xs);
+      return;
+    }
 
     // Compute the number of structural nodes on the structural root processor
     if (struct_comm != MPI_COMM_NULL) {
@@ -148,6 +488,14 @@ void TransferScheme::distributeStructuralMesh() {
 */
 void TransferScheme::structAddScatter(int global_len, F2FScalar *global_data,
                                       int local_len, F2FScalar *local_data) {
+  // Add the halo values directly to the processors that own the nodes
+  if (halo_nodes) {
+    int bs;
+    structHaloBlockSize(global_len, local_len, &bs);
+    structHaloAddScatter(bs, global_data, local_data);
+    return;
+  }
+
   // Reduce values on global_comm to the struct_root processor
   int global_rank;
   MPI_Comm_rank(global_comm, &global_rank);
@@ -167,13 +515,13 @@ void TransferScheme::structAddScatter(int global_len, F2FScalar *global_data,
     MPI_Comm_size(struct_comm, &struct_nprocs);
     MPI_Comm_rank(struct_comm, &struct_rank);
 
-    int *nvalues = new int[struct_nprocs];
+    int *nvalues = getIntWorkArray(WORK_COMM_COUNTS, struct_nprocs);
     memset(nvalues, 0, struct_nprocs * sizeof(int));
 
     MPI_Gather(&local_len, 1, MPI_INT, nvalues, 1, MPI_INT, 0, struct_comm);
 
     // Collect the values nodes on the root
-    int *disps = new int[struct_nprocs];
+    int *disps = getIntWorkArray(WORK_COMM_DISPS, struct_nprocs);
     memset(disps, 0, struct_nprocs * sizeof(int));
 
     if (struct_rank == 0) {
@@ -187,9 +535,6 @@ void TransferScheme::structAddScatter(int global_len, F2FScalar *global_data,
     // Scatter from the root aero processor
     MPI_Scatterv(global_data, nvalues, disps, F2F_MPI_TYPE, local_data,
                  local_len, F2F_MPI_TYPE, 0, struct_comm);
-
-    delete[] nvalues;
-    delete[] disps;
   }
 }
 
@@ -210,19 +555,28 @@ void TransferScheme::structAddScatter(int global_len, F2FScalar *global_data,
 void TransferScheme::structGatherBcast(int local_len,
                                        const F2FScalar *local_data,
                                        int global_len, F2FScalar *global_data) {
+  // Only collect the values for the halo nodes from the processors that own
+  // the nodes
+  if (halo_nodes) {
+    int bs;
+    structHaloBlockSize(global_len, local_len, &bs);
+    structHaloGather(bs, local_data, global_data);
+    return;
+  }
+
   // Collect how many structural nodes every processor has
   if (struct_comm != MPI_COMM_NULL) {
     int struct_nprocs, struct_rank;
     MPI_Comm_size(struct_comm, &struct_nprocs);
     MPI_Comm_rank(struct_comm, &struct_rank);
 
-    int *nvalues = new int[struct_nprocs];
+    int *nvalues = getIntWorkArray(WORK_COMM_COUNTS, struct_nprocs);
     memset(nvalues, 0, struct_nprocs * sizeof(int));
 
     MPI_Gather(&local_len, 1, MPI_INT, nvalues, 1, MPI_INT, 0, struct_comm);
 
     // Collect the values nodes on the root
-    int *disps = new int[struct_nprocs];
+    int *disps = getIntWorkArray(WORK_COMM_DISPS, struct_nprocs);
     memset(disps, 0, struct_nprocs * sizeof(int));
 
     if (struct_rank == 0) {
@@ -235,15 +589,351 @@ void TransferScheme::structGatherBcast(int local_len,
 
     MPI_Gatherv(local_data, local_len, F2F_MPI_TYPE, global_data, nvalues,
                 disps, F2F_MPI_TYPE, 0, struct_comm);
-
-    delete[] nvalues;
-    delete[] disps;
   }
 
   // Broadcast the global list to all the processors
   MPI_Bcast(global_data, global_len, F2F_MPI_TYPE, struct_root, global_comm);
 }
 
+/*
+  Replace the global structural mesh with the halo of structural nodes that
+  are referenced by the aerostructural connectivity on this processor, and
+  set up the neighbor communication between the owners of the structural
+  nodes and the processors that use them.
+
+  After this call, ns is the number of halo nodes, Xs stores the locations of
+  the halo nodes and the connectivity refers to the halo nodes, with the
+  reflected nodes offset by the number of halo nodes. The exchanges in
+  structGatherBcast and structAddScatter are then sparse point-to-point
+  exchanges with the neighbors instead of global collectives.
+
+  Arguments
+  ---------
+  nn   : The number of nearest neighbors
+  conn : Connectivity array aero nodes -> global structural nodes
+
+  Returns
+  -------
+  conn : Connectivity array aero nodes -> halo structural nodes
+*/
+void TransferScheme::buildStructHalo(int nn, int *conn) {
+  clearStructHalo();
+
+  int rank, nprocs;
+  MPI_Comm_rank(global_comm, &rank);
+  MPI_Comm_size(global_comm, &nprocs);
+
+  // Find the processor that owns each block of the global structural nodes.
+  // The nodes are ordered by rank in struct_comm.
+  int info[2] = {-1, ns_local};
+  if (struct_comm != MPI_COMM_NULL) {
+    MPI_Comm_rank(struct_comm, &info[0]);
+  }
+  int *all_info = new int[2 * nprocs];
+  MPI_Allgather(info, 2, MPI_INT, all_info, 2, MPI_INT, global_comm);
+
+  int struct_nprocs = 0;
+  for (int proc = 0; proc < nprocs; proc++) {
+    if (all_info[2 * proc] >= 0) {
+      struct_nprocs++;
+    }
+  }
+
+  int *owner = new int[struct_nprocs];
+  int *owner_ptr = new int[struct_nprocs + 1];
+  for (int proc = 0; proc < nprocs; proc++) {
+    if (all_info[2 * proc] >= 0) {
+      owner[all_info[2 * proc]] = proc;
+      owner_ptr[all_info[2 * proc] + 1] = all_info[2 * proc + 1];
+    }
+  }
+  owner_ptr[0] = 0;
+  for (int k = 0; k < struct_nprocs; k++) {
+    owner_ptr[k + 1] += owner_ptr[k];
+  }
+  delete[] all_info;
+
+  // Find the global structural nodes referenced by the connectivity, in
+  // increasing order, and number them
+  int *halo_index = new int[ns];
+  for (int k = 0; k < ns; k++) {
+    halo_index[k] = -1;
+  }
+  for (int i = 0; i < nn * na; i++) {
+    int k = conn[i] < ns ? conn[i] : conn[i] - ns;
+    halo_index[k] = 0;
+  }
+
+  int nhalo = 0;
+  for (int k = 0; k < ns; k++) {
+    if (halo_index[k] >= 0) {
+      halo_index[k] = nhalo;
+      nhalo++;
+    }
+  }
+
+  halo_nodes = new int[nhalo];
+  F2FScalar *Xhalo = new F2FScalar[3 * nhalo];
+  for (int k = 0; k < ns; k++) {
+    if (halo_index[k] >= 0) {
+      halo_nodes[halo_index[k]] = k;
+      memcpy(&Xhalo[3 * halo_index[k]], &Xs[3 * k], 3 * sizeof(F2FScalar));
+    }
+  }
+
+  // Renumber the connectivity
+  for (int i = 0; i < nn * na; i++) {
+    if (conn[i] < ns) {
+      conn[i] = halo_index[conn[i]];
+    } else {
+      conn[i] = halo_index[conn[i] - ns] + nhalo;
+    }
+  }
+  delete[] halo_index;
+
+  // Count the halo nodes owned by each processor. Since the halo nodes are
+  // sorted, the nodes from each owner are contiguous.
+  int *recv_count = new int[nprocs];
+  memset(recv_count, 0, nprocs * sizeof(int));
+  for (int h = 0, k = 0; h < nhalo; h++) {
+    while (halo_nodes[h] >= owner_ptr[k + 1]) {
+      k++;
+    }
+    recv_count[owner[k]]++;
+  }
+
+  // Tell each owner how many of its nodes this processor needs
+  int *send_count = new int[nprocs];
+  MPI_Alltoall(recv_count, 1, MPI_INT, send_count, 1, MPI_INT, global_comm);
+
+  // Record the owners in order of the halo nodes
+  int *sources = new int[struct_nprocs];
+  halo_nrecv = 0;
+  for (int k = 0; k < struct_nprocs; k++) {
+    if (recv_count[owner[k]] > 0) {
+      sources[halo_nrecv] = owner[k];
+      halo_nrecv++;
+    }
+  }
+
+  halo_recv_count = new int[halo_nrecv];
+  halo_recv_ptr = new int[halo_nrecv + 1];
+  halo_recv_ptr[0] = 0;
+  for (int n = 0; n < halo_nrecv; n++) {
+    halo_recv_count[n] = recv_count[sources[n]];
+    halo_recv_ptr[n + 1] = halo_recv_ptr[n] + halo_recv_count[n];
+  }
+
+  // Record the processors that need nodes from this processor
+  int *dests = new int[nprocs];
+  halo_nsend = 0;
+  for (int proc = 0; proc < nprocs; proc++) {
+    if (send_count[proc] > 0) {
+      dests[halo_nsend] = proc;
+      halo_nsend++;
+    }
+  }
+
+  halo_send_count = new int[halo_nsend];
+  halo_send_ptr = new int[halo_nsend + 1];
+  halo_send_ptr[0] = 0;
+  for (int n = 0; n < halo_nsend; n++) {
+    halo_send_count[n] = send_count[dests[n]];
+    halo_send_ptr[n + 1] = halo_send_ptr[n] + halo_send_count[n];
+  }
+  halo_send_nodes = new int[halo_send_ptr[halo_nsend]];
+
+  // Send the requested nodes to the owners as local node indices
+  int *sdispls = new int[nprocs];
+  int *rdispls = new int[nprocs];
+  int *requests = new int[nhalo];
+  for (int proc = 0; proc < nprocs; proc++) {
+    sdispls[proc] = 0;
+    rdispls[proc] = 0;
+  }
+  for (int n = 0; n < halo_nrecv; n++) {
+    sdispls[sources[n]] = halo_recv_ptr[n];
+  }
+  for (int n = 0; n < halo_nsend; n++) {
+    rdispls[dests[n]] = halo_send_ptr[n];
+  }
+  for (int h = 0, k = 0; h < nhalo; h++) {
+    while (halo_nodes[h] >= owner_ptr[k + 1]) {
+      k++;
+    }
+    requests[h] = halo_nodes[h] - owner_ptr[k];
+  }
+  MPI_Alltoallv(requests, recv_count, sdispls, MPI_INT, halo_send_nodes,
+                send_count, rdispls, MPI_INT, global_comm);
+
+  // Create the neighbor communicators for the exchanges in each direction
+  MPI_Dist_graph_create_adjacent(
+      global_comm, halo_nrecv, sources, MPI_UNWEIGHTED, halo_nsend, dests,
+      MPI_UNWEIGHTED, MPI_INFO_NULL, 0, &halo_gather_comm);
+  MPI_Dist_graph_create_adjacent(global_comm, halo_nsend, dests, MPI_UNWEIGHTED,
+                                 halo_nrecv, sources, MPI_UNWEIGHTED,
+                                 MPI_INFO_NULL, 0, &halo_scatter_comm);
+
+  delete[] owner;
+  delete[] owner_ptr;
+  delete[] recv_count;
+  delete[] send_count;
+  delete[] sources;
+  delete[] dests;
+  delete[] sdispls;
+  delete[] rdispls;
+  delete[] requests;
+
+  // Replace the global structural mesh with the halo
+  if (Xs) {
+    delete[] Xs;
+  }
+  Xs = Xhalo;
+  ns = nhalo;
+  single_nodes_update = 1;
+}
+
+/*
+  Discard the structural halo, if any, so that the global structural mesh is
+  distributed again on the next call to distributeStructuralMesh()
+*/
+void TransferScheme::clearStructHalo() {
+  if (!halo_nodes) {
+    return;
+  }
+
+  // The communicators cannot be freed once MPI has been finalized
+  int finalized;
+  MPI_Finalized(&finalized);
+  if (!finalized) {
+    MPI_Comm_free(&halo_gather_comm);
+    MPI_Comm_free(&halo_scatter_comm);
+  }
+  halo_gather_comm = MPI_COMM_NULL;
+  halo_scatter_comm = MPI_COMM_NULL;
+
+  delete[] halo_nodes;
+  delete[] halo_recv_count;
+  delete[] halo_recv_ptr;
+  delete[] halo_send_count;
+  delete[] halo_send_ptr;
+  delete[] halo_send_nodes;
+  halo_nodes = NULL;
+  halo_recv_count = halo_recv_ptr = NULL;
+  halo_send_count = halo_send_ptr = halo_send_nodes = NULL;
+  halo_nrecv = halo_nsend = 0;
+
+  mesh_update = 1;
+}
+
+/*
+  Find the number of values per node for an exchange with the halo
+
+  Arguments
+  ---------
+  global_len : length of the halo data
+  local_len  : length of the local structural data
+
+  Returns
+  -------
+  bs : number of values per node
+*/
+void TransferScheme::structHaloBlockSize(int global_len, int local_len,
+                                         int *bs) {
+  *bs = 0;
+  if (ns > 0) {
+    *bs = global_len / ns;
+  } else if (ns_local > 0) {
+    *bs = local_len / ns_local;
+  }
+}
+
+/*
+  Collect the values of the halo nodes from the processors that own them
+
+  Arguments
+  ---------
+  bs         : number of values per node
+  local_data : values for the local structural nodes
+
+  Returns
+  -------
+  halo_data  : values for the halo nodes
+*/
+void TransferScheme::structHaloGather(int bs, const F2FScalar *local_data,
+                                      F2FScalar *halo_data) {
+  int *send_counts = getIntWorkArray(WORK_HALO_SEND_COUNTS, halo_nsend);
+  int *send_displs = getIntWorkArray(WORK_HALO_SEND_DISPS, halo_nsend);
+  int *recv_counts = getIntWorkArray(WORK_HALO_RECV_COUNTS, halo_nrecv);
+  int *recv_displs = getIntWorkArray(WORK_HALO_RECV_DISPS, halo_nrecv);
+
+  // Pack the values of the requested nodes
+  int nsend = halo_send_ptr[halo_nsend];
+  F2FScalar *buffer = getWorkArray(WORK_HALO_BUFFER, bs * nsend);
+  for (int i = 0; i < nsend; i++) {
+    memcpy(&buffer[bs * i], &local_data[bs * halo_send_nodes[i]],
+           bs * sizeof(F2FScalar));
+  }
+
+  for (int n = 0; n < halo_nsend; n++) {
+    send_counts[n] = bs * halo_send_count[n];
+    send_displs[n] = bs * halo_send_ptr[n];
+  }
+  for (int n = 0; n < halo_nrecv; n++) {
+    recv_counts[n] = bs * halo_recv_count[n];
+    recv_displs[n] = bs * halo_recv_ptr[n];
+  }
+
+  MPI_Neighbor_alltoallv(buffer, send_counts, send_displs, F2F_MPI_TYPE,
+                         halo_data, recv_counts, recv_displs, F2F_MPI_TYPE,
+                         halo_gather_comm);
+}
+
+/*
+  Send the values of the halo nodes to the processors that own them and add
+  the contributions from all the processors
+
+  Arguments
+  ---------
+  bs         : number of values per node
+  halo_data  : values for the halo nodes
+
+  Returns
+  -------
+  local_data : summed values for the local structural nodes
+*/
+void TransferScheme::structHaloAddScatter(int bs, const F2FScalar *halo_data,
+                                          F2FScalar *local_data) {
+  int *send_counts = getIntWorkArray(WORK_HALO_SEND_COUNTS, halo_nrecv);
+  int *send_displs = getIntWorkArray(WORK_HALO_SEND_DISPS, halo_nrecv);
+  int *recv_counts = getIntWorkArray(WORK_HALO_RECV_COUNTS, halo_nsend);
+  int *recv_displs = getIntWorkArray(WORK_HALO_RECV_DISPS, halo_nsend);
+
+  for (int n = 0; n < halo_nrecv; n++) {
+    send_counts[n] = bs * halo_recv_count[n];
+    send_displs[n] = bs * halo_recv_ptr[n];
+  }
+  for (int n = 0; n < halo_nsend; n++) {
+    recv_counts[n] = bs * halo_send_count[n];
+    recv_displs[n] = bs * halo_send_ptr[n];
+  }
+
+  int nrecv = halo_send_ptr[halo_nsend];
+  F2FScalar *buffer = getWorkArray(WORK_HALO_BUFFER, bs * nrecv);
+  MPI_Neighbor_alltoallv(halo_data, send_counts, send_displs, F2F_MPI_TYPE,
+                         buffer, recv_counts, recv_displs, F2F_MPI_TYPE,
+                         halo_scatter_comm);
+
+  // Add the contributions to the local nodes
+  memset(local_data, 0, bs * ns_local * sizeof(F2FScalar));
+  for (int i = 0; i < nrecv; i++) {
+    F2FScalar *data = &local_data[bs * halo_send_nodes[i]];
+    for (int k = 0; k < bs; k++) {
+      data[k] += buffer[bs * i + k];
+    }
+  }
+}
+
 /*
   Reduce vector to get the total across all aero procs then distribute to the
   aerodynamic processors
@@ -256,13 +946,13 @@ void TransferScheme::aeroScatter(int global_len, F2FScalar *global_data,
     MPI_Comm_size(aero_comm, &aero_nprocs);
     MPI_Comm_rank(aero_comm, &aero_rank);
 
-    int *nvalues = new int[aero_nprocs];
+    int *nvalues = getIntWorkArray(WORK_COMM_COUNTS, aero_nprocs);
     memset(nvalues, 0, aero_nprocs * sizeof(int));
 
     MPI_Gather(&local_len, 1, MPI_INT, nvalues, 1, MPI_INT, 0, aero_comm);
 
     // Collect the values nodes on the root
-    int *disps = new int[aero_nprocs];
+    int *disps = getIntWorkArray(WORK_COMM_DISPS, aero_nprocs);
     memset(disps, 0, aero_nprocs * sizeof(int));
 
     if (aero_rank == 0) {
@@ -275,9 +965,6 @@ void TransferScheme::aeroScatter(int global_len, F2FScalar *global_data,
 
     MPI_Scatterv(global_data, nvalues, disps, F2F_MPI_TYPE, local_data,
                  local_len, F2F_MPI_TYPE, aero_root, aero_comm);
-
-    delete[] nvalues;
-    delete[] disps;
   }
 }
 
@@ -293,13 +980,13 @@ void TransferScheme::aeroGatherBcast(int local_len, const F2FScalar *local_data,
     MPI_Comm_size(aero_comm, &aero_nprocs);
     MPI_Comm_rank(aero_comm, &aero_rank);
 
-    int *nvalues = new int[aero_nprocs];
+    int *nvalues = getIntWorkArray(WORK_COMM_COUNTS, aero_nprocs);
     memset(nvalues, 0, aero_nprocs * sizeof(int));
 
     MPI_Gather(&local_len, 1, MPI_INT, nvalues, 1, MPI_INT, 0, struct_comm);
 
     // Collect the values nodes on the root
-    int *disps = new int[aero_nprocs];
+    int *disps = getIntWorkArray(WORK_COMM_DISPS, aero_nprocs);
     memset(disps, 0, aero_nprocs * sizeof(int));
 
     if (aero_rank == 0) {
@@ -312,18 +999,235 @@ void TransferScheme::aeroGatherBcast(int local_len, const F2FScalar *local_data,
 
     MPI_Gatherv(local_data, local_len, F2F_MPI_TYPE, global_data, nvalues,
                 disps, F2F_MPI_TYPE, 0, aero_comm);
+  }
+
+  // Broadcast the global list to all the processors
+  MPI_Bcast(global_data, global_len, F2F_MPI_TYPE, aero_root, global_comm);
+}
+
+/*
+  Builds aerostructural connectivity through a nearest neighbor search, linking
+  each aerodynamic node with a specified number of nearest structural nodes.
+  The LocatePoint search duplicates the reflected structural nodes, while the
+  k-d tree and octree searches reflect the aerodynamic node instead.
+
+  Arguments
+  ---------
+  isymm  : Symmetry index
+  nn     : The number of nearest neighbors
+  tol    : Symmetry plane tolerance
+
+  Returns
+  -------
+  conn   : aerostructural connectivity
+*/
+void TransferScheme::computeAeroStructConn(int isymm, int nn, int *conn,
+                                           double tol) {
+  computeAeroStructConn(na, Xa, isymm, nn, conn, tol);
+}
+
+/*
+  Builds the connectivity for the given points instead of the aerodynamic
+  nodes
+
+  Arguments
+  ---------
+  npts   : The number of points
+  pts    : The point locations
+  isymm  : Symmetry index
+  nn     : The number of nearest neighbors
+  tol    : Symmetry plane tolerance
+
+  Returns
+  -------
+  conn   : connectivity from the points to the structural nodes
+*/
+void TransferScheme::computeAeroStructConn(int npts, const F2FScalar *pts,
+                                           int isymm, int nn, int *conn,
+                                           double tol) {
+  if (search_type == KD_TREE_SEARCH) {
+    KDTree *tree = new KDTree(Xs, ns);
+    tree->locateKClosest(nn, npts, pts, conn, isymm, tol, search_threads);
+    delete tree;
+    return;
+  } else if (search_type == OCTREE_SEARCH) {
+    Octree *octree = getStructOctree(16);
+    octree->locateKClosest(nn, npts, pts, conn, isymm, tol, search_threads);
+    return;
+  }
+
+  // Copy or duplicate and reflect the unique structural nodes
+  F2FScalar *Xs_dup = NULL;
+  int num_locate_nodes = 0;
+  int *locate_to_reflected_index = NULL;
 
-    delete[] nvalues;
-    delete[] disps;
+  if (isymm >= 0) {
+    Xs_dup = new F2FScalar[6 * ns];
+    memcpy(Xs_dup, Xs, 3 * ns * sizeof(F2FScalar));
+
+    locate_to_reflected_index = new int[ns];
+
+    num_locate_nodes = 0;
+    for (int k = 0; k < ns; k++) {
+      if (fabs(F2FRealPart(Xs_dup[3 * k + isymm])) > tol) {
+        // Node is not on the plane of symmetry, so copy it
+        int kk = num_locate_nodes + ns;
+        memcpy(&Xs_dup[3 * kk], &Xs_dup[3 * k], 3 * sizeof(F2FScalar));
+
+        // reflect the point
+        Xs_dup[3 * kk + isymm] *= -1.0;
+
+        // Record the index
+        locate_to_reflected_index[num_locate_nodes] = k + ns;
+        num_locate_nodes++;
+      }
+    }
+    num_locate_nodes += ns;
+  } else {
+    Xs_dup = new F2FScalar[3 * ns];
+    memcpy(Xs_dup, Xs, 3 * ns * sizeof(F2FScalar));
+    num_locate_nodes = ns;
+  }
+
+  // Create instance of LocatePoint class to perform the following searches
+  int min_bin_size = 10;
+  LocatePoint *locator =
+      new LocatePoint(Xs_dup, num_locate_nodes, min_bin_size);
+
+  // Indices of nearest nodes
+  int *indx = new int[nn];
+  F2FScalar *dist = new F2FScalar[nn];
+
+  // For each aerodynamic node, copy the indices of the nearest n structural
+  // nodes into the conn array
+  for (int i = 0; i < npts; i++) {
+    F2FScalar xa0[3];
+    memcpy(xa0, &pts[3 * i], 3 * sizeof(F2FScalar));
+
+    locator->locateKClosest(nn, indx, dist, xa0);
+
+    for (int k = 0; k < nn; k++) {
+      if (indx[k] >= ns) {
+        int kk = indx[k] - ns;
+        conn[nn * i + k] = locate_to_reflected_index[kk];
+      } else {
+        conn[nn * i + k] = indx[k];
+      }
+    }
+  }
+
+  // Free the duplicate array
+  delete[] Xs_dup;
+
+  if (locate_to_reflected_index) {
+    delete[] locate_to_reflected_index;
+  }
+
+  // Delete the LocatePoint object and release memory
+  delete[] indx;
+  delete[] dist;
+  delete locator;
+}
+
+/*
+  Compute the distance between an aerodynamic node and a structural node that
+  may be reflected across the plane of symmetry
+*/
+static double connDistance(const F2FScalar *Xs, int ns, int isymm, int node,
+                           const F2FScalar *xa) {
+  double xs[3];
+  for (int k = 0; k < 3; k++) {
+    xs[k] = F2FRealPart(Xs[3 * (node % ns) + k]);
+  }
+  if (node >= ns) {
+    xs[isymm] *= -1.0;
+  }
+
+  double d = 0.0;
+  for (int k = 0; k < 3; k++) {
+    double t = F2FRealPart(xa[k]) - xs[k];
+    d += t * t;
+  }
+  return sqrt(d);
+}
+
+/*
+  Compute the connectivity for the given points along with the gap between
+  the distances to the nn-th and (nn+1)-th nearest structural nodes, which is
+  found by searching for one extra node
+
+  Arguments
+  ---------
+  npts   : The number of points
+  pts    : The point locations
+  isymm  : Symmetry index
+  nn     : The number of nearest neighbors
+  tol    : Symmetry plane tolerance
+
+  Returns
+  -------
+  conn   : connectivity from the points to the structural nodes
+  gap    : gap between the distances to the nn-th and (nn+1)-th nodes
+*/
+void TransferScheme::computeConnGap(int npts, const F2FScalar *pts, int isymm,
+                                    int nn, int *conn, double *gap,
+                                    double tol) {
+  // Count the structural nodes, including the reflected nodes, that can be
+  // connected to each point
+  int ncandidates = ns;
+  if (isymm >= 0) {
+    for (int k = 0; k < ns; k++) {
+      if (fabs(F2FRealPart(Xs[3 * k + isymm])) > tol) {
+        ncandidates++;
+      }
+    }
+  }
+
+  // When all the nodes are connected, the connectivity cannot change
+  if (nn >= ncandidates) {
+    computeAeroStructConn(npts, pts, isymm, nn, conn, tol);
+    for (int i = 0; i < npts; i++) {
+      gap[i] = 1e300;
+    }
+    return;
+  }
+
+  int *conn_next = new int[(nn + 1) * npts];
+  computeAeroStructConn(npts, pts, isymm, nn + 1, conn_next, tol);
+
+  for (int i = 0; i < npts; i++) {
+    const int *c = &conn_next[(nn + 1) * i];
+    memcpy(&conn[nn * i], c, nn * sizeof(int));
+
+    double dmax = 0.0;
+    for (int j = 0; j < nn; j++) {
+      double d = connDistance(Xs, ns, isymm, c[j], &pts[3 * i]);
+      if (d > dmax) {
+        dmax = d;
+      }
+    }
+    double dnext = connDistance(Xs, ns, isymm, c[nn], &pts[3 * i]);
+    gap[i] = (dnext > dmax ? dnext - dmax : 0.0);
   }
 
-  // Broadcast the global list to all the processors
-  MPI_Bcast(global_data, global_len, F2F_MPI_TYPE, aero_root, global_comm);
+  delete[] conn_next;
 }
 
 /*
-  Builds aerostructural connectivity through LocatePoint search, linking each
-  aerodynamic node with a specified number of nearest structural nodes
+  Compute the aerostructural connectivity, keeping the connectivity of the
+  aerodynamic nodes from the previous call when the node locations have
+  changed too little to change it.
+
+  If every structural node has moved at most ds and an aerodynamic node has
+  moved da since the reference search, all of its distances to the
+  structural nodes have changed by at most da + ds. Its nn nearest nodes are
+  therefore unchanged when 2(da + ds) is less than the gap between the
+  distances to its nn-th and (nn+1)-th nearest nodes. Only the aerodynamic
+  nodes that fail this test are searched again, unless they are more than
+  half of the nodes, in which case all the nodes are searched and the
+  reference locations are reset. The connectivity must use the global
+  structural nodes, so any halo must be discarded before calling this
+  function.
 
   Arguments
   ---------
@@ -334,80 +1238,111 @@ void TransferScheme::aeroGatherBcast(int local_len, const F2FScalar *local_data,
   Returns
   -------
   conn   : aerostructural connectivity
-*/
-void TransferScheme::computeAeroStructConn(int isymm, int nn, int *conn,
-                                           double tol) {
-  // Copy or duplicate and reflect the unique structural nodes
-  F2FScalar *Xs_dup = NULL;
-  int num_locate_nodes = 0;
-  int *locate_to_reflected_index = NULL;
 
-  if (isymm >= 0) {
-    Xs_dup = new F2FScalar[6 * ns];
-    memcpy(Xs_dup, Xs, 3 * ns * sizeof(F2FScalar));
+  Returns the number of aerodynamic nodes that were searched again
+*/
+int TransferScheme::updateAeroStructConn(int isymm, int nn, int *conn,
+                                         double tol) {
+  if (!conn_reuse) {
+    computeAeroStructConn(isymm, nn, conn, tol);
+    return na;
+  }
 
-    locate_to_reflected_index = new int[ns];
+  if (conn_ref && conn_na == na && conn_ns == ns && conn_nn == nn &&
+      conn_isymm == isymm) {
+    int valid = 1;
 
-    num_locate_nodes = 0;
+    // Find the largest distance moved by any structural node. Nodes that
+    // move on to or off the plane of symmetry change the reflected nodes.
+    double ds = 0.0;
     for (int k = 0; k < ns; k++) {
-      if (fabs(F2FRealPart(Xs_dup[3 * k + isymm])) > tol) {
-        // Node is not on the plane of symmetry, so copy it
-        int kk = num_locate_nodes + ns;
-        memcpy(&Xs_dup[3 * kk], &Xs_dup[3 * k], 3 * sizeof(F2FScalar));
-
-        // reflect the point
-        Xs_dup[3 * kk + isymm] *= -1.0;
-
-        // Record the index
-        locate_to_reflected_index[num_locate_nodes] = k + ns;
-        num_locate_nodes++;
+      double d = 0.0;
+      for (int j = 0; j < 3; j++) {
+        double t = F2FRealPart(Xs[3 * k + j]) - conn_Xs[3 * k + j];
+        d += t * t;
+      }
+      if (d > ds) {
+        ds = d;
+      }
+      if (isymm >= 0 && ((fabs(F2FRealPart(Xs[3 * k + isymm])) > tol) !=
+                         (fabs(conn_Xs[3 * k + isymm]) > tol))) {
+        valid = 0;
+      }
+    }
+    ds = sqrt(ds);
+
+    // Find the aerodynamic nodes that may have new nearest nodes
+    int nsearch = 0;
+    int *search_nodes = new int[na];
+    for (int i = 0; valid && i < na; i++) {
+      double d = 0.0;
+      for (int j = 0; j < 3; j++) {
+        double t = F2FRealPart(Xa[3 * i + j]) - conn_Xa[3 * i + j];
+        d += t * t;
+      }
+      d = sqrt(d) + ds;
+      if (d > 0.0 && 2.0 * d >= conn_gap[i]) {
+        search_nodes[nsearch] = i;
+        nsearch++;
       }
     }
-    num_locate_nodes += ns;
-  } else {
-    Xs_dup = new F2FScalar[3 * ns];
-    memcpy(Xs_dup, Xs, 3 * ns * sizeof(F2FScalar));
-    num_locate_nodes = ns;
-  }
-
-  // Create instance of LocatePoint class to perform the following searches
-  int min_bin_size = 10;
-  LocatePoint *locator =
-      new LocatePoint(Xs_dup, num_locate_nodes, min_bin_size);
 
-  // Indices of nearest nodes
-  int *indx = new int[nn];
-  F2FScalar *dist = new F2FScalar[nn];
+    if (valid && 2 * nsearch <= na) {
+      if (nsearch > 0) {
+        F2FScalar *pts = new F2FScalar[3 * nsearch];
+        for (int n = 0; n < nsearch; n++) {
+          memcpy(&pts[3 * n], &Xa[3 * search_nodes[n]], 3 * sizeof(F2FScalar));
+        }
 
-  // For each aerodynamic node, copy the indices of the nearest n structural
-  // nodes into the conn array
-  for (int i = 0; i < na; i++) {
-    F2FScalar xa0[3];
-    memcpy(xa0, &Xa[3 * i], 3 * sizeof(F2FScalar));
+        int *conn_new = new int[nn * nsearch];
+        double *gap = new double[nsearch];
+        computeConnGap(nsearch, pts, isymm, nn, conn_new, gap, tol);
 
-    locator->locateKClosest(nn, indx, dist, xa0);
+        // Update the reference data. The gaps are reduced so that the test
+        // remains valid with the distances moved by the structural nodes
+        // measured from their reference locations.
+        for (int n = 0; n < nsearch; n++) {
+          int i = search_nodes[n];
+          memcpy(&conn_ref[nn * i], &conn_new[nn * n], nn * sizeof(int));
+          for (int j = 0; j < 3; j++) {
+            conn_Xa[3 * i + j] = F2FRealPart(Xa[3 * i + j]);
+          }
+          conn_gap[i] = gap[n] - 2.0 * ds;
+        }
 
-    for (int k = 0; k < nn; k++) {
-      if (indx[k] >= ns) {
-        int kk = indx[k] - ns;
-        conn[nn * i + k] = locate_to_reflected_index[kk];
-      } else {
-        conn[nn * i + k] = indx[k];
+        delete[] pts;
+        delete[] conn_new;
+        delete[] gap;
       }
+      delete[] search_nodes;
+
+      memcpy(conn, conn_ref, nn * na * sizeof(int));
+      return nsearch;
     }
+    delete[] search_nodes;
+  }
+
+  // Search for all the nodes and record the reference node locations
+  clearConnReference();
+  conn_na = na;
+  conn_ns = ns;
+  conn_nn = nn;
+  conn_isymm = isymm;
+  conn_ref = new int[nn * na];
+  conn_Xa = new double[3 * na];
+  conn_Xs = new double[3 * ns];
+  conn_gap = new double[na];
+  for (int i = 0; i < 3 * na; i++) {
+    conn_Xa[i] = F2FRealPart(Xa[i]);
   }
-
-  // Free the duplicate array
-  delete[] Xs_dup;
-
-  if (locate_to_reflected_index) {
-    delete[] locate_to_reflected_index;
+  for (int k = 0; k < 3 * ns; k++) {
+    conn_Xs[k] = F2FRealPart(Xs[k]);
   }
 
-  // Delete the LocatePoint object and release memory
-  delete[] indx;
-  delete[] dist;
-  delete locator;
+  computeConnGap(na, Xa, isymm, nn, conn, conn_gap, tol);
+  memcpy(conn_ref, conn, nn * na * sizeof(int));
+
+  return na;
 }
 
 /*
@@ -480,6 +1415,113 @@ void TransferScheme::computeWeights(double beta, int isymm, int nn,
   }
 }
 
+/*
+  Get the number of bytes allocated by the transfer scheme, including the
+  structural displacements and aerodynamic loads
+*/
+size_t LDTransferScheme::getMemoryFootprint() {
+  size_t bytes = TransferScheme::getMemoryFootprint();
+  if (Us) {
+    bytes += struct_node_dof * ns * sizeof(F2FScalar);
+  }
+  if (Fa) {
+    bytes += 3 * na * sizeof(F2FScalar);
+  }
+  return bytes;
+}
+
+/*
+  Apply a single-vector product to each column of a block of vectors
+
+  The vectors are stored row-wise so that entry k of vector i is stored in
+  vecs[nvecs * i + k]. Each column is copied into a work array, the product is
+  evaluated and the result is copied back into the corresponding column of
+  prods.
+
+  Arguments
+  ---------
+  apply    : the single-vector product
+  nvecs    : number of vectors in the block
+  vec_len  : local length of each input vector
+  vecs     : input block of vectors
+  prod_len : local length of each output vector
+
+  Returns
+  -------
+  prods    : output block of vectors
+*/
+void LDTransferScheme::applyColumnwise(
+    void (LDTransferScheme::*apply)(const F2FScalar *, F2FScalar *), int nvecs,
+    int vec_len, const F2FScalar *vecs, int prod_len, F2FScalar *prods) {
+  F2FScalar *vec = getWorkArray(WORK_COLUMN_VEC, vec_len);
+  F2FScalar *prod = getWorkArray(WORK_COLUMN_PROD, prod_len);
+
+  for (int k = 0; k < nvecs; k++) {
+    for (int i = 0; i < vec_len; i++) {
+      vec[i] = vecs[nvecs * i + k];
+    }
+    (this->*apply)(vec, prod);
+    for (int i = 0; i < prod_len; i++) {
+      prods[nvecs * i + k] = prod[i];
+    }
+  }
+}
+
+/*
+  Apply the Jacobians to a block of nvecs vectors stored row-wise. These
+  default implementations evaluate the products one column at a time; schemes
+  that can share work between the right-hand sides override them.
+*/
+void LDTransferScheme::applydDduSMulti(int nvecs, const F2FScalar *vecs,
+                                       F2FScalar *prods) {
+  applyColumnwise(&LDTransferScheme::applydDduS, nvecs,
+                  getLocalStructArrayLen(), vecs, 3 * na, prods);
+}
+
+void LDTransferScheme::applydDduSTransMulti(int nvecs, const F2FScalar *vecs,
+                                            F2FScalar *prods) {
+  applyColumnwise(&LDTransferScheme::applydDduSTrans, nvecs, 3 * na, vecs,
+                  getLocalStructArrayLen(), prods);
+}
+
+void LDTransferScheme::applydLduSMulti(int nvecs, const F2FScalar *vecs,
+                                       F2FScalar *prods) {
+  applyColumnwise(&LDTransferScheme::applydLduS, nvecs,
+                  getLocalStructArrayLen(), vecs, getLocalStructArrayLen(),
+                  prods);
+}
+
+void LDTransferScheme::applydLduSTransMulti(int nvecs, const F2FScalar *vecs,
+                                            F2FScalar *prods) {
+  applyColumnwise(&LDTransferScheme::applydLduSTrans, nvecs,
+                  getLocalStructArrayLen(), vecs, getLocalStructArrayLen(),
+                  prods);
+}
+
+void LDTransferScheme::applydDdxA0Multi(int nvecs, const F2FScalar *vecs,
+                                        F2FScalar *prods) {
+  applyColumnwise(&LDTransferScheme::applydDdxA0, nvecs, 3 * na, vecs, 3 * na,
+                  prods);
+}
+
+void LDTransferScheme::applydDdxS0Multi(int nvecs, const F2FScalar *vecs,
+                                        F2FScalar *prods) {
+  applyColumnwise(&LDTransferScheme::applydDdxS0, nvecs, 3 * na, vecs,
+                  3 * ns_local, prods);
+}
+
+void LDTransferScheme::applydLdxA0Multi(int nvecs, const F2FScalar *vecs,
+                                        F2FScalar *prods) {
+  applyColumnwise(&LDTransferScheme::applydLdxA0, nvecs,
+                  getLocalStructArrayLen(), vecs, 3 * na, prods);
+}
+
+void LDTransferScheme::applydLdxS0Multi(int nvecs, const F2FScalar *vecs,
+                                        F2FScalar *prods) {
+  applyColumnwise(&LDTransferScheme::applydLdxS0, nvecs,
+                  getLocalStructArrayLen(), vecs, 3 * ns_local, prods);
+}
+
 /*
   Transform a set of aerodynamic surface displacements into a least-squares
   fit of rotation and translation plus elastic deformations
@@ -1851,7 +2893,8 @@ int LDTransferScheme::testdLdxS0Products(const F2FScalar *struct_disps,
 }
 
 /*
-  Computes decomposition H = RS using the Singular Value Decomposition (SVD)
+  Computes the rotation in the polar decomposition H = RS from the real part
+  of H using the Singular Value Decomposition (SVD)
 
   Arguments
   ----------
@@ -1859,12 +2902,9 @@ int LDTransferScheme::testdLdxS0Products(const F2FScalar *struct_disps,
 
   Returns
   --------
-  R : rotation matrix
-  S : symmetric matrix from polar decomposition of H
-
+  R : rotation matrix (real part only)
 */
-void LDTransferScheme::computeRotation(const F2FScalar *H, F2FScalar *R,
-                                       F2FScalar *S) {
+static void computeSVDRotation(const F2FScalar *H, F2FScalar *R) {
   // Allocate memory for local variables
   int m = 3, n = 3, lda = 3, ldu = 3, ldvt = 3, info, lwork = 50;  // for SVD
   F2FReal work[50];     // work matrix for SVD
@@ -1873,21 +2913,11 @@ void LDTransferScheme::computeRotation(const F2FScalar *H, F2FScalar *R,
   F2FReal s[3];
   F2FReal Hcopy[9];
 
-  // Copy over the values of H - LAPACK conveniently destroys
+  // Copy over the real part of H - LAPACK conveniently destroys
   // the entries of H
-#ifdef FUNTOFEM_USE_COMPLEX
-  F2FScalar Hreal[9], Himag[9];
   for (int i = 0; i < 9; i++) {
     Hcopy[i] = F2FRealPart(H[i]);
-
-    // Keep the real and the imaginary parts of the input for later
-    // use...
-    Hreal[i] = F2FRealPart(H[i]);
-    Himag[i] = F2FImagPart(H[i]);
   }
-#else
-  memcpy(Hcopy, H, 9 * sizeof(F2FScalar));
-#endif
 
   // Perform SVD of the covariance matrix
   LAPACKdgesvd("All", "All", &m, &n, Hcopy, &lda, s, U, &ldu, VT, &ldvt, work,
@@ -1930,8 +2960,302 @@ void LDTransferScheme::computeRotation(const F2FScalar *H, F2FScalar *R,
     R[7] = U[1] * VT[6] + U[4] * VT[7] - U[7] * VT[8];
     R[8] = U[2] * VT[6] + U[5] * VT[7] - U[8] * VT[8];
   }
+}
+
+/*
+  Computes the signed cofactor of entry (r, c) of a 4x4 matrix
+*/
+static double cofactor4(const double A[][4], int r, int c) {
+  double M[9];
+  for (int i = 0, ii = 0; i < 4; i++) {
+    if (i != r) {
+      for (int j = 0, jj = 0; j < 4; j++) {
+        if (j != c) {
+          M[ii + 3 * jj] = A[i][j];
+          jj++;
+        }
+      }
+      ii++;
+    }
+  }
+  double d =
+      (M[0] * (M[4] * M[8] - M[7] * M[5]) - M[3] * (M[1] * M[8] - M[7] * M[2]) +
+       M[6] * (M[1] * M[5] - M[4] * M[2]));
+  return ((r + c) % 2 == 0 ? d : -d);
+}
+
+/*
+  Computes the rotations in the polar decompositions of a block of covariance
+  matrices using the quaternion form of the problem (Horn's method)
+
+  The rotation R maximizing tr(R^{T} H) is given by the unit quaternion that
+  is the eigenvector of the largest eigenvalue of the symmetric 4x4 matrix K
+  formed from the entries of H. The largest eigenvalue is found with Newton's
+  method on the characteristic polynomial of K
+
+  P(lambda) = lambda^4 - 2 ||H||_F^2 lambda^2 - 8 det(H) lambda + det(K)
+
+  starting from sqrt(3) ||H||_F, which bounds the eigenvalues from above so
+  that the iterates decrease monotonically to the largest eigenvalue. The
+  eigenvector is taken from the column of the adjugate of K - lambda I with
+  the largest diagonal entry. The matrices are stored in structure-of-arrays
+  form, so that entry k of matrix i is stored in H[ROTATION_BLOCK_SIZE*k + i],
+  and each step is applied to all the matrices in the block at once.
+
+  When the largest eigenvalue is (nearly) repeated the rotation is poorly
+  defined and the eigenvector cannot be computed accurately in this way, so
+  these matrices are flagged and must be handled by the SVD instead.
+
+  Arguments
+  ---------
+  n : number of matrices in the block (at most ROTATION_BLOCK_SIZE)
+  H : covariance matrices
+
+  Returns
+  -------
+  R    : rotation matrices
+  fail : flag for each matrix whose rotation could not be computed
+*/
+void LDTransferScheme::computeQuaternionRotations(int n, const double *H,
+                                                  double *R, int *fail) {
+  const int B = ROTATION_BLOCK_SIZE;
+  const int max_newton_iters = 50;
+  const double newton_tol = 1e-15;
+  const double adj_tol = 1e-6;
+
+  // Scale the matrices to unit Frobenius norm
+  double h[9][B];
+  for (int i = 0; i < n; i++) {
+    double norm = 0.0;
+    for (int k = 0; k < 9; k++) {
+      norm += H[B * k + i] * H[B * k + i];
+    }
+    norm = sqrt(norm);
+    fail[i] = !(norm > 0.0 && norm < 1e300);
+    double scale = (fail[i] ? 0.0 : 1.0 / norm);
+    for (int k = 0; k < 9; k++) {
+      h[k][i] = scale * H[B * k + i];
+    }
+  }
+
+  // Form the entries of K in the order (w, x, y, z) of the quaternion
+  // components
+  double K[10][B];
+  for (int i = 0; i < n; i++) {
+    K[0][i] = h[0][i] + h[4][i] + h[8][i];   // K_ww
+    K[1][i] = h[0][i] - h[4][i] - h[8][i];   // K_xx
+    K[2][i] = -h[0][i] + h[4][i] - h[8][i];  // K_yy
+    K[3][i] = -h[0][i] - h[4][i] + h[8][i];  // K_zz
+    K[4][i] = h[5][i] - h[7][i];             // K_wx
+    K[5][i] = h[6][i] - h[2][i];             // K_wy
+    K[6][i] = h[1][i] - h[3][i];             // K_wz
+    K[7][i] = h[3][i] + h[1][i];             // K_xy
+    K[8][i] = h[6][i] + h[2][i];             // K_xz
+    K[9][i] = h[7][i] + h[5][i];             // K_yz
+  }
+
+  // Compute the coefficients of the characteristic polynomial
+  double detH[B], detK[B];
+  for (int i = 0; i < n; i++) {
+    detH[i] = (h[0][i] * (h[4][i] * h[8][i] - h[7][i] * h[5][i]) -
+               h[3][i] * (h[1][i] * h[8][i] - h[7][i] * h[2][i]) +
+               h[6][i] * (h[1][i] * h[5][i] - h[4][i] * h[2][i]));
+
+    // Expand the determinant of K in terms of 2x2 minors
+    double s0 = K[0][i] * K[1][i] - K[4][i] * K[4][i];
+    double s1 = K[0][i] * K[7][i] - K[4][i] * K[5][i];
+    double s2 = K[0][i] * K[8][i] - K[4][i] * K[6][i];
+    double s3 = K[4][i] * K[7][i] - K[1][i] * K[5][i];
+    double s4 = K[4][i] * K[8][i] - K[1][i] * K[6][i];
+    double s5 = K[5][i] * K[8][i] - K[7][i] * K[6][i];
+    double c5 = K[2][i] * K[3][i] - K[9][i] * K[9][i];
+    double c4 = K[7][i] * K[3][i] - K[8][i] * K[9][i];
+    double c3 = K[7][i] * K[9][i] - K[8][i] * K[2][i];
+    double c2 = K[5][i] * K[3][i] - K[6][i] * K[9][i];
+    double c1 = K[5][i] * K[9][i] - K[6][i] * K[2][i];
+    double c0 = K[5][i] * K[8][i] - K[6][i] * K[7][i];
+    detK[i] = s0 * c5 - s1 * c4 + s2 * c3 + s3 * c2 - s4 * c1 + s5 * c0;
+  }
+
+  // Find the largest eigenvalue of K with Newton's method
+  double lambda[B];
+  for (int i = 0; i < n; i++) {
+    lambda[i] = sqrt(3.0);
+  }
+  for (int iter = 0; iter < max_newton_iters; iter++) {
+    int converged = 1;
+    for (int i = 0; i < n; i++) {
+      double l = lambda[i];
+      double l2 = l * l;
+      double p = (l2 - 2.0) * l2 - 8.0 * detH[i] * l + detK[i];
+      double dp = 4.0 * l * (l2 - 1.0) - 8.0 * detH[i];
+      double step = (dp > 0.0 ? p / dp : 0.0);
+      lambda[i] -= step;
+      if (fabs(step) > newton_tol) {
+        converged = 0;
+      }
+    }
+    if (converged) {
+      break;
+    }
+  }
+
+  // Compute the eigenvectors and form the rotation matrices
+  for (int i = 0; i < n; i++) {
+    double A[4][4];
+    A[0][0] = K[0][i] - lambda[i];
+    A[1][1] = K[1][i] - lambda[i];
+    A[2][2] = K[2][i] - lambda[i];
+    A[3][3] = K[3][i] - lambda[i];
+    A[0][1] = A[1][0] = K[4][i];
+    A[0][2] = A[2][0] = K[5][i];
+    A[0][3] = A[3][0] = K[6][i];
+    A[1][2] = A[2][1] = K[7][i];
+    A[1][3] = A[3][1] = K[8][i];
+    A[2][3] = A[3][2] = K[9][i];
+
+    // The adjugate of K - lambda I is proportional to q q^{T}
+    int jmax = 0;
+    double cmax = 0.0;
+    for (int j = 0; j < 4; j++) {
+      double c = fabs(cofactor4(A, j, j));
+      if (c > cmax) {
+        cmax = c;
+        jmax = j;
+      }
+    }
+    if (!(cmax > adj_tol)) {
+      fail[i] = 1;
+    }
+    if (fail[i]) {
+      continue;
+    }
+
+    double q[4], qnorm = 0.0;
+    for (int j = 0; j < 4; j++) {
+      q[j] = cofactor4(A, jmax, j);
+      qnorm += q[j] * q[j];
+    }
+    qnorm = 1.0 / sqrt(qnorm);
+    double w = qnorm * q[0], x = qnorm * q[1];
+    double y = qnorm * q[2], z = qnorm * q[3];
+
+    R[B * 0 + i] = w * w + x * x - y * y - z * z;
+    R[B * 1 + i] = 2.0 * (x * y + w * z);
+    R[B * 2 + i] = 2.0 * (x * z - w * y);
+    R[B * 3 + i] = 2.0 * (x * y - w * z);
+    R[B * 4 + i] = w * w - x * x + y * y - z * z;
+    R[B * 5 + i] = 2.0 * (y * z + w * x);
+    R[B * 6 + i] = 2.0 * (x * z + w * y);
+    R[B * 7 + i] = 2.0 * (y * z - w * x);
+    R[B * 8 + i] = w * w - x * x - y * y + z * z;
+  }
+}
+
+/*
+  Computes the decompositions H = RS of a set of covariance matrices
+
+  The real part of each rotation is computed either with the SVD or, in
+  blocks of ROTATION_BLOCK_SIZE matrices, with the quaternion method. The
+  imaginary part of the rotation in complex mode and the symmetric matrix S
+  are then computed in the same way for either method.
+
+  Arguments
+  ----------
+  n : number of covariance matrices
+  H : covariance matrices
+
+  Returns
+  --------
+  R : rotation matrices
+  S : symmetric matrices from polar decomposition of H
+*/
+void LDTransferScheme::computeRotations(int n, const F2FScalar *H, F2FScalar *R,
+                                        F2FScalar *S) {
+  const int B = ROTATION_BLOCK_SIZE;
+
+  for (int start = 0; start < n; start += B) {
+    int nb = (n - start < B ? n - start : B);
+    const F2FScalar *Hb = &H[9 * start];
+    F2FScalar *Rb = &R[9 * start];
+
+    if (rotation_type == QUATERNION_ROTATION) {
+      // Copy the real parts of the block into structure-of-arrays form
+      double Hsoa[9 * B], Rsoa[9 * B];
+      int fail[B];
+      for (int i = 0; i < nb; i++) {
+        for (int k = 0; k < 9; k++) {
+          Hsoa[B * k + i] = F2FRealPart(Hb[9 * i + k]);
+        }
+      }
+
+      computeQuaternionRotations(nb, Hsoa, Rsoa, fail);
+
+      for (int i = 0; i < nb; i++) {
+        if (fail[i]) {
+          computeSVDRotation(&Hb[9 * i], &Rb[9 * i]);
+        } else {
+          for (int k = 0; k < 9; k++) {
+            Rb[9 * i + k] = Rsoa[B * k + i];
+          }
+        }
+      }
+    } else {
+      for (int i = 0; i < nb; i++) {
+        computeSVDRotation(&Hb[9 * i], &Rb[9 * i]);
+      }
+    }
+
+    for (int i = 0; i < nb; i++) {
+      completeRotation(&Hb[9 * i], &Rb[9 * i], &S[9 * (start + i)]);
+    }
+  }
+}
+
+/*
+  Computes decomposition H = RS
+
+  Arguments
+  ----------
+  H : covariance matrix
+
+  Returns
+  --------
+  R : rotation matrix
+  S : symmetric matrix from polar decomposition of H
+
+*/
+void LDTransferScheme::computeRotation(const F2FScalar *H, F2FScalar *R,
+                                       F2FScalar *S) {
+  computeRotations(1, H, R, S);
+}
+
+/*
+  Completes the decomposition H = RS given the real part of the rotation
+
+  In complex mode, the imaginary part of the rotation is computed from the
+  derivative of the decomposition with respect to H, so the derivatives do
+  not depend on the method used to compute the real part.
+
+  Arguments
+  ----------
+  H : covariance matrix
+  R : real part of the rotation matrix
 
+  Returns
+  --------
+  R : rotation matrix
+  S : symmetric matrix from polar decomposition of H
+*/
+void LDTransferScheme::completeRotation(const F2FScalar *H, F2FScalar *R,
+                                        F2FScalar *S) {
 #ifdef FUNTOFEM_USE_COMPLEX
+  F2FScalar Hreal[9], Himag[9];
+  for (int i = 0; i < 9; i++) {
+    Hreal[i] = F2FRealPart(H[i]);
+    Himag[i] = F2FImagPart(H[i]);
+  }
+
   F2FScalar Sreal[9];
   Sreal[0] = R[0] * Hreal[0] + R[1] * Hreal[1] + R[2] * Hreal[2];
   Sreal[1] = R[3] * Hreal[0] + R[4] * Hreal[1] + R[5] * Hreal[2];
@@ -1947,8 +3271,8 @@ void LDTransferScheme::computeRotation(const F2FScalar *H, F2FScalar *R,
   F2FScalar M1[15 * 15];
   assembleM1(R, Sreal, M1);
   int ipiv[15];
-  m = 15;
-  info = 0;
+  int m = 15;
+  int info = 0;
   LAPACKgetrf(&m, &m, M1, &m, ipiv, &info);
 
   for (int k = 0; k < 9; k++) {
@@ -2117,6 +3441,82 @@ void LDTransferScheme::assembleM1(const F2FScalar *R, const F2FScalar *S,
   A[8 + 15 * 14] = R[8];
 }
 
+/*
+  Get the number of bytes allocated by the transfer scheme, including the
+  structural temperatures and aerodynamic heat fluxes
+*/
+size_t ThermalTransfer::getMemoryFootprint() {
+  size_t bytes = TransferScheme::getMemoryFootprint();
+  if (Ts) {
+    bytes += ns * sizeof(F2FScalar);
+  }
+  if (Ha) {
+    bytes += na * sizeof(F2FScalar);
+  }
+  return bytes;
+}
+
+/*
+  Apply a single-vector product to each column of a block of vectors stored
+  row-wise, so that entry k of vector i is stored in vecs[nvecs * i + k]
+
+  Arguments
+  ---------
+  apply    : the single-vector product
+  nvecs    : number of vectors in the block
+  vec_len  : local length of each input vector
+  vecs     : input block of vectors
+  prod_len : local length of each output vector
+
+  Returns
+  -------
+  prods    : output block of vectors
+*/
+void ThermalTransfer::applyColumnwise(
+    void (ThermalTransfer::*apply)(const F2FScalar *, F2FScalar *), int nvecs,
+    int vec_len, const F2FScalar *vecs, int prod_len, F2FScalar *prods) {
+  F2FScalar *vec = getWorkArray(WORK_COLUMN_VEC, vec_len);
+  F2FScalar *prod = getWorkArray(WORK_COLUMN_PROD, prod_len);
+
+  for (int k = 0; k < nvecs; k++) {
+    for (int i = 0; i < vec_len; i++) {
+      vec[i] = vecs[nvecs * i + k];
+    }
+    (this->*apply)(vec, prod);
+    for (int i = 0; i < prod_len; i++) {
+      prods[nvecs * i + k] = prod[i];
+    }
+  }
+}
+
+/*
+  Apply the Jacobians to a block of nvecs vectors stored row-wise. These
+  default implementations evaluate the products one column at a time.
+*/
+void ThermalTransfer::applydTdtSMulti(int nvecs, const F2FScalar *vecs,
+                                      F2FScalar *prods) {
+  applyColumnwise(&ThermalTransfer::applydTdtS, nvecs, ns_local, vecs, na,
+                  prods);
+}
+
+void ThermalTransfer::applydTdtSTransMulti(int nvecs, const F2FScalar *vecs,
+                                           F2FScalar *prods) {
+  applyColumnwise(&ThermalTransfer::applydTdtSTrans, nvecs, na, vecs, ns_local,
+                  prods);
+}
+
+void ThermalTransfer::applydQdqAMulti(int nvecs, const F2FScalar *vecs,
+                                      F2FScalar *prods) {
+  applyColumnwise(&ThermalTransfer::applydQdqA, nvecs, na, vecs, ns_local,
+                  prods);
+}
+
+void ThermalTransfer::applydQdqATransMulti(int nvecs, const F2FScalar *vecs,
+                                           F2FScalar *prods) {
+  applyColumnwise(&ThermalTransfer::applydQdqATrans, nvecs, ns_local, vecs, na,
+                  prods);
+}
+
 // Test Functions
 int ThermalTransfer::testAllDerivatives(const F2FScalar *struct_temps,
                                         const F2FScalar *aero_flux,
@@ -0,0 +1,124 @@
+/*
+  This file is part of the package FUNtoFEM for coupled aeroelastic simulation
+  and design optimization.
+
+  Copyright (C) 2015 Georgia Tech Research Corporation.
+  Additional copyright (C) 2015 Kevin Jacobson, Jan Kiviaho and Graeme Kennedy.
+  All rights reserved.
+
+  FUNtoFEM is licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this software except in compliance with the License.
+  You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+*/
+
+#include "TransferWorkspace.h"
+
+#include <stdio.h>
+
+TransferWorkspace::TransferWorkspace() {
+  for (int i = 0; i < MAX_NUM_ARRAYS; i++) {
+    scalar_arrays[i] = NULL;
+    scalar_sizes[i] = 0;
+    int_arrays[i] = NULL;
+    int_sizes[i] = 0;
+  }
+}
+
+TransferWorkspace::~TransferWorkspace() { clear(); }
+
+/*
+  Get a scalar work array with at least the requested number of entries. The
+  contents of the array are not initialized.
+
+  Arguments
+  ---------
+  index : index of the work array
+  size  : minimum number of entries
+
+  Returns
+  -------
+  pointer to the work array
+*/
+F2FScalar *TransferWorkspace::getScalarArray(int index, int size) {
+  if (index < 0 || index >= MAX_NUM_ARRAYS) {
+    fprintf(stderr, "TransferWorkspace: scalar array index %d out of range\n",
+            index);
+    return NULL;
+  }
+  if (size > scalar_sizes[index]) {
+    if (scalar_arrays[index]) {
+      delete[] scalar_arrays[index];
+    }
+    scalar_arrays[index] = new F2FScalar[size];
+    scalar_sizes[index] = size;
+  }
+  return scalar_arrays[index];
+}
+
+/*
+  Get an integer work array with at least the requested number of entries.
+  The contents of the array are not initialized.
+
+  Arguments
+  ---------
+  index : index of the work array
+  size  : minimum number of entries
+
+  Returns
+  -------
+  pointer to the work array
+*/
+int *TransferWorkspace::getIntArray(int index, int size) {
+  if (index < 0 || index >= MAX_NUM_ARRAYS) {
+    fprintf(stderr, "TransferWorkspace: integer array index %d out of range\n",
+            index);
+    return NULL;
+  }
+  if (size > int_sizes[index]) {
+    if (int_arrays[index]) {
+      delete[] int_arrays[index];
+    }
+    int_arrays[index] = new int[size];
+    int_sizes[index] = size;
+  }
+  return int_arrays[index];
+}
+
+/*
+  Free all the work arrays
+*/
+void TransferWorkspace::clear() {
+  for (int i = 0; i < MAX_NUM_ARRAYS; i++) {
+    if (scalar_arrays[i]) {
+      delete[] scalar_arrays[i];
+    }
+    scalar_arrays[i] = NULL;
+    scalar_sizes[i] = 0;
+
+    if (int_arrays[i]) {
+      delete[] int_arrays[i];
+    }
+    int_arrays[i] = NULL;
+    int_sizes[i] = 0;
+  }
+}
+
+/*
+  Get the number of bytes currently allocated for the work arrays
+*/
+size_t TransferWorkspace::getMemoryFootprint() {
+  size_t bytes = 0;
+  for (int i = 0; i < MAX_NUM_ARRAYS; i++) {
+    bytes += scalar_sizes[i] * sizeof(F2FScalar);
+    bytes += int_sizes[i] * sizeof(int);
+  }
+  return bytes;
+}
@@ -0,0 +1,478 @@
+"""
+Benchmark the transfer schemes on synthetic wing surfaces
+
+The aerodynamic nodes lie on a cambered wing surface and the structural nodes
+on a coarser plate inside the wing (or a line of beam nodes along the span for
+the beam transfer). Each rank generates only its own nodes, so large meshes
+can be benchmarked without a mesh file.
+
+The benchmark times initialize(), the transfers and each of the Jacobian
+products on sub-communicators of increasing size to report the strong or weak
+scaling. For each size, the ranks are split between the structures and the
+aerodynamics in one of two layouts:
+
+    overlap : the aerodynamic nodes are on all the ranks and the structural
+              nodes on the first ranks, as in test_transfer_parallel.py
+    split   : the structural and aerodynamic nodes are on disjoint ranks, as
+              in test_transfer_nonoverlap.py
+
+The results are written as JSON, and a previous result file can be passed
+with --compare to report the change in the timings.
+
+Examples:
+
+    mpirun -n 4 python transfer_benchmark.py --aero-nodes 100000 \\
+        --struct-nodes 10000 --npts 10 20 --output meld.json
+    mpirun -n 4 python transfer_benchmark.py --scaling weak \\
+        --aero-nodes 20000 --struct-nodes 2000 --compare meld.json
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import numpy as np
+from mpi4py import MPI
+from funtofem import TransferScheme
+
+SCHEMES = ["meld", "linearized_meld", "rbf", "beam", "meld_thermal"]
+
+# The products of each type of scheme, with the input and output arrays
+LD_PRODUCTS = [
+    ("applydDduS", "struct", "aero"),
+    ("applydDduSTrans", "aero", "struct"),
+    ("applydLduS", "struct", "struct"),
+    ("applydLduSTrans", "struct", "struct"),
+    ("applydDdxA0", "aero", "aero_nodes"),
+    ("applydDdxS0", "aero", "struct_nodes"),
+    ("applydLdxA0", "struct", "aero_nodes"),
+    ("applydLdxS0", "struct", "struct_nodes"),
+]
+
+THERMAL_PRODUCTS = [
+    ("applydTdtS", "struct", "aero"),
+    ("applydTdtSTrans", "aero", "struct"),
+    ("applydQdqA", "aero", "struct"),
+    ("applydQdqATrans", "struct", "aero"),
+]
+
+
+def get_partition(n, size, rank):
+    """
+    Get the range of the n global entries owned by the rank
+    """
+    start = (n * rank) // size
+    end = (n * (rank + 1)) // size
+    return start, end
+
+
+def surface_nodes(n, start, end, z_offset, camber, seed):
+    """
+    Get the nodes [start, end) of a structured grid of about n nodes on a
+    cambered surface over the planform 0 <= x <= 1, 0 <= y <= 4
+    """
+    nu = max(2, int(np.sqrt(n / 4.0)))
+    nv = max(2, (n + nu - 1) // nu)
+    index = np.arange(start, end)
+    u = (index % nu) / (nu - 1.0)
+    v = (index // nu) / (nv - 1.0)
+
+    # Perturb the nodes so that the distances are not all equal
+    rng = np.random.RandomState(seed + start)
+    u = np.clip(u + 0.1 * (rng.random_sample(len(u)) - 0.5) / nu, 0.0, 1.0)
+
+    X = np.zeros((len(index), 3))
+    X[:, 0] = u + 0.2 * v
+    X[:, 1] = 4.0 * v
+    X[:, 2] = z_offset + camber * np.sin(np.pi * u)
+    return X.flatten().astype(TransferScheme.dtype)
+
+
+def beam_nodes(n, start, end):
+    """
+    Get the nodes [start, end) of a beam along the span
+    """
+    v = np.arange(start, end) / (n - 1.0)
+    X = np.zeros((len(v), 3))
+    X[:, 0] = 0.4 + 0.2 * v
+    X[:, 1] = 4.0 * v
+    return X.flatten().astype(TransferScheme.dtype)
+
+
+def get_comms(comm, layout, struct_fraction):
+    """
+    Split the ranks into the structural and aerodynamic communicators
+    """
+    rank = comm.rank
+    size = comm.size
+    nstruct = min(size, max(1, int(round(struct_fraction * size))))
+
+    if layout == "split" and size > 1:
+        nstruct = min(nstruct, size - 1)
+        is_struct = rank < nstruct
+        is_aero = not is_struct
+        aero_root = nstruct
+    else:
+        is_struct = rank < nstruct
+        is_aero = True
+        aero_root = 0
+
+    struct_comm = comm.Split(0 if is_struct else MPI.UNDEFINED, rank)
+    aero_comm = comm.Split(0 if is_aero else MPI.UNDEFINED, rank)
+
+    return struct_comm, 0, aero_comm, aero_root, nstruct, size - aero_root
+
+
+def create_scheme(name, comm, struct_comm, struct_root, aero_comm, aero_root, args):
+    """
+    Create the transfer scheme and return it with the structural dof per node
+    """
+    if name == "meld":
+        scheme = TransferScheme.pyMELD(
+            comm,
+            struct_comm,
+            struct_root,
+            aero_comm,
+            aero_root,
+            args.isymm,
+            args.npts,
+            args.beta,
+        )
+        return scheme, 3
+    elif name == "linearized_meld":
+        scheme = TransferScheme.pyLinearizedMELD(
+            comm,
+            struct_comm,
+            struct_root,
+            aero_comm,
+            aero_root,
+            args.isymm,
+            args.npts,
+            args.beta,
+        )
+        return scheme, 3
+    elif name == "rbf":
+        rbf_types = {
+            "gaussian": TransferScheme.PY_GAUSSIAN,
+            "multiquadric": TransferScheme.PY_MULTIQUADRIC,
+            "inverse_multiquadric": TransferScheme.PY_INVERSE_MULTIQUADRIC,
+            "thin_plate_spline": TransferScheme.PY_THIN_PLATE_SPLINE,
+        }
+        scheme = TransferScheme.pyRBF(
+            comm,
+            struct_comm,
+            struct_root,
+            aero_comm,
+            aero_root,
+            rbf_types[args.rbf_type],
+            args.sampling_ratio,
+        )
+        return scheme, 3
+    elif name == "beam":
+        nodes = np.arange(args.struct_count, dtype=np.intc)
+        conn = np.zeros((args.struct_count - 1, 2), dtype=np.intc)
+        conn[:, 0] = nodes[:-1]
+        conn[:, 1] = nodes[1:]
+        scheme = TransferScheme.pyBeamTransfer(
+            comm, struct_comm, struct_root, aero_comm, aero_root, conn, 6
+        )
+        return scheme, 6
+    elif name == "meld_thermal":
+        scheme = TransferScheme.pyMELDThermal(
+            comm,
+            struct_comm,
+            struct_root,
+            aero_comm,
+            aero_root,
+            args.isymm,
+            args.npts,
+            args.beta,
+        )
+        return scheme, 1
+
+    raise ValueError("Unknown transfer scheme %s" % (name))
+
+
+def time_call(comm, func, repeats):
+    """
+    Time the average wall time of a collective call over the ranks
+    """
+    comm.Barrier()
+    t0 = MPI.Wtime()
+    for i in range(repeats):
+        func()
+    comm.Barrier()
+    return (MPI.Wtime() - t0) / repeats
+
+
+def run_case(comm, name, args):
+    """
+    Run the benchmark for one scheme on the communicator
+    """
+    struct_comm, struct_root, aero_comm, aero_root, nstruct, naero = get_comms(
+        comm, args.layout, args.struct_fraction
+    )
+
+    # Generate the local nodes
+    ns, na = 0, 0
+    Xs = np.zeros(0, dtype=TransferScheme.dtype)
+    Xa = np.zeros(0, dtype=TransferScheme.dtype)
+    if struct_comm != MPI.COMM_NULL:
+        start, end = get_partition(
+            args.struct_count, struct_comm.size, struct_comm.rank
+        )
+        ns = end - start
+        if name == "beam":
+            Xs = beam_nodes(args.struct_count, start, end)
+        else:
+            Xs = surface_nodes(args.struct_count, start, end, 0.01, 0.0, args.seed)
+    if aero_comm != MPI.COMM_NULL:
+        start, end = get_partition(args.aero_count, aero_comm.size, aero_comm.rank)
+        na = end - start
+        Xa = surface_nodes(args.aero_count, start, end, 0.0, 0.05, args.seed + 1)
+
+    scheme, dof = create_scheme(
+        name, comm, struct_comm, struct_root, aero_comm, aero_root, args
+    )
+    scheme.setAeroNodes(Xa)
+    scheme.setStructNodes(Xs)
+
+    times = {}
+    comm.Barrier()
+    t0 = MPI.Wtime()
+    scheme.initialize()
+    comm.Barrier()
+    times["initialize"] = MPI.Wtime() - t0
+
+    rng = np.random.RandomState(args.seed + comm.rank)
+    sizes = {
+        "struct": dof * ns,
+        "aero": 3 * na,
+        "struct_nodes": 3 * ns,
+        "aero_nodes": 3 * na,
+    }
+    if name == "meld_thermal":
+        sizes["aero"] = na
+
+    def vec(kind):
+        return rng.random_sample(sizes[kind]).astype(TransferScheme.dtype)
+
+    uS, fA = vec("struct"), vec("aero")
+    uA, fS = np.zeros_like(fA), np.zeros_like(uS)
+
+    if name == "meld_thermal":
+        transfers = [
+            ("transferTemp", lambda: scheme.transferTemp(uS, uA)),
+            ("transferFlux", lambda: scheme.transferFlux(fA, fS)),
+        ]
+        products = THERMAL_PRODUCTS
+    else:
+        transfers = [
+            ("transferDisps", lambda: scheme.transferDisps(uS, uA)),
+            ("transferLoads", lambda: scheme.transferLoads(fA, fS)),
+        ]
+        products = LD_PRODUCTS
+
+    for op, func in transfers:
+        times[op] = time_call(comm, func, args.repeats)
+
+    for op, vin, vout in products:
+        if args.products and op not in args.products:
+            continue
+        v, p = vec(vin), vec(vout)
+        func = getattr(scheme, op)
+        times[op] = time_call(comm, lambda: func(v, p), args.repeats)
+
+    # The memory on the rank with the largest footprint
+    memory = comm.allreduce(scheme.getMemoryFootprint()["total"], op=MPI.MAX)
+
+    for c in [struct_comm, aero_comm]:
+        if c != MPI.COMM_NULL:
+            c.Free()
+
+    return {
+        "scheme": name,
+        "nprocs": comm.size,
+        "struct_procs": nstruct,
+        "aero_procs": naero,
+        "layout": args.layout,
+        "aero_nodes": args.aero_count,
+        "struct_nodes": args.struct_count,
+        "npts": args.npts,
+        "isymm": args.isymm,
+        "times": times,
+        "max_memory_bytes": memory,
+    }
+
+
+def print_scaling(results, scaling):
+    """
+    Print the time in seconds and the parallel efficiency relative to the
+    smallest number of ranks for each operation
+    """
+    cases = {}
+    for r in results:
+        key = (r["scheme"], r["npts"], r["isymm"])
+        cases.setdefault(key, []).append(r)
+
+    for (scheme, npts, isymm), runs in cases.items():
+        runs.sort(key=lambda r: r["nprocs"])
+        base = runs[0]
+        print(
+            "\n%s  npts=%d  isymm=%d  (%s scaling, %s layout)"
+            % (scheme, npts, isymm, scaling, base["layout"])
+        )
+        ops = list(base["times"].keys())
+        print(
+            "%-16s" % "operation"
+            + "".join(["%18s" % ("p=%d" % r["nprocs"]) for r in runs])
+        )
+        for op in ops:
+            line = "%-16s" % op
+            for r in runs:
+                ratio = base["times"][op] / max(r["times"][op], 1e-300)
+                if scaling == "strong":
+                    # Parallel efficiency of the speedup
+                    ratio *= base["nprocs"] / r["nprocs"]
+                line += "%12.3e %4.0f%%" % (r["times"][op], 100.0 * ratio)
+            print(line)
+
+
+def print_comparison(results, baseline, tol):
+    """
+    Compare the timings against a previous result file and flag slowdowns
+    """
+    ref = {}
+    for r in baseline["results"]:
+        key = (
+            r["scheme"],
+            r["nprocs"],
+            r["npts"],
+            r["isymm"],
+            r["aero_nodes"],
+            r["struct_nodes"],
+        )
+        ref[key] = r
+
+    print("\nComparison with the baseline (time / baseline time)")
+    nslow = 0
+    for r in results:
+        key = (
+            r["scheme"],
+            r["nprocs"],
+            r["npts"],
+            r["isymm"],
+            r["aero_nodes"],
+            r["struct_nodes"],
+        )
+        if key not in ref:
+            continue
+        for op, t in r["times"].items():
+            if op not in ref[key]["times"]:
+                continue
+            ratio = t / max(ref[key]["times"][op], 1e-300)
+            flag = ""
+            if ratio > 1.0 + tol:
+                flag = "  <-- slower"
+                nslow += 1
+            print(
+                "%-16s p=%-4d %-16s %6.2f%s"
+                % (r["scheme"], r["nprocs"], op, ratio, flag)
+            )
+    print(
+        "%d timings slower than the baseline by more than %.0f%%" % (nslow, 100 * tol)
+    )
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Benchmark the transfer schemes")
+    p.add_argument("--schemes", nargs="+", default=SCHEMES, choices=SCHEMES)
+    p.add_argument("--aero-nodes", type=int, default=10000)
+    p.add_argument("--struct-nodes", type=int, default=1000)
+    p.add_argument("--npts", type=int, nargs="+", default=[10])
+    p.add_argument("--isymm", type=int, nargs="+", default=[-1])
+    p.add_argument("--beta", type=float, default=0.5)
+    p.add_argument(
+        "--rbf-type",
+        default="thin_plate_spline",
+        choices=[
+            "gaussian",
+            "multiquadric",
+            "inverse_multiquadric",
+            "thin_plate_spline",
+        ],
+    )
+    p.add_argument("--sampling-ratio", type=int, default=1)
+    p.add_argument(
+        "--procs",
+        type=int,
+        nargs="+",
+        default=None,
+        help="sub-communicator sizes (default: powers of 2)",
+    )
+    p.add_argument(
+        "--scaling",
+        default="strong",
+        choices=["strong", "weak"],
+        help="weak scales the node counts with the ranks",
+    )
+    p.add_argument("--layout", default="overlap", choices=["overlap", "split"])
+    p.add_argument("--struct-fraction", type=float, default=0.5)
+    p.add_argument(
+        "--products", nargs="*", default=None, help="only time these products"
+    )
+    p.add_argument("--repeats", type=int, default=5)
+    p.add_argument("--seed", type=int, default=1234)
+    p.add_argument("--output", default=None, help="JSON output file")
+    p.add_argument("--compare", default=None, help="JSON file from a previous run")
+    p.add_argument("--compare-tol", type=float, default=0.1)
+    args = p.parse_args()
+
+    world = MPI.COMM_WORLD
+    procs = args.procs
+    if procs is None:
+        procs = [1]
+        while 2 * procs[-1] <= world.size:
+            procs.append(2 * procs[-1])
+    procs = [n for n in procs if n <= world.size]
+
+    results = []
+    for nprocs in procs:
+        comm = world.Split(0 if world.rank < nprocs else MPI.UNDEFINED, world.rank)
+        scale = nprocs if args.scaling == "weak" else 1
+
+        if comm != MPI.COMM_NULL:
+            for name in args.schemes:
+                for npts in args.npts:
+                    for isymm in args.isymm:
+                        case = argparse.Namespace(**vars(args))
+                        case.npts, case.isymm = npts, isymm
+                        case.aero_count = scale * args.aero_nodes
+                        case.struct_count = scale * args.struct_nodes
+                        results.append(run_case(comm, name, case))
+            comm.Free()
+        world.Barrier()
+
+    if world.rank == 0:
+        print_scaling(results, args.scaling)
+
+        output = {
+            "metadata": {
+                "date": datetime.datetime.now().isoformat(),
+                "host": platform.node(),
+                "python": platform.python_version(),
+                "dtype": str(np.dtype(TransferScheme.dtype)),
+                "world_size": world.size,
+                "scaling": args.scaling,
+                "arguments": vars(args),
+            },
+            "results": results,
+        }
+
+        if args.output is not None:
+            with open(args.output, "w") as fp:
+                json.dump(output, fp, indent=2)
+
+        if args.compare is not None:
+            with open(args.compare, "r") as fp:
+                print_comparison(results, json.load(fp), args.compare_tol)
@@ -8,10 +8,106 @@ from pyfuntofem.body import Body
 from pyfuntofem.function import Function
 from pyfuntofem.test_solver import TestAerodynamicSolver, TestStructuralSolver
 from pyfuntofem.funtofem_nlbgs_driver import FUNtoFEMnlbgs
+from pyfuntofem.funtofem_iqn_driver import FUNtoFEMiqn
+from pyfuntofem.funtofem_jacobi_driver import FUNtoFEMjacobi
+from pyfuntofem.scenario_parallel import ScenarioParallel
+from pyfuntofem.checkpointing import BinomialCheckpointing
+import tempfile
 import unittest
 
 
+class UnsteadyAerodynamicSolver(TestAerodynamicSolver):
+    """
+    Test aerodynamic solver whose loads depend on an internal state that is
+    advanced with the time steps, so that it has to be restored when the
+    checkpointed adjoint recomputes them
+    """
+
+    def initialize(self, scenario, bodies):
+        self.states = [
+            np.zeros(3 * body.aero_nnodes, dtype=body.dtype) for body in bodies
+        ]
+        return super().initialize(scenario, bodies)
+
+    def iterate(self, scenario, bodies, step):
+        for body, state in zip(bodies, self.states):
+            aero_disps = body.get_aero_disps(scenario, step - 1)
+            aero_loads = body.get_aero_loads(scenario, step)
+            state[:] = 0.9 * state + np.sin(aero_disps + step)
+            aero_loads[:] = np.dot(self.Jac1, aero_disps) + state
+            aero_loads[:] += np.dot(self.c1, self.aero_dvs)
+        return 0
+
+    def get_checkpoint(self, scenario, bodies, step):
+        return [state.copy() for state in self.states]
+
+    def set_checkpoint(self, scenario, bodies, step, checkpoint):
+        self.states = [state.copy() for state in checkpoint]
+        return 0
+
+    def supports_checkpointing(self):
+        return True
+
+
+class UnsteadyStructuralSolver(TestStructuralSolver):
+    """
+    Test structural solver with an internal state advanced with the time steps
+    """
+
+    def initialize(self, scenario, bodies):
+        self.states = [
+            np.zeros(3 * body.struct_nnodes, dtype=body.dtype) for body in bodies
+        ]
+        return super().initialize(scenario, bodies)
+
+    def iterate(self, scenario, bodies, step):
+        for body, state in zip(bodies, self.states):
+            struct_loads = body.get_struct_loads(scenario, step)
+            struct_disps = body.get_struct_disps(scenario, step)
+            state[:] = 0.9 * state + 0.1 * np.tanh(struct_loads)
+            struct_disps[:] = np.dot(self.Jac1, struct_loads) + state
+            struct_disps[:] += np.dot(self.c1, self.struct_dvs)
+        return 0
+
+    def get_checkpoint(self, scenario, bodies, step):
+        return [state.copy() for state in self.states]
+
+    def set_checkpoint(self, scenario, bodies, step, checkpoint):
+        self.states = [state.copy() for state in checkpoint]
+        return 0
+
+    def supports_checkpointing(self):
+        return True
+
+
+class RecordingNLBGS(FUNtoFEMnlbgs):
+    """
+    NLBGS driver that records the coupling variables each reverse step of the
+    unsteady adjoint linearizes about, those of the time step and of the
+    previous one
+    """
+
+    def _solve_unsteady_adjoint_step(self, scenario, step):
+        record = [step]
+        for body in self.model.bodies:
+            for time_index in [step - 1, step]:
+                state = body.get_coupling_state(scenario, time_index=time_index)
+                record.extend(state[key] for key in sorted(state))
+        self.records.append(record)
+        return 0
+
+
 class CoupledFrameworkTest(unittest.TestCase):
+    def _get_transfer_options(self):
+
+        # Options of the MELD load, displacement and thermal transfers
+        return {
+            "analysis_type": "aerothermoelastic",
+            "scheme": "meld",
+            "thermal_scheme": "meld",
+            "npts": 5,
+        }
+
     def _setup_model_and_driver(self):
 
         # Build the model
@@ -51,12 +147,7 @@ class CoupledFrameworkTest(unittest.TestCase):
         solvers["structural"] = TestStructuralSolver(comm, model)
 
         # L&D transfer options
-        transfer_options = {
-            "analysis_type": "aerothermoelastic",
-            "scheme": "meld",
-            "thermal_scheme": "meld",
-            "npts": 5,
-        }
+        transfer_options = self._get_transfer_options()
 
         # instantiate the driver
         driver = FUNtoFEMnlbgs(
@@ -65,6 +156,50 @@ class CoupledFrameworkTest(unittest.TestCase):
 
         return model, driver
 
+    def _compare_to_nlbgs(self, driver_cls, coupling_rtol=1e-10, designs=1, **kwargs):
+        """
+        Solve the coupled problem with NLBGS, then with a driver_cls driver on the
+        same solvers over a sequence of nearby designs, and check that both give
+        the same functions and gradients at the last design
+        """
+
+        model, driver = self._setup_model_and_driver()
+        scenario = model.scenarios[0]
+        scenario.coupling_rtol = coupling_rtol
+
+        # Solve the coupled problem with NLBGS at the last design
+        x0 = [var.value for var in model.get_variables()]
+        model.set_variables([x + 1e-3 * (designs - 1) for x in x0])
+        driver.solve_forward()
+        driver.solve_adjoint()
+        fvals = [func.value for func in model.get_functions()]
+        grads = model.get_function_gradients()
+        nlbgs_steps = len(scenario.forward_residuals)
+
+        comm = driver.comm
+        new_driver = driver_cls(
+            driver.solvers,
+            comm,
+            comm,
+            0,
+            comm,
+            0,
+            self._get_transfer_options(),
+            model=model,
+            **kwargs
+        )
+        for k in range(designs):
+            model.set_variables([x + 1e-3 * k for x in x0])
+            new_driver.solve_forward()
+            new_driver.solve_adjoint()
+        new_fvals = [func.value for func in model.get_functions()]
+        new_grads = model.get_function_gradients()
+
+        np.testing.assert_allclose(new_fvals, fvals, rtol=1e-8)
+        np.testing.assert_allclose(new_grads, grads, rtol=1e-6)
+
+        return model, new_driver, nlbgs_steps
+
     def test_model_derivatives(self):
 
         model, driver = self._setup_model_and_driver()
@@ -105,6 +240,354 @@ class CoupledFrameworkTest(unittest.TestCase):
 
         return
 
+    def test_convergence_tolerances(self):
+
+        model, driver = self._setup_model_and_driver()
+
+        # Stop the coupled iterations once the change in the coupling variables
+        # has dropped by the relative tolerance
+        scenario = model.scenarios[0]
+        scenario.coupling_rtol = 1e-8
+
+        driver.solve_forward()
+        residuals = scenario.forward_residuals
+        assert len(residuals) < scenario.steps
+        assert residuals[-1] < scenario.coupling_rtol * residuals[0]
+
+        driver.solve_adjoint()
+        residuals = scenario.adjoint_residuals
+        assert len(residuals) < scenario.steps
+        assert residuals[-1] < scenario.coupling_rtol * residuals[0]
+
+        return
+
+    def test_iqn_driver(self):
+
+        # Solve the same problem with the quasi-Newton accelerated driver
+        model, iqn_driver, nlbgs_steps = self._compare_to_nlbgs(FUNtoFEMiqn)
+        scenario = model.scenarios[0]
+
+        assert len(scenario.forward_residuals) <= nlbgs_steps
+        assert len(scenario.adjoint_residuals) < scenario.steps
+
+        # Without any coupled iterations, the drivers skip straight to the
+        # functions and the coordinate derivatives
+        scenario.steps = 0
+        iqn_driver.solve_forward()
+        iqn_driver.solve_adjoint()
+        assert len(scenario.forward_residuals) == 0
+        assert len(scenario.adjoint_residuals) == 0
+
+        return
+
+    def test_jacobi_driver(self):
+
+        # Solve the same problem with block Jacobi iterations, and with every
+        # other iteration a Gauss-Seidel iteration
+        for interval in [0, 2]:
+            model, jacobi_driver, _ = self._compare_to_nlbgs(
+                FUNtoFEMjacobi, coupling_rtol=1e-12, gauss_seidel_interval=interval
+            )
+            scenario = model.scenarios[0]
+
+            assert len(scenario.forward_residuals) < scenario.steps
+            assert len(scenario.adjoint_residuals) < scenario.steps
+            for fraction in jacobi_driver.idle_fractions.values():
+                assert 0.0 <= fraction <= 1.0
+
+        return
+
+    def test_aitken_modes(self):
+
+        # Solve the same problem with a single theta for all the fields instead
+        # of independent thetas for each field
+        model, _, _ = self._compare_to_nlbgs(FUNtoFEMnlbgs, aitken_mode="global")
+        scenario = model.scenarios[0]
+
+        assert len(scenario.forward_residuals) < scenario.steps
+        assert len(scenario.adjoint_residuals) < scenario.steps
+
+        return
+
+    def test_unrelaxed_residuals(self):
+
+        model, driver = self._setup_model_and_driver()
+        scenario = model.scenarios[0]
+        scenario.steps = 1
+
+        # With a fixed theta, the coupling variables after the first step from
+        # zero are theta times their change, which is the residual
+        theta = 0.01
+        comm = driver.comm
+        relaxed_driver = FUNtoFEMnlbgs(
+            driver.solvers,
+            comm,
+            comm,
+            0,
+            comm,
+            0,
+            self._get_transfer_options(),
+            model=model,
+            theta_init=theta,
+            theta_min=theta,
+            theta_max=theta,
+        )
+
+        relaxed_driver.solve_forward()
+        relaxed_driver.solve_adjoint()
+        for adjoint, residuals in [
+            (False, scenario.forward_residuals),
+            (True, scenario.adjoint_residuals),
+        ]:
+            vecs = relaxed_driver._get_coupling_vectors(scenario, adjoint=adjoint)
+            norm = np.sqrt(comm.allreduce(sum(np.sum(np.real(v) ** 2) for v in vecs)))
+            np.testing.assert_allclose(residuals[0], norm / theta, rtol=1e-10)
+
+        return
+
+    def test_warm_start(self):
+
+        # Solve a sequence of nearby designs, starting from the extrapolated
+        # interface variables after the first two, which must converge to the
+        # same solution as a cold start
+        model, warm_driver, _ = self._compare_to_nlbgs(
+            FUNtoFEMnlbgs, designs=3, warm_start="extrapolate"
+        )
+        scenario = model.scenarios[0]
+
+        assert warm_driver.iterations_saved[(scenario.id, False)] > 0
+        assert warm_driver.iterations_saved[(scenario.id, True)] > 0
+
+        return
+
+    def test_checkpointing(self):
+
+        # Replay the schedules on a nonlinear recurrence and check that every
+        # reverse step sees the states of its own time step
+        def advance(x):
+            return np.sin(x) + 0.1
+
+        steps = 25
+        exact = [0.0]
+        for k in range(steps):
+            exact.append(advance(exact[-1]))
+
+        for snapshots in [1, 2, 3, 5, steps + 1]:
+            schedule = BinomialCheckpointing(steps, snapshots)
+            stored = {}
+            step, x = 0, exact[0]
+            reversed_steps = []
+            max_stored = 0
+            for action in schedule.forward_actions + schedule.adjoint_actions:
+                if action[0] == "advance":
+                    assert action[1] == step + 1
+                    for k in range(action[1], action[2] + 1):
+                        x = advance(x)
+                    step = action[2]
+                elif action[0] == "store":
+                    stored[action[1]] = x
+                elif action[0] == "restore":
+                    step, x = action[1], stored[action[1]]
+                elif action[0] == "free":
+                    del stored[action[1]]
+                else:
+                    assert action[1] == step and x == exact[step]
+                    reversed_steps.append(step)
+                max_stored = max(max_stored, len(stored))
+
+            assert reversed_steps == list(range(steps, 0, -1))
+            assert max_stored <= snapshots
+            if snapshots >= steps:
+                assert schedule.recomputed_steps == 0
+
+        # The bodies only allocate the time steps they are asked for
+        model, driver = self._setup_model_and_driver()
+        body = model.bodies[0]
+        scenario = Scenario("unsteady", id=1, steady=False, steps=steps)
+        body.initialize_variables(scenario, [0])
+        assert body.get_aero_disps(scenario, 1) is None
+
+        state = body.get_coupling_state(scenario, time_index=0)
+        body.set_coupling_state(scenario, state, time_index=2)
+        assert body.get_aero_disps(scenario, 2) is not None
+        body.release_time_index(scenario, 2)
+        assert body.get_aero_disps(scenario, 2) is None
+
+        return
+
+    def test_checkpointed_adjoint(self):
+
+        # Build an unsteady aeroelastic model
+        model = FUNtoFEMmodel("model")
+        plate = Body("plate", "aeroelastic", group=0, boundary=1)
+        for i in range(5):
+            svar = Variable("thickness %d" % (i), value=0.05, lower=0.01, upper=0.1)
+            plate.add_variable("structural", svar)
+        model.add_body(plate)
+
+        unsteady = Scenario("unsteady", group=0, steady=False, steps=12)
+        for i in range(4):
+            avar = Variable("aero var %d" % (i), value=0.1, lower=-10.0, upper=10.0)
+            unsteady.add_variable("aerodynamic", avar)
+        unsteady.add_function(Function("temperature", analysis_type="structural"))
+        model.add_scenario(unsteady)
+
+        comm = MPI.COMM_WORLD
+        transfer_options = {"analysis_type": "aeroelastic", "scheme": "meld", "npts": 5}
+
+        # The default test solvers cannot restart, which must be caught before
+        # the forward solve
+        solvers = {}
+        solvers["flow"] = TestAerodynamicSolver(comm, model)
+        solvers["structural"] = TestStructuralSolver(comm, model)
+        with self.assertRaises(ValueError):
+            FUNtoFEMnlbgs(
+                solvers,
+                comm,
+                comm,
+                0,
+                comm,
+                0,
+                transfer_options,
+                model=model,
+                checkpoints=3,
+            )
+
+        # Every reverse step must see the same states with any number of
+        # checkpoints as when all the time steps are stored
+        solvers["flow"] = UnsteadyAerodynamicSolver(comm, model)
+        solvers["structural"] = UnsteadyStructuralSolver(comm, model)
+        records = {}
+        for checkpoints in [None, 1, 3, unsteady.steps + 1]:
+            driver = RecordingNLBGS(
+                solvers,
+                comm,
+                comm,
+                0,
+                comm,
+                0,
+                transfer_options,
+                model=model,
+                checkpoints=checkpoints,
+            )
+            driver.records = []
+            driver.solve_forward()
+            driver.solve_adjoint()
+            records[checkpoints] = driver.records
+
+        steps = [record[0] for record in records[None]]
+        assert steps == list(range(unsteady.steps, 0, -1))
+        for checkpoints in [1, 3, unsteady.steps + 1]:
+            assert len(records[checkpoints]) == len(records[None])
+            for record, exact in zip(records[checkpoints], records[None]):
+                assert record[0] == exact[0]
+                for value, exact_value in zip(record[1:], exact[1:]):
+                    np.testing.assert_array_equal(value, exact_value)
+
+        return
+
+    def test_time_history(self):
+
+        model, driver = self._setup_model_and_driver()
+        body = model.bodies[0]
+        scenario = Scenario("unsteady", id=1, steady=False, steps=20)
+
+        for storage in ["array", "file"]:
+            with tempfile.TemporaryDirectory() as directory:
+                body.set_time_history(storage, directory=directory, cache_size=2)
+                body.initialize_variables(scenario)
+
+                # The initialization does not go through the file
+                history = body.struct_disps[scenario.id]
+                if storage == "file":
+                    assert len(history.cache) == 0 and len(history.stored) == 0
+
+                # Write each time step, keeping only the last two in memory
+                for time_index in range(scenario.steps + 1):
+                    body.get_struct_loads(scenario, time_index)[:] = time_index
+                    body.get_aero_temps(scenario, time_index)[:] = -time_index
+                    if time_index > 1:
+                        body.release_time_index(scenario, time_index - 2)
+
+                # Read them back in the order of the adjoint
+                for time_index in range(scenario.steps, -1, -1):
+                    loads = body.get_struct_loads(scenario, time_index)
+                    temps = body.get_aero_temps(scenario, time_index)
+                    assert np.all(loads == time_index)
+                    assert np.all(temps == -time_index)
+
+                body.set_time_history("list")
+                body.initialize_variables(scenario)
+
+        return
+
+    def test_scenario_parallel(self):
+
+        model, driver = self._setup_model_and_driver()
+        model.scenarios[0].coupling_rtol = 1e-10
+
+        # Add a second scenario with its own function
+        cruise = Scenario("cruise", group=0, steps=100, coupling_rtol=1e-10)
+        cruise.add_function(Function("temperature", analysis_type="structural"))
+        model.add_scenario(cruise)
+
+        # Use the same variable values and groups of the same size so that
+        # every group gives the same results
+        comm = driver.comm
+        values = [var.value for var in model.get_variables()]
+        model.set_variables(comm.bcast(values, root=0))
+        num_groups = 1
+        if comm.size % 2 == 0:
+            num_groups = 2
+        parallel = ScenarioParallel(comm, model, num_groups=num_groups)
+        group_comm = parallel.group_comm
+
+        solvers = {}
+        solvers["flow"] = TestAerodynamicSolver(group_comm, model)
+        solvers["structural"] = TestStructuralSolver(group_comm, model)
+        transfer_options = self._get_transfer_options()
+
+        # Solve the scenarios concurrently
+        parallel_driver = FUNtoFEMnlbgs(
+            solvers,
+            group_comm,
+            group_comm,
+            0,
+            group_comm,
+            0,
+            transfer_options,
+            model=model,
+            scenario_parallel=parallel,
+        )
+        parallel_driver.solve_forward()
+        parallel_driver.solve_adjoint()
+        fvals = [func.value for func in model.get_functions()]
+        grads = model.get_function_gradients()
+
+        # Solve all the scenarios on each group
+        group_driver = FUNtoFEMnlbgs(
+            solvers,
+            group_comm,
+            group_comm,
+            0,
+            group_comm,
+            0,
+            transfer_options,
+            model=model,
+        )
+        group_driver.solve_forward()
+        group_driver.solve_adjoint()
+        group_fvals = [func.value for func in model.get_functions()]
+        group_grads = model.get_function_gradients()
+
+        # The gradients of the test solvers are not summed across the
+        # processors of a group, so they are compared on the group roots
+        np.testing.assert_allclose(fvals, group_fvals, rtol=1e-8)
+        if group_comm.rank == 0:
+            np.testing.assert_allclose(grads, group_grads, rtol=1e-6)
+
+        return
+
     def test_coupled_derivatives(self):
 
         model, driver = self._setup_model_and_driver()
@@ -125,6 +125,82 @@ class TransferSchemeTest(unittest.TestCase):
 
         assert fail == 0
 
+    def test_meld_distributed(self):
+        comm, struct_comm, struct_root, aero_comm, aero_root = self._get_comms(
+            MPI.COMM_WORLD
+        )
+
+        # Set typical parameter values
+        isymm = 1  # Symmetry axis (0, 1, 2 or -1 for no symmetry)
+        nn = 10  # Number of nearest neighbors to consider
+        beta = 0.5  # Relative decay factor
+
+        aero_nnodes = self._get_aero_nnodes(aero_comm)
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = self._get_struct_nnodes(struct_comm)
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        # The schemes with the distributed structural mesh must match the
+        # schemes with the replicated structural mesh
+        schemes = []
+        for distributed in [False, True]:
+            meld = TransferScheme.pyMELD(
+                comm, struct_comm, struct_root, aero_comm, aero_root, isymm, nn, beta
+            )
+            thermal = TransferScheme.pyMELDThermal(
+                comm, struct_comm, struct_root, aero_comm, aero_root, isymm, nn, beta
+            )
+            for transfer in [meld, thermal]:
+                transfer.setDistributedStructMesh(distributed)
+                transfer.setAeroNodes(aero_X)
+                transfer.setStructNodes(struct_X)
+                transfer.initialize()
+            schemes.append((meld, thermal))
+
+        uS = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        tS = np.random.random(struct_nnodes).astype(TransferScheme.dtype)
+        hA = np.random.random(aero_nnodes).astype(TransferScheme.dtype)
+        psi = np.random.random((3 * struct_nnodes, 3)).astype(TransferScheme.dtype)
+        lam = np.random.random((3 * aero_nnodes, 3)).astype(TransferScheme.dtype)
+
+        results = []
+        for meld, thermal in schemes:
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            fS = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            tA = np.zeros(aero_nnodes, dtype=TransferScheme.dtype)
+            hS = np.zeros(struct_nnodes, dtype=TransferScheme.dtype)
+            prods = np.zeros((3 * struct_nnodes, 3), dtype=TransferScheme.dtype)
+            meld.transferDisps(uS, uA)
+            meld.transferLoads(fA, fS)
+            meld.applydLduSTransMulti(psi, prods)
+            dDdxS0 = np.zeros((3 * struct_nnodes, 3), dtype=TransferScheme.dtype)
+            dLdxA0 = np.zeros((3 * aero_nnodes, 3), dtype=TransferScheme.dtype)
+            dLdxS0 = np.zeros((3 * struct_nnodes, 3), dtype=TransferScheme.dtype)
+            meld.applydDdxS0Multi(lam, dDdxS0)
+            meld.applydLdxA0Multi(psi, dLdxA0)
+            meld.applydLdxS0Multi(psi, dLdxS0)
+            thermal.transferTemp(tS, tA)
+            thermal.transferFlux(hA, hS)
+            results.append((uA, fS, prods, tA, hS, dDdxS0, dLdxA0, dLdxS0))
+
+        for k in range(8):
+            np.testing.assert_allclose(results[0][k], results[1][k], rtol=1e-10)
+
+        dh = 1e-6
+        rtol = 1e-5
+        atol = 1e-30
+        if TransferScheme.dtype == complex:
+            dh = 1e-30
+            rtol = 1e-9
+            atol = 1e-30
+
+        meld, thermal = schemes[1]
+        assert meld.testAllDerivatives(uS, fA, dh, rtol, atol) == 0
+        assert thermal.testAllDerivatives(tS, hA, dh, rtol, atol) == 0
+
+        return
+
     def test_linear_meld(self):
         comm, struct_comm, struct_root, aero_comm, aero_root = self._get_comms(
             MPI.COMM_WORLD
@@ -212,6 +288,52 @@ class TransferSchemeTest(unittest.TestCase):
 
         return
 
+    def test_purbf(self):
+        comm, struct_comm, struct_root, aero_comm, aero_root = self._get_comms(
+            MPI.COMM_WORLD
+        )
+
+        # Set typical parameter values
+        patch_points = 20
+        overlap = 1.5
+        transfer = TransferScheme.pyPURBF(
+            comm,
+            struct_comm,
+            struct_root,
+            aero_comm,
+            aero_root,
+            patch_points,
+            overlap,
+        )
+
+        aero_nnodes = self._get_aero_nnodes(aero_comm)
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        transfer.setAeroNodes(aero_X)
+
+        struct_nnodes = self._get_struct_nnodes(struct_comm)
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        transfer.setStructNodes(struct_X)
+
+        transfer.initialize()
+
+        # Set random forces
+        uS = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+
+        dh = 1e-6
+        rtol = 1e-5
+        atol = 1e-30
+        if TransferScheme.dtype == complex:
+            dh = 1e-30
+            rtol = 1e-9
+            atol = 1e-30
+
+        fail = transfer.testAllDerivatives(uS, fA, dh, rtol, atol)
+
+        assert fail == 0
+
+        return
+
 
 if __name__ == "__main__":
     test = TransferSchemeTest()
@@ -219,3 +341,4 @@ if __name__ == "__main__":
     test.test_meld_thermal()
     test.test_rbf()
     test.test_linear_meld()
+    test.test_purbf()
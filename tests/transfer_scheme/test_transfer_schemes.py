@@ -44,6 +44,577 @@ class TransferSchemeTest(unittest.TestCase):
 
         return
 
+    def test_meld_threaded(self):
+        comm = MPI.COMM_WORLD
+
+        # Set typical parameter values
+        isymm = 1  # Symmetry axis (0, 1, 2 or -1 for no symmetry)
+        nn = 10  # Number of nearest neighbors to consider
+        beta = 0.5  # Relative decay factor
+        serial = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+        threaded = TransferScheme.pyMELD(
+            comm, comm, 0, comm, 0, isymm, nn, beta, num_threads=4
+        )
+
+        aero_nnodes = 33
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 51
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        for transfer in [serial, threaded]:
+            transfer.setAeroNodes(aero_X)
+            transfer.setStructNodes(struct_X)
+            transfer.initialize()
+
+        # Set random displacements and forces
+        uS = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+
+        # The threaded transfers must match the serial ones and be
+        # reproducible from call to call
+        results = []
+        for transfer in [serial, threaded, threaded]:
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            fS = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            transfer.transferDisps(uS, uA)
+            transfer.transferLoads(fA, fS)
+            results.append((uA, fS))
+
+        for k in range(2):
+            np.testing.assert_allclose(results[0][k], results[1][k], rtol=1e-12)
+            np.testing.assert_array_equal(results[1][k], results[2][k])
+
+        dh = 1e-6
+        rtol = 1e-5
+        atol = 1e-30
+        if TransferScheme.dtype == complex:
+            dh = 1e-30
+            rtol = 1e-9
+            atol = 1e-30
+
+        fail = threaded.testAllDerivatives(uS, fA, dh, rtol, atol)
+
+        assert fail == 0
+
+        return
+
+    def test_kd_tree_search(self):
+        comm = MPI.COMM_WORLD
+
+        # Set typical parameter values
+        isymm = 1  # Symmetry axis (0, 1, 2 or -1 for no symmetry)
+        nn = 10  # Number of nearest neighbors to consider
+        beta = 0.5  # Relative decay factor
+
+        aero_nnodes = 133
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 251
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        # Put some of the structural nodes on the plane of symmetry
+        struct_X[3 * np.arange(0, struct_nnodes, 7) + isymm] = 0.0
+
+        # The k-d tree must find the same connectivity as the LocatePoint search
+        # for both MELD and the thermal transfer
+        schemes = []
+        for search in [
+            TransferScheme.PY_LOCATE_POINT_SEARCH,
+            TransferScheme.PY_KD_TREE_SEARCH,
+        ]:
+            meld = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+            thermal = TransferScheme.pyMELDThermal(
+                comm, comm, 0, comm, 0, isymm, nn, beta
+            )
+            for transfer in [meld, thermal]:
+                transfer.setSearchType(search, num_threads=2)
+                transfer.setAeroNodes(aero_X)
+                transfer.setStructNodes(struct_X)
+                transfer.initialize()
+            schemes.append((meld, thermal))
+
+        uS = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        tS = np.random.random(struct_nnodes).astype(TransferScheme.dtype)
+        hA = np.random.random(aero_nnodes).astype(TransferScheme.dtype)
+
+        results = []
+        for meld, thermal in schemes:
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            fS = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            tA = np.zeros(aero_nnodes, dtype=TransferScheme.dtype)
+            hS = np.zeros(struct_nnodes, dtype=TransferScheme.dtype)
+            meld.transferDisps(uS, uA)
+            meld.transferLoads(fA, fS)
+            thermal.transferTemp(tS, tA)
+            thermal.transferFlux(hA, hS)
+            results.append((uA, fS, tA, hS))
+
+        for k in range(4):
+            np.testing.assert_allclose(results[0][k], results[1][k], rtol=1e-12)
+
+        return
+
+    def test_octree(self):
+        comm = MPI.COMM_WORLD
+
+        # Set typical parameter values
+        isymm = 1  # Symmetry axis (0, 1, 2 or -1 for no symmetry)
+        nn = 10  # Number of nearest neighbors to consider
+        beta = 0.5  # Relative decay factor
+
+        aero_nnodes = 133
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 251
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        struct_X[3 * np.arange(0, struct_nnodes, 7) + isymm] = 0.0
+
+        # The leaf bins partition the points, and the coarser leaf bins match
+        # those of an octree generated with the larger point count
+        octree = TransferScheme.pyOctree(struct_X, 4)
+        octree.generate()
+        leaf_ptr, point_ids = octree.getLeafPoints()
+        assert leaf_ptr[-1] == struct_nnodes
+        assert np.all(np.diff(leaf_ptr) > 0)
+        assert np.array_equal(np.sort(point_ids), np.arange(struct_nnodes))
+
+        coarse = TransferScheme.pyOctree(struct_X, 16)
+        coarse.generate()
+        for a, b in zip(octree.getLeafBins(16), coarse.getLeafPoints()):
+            assert np.array_equal(a, b)
+
+        # The octree shared by MELD and the thermal transfer finds the same
+        # connectivity as the LocatePoint search
+        shared = TransferScheme.pyOctree()
+        schemes = []
+        for search in [
+            TransferScheme.PY_LOCATE_POINT_SEARCH,
+            TransferScheme.PY_OCTREE_SEARCH,
+        ]:
+            meld = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+            thermal = TransferScheme.pyMELDThermal(
+                comm, comm, 0, comm, 0, isymm, nn, beta
+            )
+            for transfer in [meld, thermal]:
+                transfer.setSearchType(search, num_threads=2)
+                transfer.setStructOctree(shared)
+                transfer.setAeroNodes(aero_X)
+                transfer.setStructNodes(struct_X)
+                transfer.initialize()
+            schemes.append((meld, thermal))
+
+        uS = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        tS = np.random.random(struct_nnodes).astype(TransferScheme.dtype)
+
+        results = []
+        for meld, thermal in schemes:
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            tA = np.zeros(aero_nnodes, dtype=TransferScheme.dtype)
+            meld.transferDisps(uS, uA)
+            thermal.transferTemp(tS, tA)
+            results.append((uA, tA))
+
+        for k in range(2):
+            np.testing.assert_allclose(results[0][k], results[1][k], rtol=1e-12)
+
+        return
+
+    def test_meld_workspace(self):
+        comm = MPI.COMM_WORLD
+
+        # Set typical parameter values
+        isymm = -1  # Symmetry axis (0, 1, 2 or -1 for no symmetry)
+        nn = 10  # Number of nearest neighbors to consider
+        beta = 0.5  # Relative decay factor
+        transfer = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+
+        aero_nnodes = 33
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        transfer.setAeroNodes(aero_X)
+
+        struct_nnodes = 51
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        transfer.setStructNodes(struct_X)
+
+        transfer.initialize()
+
+        # The work arrays are sized once in initialize() and reused
+        footprint = transfer.getMemoryFootprint()
+        assert footprint["workspace"] > 0
+        assert footprint["total"] > footprint["workspace"]
+
+        uS = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+        fS = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+        prods = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+        for k in range(3):
+            transfer.transferDisps(uS, uA)
+            transfer.transferLoads(fA, fS)
+            transfer.applydLduSTrans(uS, prods)
+            transfer.applydLdxS0(uS, prods)
+
+        assert transfer.getMemoryFootprint() == footprint
+
+        return
+
+    def test_meld_conn_reuse(self):
+        comm = MPI.COMM_WORLD
+
+        isymm = 1
+        nn = 10
+        beta = 0.5
+
+        aero_nnodes = 40
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 60
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        transfer = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+        transfer.setConnReuse(True)
+        transfer.setAeroNodes(aero_X)
+        transfer.setStructNodes(struct_X)
+        transfer.initialize()
+
+        # Small changes keep the connectivity, while the larger changes
+        # require a new nearest neighbor search
+        for scale in [0.0, 1e-6, 1e-3, 0.1]:
+            aero_X += scale * np.random.random(3 * aero_nnodes)
+            struct_X += scale * np.random.random(3 * struct_nnodes)
+
+            transfer.setAeroNodes(aero_X)
+            transfer.setStructNodes(struct_X)
+            transfer.initialize()
+
+            fresh = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+            fresh.setAeroNodes(aero_X)
+            fresh.setStructNodes(struct_X)
+            fresh.initialize()
+
+            # The transfers match those of a new scheme
+            uS = 0.1 * np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            uA_fresh = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            transfer.transferDisps(uS, uA)
+            fresh.transferDisps(uS, uA_fresh)
+            np.testing.assert_allclose(uA, uA_fresh, rtol=1e-10, atol=1e-12)
+
+            fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+            fS = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            fS_fresh = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            transfer.transferLoads(fA, fS)
+            fresh.transferLoads(fA, fS_fresh)
+            np.testing.assert_allclose(fS, fS_fresh, rtol=1e-10, atol=1e-12)
+
+        return
+
+    def test_meld_factor_storage(self):
+        comm = MPI.COMM_WORLD
+
+        isymm = 1
+        nn = 10
+        beta = 0.5
+
+        aero_nnodes = 33
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 51
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        uS = 0.1 * np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        vS = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        vA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+
+        results = {}
+        footprints = {}
+        for storage in [
+            TransferScheme.PY_STORE_FACTOR,
+            TransferScheme.PY_STORE_SINGLE_FACTOR,
+            TransferScheme.PY_RECOMPUTE_FACTOR,
+        ]:
+            transfer = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+            transfer.setFactorStorage(storage)
+            transfer.setAeroNodes(aero_X)
+            transfer.setStructNodes(struct_X)
+            transfer.initialize()
+
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            fS = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            transfer.transferDisps(uS, uA)
+            transfer.transferLoads(fA, fS)
+
+            prods = []
+            p = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            transfer.applydLduS(vS, p)
+            prods.append(p)
+            p = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            transfer.applydLduSTrans(vS, p)
+            prods.append(p)
+            p = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            transfer.applydLdxA0(vS, p)
+            prods.append(p)
+            results[storage] = (fS, prods)
+
+            footprints[storage] = transfer.getMemoryFootprint()["total"]
+
+        # The estimates match the difference in the memory footprints
+        full = transfer.getFactorMemoryEstimate(TransferScheme.PY_STORE_FACTOR)
+        single = transfer.getFactorMemoryEstimate(TransferScheme.PY_STORE_SINGLE_FACTOR)
+        assert full == aero_nnodes * (225 * aero_X.itemsize + 15 * 4)
+        assert transfer.getFactorMemoryEstimate(TransferScheme.PY_RECOMPUTE_FACTOR) == 0
+        assert (
+            footprints[TransferScheme.PY_STORE_FACTOR]
+            - footprints[TransferScheme.PY_RECOMPUTE_FACTOR]
+            == full
+        )
+        assert (
+            footprints[TransferScheme.PY_STORE_SINGLE_FACTOR]
+            - footprints[TransferScheme.PY_RECOMPUTE_FACTOR]
+            == single
+        )
+
+        # The factors do not change the load transfer, and recomputing them
+        # gives the same products as storing them
+        fS, prods = results[TransferScheme.PY_STORE_FACTOR]
+        for storage, rtol in [
+            (TransferScheme.PY_STORE_SINGLE_FACTOR, 1e-4),
+            (TransferScheme.PY_RECOMPUTE_FACTOR, 1e-12),
+        ]:
+            np.testing.assert_allclose(results[storage][0], fS, rtol=1e-12)
+            for p, p_ref in zip(results[storage][1], prods):
+                np.testing.assert_allclose(p, p_ref, rtol=rtol, atol=rtol)
+
+        return
+
+    def test_meld_quaternion_rotation(self):
+        comm = MPI.COMM_WORLD
+
+        isymm = 1
+        nn = 10
+        beta = 0.5
+
+        aero_nnodes = 33
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 51
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        # Rotate the structure by a large angle on top of a random deformation
+        theta = 2.5
+        Q = np.array(
+            [
+                [np.cos(theta), -np.sin(theta), 0.0],
+                [np.sin(theta), np.cos(theta), 0.0],
+                [0.0, 0.0, 1.0],
+            ]
+        )
+        Xs = struct_X.reshape(-1, 3)
+        uS = (Xs @ Q.T - Xs).flatten().astype(TransferScheme.dtype)
+        uS += 0.1 * np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+
+        results = {}
+        for rotation in [
+            TransferScheme.PY_SVD_ROTATION,
+            TransferScheme.PY_QUATERNION_ROTATION,
+        ]:
+            transfer = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+            transfer.setRotationType(rotation)
+            transfer.setAeroNodes(aero_X)
+            transfer.setStructNodes(struct_X)
+            transfer.initialize()
+
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            fS = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            transfer.transferDisps(uS, uA)
+            transfer.transferLoads(fA, fS)
+            results[rotation] = (uA, fS)
+
+        # Both methods give the same transfers
+        uA, fS = results[TransferScheme.PY_SVD_ROTATION]
+        np.testing.assert_allclose(
+            results[TransferScheme.PY_QUATERNION_ROTATION][0],
+            uA,
+            rtol=1e-10,
+            atol=1e-12,
+        )
+        np.testing.assert_allclose(
+            results[TransferScheme.PY_QUATERNION_ROTATION][1],
+            fS,
+            rtol=1e-10,
+            atol=1e-12,
+        )
+
+        dh = 1e-6
+        rtol = 1e-5
+        atol = 1e-30
+        if TransferScheme.dtype == complex:
+            dh = 1e-30
+            rtol = 1e-9
+            atol = 1e-30
+
+        fail = transfer.testAllDerivatives(uS, fA, dh, rtol, atol)
+
+        assert fail == 0
+
+        return
+
+    def test_meld_mixed_precision(self):
+        comm = MPI.COMM_WORLD
+
+        isymm = 1
+        nn = 10
+        beta = 0.5
+
+        aero_nnodes = 33
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 51
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        uS = 0.1 * np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        tS = np.random.random(struct_nnodes).astype(TransferScheme.dtype)
+        hA = np.random.random(aero_nnodes).astype(TransferScheme.dtype)
+
+        def transfer_all(meld, thermal):
+            uA = np.zeros(3 * aero_nnodes, dtype=uS.dtype)
+            fS = np.zeros(3 * struct_nnodes, dtype=uS.dtype)
+            tA = np.zeros(aero_nnodes, dtype=uS.dtype)
+            hS = np.zeros(struct_nnodes, dtype=uS.dtype)
+            meld.transferDisps(uS, uA)
+            meld.transferLoads(fA, fS)
+            thermal.transferTemp(tS, tA)
+            thermal.transferFlux(hA, hS)
+            return [uA, fS, tA, hS]
+
+        meld = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+        thermal = TransferScheme.pyMELDThermal(comm, comm, 0, comm, 0, isymm, nn, beta)
+        for transfer in [meld, thermal]:
+            transfer.setAeroNodes(aero_X)
+            transfer.setStructNodes(struct_X)
+            transfer.initialize()
+
+        full = transfer_all(meld, thermal)
+        meld_bytes = meld.getMemoryFootprint()["total"]
+        thermal_bytes = thermal.getMemoryFootprint()["total"]
+
+        # The mixed precision transfers are accurate to single precision and
+        # store less data
+        for transfer in [meld, thermal]:
+            transfer.setPrecision(TransferScheme.PY_MIXED_PRECISION)
+        mixed = transfer_all(meld, thermal)
+        for x, y in zip(mixed, full):
+            np.testing.assert_allclose(x, y, rtol=1e-5, atol=1e-5)
+        self.assertLess(meld.getMemoryFootprint()["total"], meld_bytes)
+        self.assertLess(thermal.getMemoryFootprint()["total"], thermal_bytes)
+
+        # Switching back to full precision recovers the full transfers
+        for transfer in [meld, thermal]:
+            transfer.setPrecision(TransferScheme.PY_FULL_PRECISION)
+        for x, y in zip(transfer_all(meld, thermal), full):
+            np.testing.assert_allclose(x, y, rtol=1e-12, atol=1e-14)
+
+        # The wrapper accepts single precision arrays
+        meld = TransferScheme.pyMixedPrecisionTransfer(
+            TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+        )
+        thermal = TransferScheme.pyMixedPrecisionTransfer(
+            TransferScheme.pyMELDThermal(comm, comm, 0, comm, 0, isymm, nn, beta)
+        )
+        for transfer in [meld, thermal]:
+            transfer.setAeroNodes(aero_X.astype(transfer.single_dtype))
+            transfer.setStructNodes(struct_X.astype(transfer.single_dtype))
+            transfer.initialize()
+
+        single_dtype = meld.single_dtype
+        uS, fA = uS.astype(single_dtype), fA.astype(single_dtype)
+        tS, hA = tS.astype(single_dtype), hA.astype(single_dtype)
+        for x, y in zip(transfer_all(meld, thermal), full):
+            self.assertEqual(x.dtype, single_dtype)
+            np.testing.assert_allclose(x, y, rtol=1e-4, atol=1e-4)
+
+        return
+
+    def test_multi_vector_products(self):
+        comm = MPI.COMM_WORLD
+
+        # Set typical parameter values
+        isymm = 1  # Symmetry axis (0, 1, 2 or -1 for no symmetry)
+        nn = 10  # Number of nearest neighbors to consider
+        beta = 0.5  # Relative decay factor
+        meld = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+        linear = TransferScheme.pyLinearizedMELD(
+            comm, comm, 0, comm, 0, isymm, nn, beta
+        )
+
+        aero_nnodes = 33
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 51
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        uS = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+
+        # Apply each product to a block of vectors and compare against the
+        # single-vector products applied to each column
+        nvecs = 4
+        na = 3 * aero_nnodes
+        ns = 3 * struct_nnodes
+        products = [
+            ("applydDduS", ns, na),
+            ("applydDduSTrans", na, ns),
+            ("applydLduS", ns, ns),
+            ("applydLduSTrans", ns, ns),
+            ("applydLdfATrans", ns, na),
+            ("applydDdxA0", na, na),
+            ("applydDdxS0", na, ns),
+            ("applydLdxA0", ns, na),
+            ("applydLdxS0", ns, ns),
+        ]
+
+        for transfer in [meld, linear]:
+            transfer.setAeroNodes(aero_X)
+            transfer.setStructNodes(struct_X)
+            transfer.initialize()
+
+            uA = np.zeros(na, dtype=TransferScheme.dtype)
+            fS = np.zeros(ns, dtype=TransferScheme.dtype)
+            transfer.transferDisps(uS, uA)
+            transfer.transferLoads(fA, fS)
+
+            for name, vec_len, prod_len in products:
+                vecs = np.random.random((vec_len, nvecs)).astype(TransferScheme.dtype)
+                prods = np.zeros((prod_len, nvecs), dtype=TransferScheme.dtype)
+                getattr(transfer, name + "Multi")(vecs, prods)
+
+                prod = np.zeros(prod_len, dtype=TransferScheme.dtype)
+                for k in range(nvecs):
+                    getattr(transfer, name)(vecs[:, k].copy(), prod)
+                    np.testing.assert_allclose(prods[:, k], prod, rtol=1e-10)
+
+        # Check the thermal products
+        thermal = TransferScheme.pyMELDThermal(comm, comm, 0, comm, 0, isymm, nn, beta)
+        thermal.setAeroNodes(aero_X)
+        thermal.setStructNodes(struct_X)
+        thermal.initialize()
+
+        products = [
+            ("applydTdtS", struct_nnodes, aero_nnodes),
+            ("applydTdtSTrans", aero_nnodes, struct_nnodes),
+            ("applydQdqA", aero_nnodes, struct_nnodes),
+            ("applydQdqATrans", struct_nnodes, aero_nnodes),
+        ]
+
+        for name, vec_len, prod_len in products:
+            vecs = np.random.random((vec_len, nvecs)).astype(TransferScheme.dtype)
+            prods = np.zeros((prod_len, nvecs), dtype=TransferScheme.dtype)
+            getattr(thermal, name + "Multi")(vecs, prods)
+
+            prod = np.zeros(prod_len, dtype=TransferScheme.dtype)
+            for k in range(nvecs):
+                getattr(thermal, name)(vecs[:, k].copy(), prod)
+                np.testing.assert_allclose(prods[:, k], prod, rtol=1e-10)
+
+        return
+
     def test_meld_thermal(self):
 
         comm = MPI.COMM_WORLD
@@ -119,6 +690,71 @@ class TransferSchemeTest(unittest.TestCase):
 
         return
 
+    def test_interp_operator(self):
+        comm = MPI.COMM_WORLD
+
+        # Set typical parameter values
+        isymm = 1  # Symmetry axis (0, 1, 2 or -1 for no symmetry)
+        nn = 10  # Number of nearest neighbors to consider
+        beta = 0.5  # Relative decay factor
+
+        aero_nnodes = 53
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 47
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        # Put some of the structural nodes on the plane of symmetry
+        struct_X[3 * np.arange(0, struct_nnodes, 7) + isymm] = 0.0
+
+        meld = TransferScheme.pyMELD(comm, comm, 0, comm, 0, isymm, nn, beta)
+        linear = TransferScheme.pyLinearizedMELD(
+            comm, comm, 0, comm, 0, isymm, nn, beta
+        )
+        thermal = TransferScheme.pyMELDThermal(comm, comm, 0, comm, 0, isymm, nn, beta)
+        for transfer in [meld, linear, thermal]:
+            transfer.setAeroNodes(aero_X)
+            transfer.setStructNodes(struct_X)
+            transfer.initialize()
+
+        # MELD is nonlinear and does not assemble an operator
+        assert meld.getInterpOperator() is None
+
+        uS = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        tS = np.random.random(struct_nnodes).astype(TransferScheme.dtype)
+        hA = np.random.random(aero_nnodes).astype(TransferScheme.dtype)
+
+        # The sparse products must match the transfers
+        for k in range(2):
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            fS = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            linear.transferDisps(uS, uA)
+            linear.transferLoads(fA, fS)
+
+            mat = linear.getInterpOperator()
+            assert mat.shape == (3 * aero_nnodes, 3 * struct_nnodes)
+            np.testing.assert_allclose(mat @ uS, uA, rtol=1e-12)
+            np.testing.assert_allclose(mat.T @ fA, fS, rtol=1e-12)
+
+            # The operator must be reassembled when the nodes move
+            aero_X += 0.01 * np.random.random(3 * aero_nnodes)
+            linear.setAeroNodes(aero_X)
+
+        tA = np.zeros(aero_nnodes, dtype=TransferScheme.dtype)
+        hS = np.zeros(struct_nnodes, dtype=TransferScheme.dtype)
+        thermal.transferTemp(tS, tA)
+        thermal.transferFlux(hA, hS)
+
+        mat = thermal.getInterpOperator()
+        assert mat.shape == (aero_nnodes, struct_nnodes)
+        np.testing.assert_allclose(mat @ tS, tA, rtol=1e-12)
+        np.testing.assert_allclose(mat.T @ hA, hS, rtol=1e-12)
+
+        # The temperature is a weighted average of the structural temperatures
+        np.testing.assert_allclose(mat @ np.ones(struct_nnodes), 1.0, rtol=1e-12)
+
+        return
+
     def test_rbf(self):
         comm = MPI.COMM_WORLD
 
@@ -157,6 +793,253 @@ class TransferSchemeTest(unittest.TestCase):
 
         return
 
+    def test_rbf_greedy_sampling(self):
+        comm = MPI.COMM_WORLD
+
+        # Structural nodes on a smooth curved surface
+        struct_nnodes = 400
+        xy = np.random.random((struct_nnodes, 2))
+        z = 0.1 * np.sin(np.pi * xy[:, 0]) * np.cos(np.pi * xy[:, 1])
+        struct_X = np.column_stack((xy, z)).flatten().astype(TransferScheme.dtype)
+
+        aero_nnodes = 50
+        xy = np.random.random((aero_nnodes, 2))
+        z = 0.1 * np.sin(np.pi * xy[:, 0]) * np.cos(np.pi * xy[:, 1])
+        aero_X = np.column_stack((xy, z)).flatten().astype(TransferScheme.dtype)
+
+        # Smooth bending displacement field
+        Xs = struct_X.real.reshape(-1, 3)
+        uS = np.zeros((struct_nnodes, 3))
+        uS[:, 2] = Xs[:, 0] ** 2 + 0.5 * Xs[:, 0] * Xs[:, 1]
+        uS = uS.flatten().astype(TransferScheme.dtype)
+
+        results = []
+        for greedy in [False, True]:
+            transfer = TransferScheme.pyRBF(
+                comm, comm, 0, comm, 0, TransferScheme.PY_THIN_PLATE_SPLINE, 1
+            )
+            if greedy:
+                transfer.setGreedySampling(1e-3)
+            transfer.setAeroNodes(aero_X)
+            transfer.setStructNodes(struct_X)
+            transfer.initialize()
+
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            transfer.transferDisps(uS, uA)
+            results.append((uA, transfer.getMemoryFootprint()["total"]))
+
+        # The greedy centers reproduce the full interpolation with fewer centers
+        np.testing.assert_allclose(results[1][0], results[0][0], atol=1e-3)
+        assert results[1][1] < results[0][1]
+
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        dh = 1e-6
+        rtol = 1e-5
+        atol = 1e-30
+        if TransferScheme.dtype == complex:
+            dh = 1e-30
+            rtol = 1e-9
+            atol = 1e-30
+
+        fail = transfer.testAllDerivatives(uS, fA, dh, rtol, atol)
+        assert fail == 0
+
+        return
+
+    def test_rbf_factor_reuse(self):
+        comm = MPI.COMM_WORLD
+
+        aero_nnodes = 40
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 60
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        transfer = TransferScheme.pyRBF(
+            comm, comm, 0, comm, 0, TransferScheme.PY_THIN_PLATE_SPLINE, 1
+        )
+        transfer.setFactorReuse(True)
+        transfer.setAeroNodes(aero_X)
+        transfer.setStructNodes(struct_X)
+        transfer.initialize()
+
+        # Move the aerodynamic nodes, then a few structural nodes and then all
+        # of the structural nodes
+        for nmoved in [0, 3, struct_nnodes]:
+            aero_X += 0.01 * np.random.random(3 * aero_nnodes)
+            struct_X[: 3 * nmoved] += 0.01 * np.random.random(3 * nmoved)
+
+            transfer.setAeroNodes(aero_X)
+            transfer.setStructNodes(struct_X)
+            transfer.initialize()
+
+            fresh = TransferScheme.pyRBF(
+                comm, comm, 0, comm, 0, TransferScheme.PY_THIN_PLATE_SPLINE, 1
+            )
+            fresh.setAeroNodes(aero_X)
+            fresh.setStructNodes(struct_X)
+            fresh.initialize()
+
+            # The updated factorization gives the same interpolation
+            uS = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            uA_fresh = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            transfer.transferDisps(uS, uA)
+            fresh.transferDisps(uS, uA_fresh)
+            np.testing.assert_allclose(uA, uA_fresh, rtol=1e-8, atol=1e-10)
+
+        return
+
+    def test_wendland_rbf(self):
+        comm = MPI.COMM_WORLD
+
+        aero_nnodes = 33
+        aero_X = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 51
+        struct_X = np.random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        # A linear displacement field is interpolated exactly
+        A = np.random.random((3, 3))
+        c = np.random.random(3)
+        uS = (struct_X.reshape(-1, 3) @ A.T + c).flatten()
+        uA_exact = (aero_X.reshape(-1, 3) @ A.T + c).flatten()
+        fA = np.random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+
+        dh = 1e-6
+        rtol = 1e-5
+        atol = 1e-30
+        if TransferScheme.dtype == complex:
+            dh = 1e-30
+            rtol = 1e-9
+            atol = 1e-30
+
+        for rbf_type in [
+            TransferScheme.PY_WENDLAND_C0,
+            TransferScheme.PY_WENDLAND_C2,
+            TransferScheme.PY_WENDLAND_C4,
+        ]:
+            transfer = TransferScheme.pyRBF(comm, comm, 0, comm, 0, rbf_type, 1)
+            transfer.setAeroNodes(aero_X)
+            transfer.setStructNodes(struct_X)
+            transfer.initialize()
+
+            uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+            transfer.transferDisps(uS.astype(TransferScheme.dtype), uA)
+            np.testing.assert_allclose(uA, uA_exact, rtol=1e-8, atol=1e-8)
+
+            # The loads conserve virtual work
+            fS = np.zeros(3 * struct_nnodes, dtype=TransferScheme.dtype)
+            transfer.transferLoads(fA, fS)
+            work_aero = np.dot(uA, fA)
+            work_struct = np.dot(uS, fS)
+            self.assertAlmostEqual(work_aero.real, work_struct.real, places=8)
+
+            fail = transfer.testAllDerivatives(uS, fA, dh, rtol, atol)
+            assert fail == 0
+
+        return
+
+    def test_purbf(self):
+        comm = MPI.COMM_WORLD
+
+        # Give each rank its own nodes, the same nodes on every rank would
+        # coincide
+        random = np.random.RandomState(1234567 + comm.rank)
+
+        aero_nnodes = 60
+        aero_X = random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_nnodes = 300
+        struct_X = random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+
+        patch_points = 20
+        overlap = 1.5
+        transfer = TransferScheme.pyPURBF(comm, comm, 0, comm, 0, patch_points, overlap)
+        transfer.setAeroNodes(aero_X)
+        transfer.setStructNodes(struct_X)
+        transfer.initialize()
+
+        # A linear displacement field is interpolated exactly
+        A = comm.bcast(random.random((3, 3)))
+        c = comm.bcast(random.random(3))
+        uS = (struct_X.reshape(-1, 3) @ A.T + c).flatten()
+        uA_exact = (aero_X.reshape(-1, 3) @ A.T + c).flatten()
+        uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+        transfer.transferDisps(uS, uA)
+        np.testing.assert_allclose(uA, uA_exact, rtol=1e-8, atol=1e-8)
+
+        # Each aerodynamic node depends only on the nodes of its patches and
+        # the weights reproduce a constant
+        mat = transfer.getInterpOperator()
+        assert mat.shape == (aero_nnodes, comm.allreduce(struct_nnodes))
+        assert mat.nnz < aero_nnodes * struct_nnodes
+        np.testing.assert_allclose(mat @ np.ones(mat.shape[1]), 1.0, rtol=1e-8)
+
+        # Set random forces
+        uS = random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+
+        dh = 1e-6
+        rtol = 1e-5
+        atol = 1e-30
+        if TransferScheme.dtype == complex:
+            dh = 1e-30
+            rtol = 1e-9
+            atol = 1e-30
+
+        fail = transfer.testAllDerivatives(uS, fA, dh, rtol, atol)
+
+        assert fail == 0
+
+        return
+
+    def test_purbf_coincident_nodes(self):
+        comm = MPI.COMM_WORLD
+        random = np.random.RandomState(1234567 + comm.rank)
+
+        # Duplicate some of the structural nodes
+        aero_nnodes = 40
+        aero_X = random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+        struct_X = random.random(3 * 150).astype(TransferScheme.dtype)
+        dups = random.choice(150, 5, replace=False)
+        struct_X = np.concatenate([struct_X, struct_X.reshape(-1, 3)[dups].flatten()])
+        struct_nnodes = 155
+
+        transfer = TransferScheme.pyPURBF(comm, comm, 0, comm, 0, 20, 1.5)
+        transfer.setAeroNodes(aero_X)
+        transfer.setStructNodes(struct_X)
+        transfer.initialize()
+
+        # The coincident nodes are merged, so a linear displacement field is
+        # still interpolated exactly
+        A = comm.bcast(random.random((3, 3)))
+        c = comm.bcast(random.random(3))
+        uS = (struct_X.reshape(-1, 3) @ A.T + c).flatten()
+        uA_exact = (aero_X.reshape(-1, 3) @ A.T + c).flatten()
+        uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+        transfer.transferDisps(uS, uA)
+        np.testing.assert_allclose(uA, uA_exact, rtol=1e-8, atol=1e-8)
+
+        # The coincident nodes share the weights of their merged node
+        if comm.size == 1:
+            mat = transfer.getInterpOperator().toarray()
+            np.testing.assert_allclose(mat[:, dups], mat[:, 150:])
+
+        uS = random.random(3 * struct_nnodes).astype(TransferScheme.dtype)
+        fA = random.random(3 * aero_nnodes).astype(TransferScheme.dtype)
+
+        dh = 1e-6
+        rtol = 1e-5
+        atol = 1e-30
+        if TransferScheme.dtype == complex:
+            dh = 1e-30
+            rtol = 1e-9
+            atol = 1e-30
+
+        fail = transfer.testAllDerivatives(uS, fA, dh, rtol, atol)
+
+        assert fail == 0
+
+        return
+
     def test_beam_transfer(self):
 
         comm = MPI.COMM_WORLD
@@ -245,6 +1128,60 @@ class TransferSchemeTest(unittest.TestCase):
 
         assert fail == 0
 
+    def test_beam_closest_element(self):
+
+        comm = MPI.COMM_WORLD
+
+        # Create a beam that folds back on itself so that the closest node is
+        # often not attached to the closest element
+        nelems = 60
+        nnodes = nelems + 1
+        nodes = np.arange(0, nelems + 1, dtype=np.intc)
+        conn = np.zeros((nelems, 2), dtype=np.intc)
+        conn[:, 0] = nodes[:-1]
+        conn[:, 1] = nodes[1:]
+
+        theta = np.linspace(0.0, 6.0 * np.pi, nnodes)
+        Xs = np.zeros((nnodes, 3))
+        Xs[:, 0] = np.cos(theta) * (1.0 + 0.1 * theta)
+        Xs[:, 1] = np.sin(theta) * (1.0 + 0.1 * theta)
+        Xs[:, 2] = 0.05 * np.sin(3.0 * theta)
+
+        dof_per_node = 6
+        transfer = TransferScheme.pyBeamTransfer(
+            comm, comm, 0, comm, 0, conn, dof_per_node
+        )
+        transfer.setNumThreads(2)
+
+        aero_nnodes = 500
+        Xa = 6.0 * np.random.random((aero_nnodes, 3)) - 3.0
+        Xa[:, 2] *= 0.1
+        transfer.setAeroNodes(Xa.flatten().astype(TransferScheme.dtype))
+        transfer.setStructNodes(Xs.flatten().astype(TransferScheme.dtype))
+        transfer.initialize()
+
+        # With translations equal to the node locations and no rotations, the
+        # aerodynamic displacements are the closest points on the beam
+        uS = np.zeros((nnodes, dof_per_node))
+        uS[:, :3] = Xs
+        uA = np.zeros(3 * aero_nnodes, dtype=TransferScheme.dtype)
+        transfer.transferDisps(uS.flatten().astype(TransferScheme.dtype), uA)
+        uA = uA.real.reshape(-1, 3)
+
+        # Find the closest points by brute force
+        X1 = Xs[conn[:, 0]]
+        d = Xs[conn[:, 1]] - X1
+        t = np.einsum("ek,aek->ae", d, Xa[:, None, :] - X1[None, :, :])
+        t = np.clip(t / np.sum(d**2, axis=1), 0.0, 1.0)
+        closest = X1[None, :, :] + t[:, :, None] * d[None, :, :]
+        dist = np.sum((Xa[:, None, :] - closest) ** 2, axis=2)
+        elems = np.argmin(dist, axis=1)
+        expected = closest[np.arange(aero_nnodes), elems]
+
+        np.testing.assert_allclose(uA, expected, rtol=1e-10, atol=1e-12)
+
+        return
+
 
 if __name__ == "__main__":
     test = TransferSchemeTest()
@@ -254,3 +1191,4 @@ if __name__ == "__main__":
     test.test_linear_meld()
     test.test_beam_transfer()
     test.test_quaternion_beam_transfer()
+    test.test_beam_closest_element()